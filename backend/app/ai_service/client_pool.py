@@ -0,0 +1,227 @@
+"""
+Process-wide registry of Gemini clients.
+
+Model objects are keyed by (model, generation config, safety settings, system
+instruction) and reused across calls so connection setup and config conversion
+happen once; the google-genai client (images, storyboards, Magic Pencil) is a
+single shared instance. With GEMINI_BACKEND=offline both are replaced by the
+local stand-ins from offline_gemini. Every pooled client tracks its own
+concurrency and latency so slow or saturated models show up in usage stats.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional
+
+import google.generativeai as genai
+
+from app.ai_service.offline_gemini import (
+    OfflineGenaiClient,
+    OfflineGenerativeModel,
+    get_offline_backend,
+    offline_enabled,
+)
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _fingerprint(value: Any) -> str:
+    """Stable digest of a JSON-like value (enum keys/values are stringified)."""
+    if isinstance(value, dict):
+        value = {str(key): val for key, val in value.items()}
+    raw = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+class ClientStats:
+    """Concurrency and latency counters for one pooled client."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_used: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "avg_latency": self.total_latency / max(self.requests, 1),
+            "max_latency": self.max_latency,
+            "last_used": self.last_used,
+        }
+
+
+class PooledClient:
+    """A reusable client plus the stats of calls made through it."""
+
+    def __init__(self, label: str, client: Any):
+        self.label = label
+        self.client = client
+        self.stats = ClientStats()
+
+    @asynccontextmanager
+    async def track(self):
+        """
+        Wrap one upstream call to record concurrency, latency and errors.
+        Cancellation (e.g. the losing half of a hedged call) is counted
+        separately and is not an error.
+        """
+        stats = self.stats
+        stats.requests += 1
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        start_time = time.time()
+        try:
+            yield self.client
+        except asyncio.CancelledError:
+            stats.cancelled += 1
+            raise
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            duration = time.time() - start_time
+            stats.in_flight -= 1
+            stats.total_latency += duration
+            stats.max_latency = max(stats.max_latency, duration)
+            stats.last_used = time.time()
+
+
+class GeminiClientRegistry:
+    """Shared, bounded cache of Gemini model objects and the google-genai client."""
+
+    def __init__(self, max_models: Optional[int] = None):
+        self.max_models = max_models or settings.GEMINI_CLIENT_POOL_SIZE
+        self._models: "OrderedDict[str, PooledClient]" = OrderedDict()
+        self._schemas: "OrderedDict[str, Any]" = OrderedDict()
+        self._genai_client: Optional[PooledClient] = None
+        self._configured = False
+        self._lock = threading.Lock()
+
+        # Performance tracking
+        self.model_hits = 0
+        self.model_misses = 0
+        self.evictions = 0
+
+    def _ensure_configured(self):
+        if not self._configured:
+            if not settings.GEMINI_API_KEY:
+                raise ValueError("GEMINI_API_KEY not found")
+            genai.configure(api_key=settings.GEMINI_API_KEY)
+            self._configured = True
+
+    def get_model(
+        self,
+        model_name: str,
+        generation_config: Optional[Dict[str, Any]] = None,
+        safety_settings: Any = None,
+        system_instruction: Optional[str] = None,
+    ) -> PooledClient:
+        """Return the pooled ``genai.GenerativeModel`` for this exact configuration."""
+        key = _fingerprint({
+            "model": model_name,
+            "config": generation_config,
+            "safety": safety_settings,
+            "system": system_instruction,
+        })
+        with self._lock:
+            pooled = self._models.get(key)
+            if pooled is not None:
+                self.model_hits += 1
+                self._models.move_to_end(key)
+                return pooled
+
+            self.model_misses += 1
+            if offline_enabled():
+                model = OfflineGenerativeModel(model_name, generation_config, get_offline_backend())
+            else:
+                self._ensure_configured()
+                model_kwargs = {
+                    "model_name": model_name,
+                    "generation_config": generation_config,
+                    "safety_settings": safety_settings,
+                }
+                if system_instruction:
+                    model_kwargs["system_instruction"] = system_instruction
+                model = genai.GenerativeModel(**model_kwargs)
+            pooled = PooledClient(f"{model_name}:{key[:8]}", model)
+            self._models[key] = pooled
+            while len(self._models) > self.max_models:
+                self._models.popitem(last=False)
+                self.evictions += 1
+            logger.debug(f"Client pool created model {pooled.label}")
+            return pooled
+
+    def get_genai_client(self) -> PooledClient:
+        """Return the shared google-genai client (one HTTP connection pool per process)."""
+        if self._genai_client is None:
+            with self._lock:
+                if self._genai_client is None and offline_enabled():
+                    self._genai_client = PooledClient("google-genai", OfflineGenaiClient(get_offline_backend()))
+                if self._genai_client is None:
+                    from google import genai as google_genai
+
+                    if not settings.GEMINI_API_KEY:
+                        raise ValueError("GEMINI_API_KEY not found")
+                    self._genai_client = PooledClient(
+                        "google-genai", google_genai.Client(api_key=settings.GEMINI_API_KEY)
+                    )
+                    logger.info("Client pool initialized shared google-genai client")
+        return self._genai_client
+
+    def sanitize_schema(self, schema: Any, sanitizer: Callable[[Any], Any]) -> Any:
+        """Memoize a schema transformation (the result is shared; treat it as read-only)."""
+        key = f"{getattr(sanitizer, '__qualname__', repr(sanitizer))}:{_fingerprint(schema)}"
+        with self._lock:
+            cached = self._schemas.get(key)
+            if cached is not None:
+                self._schemas.move_to_end(key)
+                return cached
+        sanitized = sanitizer(schema)
+        with self._lock:
+            self._schemas[key] = sanitized
+            while len(self._schemas) > self.max_models:
+                self._schemas.popitem(last=False)
+        return sanitized
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool usage plus per-client concurrency/latency stats."""
+        clients = {pooled.label: pooled.stats.to_dict() for pooled in self._models.values()}
+        if self._genai_client is not None:
+            clients[self._genai_client.label] = self._genai_client.stats.to_dict()
+        return {
+            "models_cached": len(self._models),
+            "max_models": self.max_models,
+            "model_hits": self.model_hits,
+            "model_misses": self.model_misses,
+            "evictions": self.evictions,
+            "schemas_cached": len(self._schemas),
+            "clients": clients,
+            "offline": get_offline_backend().get_stats() if offline_enabled() else None,
+        }
+
+
+# Global registry instance (lazy-loaded)
+_client_registry: Optional[GeminiClientRegistry] = None
+
+
+def get_client_registry() -> GeminiClientRegistry:
+    """Get or create the process-wide client registry."""
+    global _client_registry
+    if _client_registry is None:
+        _client_registry = GeminiClientRegistry()
+    return _client_registry
@@ -0,0 +1,139 @@
+"""
+Concurrent hero image generation on the async google-genai API.
+Bounds in-flight image calls process-wide so parallel workflows share one budget.
+"""
+import asyncio
+import logging
+from contextlib import nullcontext
+from typing import Optional
+
+from app.ai_service.client_pool import get_client_registry
+from app.ai_service.rate_limiter import Priority, RateLimitTimeoutError, get_rate_limiter
+from app.ai_service.resilience import get_circuit_breaker
+from app.core.config import settings
+from app.core.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class ImageGenerationError(Exception):
+    """Image generation failed or timed out."""
+    pass
+
+
+def _is_quota_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return "429" in message or "quota" in message or "resource_exhausted" in message or "rate limit" in message
+
+
+class ImageGenerationEngine:
+    """Shared async image client with a global concurrency limit."""
+
+    def __init__(self, concurrency: Optional[int] = None):
+        self.model = settings.GEMINI_IMAGE_MODEL
+        self.concurrency = max(1, concurrency or settings.IMAGE_GENERATION_CONCURRENCY)
+        self.timeout = settings.IMAGE_GENERATION_TIMEOUT
+        self._client = None
+        self._pooled = None
+        self._semaphores = {}
+
+        # Performance tracking
+        self.in_flight = 0
+        self.request_count = 0
+        self.error_count = 0
+
+    @property
+    def client(self):
+        if self._client is None:
+            # Shared process-wide client: connections are reused across images
+            self._pooled = get_client_registry().get_genai_client()
+            self._client = self._pooled.client
+        return self._client
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Semaphores bind to the loop they are first awaited on
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            self._semaphores = {loop: asyncio.Semaphore(self.concurrency)}
+            semaphore = self._semaphores[loop]
+        return semaphore
+
+    async def generate_image(
+        self, prompt: str, label: str = "image", priority: Priority = Priority.STANDARD
+    ) -> Optional[bytes]:
+        """
+        Generate one image and return its raw bytes, or None if the model
+        answered without an image part. Each call first takes a token from the
+        shared image budget, so hero images are admitted ahead of background work.
+        """
+        with span("gemini.image", model=self.model, label=label, priority=priority.name):
+            return await self._generate_image(prompt, label, priority)
+
+    async def _generate_image(self, prompt: str, label: str, priority: Priority) -> Optional[bytes]:
+        breaker = get_circuit_breaker(self.model)
+        if not breaker.allow_request():
+            # Fail fast: callers fall back to placeholders while the model is degraded
+            raise ImageGenerationError(f"Circuit open for {self.model}, skipping {label}")
+
+        limiter = get_rate_limiter("image") if settings.GEMINI_RATE_LIMIT_ENABLED else None
+        if limiter:
+            try:
+                await limiter.acquire(priority)
+            except RateLimitTimeoutError as e:
+                self.error_count += 1
+                raise ImageGenerationError(f"Image generation not admitted for {label}: {str(e)}") from e
+
+        async with self._get_semaphore():
+            self.in_flight += 1
+            self.request_count += 1
+            try:
+                logger.info(f"IMG: Calling {self.model} for {label} ({self.in_flight}/{self.concurrency} in flight)")
+                client = self.client
+                async with self._pooled.track() if self._pooled else nullcontext():
+                    response = await asyncio.wait_for(
+                        client.aio.models.generate_content(model=self.model, contents=[prompt]),
+                        timeout=self.timeout
+                    )
+            except asyncio.TimeoutError:
+                self.error_count += 1
+                breaker.record_failure()
+                raise ImageGenerationError(f"Image generation timed out after {self.timeout}s for {label}")
+            except Exception as e:
+                self.error_count += 1
+                if limiter and _is_quota_error(e):
+                    await limiter.record_throttle()
+                else:
+                    breaker.record_failure()
+                raise ImageGenerationError(f"Image generation failed for {label}: {str(e)}") from e
+            finally:
+                self.in_flight -= 1
+
+        breaker.record_success()
+        if limiter:
+            await limiter.record_success()
+        return self._extract_image_bytes(response)
+
+    @staticmethod
+    def _extract_image_bytes(response) -> Optional[bytes]:
+        """Return the first inline image payload from a generate_content response."""
+        for candidate in getattr(response, "candidates", None) or []:
+            content = getattr(candidate, "content", None)
+            for part in getattr(content, "parts", None) or []:
+                inline_data = getattr(part, "inline_data", None)
+                if inline_data is not None and inline_data.data:
+                    return inline_data.data
+                if getattr(part, "text", None):
+                    logger.info(f"IMG: Gemini text response: {part.text[:200]}...")
+        return None
+
+
+_image_engine: Optional[ImageGenerationEngine] = None
+
+
+def get_image_engine() -> ImageGenerationEngine:
+    """Get or create the global image generation engine."""
+    global _image_engine
+    if _image_engine is None:
+        _image_engine = ImageGenerationEngine()
+    return _image_engine
@@ -0,0 +1,147 @@
+"""
+Incremental parsing of streamed JSON responses.
+
+Structured Gemini responses arrive in arbitrary text chunks when streamed.
+``JSONArrayStreamParser`` scans those chunks once, character by character, and
+returns each element of one array (e.g. ``viable_options``) as soon as that
+element closes, so callers can publish it before the rest of the response has
+been generated. The full response is still parsed normally at the end; this
+parser only surfaces early results.
+"""
+import json
+import logging
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JSONArrayStreamParser:
+    """
+    Emits completed elements of ``array_key`` (a key of the root object), or of
+    the root array itself when ``array_key`` is None. Anything outside the JSON
+    document (markdown fences, stray text) is ignored.
+    """
+
+    def __init__(self, array_key: Optional[str] = None):
+        self.array_key = array_key
+        self.emitted = 0
+        self.done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_chars: List[str] = []
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._array_depth: Optional[int] = None  # depth inside the target array
+        self._capture: Optional[List[str]] = None
+        self._capture_is_container = False
+
+    @property
+    def _in_target(self) -> bool:
+        return self._array_depth is not None and self._depth == self._array_depth
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume a chunk; returns the array elements completed by it."""
+        items: List[Any] = []
+        for char in chunk:
+            self._consume(char, items)
+        return items
+
+    def _start_capture(self, char: str, container: bool):
+        self._capture = [char]
+        self._capture_is_container = container
+
+    def _emit(self, items: List[Any]):
+        raw = "".join(self._capture).strip()
+        self._capture = None
+        try:
+            items.append(json.loads(raw))
+            self.emitted += 1
+        except json.JSONDecodeError:
+            # The final full parse is authoritative; a bad element is just not streamed early
+            logger.debug(f"Skipping unparseable streamed element: {raw[:80]}")
+
+    def _consume(self, char: str, items: List[Any]):
+        if self._in_string:
+            if self._capture is not None:
+                self._capture.append(char)
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if self._capture is None and self._depth == 1:
+                    try:
+                        self._last_string = json.loads('"' + "".join(self._key_chars) + '"')
+                    except json.JSONDecodeError:
+                        self._last_string = None
+                return
+            if self._capture is None and self._depth == 1:
+                self._key_chars.append(char)
+            return
+
+        if self.done and self._capture is None:
+            return
+
+        if char == '"':
+            self._in_string = True
+            if self._capture is not None:
+                self._capture.append(char)
+            elif self._in_target:
+                self._start_capture(char, container=False)
+            elif self._depth == 1:
+                self._key_chars = []
+            return
+
+        if char in "{[":
+            entering_target = (
+                char == "["
+                and self._array_depth is None
+                and self._capture is None
+                and (
+                    (self.array_key is None and self._depth == 0)
+                    or (self.array_key is not None and self._depth == 1 and self._current_key == self.array_key)
+                )
+            )
+            if self._capture is not None:
+                self._capture.append(char)
+            elif self._in_target:
+                self._start_capture(char, container=True)
+            self._depth += 1
+            if entering_target:
+                self._array_depth = self._depth
+            return
+
+        if char in "}]":
+            if self._in_target:
+                # Closing the target array itself
+                if self._capture is not None:
+                    self._emit(items)
+                self._array_depth = None
+                self.done = True
+                self._depth -= 1
+                return
+            self._depth -= 1
+            if self._capture is not None:
+                self._capture.append(char)
+                if self._capture_is_container and self._in_target:
+                    self._emit(items)
+            return
+
+        if char == ",":
+            if self._capture is not None:
+                if self._in_target:
+                    self._emit(items)
+                else:
+                    self._capture.append(char)
+            return
+
+        if char == ":" and self._depth == 1 and self._capture is None:
+            self._current_key = self._last_string
+            return
+
+        if self._capture is not None:
+            self._capture.append(char)
+        elif self._in_target and not char.isspace():
+            self._start_capture(char, container=False)
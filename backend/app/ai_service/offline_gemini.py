@@ -0,0 +1,266 @@
+"""
+Offline stand-in for the Gemini text and image models.
+
+With GEMINI_BACKEND=offline the client registry hands out these objects in place
+of google-generativeai models and the google-genai client, so every caller
+(structured workflow calls, streaming, chat, hero images) runs unchanged with
+no network or quota. Text responses are synthesized from the request's
+``response_schema``, image models return a small PNG, and every call waits for
+a latency drawn from the selected profile and fails at the configured 429 and
+error rates. Meant for benchmarking the workflow end to end on one machine.
+"""
+import asyncio
+import base64
+import json
+import logging
+import random
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from google.api_core import exceptions as google_exceptions
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 8x8 grey PNG returned by image models
+PLACEHOLDER_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAgAAAAICAIAAABLbSncAAAAD0lEQVR42mNowAEYhpYEAILzYAEllbNjAAAAAElFTkSuQmCC"
+)
+
+DEFAULT_ARRAY_ITEMS = 3
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    """
+    Latency model for one kind of call: a log-normal time to first token plus
+    generation time at ``tokens_per_second`` (0 means output is instantaneous).
+    """
+    median: float
+    sigma: float
+    tokens_per_second: float = 0.0
+
+    def first_token_delay(self, rng: random.Random) -> float:
+        if self.median <= 0:
+            return 0.0
+        return self.median * rng.lognormvariate(0.0, self.sigma)
+
+    def generation_time(self, tokens: int) -> float:
+        return tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+
+# Named profiles selectable with GEMINI_OFFLINE_PROFILE: (text, image)
+LATENCY_PROFILES: Dict[str, Dict[str, LatencyProfile]] = {
+    "instant": {"text": LatencyProfile(0.0, 0.0), "image": LatencyProfile(0.0, 0.0)},
+    "fast": {"text": LatencyProfile(0.2, 0.3, 800.0), "image": LatencyProfile(1.0, 0.3)},
+    "realistic": {"text": LatencyProfile(1.2, 0.5, 150.0), "image": LatencyProfile(8.0, 0.4)},
+    "degraded": {"text": LatencyProfile(4.0, 0.9, 60.0), "image": LatencyProfile(20.0, 0.6)},
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Same rough 4-characters-per-token estimate the production client uses."""
+    return len(text) // 4
+
+
+def synthesize_from_schema(schema: Any, words: int, name: str = "value", index: int = 1) -> Any:
+    """Build a value that satisfies a (Gemini-style) JSON schema."""
+    if not isinstance(schema, dict):
+        return None
+    if schema.get("enum"):
+        return schema["enum"][0]
+
+    schema_type = str(schema.get("type", "object")).lower()
+    if schema_type == "object":
+        return {
+            key: synthesize_from_schema(value, words, key, index)
+            for key, value in (schema.get("properties") or {}).items()
+        }
+    if schema_type == "array":
+        count = DEFAULT_ARRAY_ITEMS
+        count = max(count, int(schema.get("min_items", schema.get("minItems", 0))))
+        count = min(count, int(schema.get("max_items", schema.get("maxItems", count))))
+        item_name = name[:-1] if name.endswith("s") else name
+        return [
+            synthesize_from_schema(schema.get("items", {}), words, item_name, position + 1)
+            for position in range(count)
+        ]
+    if schema_type == "integer":
+        return index
+    if schema_type == "number":
+        # High enough to pass confidence and score thresholds downstream
+        return 0.9
+    if schema_type == "boolean":
+        return False
+    if name.endswith("_id"):
+        return f"{name[:-3]}_{index}"
+    filler = " ".join(["offline"] * max(words - 2, 0))
+    return f"{name.replace('_', ' ')} {index} {filler}".strip()
+
+
+class OfflineStats:
+    """Calls served by the stand-in, by outcome."""
+
+    def __init__(self):
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {"requests": self.requests, "throttled": self.throttled, "errors": self.errors}
+
+
+class OfflineBackend:
+    """Shared latency sampling, fault injection and stats for all offline clients."""
+
+    def __init__(
+        self,
+        profile: Optional[str] = None,
+        throttle_rate: Optional[float] = None,
+        error_rate: Optional[float] = None,
+        seed: Optional[int] = None,
+        text_words: Optional[int] = None,
+    ):
+        profile = profile or settings.GEMINI_OFFLINE_PROFILE
+        if profile not in LATENCY_PROFILES:
+            raise ValueError(f"Unknown offline Gemini profile '{profile}' (expected one of {sorted(LATENCY_PROFILES)})")
+        self.profile = profile
+        self.latency = LATENCY_PROFILES[profile]
+        self.throttle_rate = settings.GEMINI_OFFLINE_THROTTLE_RATE if throttle_rate is None else throttle_rate
+        self.error_rate = settings.GEMINI_OFFLINE_ERROR_RATE if error_rate is None else error_rate
+        self.text_words = settings.GEMINI_OFFLINE_TEXT_WORDS if text_words is None else text_words
+        self.rng = random.Random(settings.GEMINI_OFFLINE_SEED if seed is None else seed)
+        self.stats = OfflineStats()
+
+    async def begin(self, kind: str) -> LatencyProfile:
+        """Wait for the first token, raising injected 429s and server errors on the way."""
+        self.stats.requests += 1
+        profile = self.latency[kind]
+        delay = profile.first_token_delay(self.rng)
+        roll = self.rng.random()
+        if roll < self.throttle_rate:
+            # Quota rejections come back quickly
+            self.stats.throttled += 1
+            await asyncio.sleep(delay * 0.1)
+            raise google_exceptions.ResourceExhausted("Resource has been exhausted (e.g. check quota).")
+        await asyncio.sleep(delay)
+        if roll < self.throttle_rate + self.error_rate:
+            self.stats.errors += 1
+            raise google_exceptions.ServiceUnavailable("The model is overloaded. Please try again later.")
+        return profile
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"profile": self.profile, **self.stats.to_dict()}
+
+
+class OfflineTextResponse:
+    """Mimics a generate_content response: ``.text``, ``usage_metadata`` and async chunk iteration."""
+
+    def __init__(self, text: str, prompt_tokens: int, chunks: Optional[List[str]] = None, chunk_delay: float = 0.0):
+        self.text = text
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=estimate_tokens(text),
+            total_token_count=prompt_tokens + estimate_tokens(text),
+        )
+        self.safety_ratings = []
+        self.candidates = [SimpleNamespace(content=SimpleNamespace(parts=[SimpleNamespace(text=text, inline_data=None)]))]
+        self._chunks = chunks or []
+        self._chunk_delay = chunk_delay
+
+    async def __aiter__(self):
+        for chunk in self._chunks:
+            await asyncio.sleep(self._chunk_delay)
+            yield SimpleNamespace(text=chunk)
+
+
+def _prompt_text(contents: Any) -> str:
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, (list, tuple)):
+        return " ".join(item for item in contents if isinstance(item, str))
+    return str(contents)
+
+
+class OfflineGenerativeModel:
+    """Stand-in for ``genai.GenerativeModel`` answering with schema-valid synthetic JSON."""
+
+    def __init__(self, model_name: str, generation_config: Optional[Dict[str, Any]], backend: "OfflineBackend"):
+        self.model_name = model_name
+        self.generation_config = generation_config or {}
+        self.backend = backend
+
+    def _render(self) -> str:
+        words = self.backend.text_words
+        schema = self.generation_config.get("response_schema")
+        if schema is not None or self.generation_config.get("response_mime_type") == "application/json":
+            return json.dumps(synthesize_from_schema(schema, words) or {})
+        return " ".join(["Offline response"] + ["offline"] * words)
+
+    async def generate_content_async(self, contents: Any, stream: bool = False, **kwargs) -> OfflineTextResponse:
+        profile = await self.backend.begin("text")
+        text = self._render()
+        prompt_tokens = estimate_tokens(_prompt_text(contents))
+        generation_time = profile.generation_time(estimate_tokens(text))
+        if not stream:
+            await asyncio.sleep(generation_time)
+            return OfflineTextResponse(text, prompt_tokens)
+        chunk_size = max(len(text) // 8, 1)
+        chunks = [text[start:start + chunk_size] for start in range(0, len(text), chunk_size)]
+        return OfflineTextResponse(text, prompt_tokens, chunks, generation_time / len(chunks))
+
+    def start_chat(self, history: Optional[List[Any]] = None) -> "OfflineChatSession":
+        return OfflineChatSession(self, history or [])
+
+
+class OfflineChatSession:
+    """Stand-in for ``ChatSession``; history is kept but does not shape the answer."""
+
+    def __init__(self, model: OfflineGenerativeModel, history: List[Any]):
+        self.model = model
+        self.history = list(history)
+
+    async def send_message_async(self, content: Any, stream: bool = False, **kwargs) -> OfflineTextResponse:
+        self.history.append(content)
+        return await self.model.generate_content_async(content, stream=stream)
+
+
+class _OfflineModels:
+    def __init__(self, backend: OfflineBackend):
+        self.backend = backend
+
+    async def generate_content(self, model: str, contents: Any, config: Any = None, **kwargs):
+        if "image" not in model:
+            return await OfflineGenerativeModel(model, {}, self.backend).generate_content_async(contents)
+        await self.backend.begin("image")
+        part = SimpleNamespace(text=None, inline_data=SimpleNamespace(data=PLACEHOLDER_PNG, mime_type="image/png"))
+        return SimpleNamespace(
+            text=None,
+            candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))],
+            usage_metadata=SimpleNamespace(prompt_token_count=estimate_tokens(_prompt_text(contents))),
+        )
+
+
+class OfflineGenaiClient:
+    """Stand-in for ``google.genai.Client`` (only the async ``aio.models`` surface is used)."""
+
+    def __init__(self, backend: OfflineBackend):
+        self.aio = SimpleNamespace(models=_OfflineModels(backend))
+
+
+_offline_backend: Optional[OfflineBackend] = None
+
+
+def offline_enabled() -> bool:
+    return settings.GEMINI_BACKEND == "offline"
+
+
+def get_offline_backend() -> OfflineBackend:
+    """Get or create the process-wide offline backend."""
+    global _offline_backend
+    if _offline_backend is None:
+        _offline_backend = OfflineBackend()
+        logger.warning(f"Gemini OFFLINE stand-in active (profile: {_offline_backend.profile}) - no real API calls")
+    return _offline_backend
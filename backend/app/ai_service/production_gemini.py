@@ -2,17 +2,25 @@
 Production-ready Gemini AI service with monitoring, error handling, and cost optimization.
 Replaces development gemini integration with production features.
 """
+import copy
 import json
 import time
 import asyncio
+import hashlib
 import logging
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Union
 from contextlib import asynccontextmanager
 
 import google.generativeai as genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 
+from app.ai_service.client_pool import get_client_registry
+from app.ai_service.json_stream import JSONArrayStreamParser
+from app.ai_service.offline_gemini import offline_enabled
+from app.ai_service.rate_limiter import RateLimitTimeoutError, get_rate_limiter, priority_for_task
+from app.ai_service.resilience import get_circuit_breaker, get_circuit_stats, hedged_call, latency_tracker
 from app.core.config import settings
+from app.core.tracing import span
 try:
     from app.core.metrics import metrics, track_gemini_metrics
     METRICS_AVAILABLE = True
@@ -22,10 +30,13 @@ except ImportError:
         def decorator(func):
             return func
         return decorator
-from app.core.redis import redis_service
+from app.core.redis import async_redis_service as redis_service
 
 logger = logging.getLogger(__name__)
 
+# Receives (index, element) for each streamed array element
+StreamItemCallback = Callable[[int, Any], Awaitable[None]]
+
 
 class ProductionGeminiError(Exception):
     """Production Gemini service errors."""
@@ -46,10 +57,11 @@ class ProductionGeminiClient:
     """Production-ready Gemini client with monitoring and optimization."""
 
     def __init__(self):
-        if not settings.GEMINI_API_KEY:
+        if not settings.GEMINI_API_KEY and not offline_enabled():
             raise ValueError("GEMINI_API_KEY is required for production")
 
-        genai.configure(api_key=settings.GEMINI_API_KEY)
+        if settings.GEMINI_API_KEY:
+            genai.configure(api_key=settings.GEMINI_API_KEY)
 
         # Model configuration
         self.pro_model = settings.GEMINI_MODEL
@@ -69,6 +81,15 @@ class ProductionGeminiClient:
         self.error_count = 0
         self.total_tokens = 0
 
+        # Response cache tracking
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_coalesced = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        # Tail-latency hedging
+        self.hedged_requests = 0
+
         logger.info(f"Production Gemini client initialized - Pro: {self.pro_model}, Flash: {self.flash_model}, Safety: DISABLED")
 
 
@@ -119,13 +140,14 @@ class ProductionGeminiClient:
         return timeout_map.get(task_type, 45.0)
 
     @asynccontextmanager
-    async def _request_context(self, operation: str):
-        """Context manager for request tracking and error handling."""
+    async def _request_context(self, operation: str, **span_attributes):
+        """Context manager for request tracking and error handling (one trace span per attempt)."""
         start_time = time.time()
         self.request_count += 1
 
         try:
-            yield
+            with span("gemini.generate", operation=operation, **span_attributes):
+                yield
         except Exception as e:
             self.error_count += 1
             duration = time.time() - start_time
@@ -159,7 +181,9 @@ class ProductionGeminiClient:
         prompt: str,
         task_type: str = "default",
         response_schema: Optional[Dict[str, Any]] = None,
-        max_retries: int = None
+        max_retries: int = None,
+        stream_key: Optional[str] = None,
+        on_item: Optional[StreamItemCallback] = None
     ) -> Dict[str, Any]:
         """
         Production-ready Gemini API call with retries, monitoring, and optimization.
@@ -169,12 +193,62 @@ class ProductionGeminiClient:
             task_type: Type of task for optimization (extraction, creative, analysis)
             response_schema: Optional JSON schema for structured output
             max_retries: Override default retry count
+            stream_key: Top-level array in the structured response to stream
+            on_item: Called with (index, element) as each ``stream_key`` element completes
 
         Returns:
             Dict containing the response and metadata
         """
         max_retries = max_retries or settings.GEMINI_MAX_RETRIES
-        
+        prompt, model_name, generation_config = self._prepare_request(prompt, task_type, response_schema)
+        self.current_model = model_name
+        stream = (stream_key, on_item) if stream_key and on_item and response_schema else None
+
+        if not settings.GEMINI_CACHE_ENABLED:
+            return await self._call_with_retries(
+                prompt, task_type, model_name, generation_config, response_schema, max_retries, stream
+            )
+
+        cache_key = self._build_cache_key(task_type, model_name, generation_config, prompt)
+
+        cached = await self._read_cache(cache_key)
+        if cached is not None:
+            self.cache_hits += 1
+            self._record_cache_event("hit")
+            cached.setdefault("_metadata", {})["cache_hit"] = True
+            logger.info(f"Gemini cache HIT for {task_type}")
+            await self._replay_items(cached, stream)
+            return cached
+
+        # Single-flight: identical concurrent calls share one upstream request
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None and inflight.get_loop() is asyncio.get_running_loop():
+            self.cache_coalesced += 1
+            self._record_cache_event("coalesced")
+            logger.info(f"Gemini call coalesced with in-flight {task_type} request")
+            result = copy.deepcopy(await asyncio.shield(inflight))
+            await self._replay_items(result, stream)
+            return result
+
+        self.cache_misses += 1
+        self._record_cache_event("miss")
+        task = asyncio.ensure_future(
+            self._call_and_cache(
+                cache_key, prompt, task_type, model_name, generation_config, response_schema, max_retries, stream
+            )
+        )
+        self._inflight[cache_key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        # Shield so a cancelled caller does not abort the request for coalesced waiters
+        return copy.deepcopy(await asyncio.shield(task))
+
+    def _prepare_request(
+        self,
+        prompt: str,
+        task_type: str,
+        response_schema: Optional[Dict[str, Any]]
+    ) -> tuple:
+        """Resolve the final prompt, model and generation config for a call."""
         # Add explicit JSON formatting instruction if schema provided
         if response_schema:
             prompt = f"""{prompt}
@@ -187,11 +261,9 @@ IMPORTANT: Respond with ONLY valid JSON matching the required schema. Do not inc
         else:
             model_name = self.pro_model
 
-        self.current_model = model_name
-
         # Get optimized generation config
         generation_config = self._get_generation_config(task_type)
-        
+
         # IMPORTANT: Add schema to config BEFORE creating model
         if response_schema:
             generation_config.update({
@@ -199,27 +271,99 @@ IMPORTANT: Respond with ONLY valid JSON matching the required schema. Do not inc
                 "response_schema": response_schema
             })
 
+        return prompt, model_name, generation_config
+
+    async def _call_and_cache(
+        self,
+        cache_key: str,
+        prompt: str,
+        task_type: str,
+        model_name: str,
+        generation_config: Dict[str, Any],
+        response_schema: Optional[Dict[str, Any]],
+        max_retries: int,
+        stream: Optional[tuple] = None
+    ) -> Dict[str, Any]:
+        """Run the upstream call and cache the result if it succeeded."""
+        result = await self._call_with_retries(
+            prompt, task_type, model_name, generation_config, response_schema, max_retries, stream
+        )
+        if result and not result.get("error"):
+            await self._cache_response(cache_key, result)
+        return result
+
+    async def _call_with_retries(
+        self,
+        prompt: str,
+        task_type: str,
+        model_name: str,
+        generation_config: Dict[str, Any],
+        response_schema: Optional[Dict[str, Any]],
+        max_retries: int,
+        stream: Optional[tuple] = None
+    ) -> Dict[str, Any]:
+        """
+        Call Gemini with retries and exponential backoff (no caching).
+        ``stream`` is a (stream_key, on_item) pair: the response is streamed and
+        each completed element of that array is handed to on_item immediately.
+        """
+        # Shared admission control: every attempt (including retries) needs a token
+        limiter = get_rate_limiter("text") if settings.GEMINI_RATE_LIMIT_ENABLED else None
+        priority = priority_for_task(task_type)
+        breaker = get_circuit_breaker(model_name)
         for attempt in range(max_retries):
+            # Fail fast into the caller's fallback while the model is degraded
+            if not breaker.allow_request():
+                return {"error": f"Circuit open for {model_name}, skipping Gemini call"}
             try:
-                async with self._request_context(f"call_gemini_retry_attempt_{attempt + 1}"):
-                    # Create model with schema-enabled config
-                    model = genai.GenerativeModel(
-                        model_name=model_name,
-                        generation_config=generation_config,
-                        safety_settings=self.safety_settings,
+                if limiter:
+                    await limiter.acquire(priority)
+                async with self._request_context(
+                    f"call_gemini_retry_attempt_{attempt + 1}",
+                    task_type=task_type, model=model_name, attempt=attempt + 1, streamed=bool(stream),
+                ):
+                    # Reuse the pooled model for this schema-enabled config
+                    pooled = get_client_registry().get_model(
+                        model_name,
+                        generation_config,
+                        self.safety_settings,
                     )
 
+                    async def upstream_call():
+                        async with pooled.track() as model:
+                            if stream:
+                                return await self._consume_stream(model, prompt, *stream)
+                            return await model.generate_content_async(prompt, stream=False)
+
+                    async def hedge_call():
+                        # The hedge is a real request: it needs its own token
+                        if limiter:
+                            await limiter.acquire(priority)
+                        return await upstream_call()
+
                     # Use asyncio.wait_for to ensure proper cleanup
                     # Get task-specific timeout
                     task_timeout = self._get_timeout_for_task(task_type)
+                    call_started = time.time()
                     try:
                         response = await asyncio.wait_for(
-                            model.generate_content_async(prompt, stream=False),
+                            hedged_call(
+                                upstream_call,
+                                # A hedge would emit every streamed element twice
+                                None if stream else self._hedge_delay(task_type),
+                                hedge=hedge_call,
+                                on_hedge=lambda: self._record_hedge(task_type),
+                            ),
                             timeout=task_timeout
                         )
                     except asyncio.TimeoutError:
                         raise ProductionGeminiError(f"Gemini API timeout on attempt {attempt + 1} (timeout: {task_timeout}s)")
 
+                    latency_tracker.record(task_type, time.time() - call_started)
+                    breaker.record_success()
+                    if limiter:
+                        await limiter.record_success()
+
                     # Process response
                     if response.text:
                         try:
@@ -241,9 +385,9 @@ IMPORTANT: Respond with ONLY valid JSON matching the required schema. Do not inc
                             # Track token usage
                             estimated_tokens = result["_metadata"]["tokens_estimated"]
                             self.total_tokens += estimated_tokens
-
-                            # Cache successful responses for similar prompts
-                            await self._cache_response(prompt, result, task_type)
+                            self._record_request_metrics(
+                                task_type, model_name, response, attempt + 1, time.time() - call_started
+                            )
 
                             return result
 
@@ -272,7 +416,9 @@ IMPORTANT: Respond with ONLY valid JSON matching the required schema. Do not inc
                                 }
                                 
                                 self.total_tokens += result["_metadata"]["tokens_estimated"]
-                                await self._cache_response(prompt, result, task_type)
+                                self._record_request_metrics(
+                                    task_type, model_name, response, attempt + 1, time.time() - call_started
+                                )
                                 return result
                                 
                             except json.JSONDecodeError:
@@ -291,11 +437,19 @@ IMPORTANT: Respond with ONLY valid JSON matching the required schema. Do not inc
                             continue
 
             except QuotaExceededError as e:
+                if limiter:
+                    # Cut the shared rate (AIMD); the limiter paces the retry
+                    await limiter.record_throttle()
+                if not limiter or attempt == max_retries - 1:
+                    return {"error": str(e)}
+                logger.warning(f"Quota exceeded on attempt {attempt + 1}, retrying at reduced rate")
+            except RateLimitTimeoutError as e:
                 return {"error": str(e)}
             except SafetyError as e:
                 logger.error("Unexpected safety error with disabled filters")
                 return {"error": str(e)}
             except Exception as e:
+                breaker.record_failure()
                 if attempt == max_retries - 1:
                     return {"error": f"Max retries exceeded: {str(e)}"}
                 else:
@@ -304,31 +458,104 @@ IMPORTANT: Respond with ONLY valid JSON matching the required schema. Do not inc
                     logger.warning(f"Attempt {attempt + 1} failed, retrying in {delay:.1f}s: {str(e)}")
                     await asyncio.sleep(delay)
 
-    async def _cache_response(self, prompt: str, response: Dict[str, Any], task_type: str):
-        """Cache successful responses for performance optimization."""
+    async def _consume_stream(self, model, prompt: str, stream_key: str, on_item: StreamItemCallback):
+        """Stream a structured response, emitting ``stream_key`` elements as they close."""
+        parser = JSONArrayStreamParser(stream_key)
+        response = await model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks carrying only a finish reason have no text part
+                continue
+            items = parser.feed(text)
+            # One chunk can close several elements; number them from the first it closed
+            for index, item in enumerate(items, parser.emitted - len(items)):
+                await self._emit_item(on_item, index, item)
+        # The completed stream exposes the aggregated .text like a non-streamed response
+        return response
+
+    async def _replay_items(self, result: Dict[str, Any], stream: Optional[tuple]):
+        """Give streaming callers the same per-element callbacks for cached/coalesced results."""
+        if not stream or not result or result.get("error"):
+            return
+        stream_key, on_item = stream
+        for index, item in enumerate(result.get(stream_key) or []):
+            await self._emit_item(on_item, index, item)
+
+    @staticmethod
+    async def _emit_item(on_item: StreamItemCallback, index: int, item: Any):
         try:
-            # Create cache key
-            import hashlib
-            prompt_hash = hashlib.md5(prompt.encode()).hexdigest()
-            cache_key = f"gemini_cache:{task_type}:{prompt_hash}"
+            await on_item(index, item)
+        except Exception as e:
+            logger.warning(f"Stream item callback failed: {str(e)}")
+
+    def _hedge_delay(self, task_type: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None if hedging is off / p95 unknown."""
+        if not settings.GEMINI_HEDGE_ENABLED:
+            return None
+        p95 = latency_tracker.percentile(task_type)
+        if p95 is None:
+            return None
+        return max(settings.GEMINI_HEDGE_MIN_DELAY, p95)
+
+    @staticmethod
+    def _record_request_metrics(task_type: str, model_name: str, response, attempts: int, duration: float):
+        """Record latency, attempts and token usage (reported, else estimated) by task type."""
+        if not METRICS_AVAILABLE:
+            return
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", None)
+        completion_tokens = getattr(usage, "candidates_token_count", None)
+        if not isinstance(prompt_tokens, int):
+            prompt_tokens = None
+        if not isinstance(completion_tokens, int):
+            completion_tokens = len(response.text) // 4
+        metrics.record_gemini_request(task_type, model_name, duration, attempts, prompt_tokens, completion_tokens)
+
+    def _record_hedge(self, task_type: str):
+        self.hedged_requests += 1
+        logger.info(f"Hedging slow {task_type} Gemini call")
+        if METRICS_AVAILABLE:
+            metrics.record_hedged_request(task_type)
+
+    def _build_cache_key(
+        self,
+        task_type: str,
+        model_name: str,
+        generation_config: Dict[str, Any],
+        prompt: str
+    ) -> str:
+        """Build a cache key from model, generation config and whitespace-normalized prompt."""
+        normalized_prompt = " ".join(prompt.split())
+        fingerprint = json.dumps(
+            {"model": model_name, "config": generation_config, "prompt": normalized_prompt},
+            sort_keys=True,
+            default=str
+        )
+        prompt_hash = hashlib.md5(fingerprint.encode()).hexdigest()
+        return f"gemini_cache:{task_type}:{prompt_hash}"
+
+    def _record_cache_event(self, result: str):
+        """Record a cache hit/miss/coalesced event in Prometheus if available."""
+        if METRICS_AVAILABLE:
+            metrics.record_gemini_cache(result)
 
-            # Store for 1 hour
-            redis_service.setex(
+    async def _cache_response(self, cache_key: str, response: Dict[str, Any]):
+        """Cache successful responses for performance optimization."""
+        try:
+            await redis_service.setex(
                 cache_key,
-                3600,
+                settings.GEMINI_CACHE_TTL,
                 json.dumps(response, default=str)
             )
         except Exception as e:
             logger.warning(f"Failed to cache response: {str(e)}")
 
-    async def get_cached_response(self, prompt: str, task_type: str) -> Optional[Dict[str, Any]]:
-        """Get cached response if available."""
+    async def _read_cache(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Read a cached response by key."""
         try:
-            import hashlib
-            prompt_hash = hashlib.md5(prompt.encode()).hexdigest()
-            cache_key = f"gemini_cache:{task_type}:{prompt_hash}"
-
-            cached = redis_service.get(cache_key)
+            cached = await redis_service.get(cache_key)
             if cached:
                 return json.loads(cached)
         except Exception as e:
@@ -336,6 +563,17 @@ IMPORTANT: Respond with ONLY valid JSON matching the required schema. Do not inc
 
         return None
 
+    async def get_cached_response(
+        self,
+        prompt: str,
+        task_type: str,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Get cached response if available."""
+        prompt, model_name, generation_config = self._prepare_request(prompt, task_type, response_schema)
+        cache_key = self._build_cache_key(task_type, model_name, generation_config, prompt)
+        return await self._read_cache(cache_key)
+
     def get_usage_stats(self) -> Dict[str, Any]:
         """Get usage statistics for monitoring."""
         return {
@@ -345,7 +583,22 @@ IMPORTANT: Respond with ONLY valid JSON matching the required schema. Do not inc
             "estimated_tokens": self.total_tokens,
             "current_model": self.current_model,
             "pro_model": self.pro_model,
-            "flash_model": self.flash_model
+            "flash_model": self.flash_model,
+            "cache": {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "coalesced": self.cache_coalesced,
+                "hit_rate": self.cache_hits / max(self.cache_hits + self.cache_misses + self.cache_coalesced, 1),
+                "in_flight": len(self._inflight)
+            },
+            "client_pool": get_client_registry().get_stats(),
+            "rate_limit": get_rate_limiter("text").get_stats(),
+            "circuit_breakers": get_circuit_stats(),
+            "hedging": {
+                "enabled": settings.GEMINI_HEDGE_ENABLED,
+                "hedged_requests": self.hedged_requests,
+                "latency": latency_tracker.get_stats()
+            }
         }
 
 
@@ -355,7 +608,7 @@ production_gemini = None
 def get_production_client():
     """Get or create the production client instance."""
     global production_gemini
-    if production_gemini is None and settings.GEMINI_API_KEY:
+    if production_gemini is None and (settings.GEMINI_API_KEY or offline_enabled()):
         production_gemini = ProductionGeminiClient()
     return production_gemini
 
@@ -364,7 +617,9 @@ def get_production_client():
 async def call_gemini_with_retry(
     prompt: str,
     response_schema: Optional[Dict[str, Any]] = None,
-    task_type: str = "default"
+    task_type: str = "default",
+    stream_key: Optional[str] = None,
+    on_item: Optional[StreamItemCallback] = None
 ) -> Dict[str, Any]:
     """Backward compatible function for existing code."""
     client = get_production_client()
@@ -372,7 +627,9 @@ async def call_gemini_with_retry(
         return await client.call_gemini_with_retry(
             prompt=prompt,
             task_type=task_type,
-            response_schema=response_schema
+            response_schema=response_schema,
+            stream_key=stream_key,
+            on_item=on_item
         )
     else:
         raise ValueError("Production client not available - GEMINI_API_KEY not configured")
\ No newline at end of file
@@ -0,0 +1,285 @@
+"""
+Shared admission control for Gemini calls.
+
+A token bucket per budget (text vs image models) lives in Redis so every worker
+draws from the same quota. Its refill rate adapts AIMD-style: halved on a 429,
+nudged back up on success. Within a process, callers queue by priority so
+interactive steps (ingredient extraction, questions) are admitted before
+background work (packaging analysis, step images) when tokens are scarce.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.redis import async_redis_service as redis_service
+try:
+    from app.core.metrics import metrics
+    METRICS_AVAILABLE = True
+except ImportError:
+    METRICS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Longest a queue head sleeps before re-checking the bucket (rate may have risen)
+MAX_POLL_INTERVAL = 0.5
+
+# KEYS[1] = bucket hash; ARGV = max_rate, burst, requested
+# Returns {wait_seconds, current_rate} as strings (Lua numbers truncate to ints)
+TAKE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local max_rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'rate')
+local rate = tonumber(state[3]) or max_rate
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= requested then
+  tokens = tokens - requested
+else
+  wait = (requested - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now), 'rate', tostring(rate))
+redis.call('EXPIRE', KEYS[1], 3600)
+return {tostring(wait), tostring(rate)}
+"""
+
+# KEYS[1] = bucket hash; ARGV = max_rate, min_rate, mode ('decrease'|'increase'), factor, step
+ADJUST_SCRIPT = """
+local max_rate = tonumber(ARGV[1])
+local min_rate = tonumber(ARGV[2])
+local rate = tonumber(redis.call('HGET', KEYS[1], 'rate')) or max_rate
+if ARGV[3] == 'decrease' then
+  rate = math.max(min_rate, rate * tonumber(ARGV[4]))
+else
+  rate = math.min(max_rate, rate + tonumber(ARGV[5]))
+end
+redis.call('HSET', KEYS[1], 'rate', tostring(rate))
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(rate)
+"""
+
+
+class Priority(IntEnum):
+    """Admission classes; lower values are served first."""
+    INTERACTIVE = 0
+    STANDARD = 1
+    BACKGROUND = 2
+
+
+class RateLimitTimeoutError(Exception):
+    """No token became available within the allowed wait."""
+    pass
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    event: asyncio.Event = field(compare=False, default_factory=asyncio.Event)
+
+
+class _LocalBucket:
+    """In-process token bucket with the same semantics as the Redis scripts."""
+
+    def __init__(self, max_rate: float, burst: float):
+        self.rate = max_rate
+        self.tokens = burst
+        self.ts = time.monotonic()
+
+    def take(self, max_rate: float, burst: float, requested: float) -> Tuple[float, float]:
+        now = time.monotonic()
+        self.tokens = min(burst, self.tokens + max(0.0, now - self.ts) * self.rate)
+        self.ts = now
+        if self.tokens >= requested:
+            self.tokens -= requested
+            return 0.0, self.rate
+        return (requested - self.tokens) / self.rate, self.rate
+
+    def adjust(self, max_rate: float, min_rate: float, decrease: bool, factor: float, step: float) -> float:
+        if decrease:
+            self.rate = max(min_rate, self.rate * factor)
+        else:
+            self.rate = min(max_rate, self.rate + step)
+        return self.rate
+
+
+class AdaptiveRateLimiter:
+    """Redis-backed token bucket with AIMD rate adaptation and priority queueing."""
+
+    def __init__(
+        self,
+        budget: str,
+        requests_per_minute: float,
+        burst: Optional[float] = None,
+        min_fraction: float = 0.1,
+        decrease_factor: float = 0.5,
+        increase_fraction: float = 0.05,
+        max_wait: Optional[float] = None,
+    ):
+        self.budget = budget
+        self.key = f"gemini_rate_limit:{budget}"
+        self.max_rate = max(requests_per_minute / 60.0, 0.01)
+        self.min_rate = self.max_rate * min_fraction
+        self.burst = burst or max(1.0, self.max_rate)
+        self.decrease_factor = decrease_factor
+        self.increase_step = self.max_rate * increase_fraction
+        self.max_wait = max_wait if max_wait is not None else settings.GEMINI_RATE_LIMIT_MAX_WAIT
+        self.rate = self.max_rate
+        self._local = _LocalBucket(self.max_rate, self.burst)
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+
+        # Performance tracking
+        self.admitted = 0
+        self.throttles = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+
+    async def _take(self) -> float:
+        """Try to take one token; returns seconds until one is available (0 = granted)."""
+        result = await redis_service.eval(
+            TAKE_SCRIPT,
+            [self.key],
+            [self.max_rate, self.burst, 1],
+            fallback=lambda: self._local.take(self.max_rate, self.burst, 1),
+        )
+        wait, rate = float(result[0]), float(result[1])
+        self.rate = rate
+        return wait
+
+    async def _adjust(self, decrease: bool) -> None:
+        result = await redis_service.eval(
+            ADJUST_SCRIPT,
+            [self.key],
+            [self.max_rate, self.min_rate, "decrease" if decrease else "increase",
+             self.decrease_factor, self.increase_step],
+            fallback=lambda: self._local.adjust(
+                self.max_rate, self.min_rate, decrease, self.decrease_factor, self.increase_step
+            ),
+        )
+        self.rate = float(result)
+        if METRICS_AVAILABLE:
+            metrics.record_rate_limit_rate(self.budget, self.rate, throttled=decrease)
+
+    def _queue_depth(self, priority: Priority) -> int:
+        return sum(1 for waiter in self._waiters if waiter.priority == priority)
+
+    def _record_queue(self, priority: Priority):
+        if METRICS_AVAILABLE:
+            metrics.set_rate_limit_queue_depth(self.budget, priority.name.lower(), self._queue_depth(priority))
+
+    def _wake_head(self):
+        if self._waiters:
+            self._waiters[0].event.set()
+
+    async def acquire(self, priority: Priority = Priority.STANDARD) -> float:
+        """
+        Wait for a token. Only the highest-priority, oldest waiter polls the
+        shared bucket; everyone else sleeps until they reach the head.
+        Returns the time spent waiting.
+        """
+        start_time = time.time()
+        waiter = _Waiter(int(priority), next(self._seq))
+        heapq.heappush(self._waiters, waiter)
+        self._record_queue(priority)
+        try:
+            while True:
+                waited = time.time() - start_time
+                if self.max_wait and waited > self.max_wait:
+                    self.timeouts += 1
+                    raise RateLimitTimeoutError(
+                        f"No {self.budget} rate limit token after {waited:.1f}s ({priority.name.lower()})"
+                    )
+                if self._waiters[0] is not waiter:
+                    waiter.event.clear()
+                    try:
+                        await asyncio.wait_for(waiter.event.wait(), timeout=MAX_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                wait = await self._take()
+                if wait <= 0:
+                    break
+                await asyncio.sleep(min(wait, MAX_POLL_INTERVAL))
+        finally:
+            self._waiters.remove(waiter)
+            heapq.heapify(self._waiters)
+            self._wake_head()
+            self._record_queue(priority)
+
+        waited = time.time() - start_time
+        self.admitted += 1
+        self.total_wait += waited
+        if METRICS_AVAILABLE:
+            metrics.record_rate_limit_wait(self.budget, priority.name.lower(), waited)
+        if waited > 1:
+            logger.info(f"RATE LIMIT: {self.budget} {priority.name.lower()} call waited {waited:.1f}s")
+        return waited
+
+    async def record_success(self) -> None:
+        """Additive increase (only while below the configured maximum)."""
+        if self.rate < self.max_rate:
+            await self._adjust(decrease=False)
+
+    async def record_throttle(self) -> None:
+        """Multiplicative decrease after a quota/429 response."""
+        self.throttles += 1
+        await self._adjust(decrease=True)
+        logger.warning(f"RATE LIMIT: {self.budget} throttled by upstream, rate now {self.rate * 60:.0f}/min")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "rate_per_minute": self.rate * 60,
+            "max_rate_per_minute": self.max_rate * 60,
+            "queue_depth": {p.name.lower(): self._queue_depth(p) for p in Priority},
+            "admitted": self.admitted,
+            "throttles": self.throttles,
+            "timeouts": self.timeouts,
+            "avg_wait": self.total_wait / max(self.admitted, 1),
+        }
+
+
+# Task types that block the user on the current screen get admitted first
+TASK_PRIORITIES = {
+    "extraction": Priority.INTERACTIVE,
+    "clarification": Priority.INTERACTIVE,
+    "question_generation": Priority.INTERACTIVE,
+    "categorization": Priority.INTERACTIVE,
+    "goal_formation": Priority.STANDARD,
+    "creative": Priority.STANDARD,
+    "default": Priority.STANDARD,
+    "analysis": Priority.BACKGROUND,
+}
+
+
+def priority_for_task(task_type: str) -> Priority:
+    return TASK_PRIORITIES.get(task_type, Priority.STANDARD)
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+
+
+def get_rate_limiter(budget: str) -> AdaptiveRateLimiter:
+    """Get or create the limiter for a budget ("text" or "image")."""
+    limiter = _limiters.get(budget)
+    if limiter is None:
+        if budget == "image":
+            limiter = AdaptiveRateLimiter(
+                "image", settings.GEMINI_IMAGE_RPM, burst=settings.GEMINI_IMAGE_BURST
+            )
+        else:
+            limiter = AdaptiveRateLimiter(
+                budget, settings.GEMINI_TEXT_RPM, burst=settings.GEMINI_TEXT_BURST
+            )
+        _limiters[budget] = limiter
+    return limiter
@@ -0,0 +1,181 @@
+"""
+Failure isolation for upstream model calls.
+
+A per-model circuit breaker stops sending traffic to a degraded model so
+callers fail fast into their existing fallbacks instead of burning the full
+retry budget. Hedged requests cut tail latency: if a call has not answered by
+the p95 latency observed for its task type, a second identical call is fired
+and whichever returns first wins.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from app.core.config import settings
+try:
+    from app.core.metrics import metrics
+    METRICS_AVAILABLE = True
+except ImportError:
+    METRICS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(Enum):
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after ``failure_threshold`` consecutive failures; open ->
+    half-open after ``recovery_timeout``; a half-open probe closes the circuit
+    on success or re-opens it on failure.
+    """
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None, recovery_timeout: Optional[float] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.GEMINI_CIRCUIT_FAILURE_THRESHOLD
+        self.recovery_timeout = recovery_timeout or settings.GEMINI_CIRCUIT_RECOVERY_TIMEOUT
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_started: Optional[float] = None
+
+        # Performance tracking
+        self.rejected = 0
+        self.times_opened = 0
+
+    def _set_state(self, state: CircuitState):
+        if state is not self.state:
+            logger.warning(f"CIRCUIT: {self.name} {self.state.name.lower()} -> {state.name.lower()}")
+        self.state = state
+        if METRICS_AVAILABLE:
+            metrics.record_circuit_state(self.name, state.value)
+
+    def allow_request(self) -> bool:
+        """Whether a call may go upstream now."""
+        now = time.time()
+        if self.state is CircuitState.OPEN:
+            if now - self.opened_at < self.recovery_timeout:
+                self.rejected += 1
+                return False
+            self._set_state(CircuitState.HALF_OPEN)
+            self._probe_started = None
+
+        if self.state is CircuitState.HALF_OPEN:
+            # One probe at a time; a probe that never reports back expires
+            if self._probe_started is not None and now - self._probe_started < self.recovery_timeout:
+                self.rejected += 1
+                return False
+            self._probe_started = now
+        return True
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self._probe_started = None
+        if self.state is not CircuitState.CLOSED:
+            self._set_state(CircuitState.CLOSED)
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probe_started = None
+        if self.state is CircuitState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state is not CircuitState.OPEN:
+                self.times_opened += 1
+            self.opened_at = time.time()
+            self._set_state(CircuitState.OPEN)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state.name.lower(),
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per task type."""
+
+    def __init__(self, window: int = 200, min_samples: Optional[int] = None):
+        self.window = window
+        self.min_samples = min_samples or settings.GEMINI_HEDGE_MIN_SAMPLES
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, task_type: str, duration: float):
+        samples = self._samples.get(task_type)
+        if samples is None:
+            samples = self._samples[task_type] = deque(maxlen=self.window)
+        samples.append(duration)
+
+    def percentile(self, task_type: str, pct: float = 0.95) -> Optional[float]:
+        """Latency percentile, or None until enough samples have been seen."""
+        samples = self._samples.get(task_type)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            task_type: {"samples": len(samples), "p95": self.percentile(task_type)}
+            for task_type, samples in self._samples.items()
+        }
+
+
+async def hedged_call(
+    call: Callable[[], Awaitable[Any]],
+    hedge_after: Optional[float],
+    hedge: Optional[Callable[[], Awaitable[Any]]] = None,
+    on_hedge: Optional[Callable[[], None]] = None,
+) -> Any:
+    """
+    Run ``call``; if it has not finished after ``hedge_after`` seconds, start
+    ``hedge`` (defaults to ``call``) and return whichever succeeds first. The
+    loser is cancelled. With ``hedge_after=None`` this is a plain await.
+    """
+    if hedge_after is None:
+        return await call()
+
+    tasks = [asyncio.ensure_future(call())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            if on_hedge:
+                on_hedge()
+            tasks.append(asyncio.ensure_future((hedge or call)()))
+
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+latency_tracker = LatencyTracker()
+
+
+def get_circuit_breaker(model_name: str) -> CircuitBreaker:
+    """Get or create the breaker for a model."""
+    breaker = _circuit_breakers.get(model_name)
+    if breaker is None:
+        breaker = _circuit_breakers[model_name] = CircuitBreaker(model_name)
+    return breaker
+
+
+def get_circuit_stats() -> Dict[str, Any]:
+    return {name: breaker.get_stats() for name, breaker in _circuit_breakers.items()}
@@ -27,6 +27,17 @@ class Settings(BaseSettings):
     REDIS_HOST: str = Field(default=os.getenv("REDIS_HOST", "127.0.0.1"))
     REDIS_PORT: int = Field(default=int(os.getenv("REDIS_PORT", "6379")))
     REDIS_DB: int = Field(default=int(os.getenv("REDIS_DB", "0")))
+    REDIS_MAX_CONNECTIONS: int = Field(default=int(os.getenv("REDIS_MAX_CONNECTIONS", "50")))
+    REDIS_POOL_TIMEOUT: float = Field(default=float(os.getenv("REDIS_POOL_TIMEOUT", "5")))
+    REDIS_SOCKET_TIMEOUT: float = Field(default=float(os.getenv("REDIS_SOCKET_TIMEOUT", "5")))
+    REDIS_CONNECT_TIMEOUT: float = Field(default=float(os.getenv("REDIS_CONNECT_TIMEOUT", "2")))
+    REDIS_HEALTH_CHECK_INTERVAL: int = Field(default=int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30")))
+
+    # In-memory fallback while Redis is down: memory cap, expiry sweep, recovery probe
+    REDIS_FALLBACK_MAX_MB: int = Field(default=int(os.getenv("REDIS_FALLBACK_MAX_MB", "64")))
+    REDIS_FALLBACK_SWEEP_INTERVAL: float = Field(default=float(os.getenv("REDIS_FALLBACK_SWEEP_INTERVAL", "30")))
+    REDIS_FALLBACK_PROBE_INTERVAL: float = Field(default=float(os.getenv("REDIS_FALLBACK_PROBE_INTERVAL", "10")))
+    REDIS_FALLBACK_REPLAY_KEYS: int = Field(default=int(os.getenv("REDIS_FALLBACK_REPLAY_KEYS", "500")))
     
     # API keys
     TRELLIS_API_KEY: Optional[str] = Field(default=os.getenv("TRELLIS_API_KEY", None))
@@ -39,6 +50,77 @@ class Settings(BaseSettings):
     GEMINI_MAX_RETRIES: int = Field(default=int(os.getenv("GEMINI_MAX_RETRIES", "3")))
     GEMINI_TEMPERATURE: float = Field(default=float(os.getenv("GEMINI_TEMPERATURE", "0.7")))
     GEMINI_MAX_TOKENS: int = Field(default=int(os.getenv("GEMINI_MAX_TOKENS", "4096")))
+    GEMINI_CACHE_ENABLED: bool = Field(default=os.getenv("GEMINI_CACHE_ENABLED", "true").lower() in {"1", "true", "yes", "on"})
+    GEMINI_CACHE_TTL: int = Field(default=int(os.getenv("GEMINI_CACHE_TTL", "3600")))
+    GEMINI_CLIENT_POOL_SIZE: int = Field(default=int(os.getenv("GEMINI_CLIENT_POOL_SIZE", "64")))
+
+    # Gemini backend: live | offline (local stand-in for benchmarks, see app/ai_service/offline_gemini.py)
+    GEMINI_BACKEND: str = Field(default=os.getenv("GEMINI_BACKEND", "live"))
+    GEMINI_OFFLINE_PROFILE: str = Field(default=os.getenv("GEMINI_OFFLINE_PROFILE", "realistic"))
+    GEMINI_OFFLINE_THROTTLE_RATE: float = Field(default=float(os.getenv("GEMINI_OFFLINE_THROTTLE_RATE", "0")))
+    GEMINI_OFFLINE_ERROR_RATE: float = Field(default=float(os.getenv("GEMINI_OFFLINE_ERROR_RATE", "0")))
+    GEMINI_OFFLINE_TEXT_WORDS: int = Field(default=int(os.getenv("GEMINI_OFFLINE_TEXT_WORDS", "12")))
+    GEMINI_OFFLINE_SEED: Optional[int] = Field(default=int(os.environ["GEMINI_OFFLINE_SEED"]) if os.getenv("GEMINI_OFFLINE_SEED") else None)
+
+    # Shared (Redis-backed) Gemini admission control; rates adapt down on 429s
+    GEMINI_RATE_LIMIT_ENABLED: bool = Field(default=os.getenv("GEMINI_RATE_LIMIT_ENABLED", "true").lower() in {"1", "true", "yes", "on"})
+    GEMINI_TEXT_RPM: float = Field(default=float(os.getenv("GEMINI_TEXT_RPM", "300")))
+    GEMINI_TEXT_BURST: float = Field(default=float(os.getenv("GEMINI_TEXT_BURST", "20")))
+    GEMINI_IMAGE_RPM: float = Field(default=float(os.getenv("GEMINI_IMAGE_RPM", "60")))
+    GEMINI_IMAGE_BURST: float = Field(default=float(os.getenv("GEMINI_IMAGE_BURST", "5")))
+    GEMINI_RATE_LIMIT_MAX_WAIT: float = Field(default=float(os.getenv("GEMINI_RATE_LIMIT_MAX_WAIT", "60")))
+
+    # Per-model circuit breaker and optional hedged requests (fired after the task's p95)
+    GEMINI_CIRCUIT_FAILURE_THRESHOLD: int = Field(default=int(os.getenv("GEMINI_CIRCUIT_FAILURE_THRESHOLD", "5")))
+    GEMINI_CIRCUIT_RECOVERY_TIMEOUT: float = Field(default=float(os.getenv("GEMINI_CIRCUIT_RECOVERY_TIMEOUT", "30")))
+    GEMINI_HEDGE_ENABLED: bool = Field(default=os.getenv("GEMINI_HEDGE_ENABLED", "false").lower() in {"1", "true", "yes", "on"})
+    GEMINI_HEDGE_MIN_DELAY: float = Field(default=float(os.getenv("GEMINI_HEDGE_MIN_DELAY", "2")))
+    GEMINI_HEDGE_MIN_SAMPLES: int = Field(default=int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES", "20")))
+
+    # Image generation settings
+    GEMINI_IMAGE_MODEL: str = Field(default=os.getenv("GEMINI_IMAGE_MODEL", "gemini-2.5-flash-image"))
+    IMAGE_GENERATION_CONCURRENCY: int = Field(default=int(os.getenv("IMAGE_GENERATION_CONCURRENCY", "3")))
+    IMAGE_GENERATION_TIMEOUT: float = Field(default=float(os.getenv("IMAGE_GENERATION_TIMEOUT", "90")))
+
+    # P1c: ingredients the material knowledge base resolves with at least this
+    # confidence are finalized locally; only the rest go to Gemini
+    P1C_RULE_CATEGORIZATION_ENABLED: bool = Field(default=os.getenv("P1C_RULE_CATEGORIZATION_ENABLED", "true").lower() in {"1", "true", "yes", "on"})
+    P1C_RULE_CONFIDENCE_THRESHOLD: float = Field(default=float(os.getenv("P1C_RULE_CONFIDENCE_THRESHOLD", "0.8")))
+
+    # Phase 4 packaging: per-section deadline before falling back
+    PACKAGE_SECTION_TIMEOUT: float = Field(default=float(os.getenv("PACKAGE_SECTION_TIMEOUT", "45")))
+
+    # Per-thread artifact hash: one TTL for the whole thread; large values are compressed
+    THREAD_ARTIFACT_TTL: int = Field(default=int(os.getenv("THREAD_ARTIFACT_TTL", "3600")))
+    THREAD_ARTIFACT_COMPRESS_MIN_BYTES: int = Field(default=int(os.getenv("THREAD_ARTIFACT_COMPRESS_MIN_BYTES", "8192")))
+
+    # Workflow job queue: API processes enqueue, workers execute (see app/workflows/worker.py)
+    WORKFLOW_WORKER_CONCURRENCY: int = Field(default=int(os.getenv("WORKFLOW_WORKER_CONCURRENCY", "4")))
+    # Standalone workers serve Prometheus metrics on this port (0 disables)
+    WORKFLOW_WORKER_METRICS_PORT: int = Field(default=int(os.getenv("WORKFLOW_WORKER_METRICS_PORT", "9101")))
+    WORKFLOW_EMBEDDED_WORKER: bool = Field(default=os.getenv("WORKFLOW_EMBEDDED_WORKER", "true").lower() in {"1", "true", "yes", "on"})
+    WORKFLOW_JOB_VISIBILITY_TIMEOUT: float = Field(default=float(os.getenv("WORKFLOW_JOB_VISIBILITY_TIMEOUT", "120")))
+    WORKFLOW_JOB_MAX_ATTEMPTS: int = Field(default=int(os.getenv("WORKFLOW_JOB_MAX_ATTEMPTS", "3")))
+
+    # Tracing: none | memory | jsonl | otel (see app/core/tracing.py)
+    TRACING_EXPORTER: str = Field(default=os.getenv("TRACING_EXPORTER", "none"))
+    TRACING_MEMORY_MAX_TRACES: int = Field(default=int(os.getenv("TRACING_MEMORY_MAX_TRACES", "200")))
+    TRACING_JSONL_PATH: str = Field(default=os.getenv("TRACING_JSONL_PATH", "/tmp/orbit_traces.jsonl"))
+
+    # In-process performance monitor (see app/workflows/performance_monitor.py)
+    PERFORMANCE_RECENT_WORKFLOWS: int = Field(default=int(os.getenv("PERFORMANCE_RECENT_WORKFLOWS", "200")))
+    PERFORMANCE_MAX_ACTIVE_WORKFLOWS: int = Field(default=int(os.getenv("PERFORMANCE_MAX_ACTIVE_WORKFLOWS", "1000")))
+    # Relative error of the per-node latency quantiles
+    PERFORMANCE_SKETCH_ACCURACY: float = Field(default=float(os.getenv("PERFORMANCE_SKETCH_ACCURACY", "0.01")))
+
+    # Image store settings (backend: local | shared | s3)
+    IMAGE_STORE_BACKEND: str = Field(default=os.getenv("IMAGE_STORE_BACKEND", "local"))
+    IMAGE_STORE_LOCAL_DIR: str = Field(default=os.getenv("IMAGE_STORE_LOCAL_DIR", "/tmp/orbit_image_cache"))
+    IMAGE_STORE_LOCAL_MAX_MB: int = Field(default=int(os.getenv("IMAGE_STORE_LOCAL_MAX_MB", "512")))
+    IMAGE_STORE_SHARED_DIR: str = Field(default=os.getenv("IMAGE_STORE_SHARED_DIR", "/var/lib/orbit/images"))
+    IMAGE_STORE_S3_BUCKET: Optional[str] = Field(default=os.getenv("IMAGE_STORE_S3_BUCKET", None))
+    IMAGE_STORE_S3_ENDPOINT: Optional[str] = Field(default=os.getenv("IMAGE_STORE_S3_ENDPOINT", None))
+    IMAGE_STORE_S3_PREFIX: str = Field(default=os.getenv("IMAGE_STORE_S3_PREFIX", "orbit-images"))
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,209 @@
+"""Workflow event bus backed by Redis Streams with an in-process fallback.
+
+Workflow nodes and endpoints publish typed events (``state_update``,
+``concept_progress``, ``workflow_complete``...) to a per-thread stream, and the
+SSE endpoint consumes them with blocking reads. Stream entry IDs double as SSE
+event IDs so reconnecting clients can resume via ``Last-Event-ID``. Readers can
+ask for the raw JSON ``data`` text to forward it without decoding.
+
+Streams go through the shared pooled AsyncRedisService client. When Redis
+fails the bus switches to bounded in-process streams and, like the Redis
+services, probes periodically to switch back once Redis answers again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import AsyncRedisService, _FallbackMixin, async_redis_service
+from app.core.serialization import dumps_str, loads
+
+logger = logging.getLogger(__name__)
+
+# Stream entry: (event_id, {"type": ..., "data": ...}); "data" is JSON text when read with decode=False
+WorkflowEvent = Tuple[str, Dict[str, Any]]
+
+
+def _parse_event_id(event_id: str) -> Tuple[int, int]:
+    """Parse a stream ID ("<ms>-<seq>") into a sortable tuple."""
+    try:
+        ms, _, seq = event_id.partition("-")
+        return int(ms), int(seq or 0)
+    except (TypeError, ValueError):
+        return 0, 0
+
+
+class WorkflowEventBus(_FallbackMixin):
+    """Per-thread event streams with blocking reads and resumable cursors."""
+
+    STREAM_MAXLEN = 500
+    STREAM_TTL = 3600
+    # In-process fallback keeps at most this many threads (least recently published evicted first)
+    LOCAL_MAX_THREADS = 1000
+
+    def __init__(self, redis: AsyncRedisService | None = None):
+        self._redis = redis or async_redis_service
+        self._use_fallback = False
+        self._last_probe = time.monotonic()
+
+        # In-process fallback: bounded history of raw entries per thread plus waiting readers
+        self._local_streams: OrderedDict[str, Deque[WorkflowEvent]] = OrderedDict()
+        self._local_waiters: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+        self._local_seq = itertools.count(1)
+        self._pending: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def stream_key(thread_id: str) -> str:
+        return f"workflow_events:{thread_id}"
+
+    async def _redis_available(self) -> bool:
+        """True when streams should go to Redis (probing, rate-limited, while in fallback)."""
+        if not self._use_fallback:
+            return True
+        if not self._probe_due():
+            return False
+        try:
+            await self._redis.client.ping()
+        except (RedisError, OSError):
+            return False
+        self._leave_fallback(0)
+        return True
+
+    def _leave_fallback(self, replayed: int) -> None:
+        self._use_fallback = False
+        # Events now go to Redis; local history would only go stale
+        self._local_streams.clear()
+        logger.info("Redis reachable again; event bus back on Redis Streams")
+
+    async def publish(self, thread_id: str, event_type: str, data: Any) -> Optional[str]:
+        """Append an event to the thread's stream and wake blocked readers."""
+        payload = dumps_str(data)
+        if await self._redis_available():
+            try:
+                client = self._redis.client
+                key = self.stream_key(thread_id)
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.xadd(key, {"type": event_type, "data": payload},
+                              maxlen=self.STREAM_MAXLEN, approximate=True)
+                    pipe.expire(key, self.STREAM_TTL)
+                    event_id, _ = await pipe.execute()
+                return event_id
+            except (RedisError, OSError) as e:
+                self._enter_fallback(e)
+        return self._publish_local(thread_id, event_type, payload)
+
+    def publish_nowait(self, thread_id: str, event_type: str, data: Any) -> None:
+        """Publish from synchronous code; schedules on the running loop if any."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            if self._use_fallback:
+                self._publish_local(thread_id, event_type, dumps_str(data))
+            else:
+                logger.debug(f"No running loop; dropping {event_type} event for {thread_id}")
+            return
+        task = loop.create_task(self.publish(thread_id, event_type, data))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def read(
+        self,
+        thread_id: str,
+        last_event_id: str = "0",
+        block_ms: int = 15000,
+        count: int = 100,
+        decode: bool = True,
+    ) -> List[WorkflowEvent]:
+        """
+        Return events after ``last_event_id``, blocking up to ``block_ms`` for new ones.
+        With ``decode=False`` each event's data is left as the stored JSON text.
+        """
+        if await self._redis_available():
+            try:
+                client = self._redis.client
+                key = self.stream_key(thread_id)
+                # Block for less than the pool's socket timeout; callers loop on empty reads
+                block = min(block_ms, int(settings.REDIS_SOCKET_TIMEOUT * 800)) if block_ms else block_ms
+                response = await client.xread({key: last_event_id}, count=count, block=block)
+                entries = [entry for _stream, stream_entries in response or [] for entry in stream_entries]
+                return [(event_id, self._decode(fields, decode)) for event_id, fields in entries]
+            except (RedisError, OSError) as e:
+                self._enter_fallback(e)
+        entries = await self._read_local(thread_id, last_event_id, block_ms, count)
+        return [(event_id, self._decode(fields, decode)) for event_id, fields in entries]
+
+    @staticmethod
+    def _decode(fields: Dict[str, str], decode: bool = True) -> Dict[str, Any]:
+        raw = fields.get("data", "null")
+        data: Any = raw
+        if decode:
+            try:
+                data = loads(raw)
+            except ValueError:
+                pass
+        return {"type": fields.get("type", "message"), "data": data}
+
+    def _publish_local(self, thread_id: str, event_type: str, payload: str) -> str:
+        event_id = f"{int(time.time() * 1000)}-{next(self._local_seq)}"
+        stream = self._local_streams.pop(thread_id, None) or deque(maxlen=self.STREAM_MAXLEN)
+        stream.append((event_id, {"type": event_type, "data": payload}))
+        self._local_streams[thread_id] = stream
+        self._prune_local()
+
+        for loop, waiter in self._local_waiters.pop(thread_id, set()):
+            loop.call_soon_threadsafe(self._wake, waiter)
+        return event_id
+
+    def _prune_local(self) -> None:
+        """Drop threads idle past STREAM_TTL (as Redis would expire them) and cap the thread count."""
+        cutoff = (time.time() - self.STREAM_TTL) * 1000
+        while self._local_streams:
+            thread_id, stream = next(iter(self._local_streams.items()))
+            idle = _parse_event_id(stream[-1][0])[0] < cutoff
+            if not idle and len(self._local_streams) <= self.LOCAL_MAX_THREADS:
+                break
+            self._local_streams.popitem(last=False)
+
+    @staticmethod
+    def _wake(waiter: asyncio.Future) -> None:
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def _collect_local(self, thread_id: str, last_event_id: str, count: int) -> List[WorkflowEvent]:
+        cursor = _parse_event_id(last_event_id)
+        stream = self._local_streams.get(thread_id, ())
+        return [event for event in stream if _parse_event_id(event[0]) > cursor][:count]
+
+    async def _read_local(
+        self, thread_id: str, last_event_id: str, block_ms: int, count: int
+    ) -> List[WorkflowEvent]:
+        events = self._collect_local(thread_id, last_event_id, count)
+        if events or not block_ms:
+            return events
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        entry = (loop, waiter)
+        self._local_waiters.setdefault(thread_id, set()).add(entry)
+        try:
+            await asyncio.wait_for(waiter, timeout=block_ms / 1000)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            waiters = self._local_waiters.get(thread_id)
+            if waiters is not None:
+                waiters.discard(entry)
+                if not waiters:
+                    self._local_waiters.pop(thread_id, None)
+        return self._collect_local(thread_id, last_event_id, count)
+
+
+workflow_events = WorkflowEventBus()
@@ -0,0 +1,399 @@
+"""
+Content-addressed image store.
+
+Images are stored once per content hash (identical outputs dedupe) and
+referenced by image ID through small ref records. A size-capped LRU local
+directory sits in front of an optional shared backing store (shared volume or
+S3-compatible bucket) so every worker/container can serve every image.
+All writes are atomic (temp file + rename), so readers never see partial files.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+    S3_AVAILABLE = True
+except ImportError:
+    S3_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {
+    "webp": "image/webp",
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "avif": "image/avif",
+}
+
+_IMAGE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+@dataclass
+class StoredImage:
+    """Image bytes plus the content hash they are addressed by."""
+    content_hash: str
+    data: bytes
+    format: str = "webp"
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES.get(self.format, "application/octet-stream")
+
+
+def content_hash(data: bytes) -> str:
+    """Hash used both for addressing and as the strong ETag."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def blob_name(digest: str, fmt: str, variant: str = "") -> str:
+    """Storage name for an original (no variant) or a derived variant of a blob."""
+    suffix = f"-{variant}" if variant else ""
+    return f"blobs/{digest[:2]}/{digest}{suffix}.{fmt}"
+
+
+class ImageStoreBackend(ABC):
+    """Minimal blob interface; implementations are synchronous and run in threads."""
+
+    @abstractmethod
+    def read(self, name: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def write(self, name: str, data: bytes) -> None:
+        ...
+
+    def exists(self, name: str) -> bool:
+        return self.read(name) is not None
+
+
+class LocalDirBackend(ImageStoreBackend):
+    """Directory-backed blobs; used for the local tier and for shared volumes."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, name: str) -> Path:
+        return self.root / name
+
+    def read(self, name: str) -> Optional[bytes]:
+        try:
+            return self._path(name).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def write(self, name: str, data: bytes) -> None:
+        path = self._path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def exists(self, name: str) -> bool:
+        return self._path(name).exists()
+
+
+class LRULocalBackend(LocalDirBackend):
+    """
+    Local directory capped at ``max_bytes``; least recently used blobs are evicted.
+
+    Several worker processes may share the directory. Each tracks its own writes
+    and re-reads usage and recency (mtimes) from disk after every ``rescan_bytes``
+    written (default ``max_bytes / RESCAN_FRACTION``), so the directory can
+    overshoot the cap by at most that much per process between scans.
+    """
+
+    RESCAN_FRACTION = 16
+
+    def __init__(self, root: Path, max_bytes: int, rescan_bytes: Optional[int] = None):
+        super().__init__(root)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._rescan_bytes = rescan_bytes or max(max_bytes // self.RESCAN_FRACTION, 1)
+        self._written_since_scan = 0
+        with self._lock:
+            self._load_index()
+            self._evict()
+
+    def _load_index(self):
+        # Recency from mtimes (reads touch files), so every process and restarts agree on the order
+        files = []
+        for path in self.root.rglob("*"):
+            if path.is_file() and not path.name.startswith("."):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, path.relative_to(self.root).as_posix(), stat.st_size))
+        self._entries = OrderedDict((name, size) for _mtime, name, size in sorted(files))
+        self.total_bytes = sum(self._entries.values())
+        self._written_since_scan = 0
+
+    def touch(self, name: str) -> None:
+        """Mark a blob as recently used without reading it (e.g. a dedup hit)."""
+        with self._lock:
+            if name in self._entries:
+                self._entries.move_to_end(name)
+        try:
+            os.utime(self._path(name))
+        except OSError:
+            pass
+
+    def read(self, name: str) -> Optional[bytes]:
+        data = super().read(name)
+        with self._lock:
+            if data is None:
+                # Another worker may have evicted it
+                self.total_bytes -= self._entries.pop(name, 0)
+                return None
+            self._entries[name] = len(data)
+            self._entries.move_to_end(name)
+        try:
+            os.utime(self._path(name))
+        except OSError:
+            pass
+        return data
+
+    def write(self, name: str, data: bytes) -> None:
+        super().write(name, data)
+        with self._lock:
+            self.total_bytes -= self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            self.total_bytes += len(data)
+            self._written_since_scan += len(data)
+            if self._written_since_scan >= self._rescan_bytes:
+                # Pick up what other processes wrote to (or evicted from) the directory
+                self._load_index()
+            self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                self._path(name).unlink()
+            except FileNotFoundError:
+                pass
+            logger.debug(f"Image store evicted {name} ({size} bytes)")
+
+
+class S3Backend(ImageStoreBackend):
+    """S3-compatible bucket (AWS, MinIO, R2...) as the shared backing store."""
+
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = None, prefix: str = ""):
+        if not S3_AVAILABLE:
+            raise RuntimeError("boto3 is required for the s3 image store backend")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None)
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}/{name}" if self.prefix else name
+
+    def read(self, name: str) -> Optional[bytes]:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(name))
+            return response["Body"].read()
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in {"NoSuchKey", "404"}:
+                return None
+            raise
+
+    def write(self, name: str, data: bytes) -> None:
+        # S3 PUTs are atomic per object
+        self.client.put_object(Bucket=self.bucket, Key=self._key(name), Body=data)
+
+    def exists(self, name: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(name))
+            return True
+        except ClientError:
+            return False
+
+
+class ImageStore:
+    """Content-addressed image store with an LRU local tier over optional shared backing."""
+
+    MAX_CACHED_REFS = 10000
+
+    def __init__(self, local: LRULocalBackend, backing: Optional[ImageStoreBackend] = None):
+        self.local = local
+        self.backing = backing
+        self._refs: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        # Store methods run in worker threads (asyncio.to_thread)
+        self._lock = threading.Lock()
+
+        # Performance tracking
+        self.local_hits = 0
+        self.backing_hits = 0
+        self.misses = 0
+        self.dedup_writes = 0
+
+    @staticmethod
+    def _ref_name(image_id: str) -> str:
+        if not _IMAGE_ID_PATTERN.match(image_id):
+            raise ValueError(f"Invalid image id: {image_id}")
+        return f"refs/{image_id}.json"
+
+    def _remember_ref(self, image_id: str, ref: Dict[str, str]):
+        with self._lock:
+            self._refs[image_id] = ref
+            self._refs.move_to_end(image_id)
+            while len(self._refs) > self.MAX_CACHED_REFS:
+                self._refs.popitem(last=False)
+
+    def _read_blob(self, name: str) -> Optional[bytes]:
+        data = self.local.read(name)
+        if data is not None:
+            self.local_hits += 1
+            return data
+        if self.backing is not None:
+            data = self.backing.read(name)
+            if data is not None:
+                self.backing_hits += 1
+                self.local.write(name, data)
+                return data
+        self.misses += 1
+        return None
+
+    def _write_blob(self, name: str, data: bytes):
+        target = self.backing or self.local
+        if target.exists(name):
+            self.dedup_writes += 1
+            if target is self.local:
+                # Re-stored content is hot: keep it away from the eviction end
+                self.local.touch(name)
+        else:
+            target.write(name, data)
+        if self.backing is not None:
+            if self.local.exists(name):
+                self.local.touch(name)
+            else:
+                self.local.write(name, data)
+
+    def _resolve_sync(self, image_id: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            ref = self._refs.get(image_id)
+        if ref is not None:
+            return ref
+        raw = self._read_blob(self._ref_name(image_id))
+        if raw is None:
+            return None
+        ref = json.loads(raw)
+        self._remember_ref(image_id, ref)
+        return ref
+
+    def _put_sync(self, image_id: str, data: bytes, fmt: str) -> str:
+        digest = content_hash(data)
+        self._write_blob(blob_name(digest, fmt), data)
+        ref = {"hash": digest, "format": fmt}
+        self._write_blob_ref(image_id, ref)
+        return digest
+
+    def _write_blob_ref(self, image_id: str, ref: Dict[str, str]):
+        raw = json.dumps(ref).encode()
+        name = self._ref_name(image_id)
+        (self.backing or self.local).write(name, raw)
+        if self.backing is not None:
+            self.local.write(name, raw)
+        self._remember_ref(image_id, ref)
+
+    def _get_sync(self, image_id: str) -> Optional[StoredImage]:
+        ref = self._resolve_sync(image_id)
+        if ref is None:
+            return None
+        data = self._read_blob(blob_name(ref["hash"], ref["format"]))
+        if data is None:
+            return None
+        return StoredImage(content_hash=ref["hash"], data=data, format=ref["format"])
+
+    async def put_image(self, image_id: str, data: bytes, fmt: str = "webp") -> str:
+        """Store encoded image bytes under ``image_id``; returns the content hash."""
+        return await asyncio.to_thread(self._put_sync, image_id, data, fmt)
+
+    async def get_image(self, image_id: str) -> Optional[StoredImage]:
+        """Load an image by ID, or None if unknown (or invalid ID)."""
+        try:
+            return await asyncio.to_thread(self._get_sync, image_id)
+        except ValueError:
+            return None
+
+    async def resolve(self, image_id: str) -> Optional[Dict[str, str]]:
+        """Return the ``{"hash", "format"}`` ref for an image ID without loading bytes."""
+        try:
+            return await asyncio.to_thread(self._resolve_sync, image_id)
+        except ValueError:
+            return None
+
+    async def get_variant(self, digest: str, fmt: str, variant: str = "") -> Optional[bytes]:
+        """Load a derived representation (other format/size) of a stored blob."""
+        return await asyncio.to_thread(self._read_blob, blob_name(digest, fmt, variant))
+
+    async def put_variant(self, digest: str, fmt: str, data: bytes, variant: str = "") -> None:
+        """Store a derived representation next to its source blob."""
+        await asyncio.to_thread(self._write_blob, blob_name(digest, fmt, variant), data)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "local_bytes": self.local.total_bytes,
+            "local_max_bytes": self.local.max_bytes,
+            "local_evictions": self.local.evictions,
+            "local_hits": self.local_hits,
+            "backing_hits": self.backing_hits,
+            "misses": self.misses,
+            "dedup_writes": self.dedup_writes,
+        }
+
+
+def _create_backing_store() -> Optional[ImageStoreBackend]:
+    backend = settings.IMAGE_STORE_BACKEND.lower()
+    if backend == "shared":
+        return LocalDirBackend(Path(settings.IMAGE_STORE_SHARED_DIR))
+    if backend == "s3":
+        return S3Backend(
+            bucket=settings.IMAGE_STORE_S3_BUCKET,
+            endpoint_url=settings.IMAGE_STORE_S3_ENDPOINT,
+            prefix=settings.IMAGE_STORE_S3_PREFIX,
+        )
+    return None
+
+
+_image_store: Optional[ImageStore] = None
+
+
+def get_image_store() -> ImageStore:
+    """Get or create the global image store."""
+    global _image_store
+    if _image_store is None:
+        local = LRULocalBackend(
+            Path(settings.IMAGE_STORE_LOCAL_DIR),
+            max_bytes=settings.IMAGE_STORE_LOCAL_MAX_MB * 1024 * 1024,
+        )
+        _image_store = ImageStore(local, _create_backing_store())
+        logger.info(f"Image store initialized - backend: {settings.IMAGE_STORE_BACKEND}, local cap: {settings.IMAGE_STORE_LOCAL_MAX_MB}MB")
+    return _image_store
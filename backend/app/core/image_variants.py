@@ -0,0 +1,90 @@
+"""
+Derived image representations: format transcodes and responsive sizes.
+
+Variants are rendered from the stored original and persisted next to it in the
+image store, keyed by content hash + variant key, so each (size, quality,
+format) combination is encoded at most once per store.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Optional AVIF support (Pillow >= 11.3 or pillow-avif-plugin)
+try:
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+AVIF_AVAILABLE = "AVIF" in Image.SAVE
+
+# Encoder settings per output format (quality may be overridden per request)
+FORMAT_SAVE_OPTIONS = {
+    "webp": ("WEBP", {"quality": 85, "method": 4}),
+    "avif": ("AVIF", {"quality": 60}),
+    "jpeg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+# Widths rendered eagerly when a hero image is stored (grid thumbnails, cards)
+PREGENERATED_WIDTHS: Tuple[int, ...] = (256, 512)
+THUMBNAIL_WIDTH = 512
+
+MIN_DIMENSION = 16
+MAX_DIMENSION = 2048
+
+
+@dataclass(frozen=True)
+class VariantSpec:
+    """Requested output: bounding box (never upscaled) and encoder quality."""
+    width: Optional[int] = None
+    height: Optional[int] = None
+    quality: Optional[int] = None
+
+    @property
+    def is_original(self) -> bool:
+        return self.width is None and self.height is None and self.quality is None
+
+    @property
+    def key(self) -> str:
+        """Stable storage/ETag key such as ``w256-q80``; empty for the original."""
+        parts = []
+        if self.width:
+            parts.append(f"w{self.width}")
+        if self.height:
+            parts.append(f"h{self.height}")
+        if self.quality:
+            parts.append(f"q{self.quality}")
+        return "-".join(parts)
+
+
+def render_variant(source: bytes, fmt: str, spec: VariantSpec) -> bytes:
+    """Resize (fit within the box, keep aspect ratio) and encode ``source`` as ``fmt``."""
+    pil_format, options = FORMAT_SAVE_OPTIONS[fmt]
+    options = dict(options)
+    if spec.quality:
+        options["quality"] = spec.quality
+
+    img = Image.open(BytesIO(source))
+    if spec.width or spec.height:
+        img.thumbnail((spec.width or img.width, spec.height or img.height), Image.Resampling.LANCZOS)
+    if fmt == "jpeg" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+
+    buffer = BytesIO()
+    img.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+async def pregenerate_variants(image_store, digest: str, source: bytes, fmt: str = "webp") -> None:
+    """Render the common responsive widths for a freshly stored image."""
+    for width in PREGENERATED_WIDTHS:
+        spec = VariantSpec(width=width)
+        try:
+            data = await asyncio.to_thread(render_variant, source, fmt, spec)
+            await image_store.put_variant(digest, fmt, data, spec.key)
+        except Exception as e:
+            logger.warning(f"Failed to pre-generate {spec.key} variant for {digest[:12]}: {str(e)}")
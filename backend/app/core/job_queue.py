@@ -0,0 +1,273 @@
+"""
+Reliable job queue for long-running workflow work, backed by Redis.
+
+API processes enqueue jobs; workers (``python -m app.workflows.worker``, or the
+embedded worker in the API process) claim them. A claimed job stays in a
+processing set scored by its visibility deadline: workers extend the deadline
+while the job runs and acknowledge it when done. If a worker dies mid-job the
+deadline lapses and the next claim puts the job back on the queue, so work
+survives pod restarts. Failed jobs are retried with backoff and dead-lettered
+after ``max_attempts``.
+
+Without Redis the same operations run against an in-process stand-in, which is
+only useful when a worker runs in the same process: otherwise ``enqueue``
+raises ``QueueUnavailableError`` rather than accept a job nobody will claim.
+Jobs still pending in the stand-in when Redis comes back are moved onto the
+Redis queue by the next ``claim``.
+"""
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.redis import async_redis_service as redis_service
+from app.core.tracing import inject, span
+
+logger = logging.getLogger(__name__)
+
+# KEYS = pending list, data hash; ARGV = id, job json
+ENQUEUE_SCRIPT = """
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+redis.call('LPUSH', KEYS[1], ARGV[1])
+return 1
+"""
+
+# KEYS = pending list, processing zset, data hash, attempts hash; ARGV = visibility timeout
+# Returns {id, job json, attempts} or false when the queue is empty
+CLAIM_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)
+for _, id in ipairs(expired) do
+  redis.call('ZREM', KEYS[2], id)
+  redis.call('RPUSH', KEYS[1], id)
+end
+local id = redis.call('RPOP', KEYS[1])
+if not id then
+  return false
+end
+redis.call('ZADD', KEYS[2], now + tonumber(ARGV[1]), id)
+local attempts = redis.call('HINCRBY', KEYS[4], id, 1)
+local raw = redis.call('HGET', KEYS[3], id) or ''
+return {id, raw, tostring(attempts)}
+"""
+
+# KEYS = processing zset; ARGV = id, seconds from now (only if still claimed)
+DEFER_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+return redis.call('ZADD', KEYS[1], 'XX', 'CH', now + tonumber(ARGV[2]), ARGV[1])
+"""
+
+# KEYS = processing zset, data hash, attempts hash, dead list; ARGV = id, dead-letter flag
+FINISH_SCRIPT = """
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+if ARGV[2] == '1' then
+  redis.call('LPUSH', KEYS[4], ARGV[1])
+else
+  redis.call('HDEL', KEYS[2], ARGV[1])
+end
+return 1
+"""
+
+# KEYS = pending list, processing zset, dead list
+STATS_SCRIPT = """
+return {redis.call('LLEN', KEYS[1]), redis.call('ZCARD', KEYS[2]), redis.call('LLEN', KEYS[3])}
+"""
+
+
+class QueueUnavailableError(Exception):
+    """Redis is down and no worker in this process could run the job."""
+    pass
+
+
+@dataclass
+class Job:
+    kind: str
+    payload: Dict[str, Any]
+    max_attempts: int = field(default_factory=lambda: settings.WORKFLOW_JOB_MAX_ATTEMPTS)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    enqueued_at: float = field(default_factory=time.time)
+    # Span context of the enqueuer, so the worker's spans join its trace
+    trace: Optional[Dict[str, str]] = None
+    attempts: int = 0
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data.pop("attempts")
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw: str, attempts: int) -> "Job":
+        return cls(**json.loads(raw), attempts=attempts)
+
+
+class _LocalJobQueue:
+    """In-process stand-in with the same semantics as the Redis scripts."""
+
+    def __init__(self):
+        self.pending: Deque[str] = deque()
+        self.processing: Dict[str, float] = {}
+        self.data: Dict[str, str] = {}
+        self.attempts: Dict[str, int] = {}
+        self.dead: List[str] = []
+
+    def enqueue(self, job_id: str, raw: str) -> int:
+        self.data[job_id] = raw
+        self.pending.appendleft(job_id)
+        return 1
+
+    def claim(self, visibility_timeout: float):
+        now = time.time()
+        for job_id, deadline in list(self.processing.items()):
+            if deadline <= now:
+                del self.processing[job_id]
+                self.pending.append(job_id)
+        if not self.pending:
+            return None
+        job_id = self.pending.pop()
+        self.processing[job_id] = now + visibility_timeout
+        self.attempts[job_id] = self.attempts.get(job_id, 0) + 1
+        return [job_id, self.data.get(job_id, ""), str(self.attempts[job_id])]
+
+    def defer(self, job_id: str, seconds: float) -> int:
+        if job_id not in self.processing:
+            return 0
+        self.processing[job_id] = time.time() + seconds
+        return 1
+
+    def finish(self, job_id: str, dead: bool) -> int:
+        self.processing.pop(job_id, None)
+        self.attempts.pop(job_id, None)
+        if dead:
+            self.dead.insert(0, job_id)
+        else:
+            self.data.pop(job_id, None)
+        return 1
+
+    def stats(self):
+        return [len(self.pending), len(self.processing), len(self.dead)]
+
+
+class JobQueue:
+    """Named queue with claim/ack/retry/dead-letter semantics."""
+
+    def __init__(self, name: str = "workflow_jobs", visibility_timeout: Optional[float] = None):
+        self.name = name
+        self.visibility_timeout = visibility_timeout or settings.WORKFLOW_JOB_VISIBILITY_TIMEOUT
+        self.pending_key = f"{name}:pending"
+        self.processing_key = f"{name}:processing"
+        self.data_key = f"{name}:data"
+        self.attempts_key = f"{name}:attempts"
+        self.dead_key = f"{name}:dead"
+        self._local = _LocalJobQueue()
+        # Workers running in this process (they register in WorkflowWorker.run)
+        self.local_workers = 0
+
+    async def enqueue(self, kind: str, payload: Dict[str, Any], max_attempts: Optional[int] = None) -> Job:
+        with span("job.enqueue", kind=kind, thread_id=payload.get("thread_id")):
+            job = Job(kind=kind, payload=payload, trace=inject())
+            if max_attempts:
+                job.max_attempts = max_attempts
+            raw = job.to_json()
+            await redis_service.eval(
+                ENQUEUE_SCRIPT,
+                [self.pending_key, self.data_key],
+                [job.id, raw],
+                fallback=lambda: self._enqueue_locally(job.id, raw),
+            )
+        logger.info(f"JOBS: Enqueued {kind} job {job.id}")
+        return job
+
+    def _enqueue_locally(self, job_id: str, raw: str) -> int:
+        if not (self.local_workers or settings.WORKFLOW_EMBEDDED_WORKER):
+            # Separate worker deployment: it can't see this process's stand-in
+            raise QueueUnavailableError(f"Job queue '{self.name}' is unavailable (Redis is down)")
+        return self._local.enqueue(job_id, raw)
+
+    async def _requeue_local(self) -> None:
+        """Move jobs the in-process stand-in accepted during an outage onto the Redis queue."""
+        while self._local.pending and not redis_service._use_fallback:
+            job_id = self._local.pending.pop()
+            raw = self._local.data.pop(job_id, "")
+            requeued = await redis_service.eval(
+                ENQUEUE_SCRIPT,
+                [self.pending_key, self.data_key],
+                [job_id, raw],
+                fallback=lambda: None,
+            )
+            if requeued is None:
+                # Redis failed again: keep the job local, still first in line
+                self._local.pending.append(job_id)
+                self._local.data[job_id] = raw
+                return
+            self._local.attempts.pop(job_id, None)
+            logger.info(f"JOBS: Moved job {job_id} from the in-process queue back to Redis")
+
+    async def claim(self) -> Optional[Job]:
+        """Claim the oldest pending job (re-queuing any whose visibility lapsed)."""
+        if self._local.pending:
+            await self._requeue_local()
+        result = await redis_service.eval(
+            CLAIM_SCRIPT,
+            [self.pending_key, self.processing_key, self.data_key, self.attempts_key],
+            [self.visibility_timeout],
+            fallback=lambda: self._local.claim(self.visibility_timeout),
+        )
+        if not result:
+            return None
+        job_id, raw, attempts = result
+        if not raw:
+            # Data already removed (acknowledged elsewhere); drop the stray id
+            await self._finish(job_id, dead=False)
+            return None
+        return Job.from_json(raw, int(attempts))
+
+    async def _defer(self, job: Job, seconds: float) -> bool:
+        result = await redis_service.eval(
+            DEFER_SCRIPT,
+            [self.processing_key],
+            [job.id, seconds],
+            fallback=lambda: self._local.defer(job.id, seconds),
+        )
+        return bool(result)
+
+    async def _finish(self, job_id: str, dead: bool) -> None:
+        await redis_service.eval(
+            FINISH_SCRIPT,
+            [self.processing_key, self.data_key, self.attempts_key, self.dead_key],
+            [job_id, "1" if dead else "0"],
+            fallback=lambda: self._local.finish(job_id, dead),
+        )
+
+    async def extend(self, job: Job) -> bool:
+        """Heartbeat: push the visibility deadline out while the job is running."""
+        return await self._defer(job, self.visibility_timeout)
+
+    async def ack(self, job: Job) -> None:
+        await self._finish(job.id, dead=False)
+
+    async def retry(self, job: Job, delay: float) -> None:
+        """Leave the job claimed until ``delay`` expires; the next claim re-queues it."""
+        await self._defer(job, delay)
+
+    async def dead_letter(self, job: Job) -> None:
+        await self._finish(job.id, dead=True)
+        logger.error(f"JOBS: {job.kind} job {job.id} dead-lettered after {job.attempts} attempts")
+
+    async def get_stats(self) -> Dict[str, int]:
+        pending, processing, dead = await redis_service.eval(
+            STATS_SCRIPT,
+            [self.pending_key, self.processing_key, self.dead_key],
+            [],
+            fallback=self._local.stats,
+        )
+        return {"pending": int(pending), "processing": int(processing), "dead": int(dead)}
+
+
+workflow_jobs = JobQueue()
@@ -1,18 +1,28 @@
 """
 Prometheus metrics collection for AI Recycle-to-Market Generator.
 Tracks API performance, workflow progress, and system health.
+
+With several uvicorn workers set ``PROMETHEUS_MULTIPROC_DIR`` to an empty,
+per-container directory: every worker then writes its samples there and
+``/metrics`` aggregates them, whichever worker serves the scrape.
 """
+import os
 import time
 import logging
 from functools import wraps
-from typing import Callable, Any, Dict
-from prometheus_client import Counter, Histogram, Gauge, generate_latest
+from typing import Callable, Any, Dict, Optional
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, Counter, Histogram, Gauge, generate_latest, multiprocess, start_http_server
+)
 from prometheus_client.core import CollectorRegistry
 from fastapi import Request, Response
 from fastapi.responses import PlainTextResponse
+from starlette.routing import Match
 
 logger = logging.getLogger(__name__)
 
+MULTIPROCESS_MODE = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
 # Create custom registry for our metrics
 REGISTRY = CollectorRegistry()
 
@@ -31,6 +41,13 @@ http_request_duration_seconds = Histogram(
     registry=REGISTRY
 )
 
+sse_connections_active = Gauge(
+    'sse_connections_active',
+    'Open workflow SSE streams',
+    registry=REGISTRY,
+    multiprocess_mode='livesum'
+)
+
 # Workflow Metrics
 workflow_attempts_total = Counter(
     'workflow_attempts_total',
@@ -60,11 +77,20 @@ phase_processing_duration_seconds = Histogram(
     registry=REGISTRY
 )
 
+workflow_node_duration_seconds = Histogram(
+    'workflow_node_duration_seconds',
+    'LangGraph node execution time',
+    ['node', 'status'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+    registry=REGISTRY
+)
+
 # System Metrics
 active_workflows_count = Gauge(
     'active_workflows_count',
     'Number of currently active workflows',
-    registry=REGISTRY
+    registry=REGISTRY,
+    multiprocess_mode='livesum'
 )
 
 redis_operations_total = Counter(
@@ -74,6 +100,14 @@ redis_operations_total = Counter(
     registry=REGISTRY
 )
 
+redis_operation_duration_seconds = Histogram(
+    'redis_operation_duration_seconds',
+    'Redis command latency (including in-memory fallback)',
+    ['operation'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+    registry=REGISTRY
+)
+
 gemini_api_calls_total = Counter(
     'gemini_api_calls_total',
     'Total Gemini API calls',
@@ -88,6 +122,82 @@ gemini_api_duration_seconds = Histogram(
     registry=REGISTRY
 )
 
+gemini_request_duration_seconds = Histogram(
+    'gemini_request_duration_seconds',
+    'Successful Gemini request latency by task type',
+    ['task_type', 'model'],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 90),
+    registry=REGISTRY
+)
+
+gemini_tokens = Histogram(
+    'gemini_tokens',
+    'Tokens per Gemini request by task type',
+    ['task_type', 'kind'],
+    buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000),
+    registry=REGISTRY
+)
+
+gemini_attempts = Histogram(
+    'gemini_attempts',
+    'Attempts needed per successful Gemini request (1 = no retry)',
+    ['task_type'],
+    buckets=(1, 2, 3, 4, 5),
+    registry=REGISTRY
+)
+
+gemini_cache_requests_total = Counter(
+    'gemini_cache_requests_total',
+    'Gemini response cache lookups',
+    ['result'],
+    registry=REGISTRY
+)
+
+gemini_rate_limit_queue_depth = Gauge(
+    'gemini_rate_limit_queue_depth',
+    'Calls waiting for a Gemini rate limit token',
+    ['budget', 'priority'],
+    registry=REGISTRY,
+    multiprocess_mode='livesum'
+)
+
+gemini_rate_limit_wait_seconds = Histogram(
+    'gemini_rate_limit_wait_seconds',
+    'Time spent waiting for a Gemini rate limit token',
+    ['budget', 'priority'],
+    registry=REGISTRY
+)
+
+gemini_rate_limit_rate = Gauge(
+    'gemini_rate_limit_rate',
+    'Current adaptive Gemini request rate (requests/second)',
+    ['budget'],
+    registry=REGISTRY,
+    multiprocess_mode='livemax'
+)
+
+gemini_rate_limit_throttles_total = Counter(
+    'gemini_rate_limit_throttles_total',
+    'Gemini quota (429) responses that reduced the request rate',
+    ['budget'],
+    registry=REGISTRY
+)
+
+gemini_circuit_state = Gauge(
+    'gemini_circuit_state',
+    'Gemini circuit breaker state (0=closed, 1=half-open, 2=open)',
+    ['model'],
+    registry=REGISTRY,
+    multiprocess_mode='livemax'
+)
+
+gemini_hedged_requests_total = Counter(
+    'gemini_hedged_requests_total',
+    'Gemini calls that fired a hedge request after the p95 latency',
+    ['task_type'],
+    registry=REGISTRY
+)
+
 # Error Metrics
 errors_total = Counter(
     'errors_total',
@@ -128,15 +238,70 @@ class MetricsCollector:
         """Record individual phase processing time."""
         phase_processing_duration_seconds.labels(phase=phase, node=node).observe(duration)
 
-    def record_redis_operation(self, operation: str, status: str):
-        """Record Redis operation."""
+    def record_node(self, node: str, status: str, duration: float):
+        """Record one LangGraph node execution."""
+        workflow_node_duration_seconds.labels(node=node, status=status).observe(duration)
+
+    def record_redis_operation(self, operation: str, status: str, duration: Optional[float] = None):
+        """Record Redis operation (status: ok, fallback or error)."""
         redis_operations_total.labels(operation=operation, status=status).inc()
+        if duration is not None:
+            redis_operation_duration_seconds.labels(operation=operation).observe(duration)
 
     def record_gemini_call(self, model: str, status: str, duration: float):
         """Record Gemini API call."""
         gemini_api_calls_total.labels(model=model, status=status).inc()
         gemini_api_duration_seconds.labels(model=model).observe(duration)
 
+    def record_gemini_request(
+        self,
+        task_type: str,
+        model: str,
+        duration: float,
+        attempts: int,
+        prompt_tokens: Optional[int],
+        completion_tokens: Optional[int]
+    ):
+        """Record a successful Gemini request: latency, attempts and token usage."""
+        gemini_request_duration_seconds.labels(task_type=task_type, model=model).observe(duration)
+        gemini_attempts.labels(task_type=task_type).observe(attempts)
+        if prompt_tokens is not None:
+            gemini_tokens.labels(task_type=task_type, kind="prompt").observe(prompt_tokens)
+        if completion_tokens is not None:
+            gemini_tokens.labels(task_type=task_type, kind="completion").observe(completion_tokens)
+
+    def sse_connection_opened(self):
+        sse_connections_active.inc()
+
+    def sse_connection_closed(self):
+        sse_connections_active.dec()
+
+    def record_gemini_cache(self, result: str):
+        """Record Gemini cache lookup (hit, miss, coalesced)."""
+        gemini_cache_requests_total.labels(result=result).inc()
+
+    def record_rate_limit_wait(self, budget: str, priority: str, duration: float):
+        """Record how long a call waited for a rate limit token."""
+        gemini_rate_limit_wait_seconds.labels(budget=budget, priority=priority).observe(duration)
+
+    def set_rate_limit_queue_depth(self, budget: str, priority: str, depth: int):
+        """Record calls currently queued for a rate limit token."""
+        gemini_rate_limit_queue_depth.labels(budget=budget, priority=priority).set(depth)
+
+    def record_rate_limit_rate(self, budget: str, rate: float, throttled: bool = False):
+        """Record the adaptive request rate (and a throttle event if it was cut)."""
+        gemini_rate_limit_rate.labels(budget=budget).set(rate)
+        if throttled:
+            gemini_rate_limit_throttles_total.labels(budget=budget).inc()
+
+    def record_circuit_state(self, model: str, state: int):
+        """Record circuit breaker state for a model."""
+        gemini_circuit_state.labels(model=model).set(state)
+
+    def record_hedged_request(self, task_type: str):
+        """Record that a hedge request was fired."""
+        gemini_hedged_requests_total.labels(task_type=task_type).inc()
+
     def record_error(self, component: str, error_type: str):
         """Record application error."""
         errors_total.labels(component=component, error_type=error_type).inc()
@@ -239,39 +404,101 @@ def track_gemini_metrics(model: str):
     return decorator
 
 
+def track_node_metrics(name: str, node: Callable) -> Callable:
+    """Wrap a LangGraph node so every execution lands in ``workflow_node_duration_seconds``."""
+    @wraps(node)
+    async def wrapper(*args, **kwargs):
+        start_time = time.perf_counter()
+        status = "error"
+        try:
+            result = await node(*args, **kwargs)
+            status = "success"
+            return result
+        finally:
+            metrics.record_node(name, status, time.perf_counter() - start_time)
+
+    return wrapper
+
+
+def _scrape_registry() -> CollectorRegistry:
+    """Registry to expose; in multiprocess mode, one aggregating every worker process."""
+    if MULTIPROCESS_MODE:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def collect_metrics() -> bytes:
+    return generate_latest(_scrape_registry())
+
+
+def start_metrics_server(port: int):
+    """Expose metrics on their own port, for processes without an HTTP app (workflow workers)."""
+    start_http_server(port, registry=_scrape_registry())
+    logger.info(f"Prometheus metrics served on :{port}")
+
+
 async def metrics_endpoint() -> PlainTextResponse:
     """Prometheus metrics endpoint."""
     try:
-        metrics_data = generate_latest(REGISTRY)
-        return PlainTextResponse(metrics_data, media_type="text/plain")
+        metrics_data = collect_metrics()
+        return PlainTextResponse(metrics_data, media_type=CONTENT_TYPE_LATEST)
     except Exception as e:
         logger.error(f"Failed to generate metrics: {str(e)}")
         return PlainTextResponse("# Error generating metrics", status_code=500)
 
 
+# Label for requests no route matched (404s, scanners): one series, not one per path
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope) -> str:
+    """Path template of the route that handled a request (e.g. /workflow/status/{thread_id})."""
+    app = scope.get("app")
+    for route in getattr(app, "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+    return UNMATCHED_ROUTE
+
+
 # Middleware for automatic HTTP metrics collection
 class MetricsMiddleware:
-    """FastAPI middleware for automatic metrics collection."""
+    """
+    FastAPI middleware for automatic metrics collection.
+    Requests are labelled with the route template rather than the raw path, so
+    thread IDs and other path parameters do not create a series each.
+    """
 
-    def __init__(self, app):
+    def __init__(self, app, exclude_paths: tuple = ("/metrics",)):
         self.app = app
+        self.exclude_paths = exclude_paths
 
     async def __call__(self, scope, receive, send):
-        if scope["type"] != "http":
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
             await self.app(scope, receive, send)
             return
 
-        start_time = time.time()
+        start_time = time.perf_counter()
+        recorded = False
+
+        def record(status_code: int):
+            nonlocal recorded
+            recorded = True
+            metrics.record_http_request(
+                scope["method"], route_template(scope), status_code, time.perf_counter() - start_time
+            )
 
         async def send_wrapper(message):
+            # Time to response start, so long-lived SSE streams do not skew latency
             if message["type"] == "http.response.start":
-                duration = time.time() - start_time
-                method = scope["method"]
-                path = scope["path"]
-                status_code = message["status"]
-
-                metrics.record_http_request(method, path, status_code, duration)
-
+                record(message["status"])
             await send(message)
 
-        await self.app(scope, receive, send_wrapper)
\ No newline at end of file
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if not recorded:
+                record(500)
+            raise
\ No newline at end of file
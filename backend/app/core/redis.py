@@ -1,12 +1,36 @@
-"""Redis client wrapper that prefers a hosted REDIS_URL with in-memory fallback."""
+"""Redis client wrappers that prefer a hosted REDIS_URL with in-memory fallback.
+
+While Redis is unreachable both services read and write a shared, bounded
+``FallbackStore`` that honours TTLs and evicts least-recently-used keys. They
+probe Redis periodically and switch back once it answers, replaying the most
+recently used fallback keys so data written during the outage is not lost.
+"""
 
 from __future__ import annotations
 
+import asyncio
+import fnmatch
+import logging
 import os
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Iterator
+
 import redis
-from redis.exceptions import RedisError
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError, ResponseError
 
 from app.core.config import settings
+from app.core.tracing import record_span
+
+try:
+    from app.core.metrics import metrics
+    METRICS_AVAILABLE = True
+except ImportError:
+    METRICS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
 
 # Default to local Redis instance
 _DEFAULT_REDIS_URL = "redis://127.0.0.1:6379/0"
@@ -24,127 +48,524 @@ def get_redis_url() -> str:
     return _resolve_redis_url()
 
 
-class RedisService:
+class FallbackStore:
+    """In-memory stand-in for Redis strings and hashes with TTLs and an LRU memory cap.
+
+    Expired keys are dropped when touched and by a sweep that piggybacks on
+    writes at most every ``sweep_interval`` seconds. Size is approximated as
+    key plus value length. Hash values are stored as dicts.
+    """
+
+    def __init__(self, max_bytes: int | None = None, sweep_interval: float | None = None):
+        self.max_bytes = max_bytes or settings.REDIS_FALLBACK_MAX_MB * 1024 * 1024
+        self.sweep_interval = sweep_interval if sweep_interval is not None else settings.REDIS_FALLBACK_SWEEP_INTERVAL
+        # key -> (value, expires_at monotonic or None); order = least recently used first
+        self._data: OrderedDict[str, tuple[str | dict[str, str], float | None]] = OrderedDict()
+        self._bytes = 0
+        self._last_sweep = time.monotonic()
+        # Services reading and writing this store (the sync and async services share one)
+        self.services: weakref.WeakSet[_FallbackMixin] = weakref.WeakSet()
+
+        # Performance tracking
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _size(key: str, value: str | dict[str, str]) -> int:
+        if isinstance(value, dict):
+            return len(key) + sum(len(field) + len(val) for field, val in value.items())
+        return len(key) + len(value)
+
+    def _remove(self, key: str) -> tuple[str | dict[str, str], float | None] | None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= self._size(key, entry[0])
+        return entry
+
+    def _live(self, key: str) -> tuple[str | dict[str, str], float | None] | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        return entry
+
+    def _maybe_sweep(self) -> None:
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        expired = [key for key, (_, expires_at) in self._data.items() if expires_at is not None and expires_at <= now]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+
+    def get(self, key: str) -> str | None:
+        entry = self._live(key)
+        if entry is None or isinstance(entry[0], dict):
+            return None
+        self._data.move_to_end(key)
+        return entry[0]
+
+    def set(self, key: str, value: str | dict[str, str], ex: float | None = None, keep_ttl: bool = False) -> bool:
+        if not isinstance(value, dict):
+            value = str(value)
+        previous = self._remove(key)
+        if keep_ttl and previous is not None:
+            expires_at = previous[1]
+        else:
+            expires_at = time.monotonic() + ex if ex else None
+        self._data[key] = (value, expires_at)
+        self._bytes += self._size(key, value)
+        self._maybe_sweep()
+        while self._bytes > self.max_bytes and len(self._data) > 1:
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+        return True
+
+    def delete(self, key: str) -> int:
+        return 1 if self._live(key) is not None and self._remove(key) is not None else 0
+
+    def exists(self, key: str) -> bool:
+        return self._live(key) is not None
+
+    def expire(self, key: str, seconds: float) -> bool:
+        entry = self._live(key)
+        if entry is None:
+            return False
+        self._data[key] = (entry[0], time.monotonic() + seconds)
+        return True
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        new_val = int(self.get(key) or 0) + amount
+        self.set(key, str(new_val), keep_ttl=True)
+        return new_val
+
+    def hset(self, name: str, field: str, value: str) -> int:
+        entry = self._live(name)
+        current = dict(entry[0]) if entry is not None and isinstance(entry[0], dict) else {}
+        added = 0 if field in current else 1
+        current[field] = str(value)
+        self.set(name, current, keep_ttl=True)
+        return added
+
+    def hdel(self, name: str, *fields: str) -> int:
+        entry = self._live(name)
+        if entry is None or not isinstance(entry[0], dict):
+            return 0
+        current = dict(entry[0])
+        removed = sum(1 for field in fields if current.pop(field, None) is not None)
+        if current:
+            self.set(name, current, keep_ttl=True)
+        else:
+            self._remove(name)
+        return removed
+
+    def hmget(self, name: str, fields: list[str]) -> list[str | None]:
+        current = self.hgetall(name)
+        return [current.get(field) for field in fields]
+
+    def hgetall(self, name: str) -> dict[str, str]:
+        entry = self._live(name)
+        if entry is None or not isinstance(entry[0], dict):
+            return {}
+        self._data.move_to_end(name)
+        return dict(entry[0])
+
+    def keys(self, pattern: str = "*") -> list[str]:
+        return [key for key in list(self._data) if self._live(key) is not None and fnmatch.fnmatch(key, pattern)]
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._bytes = 0
+
+    def hottest(self, limit: int) -> Iterator[tuple[str, str | dict[str, str], int | None]]:
+        """Most recently used live entries as (key, value, remaining ttl seconds)."""
+        now = time.monotonic()
+        for key in reversed(list(self._data)[-limit:] if limit else []):
+            value, expires_at = self._data[key]
+            if expires_at is None:
+                yield key, value, None
+            elif expires_at > now:
+                yield key, value, max(1, int(expires_at - now))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "keys": len(self._data),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def _record_operation(command: str, status: str, started: float) -> None:
+    if METRICS_AVAILABLE:
+        metrics.record_redis_operation(command, status, time.perf_counter() - started)
+    # Only inside a trace: SSE reads and other untraced traffic record nothing
+    record_span(f"redis {command}", started, status)
+
+
+def _queue_replay(pipe: Any, key: str, value: str | dict[str, str], ttl: int | None) -> None:
+    """Queue one fallback entry on a pipeline; values other workers wrote meanwhile win."""
+    if isinstance(value, dict):
+        for field, val in value.items():
+            pipe.hsetnx(key, field, val)
+        if ttl:
+            pipe.expire(key, ttl, nx=True)
+    else:
+        pipe.set(key, value, ex=ttl, nx=True)
+
+
+class _FallbackMixin:
+    """Fallback bookkeeping shared by the sync and async services."""
+
+    _fallback_store: FallbackStore
+    _use_fallback: bool
+    _last_probe: float
+
+    def _enter_fallback(self, error: Exception) -> None:
+        if not self._use_fallback:
+            logger.warning(f"Redis unavailable ({error}); using in-memory fallback")
+        self._use_fallback = True
+        self._last_probe = time.monotonic()
+
+    def _probe_due(self) -> bool:
+        if time.monotonic() - self._last_probe < settings.REDIS_FALLBACK_PROBE_INTERVAL:
+            return False
+        self._last_probe = time.monotonic()
+        return True
+
+    def _leave_fallback(self, replayed: int) -> None:
+        # The replay put the shared store's keys back in Redis, so every service using
+        # the store switches back with this one; clearing it under a service still in
+        # fallback would make that service's writes read as missing
+        for service in list(self._fallback_store.services):
+            service._use_fallback = False
+        self._use_fallback = False
+        # Redis is authoritative again; stale copies must not resurface on the next outage
+        self._fallback_store.clear()
+        logger.info(f"Redis reachable again; left in-memory fallback (replayed {replayed} keys)")
+
+
+class RedisService(_FallbackMixin):
     """Thin Redis client with graceful degradation to an in-memory store."""
 
-    def __init__(self, redis_url: str | None = None):
+    def __init__(self, redis_url: str | None = None, fallback_store: FallbackStore | None = None):
         self._url = redis_url or _resolve_redis_url()
         self.client = self._create_client(self._url)
-        self._fallback_store: dict[str, str] = {}
+        self._fallback_store = fallback_store if fallback_store is not None else FallbackStore()
+        self._fallback_store.services.add(self)
         self._use_fallback = False
+        self._last_probe = time.monotonic()
 
     @staticmethod
     def _create_client(redis_url: str) -> redis.Redis:
         return redis.from_url(redis_url, decode_responses=True)
 
-    def get(self, key: str) -> str | None:
+    def _try_recover(self) -> bool:
+        """Probe Redis (rate-limited); on success replay hot keys and leave fallback."""
+        if not self._probe_due():
+            return False
         try:
-            if self._use_fallback:
-                return self._fallback_store.get(key)
-            return self.client.get(key)
+            self.client.ping()
+            replayed = 0
+            pipe = self.client.pipeline(transaction=False)
+            for key, value, ttl in self._fallback_store.hottest(settings.REDIS_FALLBACK_REPLAY_KEYS):
+                _queue_replay(pipe, key, value, ttl)
+                replayed += 1
+            pipe.execute()
         except RedisError:
-            self._use_fallback = True
-            return self._fallback_store.get(key)
+            return False
+        self._leave_fallback(replayed)
+        return True
 
-    def set(self, key: str, value: str, ex: int | None = None) -> bool:
+    def _execute(self, command: str, *args: Any, fallback: Callable[[], Any], **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        if self._use_fallback and not self._try_recover():
+            result = fallback()
+            _record_operation(command, "fallback", started)
+            return result
         try:
-            if self._use_fallback:
-                self._fallback_store[key] = value
-                return True
-            return self.client.set(key, value, ex=ex)
-        except RedisError:
-            self._use_fallback = True
-            self._fallback_store[key] = value
-            return True
+            result = getattr(self.client, command)(*args, **kwargs)
+        except RedisError as e:
+            self._enter_fallback(e)
+            result = fallback()
+            _record_operation(command, "error", started)
+            return result
+        _record_operation(command, "ok", started)
+        return result
+
+    def get(self, key: str) -> str | None:
+        return self._execute("get", key, fallback=lambda: self._fallback_store.get(key))
+
+    def set(self, key: str, value: str, ex: int | None = None) -> bool:
+        return self._execute("set", key, value, ex=ex, fallback=lambda: self._fallback_store.set(key, value, ex=ex))
 
     def setex(self, key: str, time: int, value: str) -> bool:
-        """Set key with expiration time; fallback ignores expiry."""
-        try:
-            if self._use_fallback:
-                self._fallback_store[key] = value
-                return True
-            return self.client.setex(key, time, value)
-        except RedisError:
-            self._use_fallback = True
-            self._fallback_store[key] = value
-            return True
+        """Set key with expiration time."""
+        return self._execute("setex", key, time, value, fallback=lambda: self._fallback_store.set(key, value, ex=time))
 
     def delete(self, key: str) -> int:
-        if self._use_fallback:
-            return 1 if self._fallback_store.pop(key, None) is not None else 0
-        try:
-            return self.client.delete(key)
-        except RedisError:
-            self._use_fallback = True
-            return 1 if self._fallback_store.pop(key, None) is not None else 0
+        return self._execute("delete", key, fallback=lambda: self._fallback_store.delete(key))
 
     def exists(self, key: str) -> bool:
-        if self._use_fallback:
-            return key in self._fallback_store
-        try:
-            return self.client.exists(key) > 0
-        except RedisError:
-            self._use_fallback = True
-            return key in self._fallback_store
+        return bool(self._execute("exists", key, fallback=lambda: self._fallback_store.exists(key)))
 
     def ping(self) -> bool:
-        try:
-            if self._use_fallback:
-                return True
-            return self.client.ping()
-        except RedisError:
-            self._use_fallback = True
-            return True
+        return self._execute("ping", fallback=lambda: True)
+
+    def hset(self, name: str, key: str, value: str) -> int:
+        return self._execute("hset", name, key, value, fallback=lambda: self._fallback_store.hset(name, key, value))
+
+    def hgetall(self, name: str) -> dict[str, str]:
+        return self._execute("hgetall", name, fallback=lambda: self._fallback_store.hgetall(name))
+
+    def scan_iter(self, match: str, count: int = 500) -> Iterator[str]:
+        """Iterate keys matching ``match`` with SCAN (never the blocking KEYS command)."""
+        if not self._use_fallback or self._try_recover():
+            seen: set[str] = set()
+            try:
+                for key in self.client.scan_iter(match=match, count=count):
+                    seen.add(key)
+                    yield key
+                return
+            except RedisError as e:
+                self._enter_fallback(e)
+            yield from (key for key in self._fallback_store.keys(match) if key not in seen)
+            return
+        yield from self._fallback_store.keys(match)
 
     def keys(self, pattern: str) -> list[str]:
-        """Get keys matching pattern."""
-        try:
-            if self._use_fallback:
-                import fnmatch
-                return [k for k in self._fallback_store.keys() if fnmatch.fnmatch(k, pattern)]
-            return self.client.keys(pattern)
-        except RedisError:
-            self._use_fallback = True
-            import fnmatch
-            return [k for k in self._fallback_store.keys() if fnmatch.fnmatch(k, pattern)]
-    
+        """Get keys matching pattern (incrementally, via SCAN)."""
+        return list(self.scan_iter(pattern))
+
     def incr(self, key: str, amount: int = 1) -> int:
         """Increment key by amount."""
-        try:
-            if self._use_fallback:
-                current = int(self._fallback_store.get(key, 0))
-                new_val = current + amount
-                self._fallback_store[key] = str(new_val)
-                return new_val
-            return self.client.incr(key, amount)
-        except RedisError:
-            self._use_fallback = True
-            current = int(self._fallback_store.get(key, 0))
-            new_val = current + amount
-            self._fallback_store[key] = str(new_val)
-            return new_val
-    
+        return self._execute("incr", key, amount, fallback=lambda: self._fallback_store.incr(key, amount))
+
     def expire(self, key: str, time: int) -> bool:
-        """Set expiration on key (ignored in fallback)."""
-        try:
-            if self._use_fallback:
-                return True  # Fallback doesn't support expiration
-            return self.client.expire(key, time)
-        except RedisError:
-            self._use_fallback = True
-            return True
+        """Set expiration on key."""
+        return self._execute("expire", key, time, fallback=lambda: self._fallback_store.expire(key, time))
 
     def flushdb(self) -> bool:
         """Clear stored keys for the active database or fallback store."""
+        def fallback() -> bool:
+            self._fallback_store.clear()
+            return True
+        return self._execute("flushdb", fallback=fallback)
+
+
+class AsyncRedisService(_FallbackMixin):
+    """Async, pooled counterpart of RedisService for use on the event loop.
+
+    Connections come from a bounded BlockingConnectionPool (callers wait for a
+    free connection instead of opening unbounded sockets), are health-checked
+    before reuse, and honour the configured socket/connect timeouts. Pools are
+    bound to the event loop that created them, so one is created lazily per loop.
+    """
+
+    def __init__(self, redis_url: str | None = None, fallback_store: FallbackStore | None = None):
+        self._url = redis_url or _resolve_redis_url()
+        self._client: aioredis.Redis | None = None
+        self._client_loop: asyncio.AbstractEventLoop | None = None
+        # Share the sync service's fallback so both views agree when Redis is down
+        self._fallback_store = fallback_store if fallback_store is not None else FallbackStore()
+        self._fallback_store.services.add(self)
+        self._use_fallback = False
+        self._last_probe = time.monotonic()
+
+    def _create_client(self) -> aioredis.Redis:
+        pool = aioredis.BlockingConnectionPool.from_url(
+            self._url,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+            retry_on_timeout=True,
+            decode_responses=True,
+        )
+        return aioredis.Redis(connection_pool=pool)
+
+    @property
+    def client(self) -> aioredis.Redis:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = self._create_client()
+            self._client_loop = loop
+        return self._client
+
+    async def _try_recover(self) -> bool:
+        """Probe Redis (rate-limited); on success replay hot keys and leave fallback."""
+        if not self._probe_due():
+            return False
         try:
-            if self._use_fallback:
-                self._fallback_store.clear()
-                return True
-            return self.client.flushdb()
-        except RedisError:
-            self._use_fallback = True
+            await self.client.ping()
+            replayed = 0
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value, ttl in self._fallback_store.hottest(settings.REDIS_FALLBACK_REPLAY_KEYS):
+                    _queue_replay(pipe, key, value, ttl)
+                    replayed += 1
+                await pipe.execute()
+        except (RedisError, OSError):
+            return False
+        self._leave_fallback(replayed)
+        return True
+
+    async def _execute(self, command: str, *args: Any, fallback: Callable[[], Any], **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        if self._use_fallback and not await self._try_recover():
+            result = fallback()
+            _record_operation(command, "fallback", started)
+            return result
+        try:
+            result = await getattr(self.client, command)(*args, **kwargs)
+        except (RedisError, OSError) as e:
+            self._enter_fallback(e)
+            result = fallback()
+            _record_operation(command, "error", started)
+            return result
+        _record_operation(command, "ok", started)
+        return result
+
+    async def get(self, key: str) -> str | None:
+        return await self._execute("get", key, fallback=lambda: self._fallback_store.get(key))
+
+    async def set(self, key: str, value: str, ex: int | None = None) -> bool:
+        return await self._execute(
+            "set", key, value, ex=ex,
+            fallback=lambda: self._fallback_store.set(key, value, ex=ex),
+        )
+
+    async def setex(self, key: str, time: int, value: str) -> bool:
+        """Set key with expiration time."""
+        return await self._execute(
+            "setex", key, time, value,
+            fallback=lambda: self._fallback_store.set(key, value, ex=time),
+        )
+
+    async def delete(self, key: str) -> int:
+        return await self._execute("delete", key, fallback=lambda: self._fallback_store.delete(key))
+
+    async def exists(self, key: str) -> bool:
+        result = await self._execute("exists", key, fallback=lambda: self._fallback_store.exists(key))
+        return bool(result)
+
+    async def ping(self) -> bool:
+        return await self._execute("ping", fallback=lambda: True)
+
+    async def hset(self, name: str, key: str, value: str) -> int:
+        return await self._execute(
+            "hset", name, key, value,
+            fallback=lambda: self._fallback_store.hset(name, key, value),
+        )
+
+    async def hgetall(self, name: str) -> dict[str, str]:
+        return await self._execute("hgetall", name, fallback=lambda: self._fallback_store.hgetall(name))
+
+    async def hmget(self, name: str, fields: list[str]) -> list[str | None]:
+        return await self._execute("hmget", name, fields, fallback=lambda: self._fallback_store.hmget(name, fields))
+
+    async def hdel(self, name: str, *fields: str) -> int:
+        return await self._execute("hdel", name, *fields, fallback=lambda: self._fallback_store.hdel(name, *fields))
+
+    async def hset_many(self, name: str, mapping: dict[str, str], ex: int | None = None) -> None:
+        """Set several hash fields and (optionally) the key's TTL in one atomic round trip."""
+        def fallback() -> None:
+            for field, value in mapping.items():
+                self._fallback_store.hset(name, field, value)
+            if ex:
+                self._fallback_store.expire(name, ex)
+
+        started = time.perf_counter()
+        if self._use_fallback and not await self._try_recover():
+            fallback()
+            _record_operation("hset_many", "fallback", started)
+            return
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.hset(name, mapping=mapping)
+                if ex:
+                    pipe.expire(name, ex)
+                await pipe.execute()
+        except (RedisError, OSError) as e:
+            self._enter_fallback(e)
+            fallback()
+            _record_operation("hset_many", "error", started)
+            return
+        _record_operation("hset_many", "ok", started)
+
+    async def scan_iter(self, match: str, count: int = 500) -> AsyncIterator[str]:
+        """Iterate keys matching ``match`` with SCAN (never the blocking KEYS command)."""
+        if not self._use_fallback or await self._try_recover():
+            seen: set[str] = set()
+            try:
+                async for key in self.client.scan_iter(match=match, count=count):
+                    seen.add(key)
+                    yield key
+                return
+            except (RedisError, OSError) as e:
+                self._enter_fallback(e)
+            for key in self._fallback_store.keys(match):
+                if key not in seen:
+                    yield key
+            return
+        for key in self._fallback_store.keys(match):
+            yield key
+
+    async def keys(self, pattern: str) -> list[str]:
+        """Get keys matching pattern (incrementally, via SCAN)."""
+        return [key async for key in self.scan_iter(pattern)]
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        """Increment key by amount."""
+        return await self._execute("incr", key, amount, fallback=lambda: self._fallback_store.incr(key, amount))
+
+    async def expire(self, key: str, time: int) -> bool:
+        """Set expiration on key."""
+        return await self._execute("expire", key, time, fallback=lambda: self._fallback_store.expire(key, time))
+
+    async def flushdb(self) -> bool:
+        """Clear stored keys for the active database or fallback store."""
+        def fallback() -> bool:
             self._fallback_store.clear()
             return True
+        return await self._execute("flushdb", fallback=fallback)
+
+    async def eval(self, script: str, keys: list[str], args: list[Any], fallback: Callable[[], Any]) -> Any:
+        """Run a Lua script atomically; ``fallback`` emulates it when Redis is unavailable."""
+        started = time.perf_counter()
+        if self._use_fallback and not await self._try_recover():
+            result = fallback()
+            _record_operation("eval", "fallback", started)
+            return result
+        try:
+            result = await self.client.eval(script, len(keys), *keys, *args)
+        except ResponseError:
+            # Script errors are bugs, not connectivity problems: don't switch to fallback
+            raise
+        except (RedisError, OSError) as e:
+            self._enter_fallback(e)
+            result = fallback()
+            _record_operation("eval", "error", started)
+            return result
+        _record_operation("eval", "ok", started)
+        return result
+
+    async def close(self) -> None:
+        """Release pooled connections for the current loop."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
 
 
 redis_service = RedisService()
+async_redis_service = AsyncRedisService(fallback_store=redis_service._fallback_store)
@@ -0,0 +1,61 @@
+"""
+Fast JSON encoding shared by Redis storage, the event bus, SSE and API responses.
+
+Uses orjson when installed (stdlib json otherwise). Pydantic models are dumped
+with ``model_dump(mode="json")`` and anything else unknown falls back to
+``str``, matching the ``default=str`` the event bus always used.
+"""
+import json
+from typing import Any, Optional, Union
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _default(obj: Any) -> Any:
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+def dumps(value: Any) -> bytes:
+    """Compact JSON bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=_default, separators=(",", ":")).encode()
+
+
+def dumps_str(value: Any) -> str:
+    return dumps(value).decode()
+
+
+def loads(raw: Union[str, bytes]) -> Any:
+    return orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+
+
+def to_jsonable(value: Any) -> Any:
+    """Convert Pydantic models (at any depth) and other non-JSON types into plain JSON data."""
+    return loads(dumps(value))
+
+
+def sse_event(event_type: str, raw_data: str, event_id: Optional[str] = None) -> str:
+    """
+    Build an SSE frame for an event whose data is already JSON text, without re-encoding it.
+    Compact JSON never contains raw newlines, so it is safe as a single ``data:`` line.
+    """
+    frame = f'data: {{"type":{dumps_str(event_type)},"data":{raw_data}}}\n\n'
+    return f"id: {event_id}\n{frame}" if event_id else frame
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with ``dumps``; returning it directly also skips FastAPI's encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
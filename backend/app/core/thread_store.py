@@ -0,0 +1,196 @@
+"""
+Per-thread workflow artifacts stored as fields of one Redis hash.
+
+Everything a workflow thread produces (state snapshots, ingredients, choices,
+concepts, packages...) lives in ``thread:{thread_id}``: related fields are read
+with one HMGET and written with one pipelined HSET + EXPIRE, and the whole
+thread expires together.
+
+Values are compact JSON (see ``app.core.serialization``); large values are compressed
+with zstd (zlib without ``zstandard``). Artifacts that embed another artifact
+(completion payloads, the project package) store ``artifact_ref(...)`` in its
+place, so a package is kept once and resolved on read.
+"""
+import base64
+import logging
+import zlib
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from app.core.config import settings
+from app.core.redis import async_redis_service
+from app.core.serialization import dumps, loads
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Compressed values are stored as prefix + base64(compressed json); JSON text never starts with a letter
+# other than true/false/null, so the prefixes are unambiguous
+COMPRESSED_PREFIX = "z:"
+ZSTD_PREFIX = "zs:"
+
+# Marker for a value stored in another field of the same thread hash
+REF_KEY = "$artifact"
+# References may point at references (e.g. project -> final -> essential package), up to this depth
+MAX_REF_DEPTH = 3
+
+if ZSTD_AVAILABLE:
+    _zstd_compressor = zstandard.ZstdCompressor(level=3)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+
+
+class Artifact(str, Enum):
+    """Fields of the per-thread artifact hash."""
+    WORKFLOW_STATE = "workflow_state"
+    INGREDIENTS = "ingredients"
+    CLARIFICATION = "clarification"
+    GOALS = "goals"
+    CHOICES = "choices"
+    EVALUATION = "evaluation"
+    OPTION_SELECTION = "option_selection"
+    CONCEPTS = "concepts"
+    CONCEPT_SELECTION = "concept_selection"
+    ASSEMBLY = "assembly"
+    PACKAGE_ESSENTIAL = "package_essential"
+    FINAL_PACKAGE = "final_package"
+    PROJECT_PACKAGE = "project_package"
+    ESG_METRICS = "esg_metrics"
+    TOOLS_MATERIALS = "tools_materials"
+    EXPORTS = "exports"
+    ANALYTICS = "analytics"
+    SHARING = "sharing"
+    WORKFLOW_COMPLETE = "workflow_complete"
+    WORKFLOW_ERROR = "workflow_error"
+
+
+ArtifactName = Union[Artifact, str]
+
+
+def _field(name: ArtifactName) -> str:
+    return name.value if isinstance(name, Artifact) else name
+
+
+def artifact_ref(name: ArtifactName) -> Dict[str, str]:
+    """Placeholder for another artifact of the same thread, replaced by its value on read."""
+    return {REF_KEY: _field(name)}
+
+
+def _ref_target(value: Any) -> Optional[str]:
+    if isinstance(value, dict) and len(value) == 1 and isinstance(value.get(REF_KEY), str):
+        return value[REF_KEY]
+    return None
+
+
+def _iter_refs(value: Any) -> Iterator[str]:
+    target = _ref_target(value)
+    if target is not None:
+        yield target
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _iter_refs(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _iter_refs(item)
+
+
+def _resolve_refs(value: Any, targets: Dict[str, Any], depth: int = 0) -> Any:
+    target = _ref_target(value)
+    if target is not None:
+        return _resolve_refs(targets.get(target), targets, depth + 1) if depth < MAX_REF_DEPTH else None
+    if isinstance(value, dict):
+        return {key: _resolve_refs(item, targets, depth) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_resolve_refs(item, targets, depth) for item in value]
+    return value
+
+
+def encode_artifact(value: Any) -> str:
+    """Serialize a value, compressing it when it is large."""
+    raw = dumps(value)
+    threshold = settings.THREAD_ARTIFACT_COMPRESS_MIN_BYTES
+    if threshold and len(raw) >= threshold:
+        if ZSTD_AVAILABLE:
+            prefix, compressed = ZSTD_PREFIX, _zstd_compressor.compress(raw)
+        else:
+            prefix, compressed = COMPRESSED_PREFIX, zlib.compress(raw, 6)
+        encoded = prefix + base64.b64encode(compressed).decode("ascii")
+        if len(encoded) < len(raw):
+            return encoded
+    return raw.decode()
+
+
+def decode_artifact(raw: Any) -> Any:
+    """Inverse of ``encode_artifact``; missing or undecodable values read as None."""
+    if isinstance(raw, bytes):
+        raw = raw.decode()
+    if not isinstance(raw, str) or not raw:
+        return None
+    try:
+        if raw.startswith(ZSTD_PREFIX):
+            if not ZSTD_AVAILABLE:
+                logger.warning("Thread artifact is zstd-compressed but zstandard is not installed")
+                return None
+            return loads(_zstd_decompressor.decompress(base64.b64decode(raw[len(ZSTD_PREFIX):])))
+        if raw.startswith(COMPRESSED_PREFIX):
+            return loads(zlib.decompress(base64.b64decode(raw[len(COMPRESSED_PREFIX):])))
+        return loads(raw)
+    except Exception as e:
+        logger.warning(f"Undecodable thread artifact: {str(e)}")
+        return None
+
+
+class ThreadArtifacts:
+    """Typed access to one thread's artifact hash."""
+
+    def __init__(self, thread_id: str, service=None, ttl: Optional[int] = None):
+        self.thread_id = thread_id
+        self.key = f"thread:{thread_id}"
+        self.service = service or async_redis_service
+        self.ttl = ttl or settings.THREAD_ARTIFACT_TTL
+
+    async def _fetch(self, fields: List[str]) -> List[Any]:
+        values = await self.service.hmget(self.key, fields)
+        if not isinstance(values, list):
+            values = [None] * len(fields)
+        return [decode_artifact(value) for value in values]
+
+    async def get(self, name: ArtifactName, default: Any = None) -> Any:
+        value = (await self.get_many(name))[name]
+        return default if value is None else value
+
+    async def get_many(self, *names: ArtifactName) -> Dict[ArtifactName, Any]:
+        """
+        Read several artifacts in one round trip, keyed as requested; missing ones map to None.
+        References to artifacts that were not requested cost one more HMGET per level.
+        """
+        fields = [_field(name) for name in names]
+        loaded = dict(zip(fields, await self._fetch(fields)))
+
+        targets = dict(loaded)
+        for _ in range(MAX_REF_DEPTH):
+            missing = sorted({ref for value in targets.values() for ref in _iter_refs(value)} - targets.keys())
+            if not missing:
+                break
+            targets.update(zip(missing, await self._fetch(missing)))
+        return {name: _resolve_refs(loaded[field], targets) for name, field in zip(names, fields)}
+
+    async def set(self, name: ArtifactName, value: Any) -> None:
+        await self.set_many({name: value})
+
+    async def set_many(self, values: Dict[ArtifactName, Any]) -> None:
+        """Write several artifacts and refresh the thread TTL in one pipelined call."""
+        mapping = {_field(name): encode_artifact(value) for name, value in values.items()}
+        await self.service.hset_many(self.key, mapping, ex=self.ttl)
+
+    async def delete(self, *names: ArtifactName) -> int:
+        return await self.service.hdel(self.key, *[_field(name) for name in names])
+
+    async def clear(self) -> int:
+        """Drop every artifact of the thread at once."""
+        return await self.service.delete(self.key)
+
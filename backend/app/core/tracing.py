@@ -0,0 +1,318 @@
+"""
+Lightweight tracing for workflow jobs, LangGraph nodes, Gemini calls and Redis.
+
+The current span lives in a ContextVar, so it follows awaits and is copied into
+tasks started with ``asyncio.create_task``; queued jobs carry their span
+context across the queue (``Job.trace``), so worker spans join the trace of the
+request that enqueued them. Spans inherit their parent's ``thread_id``
+attribute, which is how traces are looked up per workflow.
+
+Exporters (TRACING_EXPORTER):
+- none: nothing is recorded; ``span()`` only checks a setting (default)
+- memory: recent traces kept in-process (GET /workflow/traces/{thread_id})
+- jsonl: finished spans appended to TRACING_JSONL_PATH, one JSON object per line
+- otel: spans go to OpenTelemetry when installed (SDK and exporter are set up
+  through the usual OTEL_* environment)
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+
+try:
+    from opentelemetry import propagate as otel_propagate
+    from opentelemetry import trace as otel_trace
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+TRACER_NAME = "orbit.workflow"
+
+
+@dataclass
+class Span:
+    """One timed operation; ``parent_id`` links it into its trace."""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    start_time: float = field(default_factory=time.time)
+    duration_ms: Optional[float] = None
+    status: str = "ok"
+    error: Optional[str] = None
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def finish(self, status: str = "ok", error: Optional[str] = None, duration: Optional[float] = None) -> None:
+        self.duration_ms = (time.perf_counter() - self._started if duration is None else duration) * 1000
+        self.status = status
+        self.error = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "attributes": self.attributes,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Returned when tracing is off, so callers can set attributes unconditionally."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+class _OTelSpan:
+    def __init__(self, otel_span):
+        self._span = otel_span
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self._span.set_attribute(key, _otel_value(value))
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class MemoryExporter:
+    """Keeps the most recent traces in-process, indexed by workflow thread."""
+
+    def __init__(self, max_traces: Optional[int] = None):
+        self.max_traces = max_traces or settings.TRACING_MEMORY_MAX_TRACES
+        self._traces: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._threads: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    evicted, _ = self._traces.popitem(last=False)
+                    self._forget(evicted)
+            spans.append(span.to_dict())
+            thread_id = span.attributes.get("thread_id")
+            if thread_id:
+                trace_ids = self._threads.setdefault(thread_id, [])
+                if span.trace_id not in trace_ids:
+                    trace_ids.append(span.trace_id)
+
+    def _forget(self, trace_id: str) -> None:
+        for thread_id, trace_ids in list(self._threads.items()):
+            if trace_id in trace_ids:
+                trace_ids.remove(trace_id)
+                if not trace_ids:
+                    del self._threads[thread_id]
+
+    def get_trace(self, trace_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return sorted(self._traces.get(trace_id, []), key=lambda span: span["start_time"])
+
+    def get_thread_traces(self, thread_id: str) -> List[Dict[str, Any]]:
+        """Every retained trace that touched this workflow thread, oldest first."""
+        with self._lock:
+            trace_ids = list(self._threads.get(thread_id, []))
+        return [{"trace_id": trace_id, "spans": self.get_trace(trace_id)} for trace_id in trace_ids]
+
+
+class JSONLExporter:
+    """Appends finished spans to a file for offline analysis."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.TRACING_JSONL_PATH
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        try:
+            with self._lock, open(self.path, "a") as handle:
+                handle.write(line + "\n")
+        except OSError as e:
+            logger.warning(f"Failed to write span to {self.path}: {str(e)}")
+
+
+_exporter = None
+_configured_backend: Optional[str] = None
+
+
+def configure(backend: Optional[str] = None, exporter=None) -> None:
+    """(Re)select the tracing backend; ``exporter`` overrides the one built for it."""
+    global _exporter, _configured_backend
+    backend = backend or settings.TRACING_EXPORTER
+    if backend == "otel" and not OTEL_AVAILABLE:
+        logger.warning("TRACING_EXPORTER=otel but opentelemetry is not installed; tracing disabled")
+        backend = "none"
+    if exporter is None:
+        exporter = {"memory": MemoryExporter, "jsonl": JSONLExporter}.get(backend, lambda: None)()
+    _exporter, _configured_backend = exporter, backend
+
+
+def _backend() -> str:
+    if _configured_backend is None:
+        configure()
+    return _configured_backend
+
+
+def get_exporter():
+    """The active native exporter (None when tracing is off or delegated to OpenTelemetry)."""
+    _backend()
+    return _exporter
+
+
+def _otel_value(value: Any) -> Any:
+    return value if isinstance(value, (str, bool, int, float)) else str(value)
+
+
+@contextmanager
+def span(name: str, parent: Optional[Dict[str, str]] = None, child_only: bool = False, **attributes: Any) -> Iterator[Any]:
+    """
+    Time a block as a span, nested under the current span (or under ``parent``,
+    a context from ``inject()``). ``child_only`` spans are skipped outside a
+    trace, for operations too frequent to be worth a trace of their own.
+    """
+    backend = _backend()
+    if backend == "none":
+        yield NOOP_SPAN
+        return
+
+    if backend == "otel":
+        if child_only and not parent and not otel_trace.get_current_span().get_span_context().is_valid:
+            yield NOOP_SPAN
+            return
+        context = otel_propagate.extract(parent) if parent else None
+        clean = {key: _otel_value(value) for key, value in attributes.items() if value is not None}
+        with otel_trace.get_tracer(TRACER_NAME).start_as_current_span(name, context=context, attributes=clean) as otel_span:
+            yield _OTelSpan(otel_span)
+        return
+
+    current = _current_span.get()
+    if child_only and current is None and not parent:
+        yield NOOP_SPAN
+        return
+    new_span = _start_span(name, current, parent, attributes)
+    token = _current_span.set(new_span)
+    try:
+        yield new_span
+    except BaseException as e:
+        new_span.finish("cancelled" if isinstance(e, asyncio.CancelledError) else "error", f"{type(e).__name__}: {e}")
+        raise
+    else:
+        new_span.finish()
+    finally:
+        _current_span.reset(token)
+        _export(new_span)
+
+
+def _start_span(name: str, current: Optional[Span], parent: Optional[Dict[str, str]], attributes: Dict[str, Any]) -> Span:
+    if parent and parent.get("trace_id"):
+        trace_id, parent_id = parent["trace_id"], parent.get("span_id")
+        inherited = {"thread_id": parent["thread_id"]} if parent.get("thread_id") else {}
+    elif current is not None:
+        trace_id, parent_id = current.trace_id, current.span_id
+        inherited = {"thread_id": current.attributes["thread_id"]} if "thread_id" in current.attributes else {}
+    else:
+        trace_id, parent_id, inherited = uuid.uuid4().hex, None, {}
+    inherited.update({key: value for key, value in attributes.items() if value is not None})
+    return Span(name=name, trace_id=trace_id, span_id=uuid.uuid4().hex[:16], parent_id=parent_id, attributes=inherited)
+
+
+def _export(finished: Span) -> None:
+    if _exporter is None:
+        return
+    try:
+        _exporter.export(finished)
+    except Exception as e:
+        logger.warning(f"Failed to export span {finished.name}: {str(e)}")
+
+
+def record_span(name: str, started: float, status: str = "ok", **attributes: Any) -> None:
+    """
+    Record an already-finished operation (``started`` from ``time.perf_counter()``)
+    as a child of the current span; a no-op outside a trace.
+    """
+    backend = _backend()
+    if backend == "otel":
+        _record_otel_span(name, started, status, attributes)
+        return
+    if backend == "none":
+        return
+    current = _current_span.get()
+    if current is None:
+        return
+    duration = time.perf_counter() - started
+    finished = _start_span(name, current, None, attributes)
+    finished.start_time = time.time() - duration
+    finished.finish(status, duration=duration)
+    _export(finished)
+
+
+def _record_otel_span(name: str, started: float, status: str, attributes: Dict[str, Any]) -> None:
+    if not otel_trace.get_current_span().get_span_context().is_valid:
+        return
+    duration_ns = int((time.perf_counter() - started) * 1e9)
+    end_ns = time.time_ns()
+    clean = {key: _otel_value(value) for key, value in attributes.items() if value is not None}
+    clean["status"] = status
+    otel_span = otel_trace.get_tracer(TRACER_NAME).start_span(name, start_time=end_ns - duration_ns, attributes=clean)
+    otel_span.end(end_time=end_ns)
+
+
+def inject() -> Optional[Dict[str, str]]:
+    """Serializable context of the current span, for work handed to another process."""
+    backend = _backend()
+    if backend == "otel":
+        carrier: Dict[str, str] = {}
+        otel_propagate.inject(carrier)
+        return carrier or None
+    current = _current_span.get() if backend != "none" else None
+    if current is None:
+        return None
+    context = {"trace_id": current.trace_id, "span_id": current.span_id}
+    if "thread_id" in current.attributes:
+        context["thread_id"] = str(current.attributes["thread_id"])
+    return context
+
+
+def traced(name: str, **attributes: Any) -> Callable:
+    """Decorator: run an async function inside ``span(name)``."""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name, **attributes):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_node(name: str, node: Callable) -> Callable:
+    """Wrap a LangGraph node in a span tagged with the workflow thread."""
+    @wraps(node)
+    async def wrapper(state, *args, **kwargs):
+        with span(f"node {name}", node=name, thread_id=getattr(state, "thread_id", None)):
+            return await node(state, *args, **kwargs)
+
+    return wrapper
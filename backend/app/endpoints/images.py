@@ -1,18 +1,28 @@
 """
 Image serving endpoint for generated concept images.
 Serves both real AI-generated images and placeholder images.
-OPTIMIZED: Uses in-memory cache + HTTP caching + filesystem storage.
+OPTIMIZED: Uses the content-addressed image store + HTTP caching.
 """
-from fastapi import APIRouter, HTTPException, Response
-from fastapi.responses import StreamingResponse, FileResponse
-from app.core.redis import redis_service
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from app.core.redis import async_redis_service as redis_service
+from app.core.image_store import get_image_store, MEDIA_TYPES
+from app.core.image_variants import (
+    AVIF_AVAILABLE,
+    MAX_DIMENSION,
+    MIN_DIMENSION,
+    VariantSpec,
+    render_variant,
+)
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import asyncio
 import json
 import logging
 from io import BytesIO
 from PIL import Image, ImageDraw, ImageFont
 import base64
 from functools import lru_cache
-from pathlib import Path
 import hashlib
 import os
 
@@ -24,10 +34,7 @@ MEDIA_TYPE_PNG = "image/png"
 MEDIA_TYPE_JPEG = "image/jpeg"
 MEDIA_TYPE_WEBP = "image/webp"
 CACHE_CONTROL_HEADER = "public, max-age=3600"  # 1 hour browser cache
-
-# Image cache directory
-CACHE_DIR = Path("/tmp/orbit_image_cache")
-CACHE_DIR.mkdir(exist_ok=True)
+PLACEHOLDER_CACHE_SIZE = 128
 
 
 def create_placeholder_image(style: str, title: str, width: int = 512, height: int = 512) -> BytesIO:
@@ -110,6 +117,12 @@ def create_placeholder_image(style: str, title: str, width: int = 512, height: i
     return img_byte_arr
 
 
+@lru_cache(maxsize=PLACEHOLDER_CACHE_SIZE)
+def render_placeholder_png(style: str, title: str, width: int = 512, height: int = 512) -> bytes:
+    """Memoized PNG bytes for a placeholder; the same (style, title, size) is drawn once."""
+    return create_placeholder_image(style, title, width, height).getvalue()
+
+
 @router.options("/{image_id}")
 async def options_image(image_id: str):
     """Handle CORS preflight for image requests"""
@@ -123,95 +136,280 @@ async def options_image(image_id: str):
         }
     )
 
+HOT_SET_MAX_BYTES = 64 * 1024 * 1024
+HOT_SET_MAX_ITEM_BYTES = 4 * 1024 * 1024
+
+
+@dataclass
+class ImageRepresentation:
+    """Encoded bytes for one (image, variant, format) triple plus their strong ETag."""
+    etag: str
+    data: bytes
+    media_type: str
+
+
+class HotImageSet:
+    """Byte-capped in-memory LRU of the most requested image representations."""
+
+    def __init__(self, max_bytes: int = HOT_SET_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[Tuple[str, str, str], ImageRepresentation]" = OrderedDict()
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[ImageRepresentation]:
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(key)
+        return item
+
+    def put(self, key: Tuple[str, str, str], item: ImageRepresentation):
+        if len(item.data) > HOT_SET_MAX_ITEM_BYTES:
+            return
+        previous = self._items.pop(key, None)
+        if previous is not None:
+            self.total_bytes -= len(previous.data)
+        self._items[key] = item
+        self.total_bytes += len(item.data)
+        while self.total_bytes > self.max_bytes and self._items:
+            _key, evicted = self._items.popitem(last=False)
+            self.total_bytes -= len(evicted.data)
+
+
+hot_images = HotImageSet()
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """Pick the best output format the client accepts (AVIF > WebP > JPEG)."""
+    if not accept:
+        return "webp"
+    accepted = {}
+    for part in accept.lower().split(","):
+        media_range, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[media_range.strip()] = q
+
+    if AVIF_AVAILABLE and accepted.get("image/avif", 0) > 0:
+        return "avif"
+    if accepted.get("image/webp", 0) > 0:
+        return "webp"
+    if accepted.get("image/jpeg", 0) > 0:
+        return "jpeg"
+    # Wildcards (*/*, image/*) get our stored default
+    return "webp"
+
+
+def _etag_for(digest: str, fmt: str, source_format: str, variant: str = "") -> str:
+    # Strong validator: one per distinct byte representation
+    if variant:
+        return f'"{digest}-{variant}-{fmt}"'
+    return f'"{digest}"' if fmt == source_format else f'"{digest}-{fmt}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates
+
+
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range; returns inclusive (start, end) or None if unsatisfiable."""
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        raise ValueError("Unsupported range")
+    start_s, _, end_s = spec.strip().partition("-")
+    if not start_s:
+        # Suffix range: last N bytes
+        length = int(end_s)
+        if length <= 0:
+            return None
+        return max(size - length, 0), size - 1
+    start = int(start_s)
+    end = int(end_s) if end_s else size - 1
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def _base_headers(etag: str) -> Dict[str, str]:
+    return {
+        "Cache-Control": CACHE_CONTROL_HEADER,
+        "ETag": etag,
+        "Vary": "Accept",
+        "Accept-Ranges": "bytes",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, OPTIONS",
+    }
+
+
+def _image_response(request: Request, representation: ImageRepresentation) -> Response:
+    """Build a 200/206/304/416 response honouring conditional and range headers."""
+    headers = _base_headers(representation.etag)
+
+    if _etag_matches(request.headers.get("if-none-match"), representation.etag):
+        return Response(status_code=304, headers=headers)
+
+    data = representation.data
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == representation.etag):
+        try:
+            byte_range = _parse_range(range_header, len(data))
+        except ValueError:
+            # Unparseable or multi-range header: ignore it and serve the full image (RFC 9110)
+            return Response(content=data, media_type=representation.media_type, headers=headers)
+        if byte_range is None:
+            headers["Content-Range"] = f"bytes */{len(data)}"
+            return Response(status_code=416, headers=headers)
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+        return Response(content=data[start:end + 1], status_code=206, media_type=representation.media_type, headers=headers)
+
+    return Response(content=data, media_type=representation.media_type, headers=headers)
+
+
+def _encode_webp(img: Image.Image, **save_kwargs) -> bytes:
+    buffer = BytesIO()
+    img.save(buffer, "WEBP", **save_kwargs)
+    return buffer.getvalue()
+
+
+def _decode_to_webp(image_bytes: bytes) -> bytes:
+    # Convert to WebP for compression (50-80% smaller!)
+    return _encode_webp(Image.open(BytesIO(image_bytes)), quality=85, optimize=True)
+
+
+def _placeholder_webp(style: str, title: str) -> bytes:
+    return _encode_webp(Image.open(BytesIO(render_placeholder_png(style, title))), quality=85)
+
+
+async def _store_from_metadata(image_id: str) -> Optional[Dict[str, str]]:
+    """Materialize an image from Redis metadata (legacy base64 or placeholder) into the store."""
+    image_key = f"image:{image_id}"
+    image_data_str = await redis_service.get(image_key)
+    
+    if not image_data_str:
+        logger.warning(f"Image not found in Redis: {image_id}")
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    image_data = json.loads(image_data_str)
+    
+    # Check if we have actual image data
+    if image_data.get("base64_data"):
+        # Decode base64 ONCE and store
+        logger.info(f"Decoding and caching image: {image_id}")
+        image_bytes = base64.b64decode(image_data["base64_data"])
+        webp_bytes = await asyncio.to_thread(_decode_to_webp, image_bytes)
+    
+    elif image_data.get("url"):
+        return {"redirect": image_data["url"]}
+    
+    else:
+        # Create and serve placeholder (also stored)
+        style = image_data.get("style", "default")
+        title = image_data.get("title", "Concept")
+        
+        logger.info(f"Generating placeholder for: {image_id}")
+        webp_bytes = await asyncio.to_thread(_placeholder_webp, style, title)
+
+    digest = await get_image_store().put_image(image_id, webp_bytes)
+    logger.info(f"✓ Stored in image store: {image_id}")
+    return {"hash": digest, "format": "webp"}
+
+
+async def _load_representation(
+    ref: Dict[str, str], image_id: str, fmt: str, spec: VariantSpec = VariantSpec()
+) -> Optional[ImageRepresentation]:
+    """Load (or render and persist) the requested format/size of a stored image."""
+    image_store = get_image_store()
+    digest, source_format = ref["hash"], ref["format"]
+    etag = _etag_for(digest, fmt, source_format, spec.key)
+
+    if fmt == source_format and spec.is_original:
+        stored = await image_store.get_image(image_id)
+        data = stored.data if stored else None
+    else:
+        data = await image_store.get_variant(digest, fmt, spec.key)
+        if data is None:
+            source = await image_store.get_image(image_id)
+            if source is None:
+                return None
+            data = await asyncio.to_thread(render_variant, source.data, fmt, spec)
+            await image_store.put_variant(digest, fmt, data, spec.key)
+
+    if data is None:
+        return None
+    return ImageRepresentation(etag=etag, data=data, media_type=MEDIA_TYPES[fmt])
+
+
 @router.get("/{image_id}")
-async def get_image(image_id: str):
+async def get_image(
+    image_id: str,
+    request: Request,
+    w: Optional[int] = Query(None, ge=MIN_DIMENSION, le=MAX_DIMENSION, description="Max width in pixels"),
+    h: Optional[int] = Query(None, ge=MIN_DIMENSION, le=MAX_DIMENSION, description="Max height in pixels"),
+    q: Optional[int] = Query(None, ge=1, le=100, description="Encoder quality"),
+):
     """
-    OPTIMIZED: Serve image with in-memory cache + HTTP caching + compression.
-    - Uses LRU cache for decoded images
-    - Adds HTTP caching headers (1 hour)
-    - Compresses to WebP for smaller size
-    - Falls back to filesystem cache
+    OPTIMIZED: Serve image from the content-addressed image store + HTTP caching.
+    - In-memory hot set for the most requested representations
+    - Strong content-hash ETags with If-None-Match (304) and Range (206) support
+    - Accept-based format negotiation (AVIF/WebP/JPEG), variants cached in the store
+    - Responsive sizes via ?w=/?h= (fit within the box, never upscaled) and ?q=
+    - Falls back to Redis metadata (legacy base64 or placeholder)
     - CORS enabled for canvas usage
     """
     try:
-        # Check filesystem cache first (FAST!)
-        cache_file = CACHE_DIR / f"{image_id}.webp"
-        if cache_file.exists():
-            logger.info(f"⚡ Cache HIT (filesystem): {image_id}")
-            return FileResponse(
-                cache_file,
-                media_type=MEDIA_TYPE_WEBP,
-                headers={
-                    "Cache-Control": CACHE_CONTROL_HEADER,
-                    "ETag": f'"{image_id}"',
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Methods": "GET, OPTIONS",
-                }
-            )
-        
-        # Get image metadata from Redis (lightweight - just metadata now)
-        image_key = f"image:{image_id}"
-        image_data_str = redis_service.get(image_key)
-        
-        if not image_data_str:
-            logger.warning(f"Image not found in Redis: {image_id}")
-            raise HTTPException(status_code=404, detail="Image not found")
-        
-        image_data = json.loads(image_data_str)
-        
-        # Check if we have actual image data
-        if image_data.get("base64_data"):
-            # Decode base64 ONCE and cache
-            logger.info(f"Decoding and caching image: {image_id}")
-            image_bytes = base64.b64decode(image_data["base64_data"])
-            
-            # Convert to WebP for compression (50-80% smaller!)
-            img = Image.open(BytesIO(image_bytes))
-            
-            # Save to filesystem cache as WebP
-            img.save(cache_file, "WEBP", quality=85, optimize=True)
-            logger.info(f"✓ Cached to filesystem: {cache_file}")
-            
-            # Serve from cache
-            return FileResponse(
-                cache_file,
-                media_type=MEDIA_TYPE_WEBP,
-                headers={
-                    "Cache-Control": CACHE_CONTROL_HEADER,
-                    "ETag": f'"{image_id}"',
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Methods": "GET, OPTIONS",
-                }
-            )
-        
-        elif image_data.get("url"):
-            # Return redirect to external URL
-            from fastapi.responses import RedirectResponse
-            return RedirectResponse(url=image_data["url"])
-        
-        else:
-            # Create and serve placeholder (also cached)
-            style = image_data.get("style", "default")
-            title = image_data.get("title", "Concept")
-            
-            logger.info(f"Generating placeholder for: {image_id}")
-            img_bytes_io = create_placeholder_image(style, title)
-            
-            # Save placeholder to cache
-            img = Image.open(img_bytes_io)
-            img.save(cache_file, "WEBP", quality=85)
-            
-            return FileResponse(
-                cache_file,
-                media_type=MEDIA_TYPE_WEBP,
-                headers={
-                    "Cache-Control": CACHE_CONTROL_HEADER,
-                    "ETag": f'"{image_id}"',
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Methods": "GET, OPTIONS",
-                }
-            )
+        fmt = negotiate_format(request.headers.get("accept"))
+        spec = VariantSpec(width=w, height=h, quality=q)
+        hot_key = (image_id, spec.key, fmt)
+
+        # Hot set first (no I/O at all)
+        representation = hot_images.get(hot_key)
+        if representation:
+            return _image_response(request, representation)
+
+        # Resolve the content hash without loading bytes so 304s stay cheap
+        ref = await get_image_store().resolve(image_id)
+        if ref is not None:
+            etag = _etag_for(ref["hash"], fmt, ref["format"], spec.key)
+            if _etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers=_base_headers(etag))
+            representation = await _load_representation(ref, image_id, fmt, spec)
+
+        if representation is None:
+            # Unknown to the store (or its blob was evicted): rebuild from Redis metadata
+            ref = await _store_from_metadata(image_id)
+            if "redirect" in ref:
+                # Return redirect to external URL
+                from fastapi.responses import RedirectResponse
+                return RedirectResponse(url=ref["redirect"])
+            representation = await _load_representation(ref, image_id, fmt, spec)
+            if representation is None:
+                raise HTTPException(status_code=404, detail="Image not found")
+
+        logger.info(f"⚡ Serving {image_id} as {fmt} {spec.key or 'original'}")
+        hot_images.put(hot_key, representation)
+        return _image_response(request, representation)
     
+    except HTTPException:
+        raise
+
     except json.JSONDecodeError:
         logger.error(f"Invalid JSON for image {image_id}")
         raise HTTPException(status_code=500, detail="Invalid image data")
@@ -224,14 +422,23 @@ async def get_image(image_id: str):
 
 
 @router.get("/placeholder/{style}")
-async def get_placeholder(style: str, title: str = "Concept Preview"):
+async def get_placeholder(
+    style: str,
+    title: str = "Concept Preview",
+    w: int = Query(512, ge=64, le=1024),
+    h: Optional[int] = Query(None, ge=64, le=1024),
+):
     """
-    Generate a placeholder image on the fly for a given style.
+    Generate a placeholder image for a given style (memoized per style, title and size).
     Useful for testing and fallbacks.
     """
     try:
-        img_bytes = create_placeholder_image(style, title)
-        return StreamingResponse(img_bytes, media_type=MEDIA_TYPE_PNG)
+        png_bytes = await asyncio.to_thread(render_placeholder_png, style.lower(), title, w, h or w)
+        return Response(
+            content=png_bytes,
+            media_type=MEDIA_TYPE_PNG,
+            headers={"Cache-Control": CACHE_CONTROL_HEADER},
+        )
     except Exception as e:
         logger.error(f"Error generating placeholder: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
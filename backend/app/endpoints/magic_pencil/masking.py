@@ -0,0 +1,69 @@
+"""
+Mask and payload preparation for Magic Pencil edits.
+
+Everything here is CPU-bound Pillow work; callers should run it in a worker
+thread (``asyncio.to_thread``) so the event loop stays free.
+"""
+import base64
+import io
+from typing import Dict
+
+from PIL import Image, ImageChops
+
+# Frontend draws with rgba(76, 222, 128, 0.5); anything greener/more opaque than
+# these thresholds counts as an edit area.
+GREEN_THRESHOLD = 100
+ALPHA_THRESHOLD = 50
+
+_GREEN_LUT = [255 if v > GREEN_THRESHOLD else 0 for v in range(256)]
+_ALPHA_LUT = [255 if v > ALPHA_THRESHOLD else 0 for v in range(256)]
+
+
+def decode_data_url(url: str) -> Image.Image:
+    """Decode a base64 data URL into an RGBA image."""
+    _header, encoded = url.split(',', 1)
+    return load_image_bytes(base64.b64decode(encoded))
+
+
+def load_image_bytes(data: bytes) -> Image.Image:
+    """Open raw image bytes as RGBA."""
+    return Image.open(io.BytesIO(data)).convert("RGBA")
+
+
+def build_edit_mask(drawn_overlay: Image.Image) -> Image.Image:
+    """
+    Build a binary "L" mask (255 = edit area) from the green drawing overlay.
+    Thresholds the green and alpha bands with lookup tables and intersects them,
+    equivalent to the per-pixel ``g > 100 and a > 50`` test.
+    """
+    _r, g, _b, a = drawn_overlay.convert("RGBA").split()
+    return ImageChops.darker(g.point(_GREEN_LUT), a.point(_ALPHA_LUT))
+
+
+def image_to_base64(img: Image.Image) -> str:
+    """PNG-encode an image (flattened to RGB) as base64."""
+    buffered = io.BytesIO()
+    img.convert("RGB").save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode()
+
+
+def prepare_edit_inputs(original_image: Image.Image, drawn_overlay: Image.Image) -> Dict[str, str]:
+    """
+    Produce the base64 payloads Gemini needs (original, overlay, mask) plus the
+    composite PNG used as a fallback result.
+    """
+    # Resize drawn overlay to match original if needed
+    if drawn_overlay.size != original_image.size:
+        drawn_overlay = drawn_overlay.resize(original_image.size, Image.Resampling.LANCZOS)
+
+    pure_mask = build_edit_mask(drawn_overlay)
+
+    buffered = io.BytesIO()
+    Image.alpha_composite(original_image, drawn_overlay).save(buffered, format="PNG")
+
+    return {
+        "original_b64": image_to_base64(original_image),
+        "drawn_b64": image_to_base64(drawn_overlay),
+        "mask_b64": image_to_base64(pure_mask),
+        "composite_b64": base64.b64encode(buffered.getvalue()).decode(),
+    }
@@ -6,7 +6,8 @@ from typing import Dict, Any
 import json
 import logging
 
-from app.core.redis import redis_service
+from app.core.serialization import FastJSONResponse
+from app.core.thread_store import Artifact, ThreadArtifacts
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -27,26 +28,24 @@ async def get_final_package(thread_id: str) -> Dict[str, Any]:
         HTTPException: 404 if package not found
     """
     try:
-        # Try to get full package first
-        package_key = f"final_package:{thread_id}"
-        package_data = redis_service.get(package_key)
+        # Full package is preferred, essential package is the fallback; read both at once
+        packages = await ThreadArtifacts(thread_id).get_many(Artifact.FINAL_PACKAGE, Artifact.PACKAGE_ESSENTIAL)
+        parsed_data = packages[Artifact.FINAL_PACKAGE]
         
-        if package_data:
-            parsed_data = json.loads(package_data)
+        if parsed_data:
             logger.info(f"Retrieved final package for thread {thread_id}")
             logger.info(f"  - Keys in package: {list(parsed_data.keys())}")
             logger.info(f"  - Has detailed_esg_metrics: {'detailed_esg_metrics' in parsed_data}")
             if 'detailed_esg_metrics' in parsed_data:
                 logger.info(f"  - ESG keys: {list(parsed_data['detailed_esg_metrics'].keys()) if parsed_data['detailed_esg_metrics'] else 'None'}")
-            return parsed_data
+            return FastJSONResponse(parsed_data)
         
         # If not found, check for essential package
-        essential_key = f"package_essential:{thread_id}"
-        essential_data = redis_service.get(essential_key)
+        essential_data = packages[Artifact.PACKAGE_ESSENTIAL]
         
         if essential_data:
             logger.info(f"Retrieved essential package for thread {thread_id}")
-            return json.loads(essential_data)
+            return FastJSONResponse(essential_data)
         
         # Not found
         logger.warning(f"No package found for thread {thread_id}")
@@ -84,22 +83,20 @@ async def get_esg_metrics(thread_id: str) -> Dict[str, Any]:
         HTTPException: 404 if metrics not found
     """
     try:
-        esg_key = f"esg_metrics:{thread_id}"
-        esg_data = redis_service.get(esg_key)
+        stored = await ThreadArtifacts(thread_id).get_many(Artifact.ESG_METRICS, Artifact.FINAL_PACKAGE)
+        esg_data = stored[Artifact.ESG_METRICS]
         
         if esg_data:
             logger.info(f"Retrieved ESG metrics for thread {thread_id}")
-            return json.loads(esg_data)
+            return FastJSONResponse(esg_data)
         
         # Fallback: try to extract from full package
-        package_key = f"final_package:{thread_id}"
-        package_data = redis_service.get(package_key)
+        package = stored[Artifact.FINAL_PACKAGE]
         
-        if package_data:
-            package = json.loads(package_data)
+        if package:
             esg = package.get("detailed_esg_metrics", {})
             if esg:
-                return esg
+                return FastJSONResponse(esg)
         
         raise HTTPException(
             status_code=404,
@@ -129,22 +126,20 @@ async def get_tools_and_materials(thread_id: str) -> Dict[str, Any]:
         HTTPException: 404 if data not found
     """
     try:
-        tools_key = f"tools_materials:{thread_id}"
-        tools_data = redis_service.get(tools_key)
+        stored = await ThreadArtifacts(thread_id).get_many(Artifact.TOOLS_MATERIALS, Artifact.FINAL_PACKAGE)
+        tools_data = stored[Artifact.TOOLS_MATERIALS]
         
         if tools_data:
             logger.info(f"Retrieved tools/materials for thread {thread_id}")
-            return json.loads(tools_data)
+            return FastJSONResponse(tools_data)
         
         # Fallback: try to extract from full package
-        package_key = f"final_package:{thread_id}"
-        package_data = redis_service.get(package_key)
+        package = stored[Artifact.FINAL_PACKAGE]
         
-        if package_data:
-            package = json.loads(package_data)
+        if package:
             tools = package.get("detailed_tools_and_materials", {})
             if tools:
-                return tools
+                return FastJSONResponse(tools)
         
         raise HTTPException(
             status_code=404,
@@ -8,7 +8,7 @@ from typing import List, Optional, Dict, Any
 import logging
 import json
 
-from app.core.redis import redis_service
+from app.core.redis import async_redis_service as redis_service
 
 router = APIRouter(prefix="/step-images", tags=["step-images"])
 logger = logging.getLogger(__name__)
@@ -43,7 +43,7 @@ async def get_step_images_progress(thread_id: str):
     try:
         # Check if generation has completed
         results_key = f"step_images:final:{thread_id}"
-        results_str = redis_service.get(results_key)
+        results_str = await redis_service.get(results_key)
 
         if results_str:
             # Generation complete - return final results
@@ -64,7 +64,7 @@ async def get_step_images_progress(thread_id: str):
 
         # Check progress
         progress_key = f"step_images:progress:{thread_id}"
-        progress_str = redis_service.get(progress_key)
+        progress_str = await redis_service.get(progress_key)
 
         if not progress_str:
             # Not started yet
@@ -84,7 +84,7 @@ async def get_step_images_progress(thread_id: str):
         total_steps = progress_data.get("total_steps", 0)
         for step_num in range(1, total_steps + 1):
             result_key = f"step_images:result:{thread_id}:{step_num}"
-            result_str = redis_service.get(result_key)
+            result_str = await redis_service.get(result_key)
 
             if result_str:
                 step_data = json.loads(result_str)
@@ -121,7 +121,7 @@ async def get_single_step_image(thread_id: str, step_number: int):
     """Get a single step image by step number."""
     try:
         result_key = f"step_images:result:{thread_id}:{step_number}"
-        result_str = redis_service.get(result_key)
+        result_str = await redis_service.get(result_key)
 
         if not result_str:
             raise HTTPException(status_code=404, detail="Step image not found")
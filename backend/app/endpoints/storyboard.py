@@ -9,17 +9,13 @@ import traceback
 import base64
 from io import BytesIO
 from PIL import Image
-import os
-from google import genai
 from google.genai import types
 from typing import Optional
+from app.ai_service.client_pool import get_client_registry
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Initialize Gemini client
-gemini_client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-
 STORYBOARD_SYSTEM_PROMPT = """Eco-Crafter AI: Refined Core Task Instructions
 Role: You are "Eco-Crafter AI," an expert in sustainable DIY projects, specializing in visually clear, step-by-step upcycling instructions.
 
@@ -60,14 +56,16 @@ async def generate_storyboard_image(image_bytes: bytes) -> Optional[str]:
     try:
         logger.info("Calling Gemini Nano Banana (gemini-2.5-flash-image) for storyboard")
         
-        # Call Gemini API with Nano Banana format
-        response = gemini_client.models.generate_content(
-            model="gemini-2.5-flash-image",
-            contents=[
-                STORYBOARD_SYSTEM_PROMPT,
-                types.Part.from_bytes(data=image_bytes, mime_type="image/png")
-            ]
-        )
+        # Call Gemini API with Nano Banana format on the shared async client
+        pooled = get_client_registry().get_genai_client()
+        async with pooled.track() as gemini_client:
+            response = await gemini_client.aio.models.generate_content(
+                model="gemini-2.5-flash-image",
+                contents=[
+                    STORYBOARD_SYSTEM_PROMPT,
+                    types.Part.from_bytes(data=image_bytes, mime_type="image/png")
+                ]
+            )
         
         logger.info("Received response from Gemini")
         
@@ -6,18 +6,32 @@ import asyncio
 import uuid
 import logging
 from typing import Dict, Any, Optional
-from fastapi import APIRouter, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Query, BackgroundTasks, Header
 from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel, Field
 import json
 import time
 
 from app.workflows.graph import workflow_orchestrator
-from app.core.redis import redis_service
+from app.core.redis import async_redis_service as redis_service
+from app.core.thread_store import Artifact, ThreadArtifacts, artifact_ref
+from app.core.job_queue import Job, QueueUnavailableError, workflow_jobs
+from app.core.event_bus import workflow_events
+from app.core.serialization import FastJSONResponse, dumps_str, loads, sse_event, to_jsonable
+from app.core.tracing import MemoryExporter, get_exporter
+from app.workflows.performance_monitor import performance_monitor
+try:
+    from app.core.metrics import metrics
+    METRICS_AVAILABLE = True
+except ImportError:
+    METRICS_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/workflow", tags=["workflow"])
 
+# Idle SSE connections get a comment frame this often
+SSE_KEEPALIVE_SECONDS = 15
+
 # Use the global orchestrator instance
 
 
@@ -74,8 +88,7 @@ class WorkflowStatusResponse(BaseModel):
 
 @router.post("/start")
 async def start_workflow(
-    request: StartWorkflowRequest,
-    background_tasks: BackgroundTasks
+    request: StartWorkflowRequest
 ) -> Dict[str, Any]:
     """
     Start a new workflow for recycling product generation.
@@ -84,11 +97,10 @@ async def start_workflow(
         # Generate unique thread ID
         thread_id = f"recycle_{uuid.uuid4().hex[:12]}"
 
-        # Start workflow in background
-        background_tasks.add_task(
-            run_workflow_background,
-            thread_id,
-            request.user_input
+        # Hand the workflow to the worker pool
+        await workflow_jobs.enqueue(
+            "start_workflow",
+            {"thread_id": thread_id, "user_input": request.user_input}
         )
 
         return {
@@ -97,175 +109,68 @@ async def start_workflow(
             "message": "Workflow started successfully"
         }
 
+    except QueueUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start workflow: {e}")
 
 
 @router.get("/stream/{thread_id}")
-async def stream_workflow(thread_id: str):
+async def stream_workflow(
+    thread_id: str,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    resume_from: Optional[str] = Query(None, alias="last_event_id", description="Resume cursor for non-EventSource clients")
+):
     """
     Stream workflow progress and events.
+
+    Events are read from the workflow event bus with blocking reads; each SSE
+    frame carries the stream ID so reconnecting clients resume via Last-Event-ID.
+    Event data is forwarded as the stored JSON text, without decode/re-encode.
     """
     async def event_generator():
         """Generate SSE events for workflow progress."""
+        cursor = last_event_id or resume_from or "0"
         last_event_time = time.time()
         max_wait_time = 300  # 5 minutes timeout
 
-        while True:
-            try:
-                # Check for workflow state updates
-                state_key = f"workflow_state:{thread_id}"
-                state_data = redis_service.get(state_key)
-
-                if state_data:
-                    state = json.loads(state_data)
+        if METRICS_AVAILABLE:
+            metrics.sse_connection_opened()
+        try:
+            while True:
+                try:
+                    events = await workflow_events.read(
+                        thread_id, cursor, block_ms=SSE_KEEPALIVE_SECONDS * 1000, decode=False
+                    )
+
+                    if not events:
+                        # Timeout check
+                        if time.time() - last_event_time > max_wait_time:
+                            yield f"data: {dumps_str({'type': 'timeout', 'message': 'Workflow timeout'})}\n\n"
+                            break
+                        # Comment frame keeps proxies from closing an idle connection
+                        yield ": keepalive\n\n"
+                        continue
 
-                    # Send state update event
-                    yield f"data: {json.dumps({'type': 'state_update', 'data': state})}\n\n"
                     last_event_time = time.time()
+                    for event_id, event in events:
+                        cursor = event_id
+                        yield sse_event(event["type"], event["data"], event_id)
 
-                # Check for ingredient updates
-                ingredient_key = f"ingredients:{thread_id}"
-                ingredient_data = redis_service.get(ingredient_key)
-
-                if ingredient_data:
-                    ingredients = json.loads(ingredient_data)
-                    yield f"data: {json.dumps({'type': 'ingredients_update', 'data': ingredients})}\n\n"
-                    
-                    # Check if there are clarification questions in ingredients data
-                    if ingredients.get("needs_clarification") and ingredients.get("clarification_questions"):
-                        questions = ingredients["clarification_questions"]
-                        # Send as user_question event
-                        yield f"data: {json.dumps({'type': 'user_question', 'data': questions})}\n\n"
-
-                # Also check workflow state for user_questions (alternative location)
-                if state_data:
-                    state_obj = json.loads(state_data) if isinstance(state_data, str) else state_data
-                    result = state_obj.get("result", {})
-                    if result.get("needs_user_input") and result.get("user_questions"):
-                        questions = result["user_questions"]
-                        yield f"data: {json.dumps({'type': 'user_question', 'data': questions})}\n\n"
-
-                # Check for project choices (Phase 2: O1 node output)
-                choices_key = f"choices:{thread_id}"
-                choices_data = redis_service.get(choices_key)
-
-                if choices_data:
-                    choices = json.loads(choices_data)
-                    if not choices.get("sent", False):
-                        yield f"data: {json.dumps({'type': 'choices_generated', 'data': choices})}\n\n"
-                        choices["sent"] = True
-                        redis_service.set(choices_key, json.dumps(choices), ex=3600)
-
-                # OPTIMIZATION 2: Check for hero image (single image, fast display)
-                hero_key = f"hero_image:{thread_id}"
-                hero_data = redis_service.get(hero_key)
-                if hero_data:
-                    hero = json.loads(hero_data)
-                    if hero.get("ready") and not hero.get("sent"):
-                        yield f"data: {json.dumps({'type': 'hero_image_ready', 'data': hero})}\n\n"
-                        hero["sent"] = True
-                        redis_service.set(hero_key, json.dumps(hero), ex=3600)
-                
-                # PROGRESSIVE CONCEPT UPDATES: Stream each concept as it completes (FAST!)
-                # Check for individual concept progress updates
-                concept_progress_pattern = f"concept_progress:{thread_id}:*"
-                progress_keys = redis_service.keys(concept_progress_pattern)
-                
-                if progress_keys:
-                    for progress_key in progress_keys:
-                        progress_data = redis_service.get(progress_key)
-                        if progress_data:
-                            progress = json.loads(progress_data)
-                            if progress.get("status") == "ready" and not progress.get("sent"):
-                                # Stream this single concept update
-                                yield f"data: {json.dumps({'type': 'concept_progress', 'data': progress})}\n\n"
-                                progress["sent"] = True
-                                redis_service.set(progress_key, json.dumps(progress), ex=3600)
-                                logger.info(f"SSE: Streamed concept {progress.get('concept_id')} progress to frontend")
-                
-                # Check for concept generation updates (full set) - sent after all complete
-                concepts_key = f"concepts:{thread_id}"
-                concepts_data = redis_service.get(concepts_key)
-
-                if concepts_data:
-                    concepts = json.loads(concepts_data)
-                    if concepts.get("status") == "complete" and not concepts.get("sent"):
-                        yield f"data: {json.dumps({'type': 'concepts_generated', 'data': concepts})}\n\n"
-                        concepts["sent"] = True
-                        redis_service.set(concepts_key, json.dumps(concepts), ex=3600)
-
-                # Check for Magic Pencil edit updates
-                magic_pencil_pattern = f"magic_pencil:{thread_id}:*"
-                magic_pencil_keys = redis_service.keys(magic_pencil_pattern)
-
-                for key in magic_pencil_keys:
-                    edit_data = redis_service.get(key)
-                    if edit_data:
-                        edit_info = json.loads(edit_data)
-                        if edit_info.get("status") == "completed":
-                            yield f"data: {json.dumps({'type': 'magic_pencil_complete', 'data': edit_info})}\n\n"
-                            # Mark as sent
-                            edit_info["sent"] = True
-                            redis_service.set(key, json.dumps(edit_info), ex=3600)
-
-                # Check for concept selection
-                selection_key = f"concept_selection:{thread_id}"
-                selection_data = redis_service.get(selection_key)
-
-                if selection_data:
-                    selection = json.loads(selection_data)
-                    if not selection.get("sent", False):
-                        yield f"data: {json.dumps({'type': 'concept_selected', 'data': selection})}\n\n"
-                        selection["sent"] = True
-                        redis_service.set(selection_key, json.dumps(selection), ex=3600)
-
-                # OPTIMIZATION 3: Check for essential package first (fast display)
-                essential_key = f"package_essential:{thread_id}"
-                essential_data = redis_service.get(essential_key)
-                if essential_data:
-                    essential = json.loads(essential_data)
-                    if not essential.get("sent"):
-                        yield f"data: {json.dumps({'type': 'package_essential_ready', 'data': essential})}\n\n"
-                        essential["sent"] = True
-                        redis_service.set(essential_key, json.dumps(essential), ex=3600)
-                
-                # Check for final package (full/detailed)
-                package_key = f"project_package:{thread_id}"
-                package_data = redis_service.get(package_key)
-
-                if package_data:
-                    package = json.loads(package_data)
-                    if not package.get("sent", False):
-                        yield f"data: {json.dumps({'type': 'project_package', 'data': package})}\n\n"
-                        package["sent"] = True
-                        redis_service.set(package_key, json.dumps(package), ex=3600)
-
-                # Check for completion
-                completion_key = f"workflow_complete:{thread_id}"
-                if redis_service.exists(completion_key):
-                    completion_data = redis_service.get(completion_key)
-                    yield f"data: {json.dumps({'type': 'workflow_complete', 'data': json.loads(completion_data)})}\n\n"
-                    break
+                        # Clarification questions ride along with ingredient/state updates
+                        questions = _extract_user_questions(event)
+                        if questions:
+                            yield f"data: {dumps_str({'type': 'user_question', 'data': questions})}\n\n"
 
-                # Check for errors
-                error_key = f"workflow_error:{thread_id}"
-                error_data = redis_service.get(error_key)
-                if error_data:
-                    yield f"data: {json.dumps({'type': 'error', 'data': json.loads(error_data)})}\n\n"
-                    redis_service.delete(error_key)
+                        if event["type"] == "workflow_complete":
+                            return
 
-                # Timeout check
-                if time.time() - last_event_time > max_wait_time:
-                    yield f"data: {json.dumps({'type': 'timeout', 'message': 'Workflow timeout'})}\n\n"
+                except Exception as e:
+                    yield f"data: {dumps_str({'type': 'error', 'message': str(e)})}\n\n"
                     break
-
-                # Short delay to prevent overwhelming
-                await asyncio.sleep(1)
-
-            except Exception as e:
-                yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
-                break
+        finally:
+            if METRICS_AVAILABLE:
+                metrics.sse_connection_closed()
 
     return StreamingResponse(
         event_generator(),
@@ -278,21 +183,42 @@ async def stream_workflow(thread_id: str):
     )
 
 
+def _extract_user_questions(event: Dict[str, Any]) -> Optional[list]:
+    """Pull clarification questions out of an ingredients_update or state_update event."""
+    if event["type"] not in ("ingredients_update", "state_update"):
+        return None
+    data = event.get("data") or {}
+    if isinstance(data, (str, bytes)):
+        # Raw event data; only these two event types are ever decoded
+        try:
+            data = loads(data)
+        except ValueError:
+            return None
+    if not isinstance(data, dict):
+        return None
+    if event["type"] == "ingredients_update":
+        if data.get("needs_clarification") and data.get("clarification_questions"):
+            return data["clarification_questions"]
+    elif event["type"] == "state_update":
+        result = data.get("result") or {}
+        if result.get("needs_user_input") and result.get("user_questions"):
+            return result["user_questions"]
+    return None
+
+
 @router.post("/resume/{thread_id}")
 async def resume_workflow(
     thread_id: str,
-    request: ResumeWorkflowRequest,
-    background_tasks: BackgroundTasks
+    request: ResumeWorkflowRequest
 ) -> Dict[str, Any]:
     """
     Resume workflow with user clarification.
     """
     try:
-        # Resume workflow in background
-        background_tasks.add_task(
-            resume_workflow_background,
-            thread_id,
-            request.user_input
+        # Resume workflow on the worker pool
+        await workflow_jobs.enqueue(
+            "resume_workflow",
+            {"thread_id": thread_id, "user_input": request.user_input}
         )
 
         return {
@@ -301,6 +227,8 @@ async def resume_workflow(
             "message": "Workflow resumed successfully"
         }
 
+    except QueueUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to resume workflow: {e}")
 
@@ -311,19 +239,14 @@ async def get_workflow_status(thread_id: str) -> WorkflowStatusResponse:
     Get current workflow status.
     """
     try:
-        # Get workflow state from Redis
-        state_key = f"workflow_state:{thread_id}"
-        state_data = redis_service.get(state_key)
+        # Get workflow state and ingredients from Redis in one round trip
+        artifacts = await ThreadArtifacts(thread_id).get_many(Artifact.WORKFLOW_STATE, Artifact.INGREDIENTS)
+        state = artifacts[Artifact.WORKFLOW_STATE]
 
-        if not state_data:
+        if not state:
             raise HTTPException(status_code=404, detail="Workflow not found")
 
-        state = json.loads(state_data)
-
-        # Get ingredients data
-        ingredient_key = f"ingredients:{thread_id}"
-        ingredient_data = redis_service.get(ingredient_key)
-        ingredients = json.loads(ingredient_data) if ingredient_data else {"ingredients": []}
+        ingredients = artifacts[Artifact.INGREDIENTS] or {"ingredients": []}
 
         # Calculate completion percentage
         completion_percentage = 0.0
@@ -352,19 +275,39 @@ async def get_workflow_status(thread_id: str) -> WorkflowStatusResponse:
         raise HTTPException(status_code=500, detail=f"Failed to get status: {e}")
 
 
+@router.get("/traces/{thread_id}")
+async def get_workflow_traces(thread_id: str):
+    """
+    Spans recorded for a workflow thread (jobs, nodes, Gemini and Redis calls).
+    Only available with TRACING_EXPORTER=memory; traces live in the process that ran them.
+    """
+    exporter = get_exporter()
+    if not isinstance(exporter, MemoryExporter):
+        raise HTTPException(status_code=404, detail="In-memory tracing is not enabled")
+    return FastJSONResponse({"thread_id": thread_id, "traces": exporter.get_thread_traces(thread_id)})
+
+
+@router.get("/admin/performance")
+async def get_performance_overview():
+    """
+    Per-node latency percentiles (seconds), workflow durations and error counts
+    for the graph runs in this process since it started.
+    """
+    return FastJSONResponse(performance_monitor.get_snapshot())
+
+
 @router.get("/ingredients/{thread_id}")
 async def get_ingredients(thread_id: str) -> Dict[str, Any]:
     """
     Get current ingredient data.
     """
     try:
-        ingredient_key = f"ingredients:{thread_id}"
-        ingredient_data = redis_service.get(ingredient_key)
+        ingredients = await ThreadArtifacts(thread_id).get(Artifact.INGREDIENTS)
 
-        if not ingredient_data:
+        if not ingredients:
             return {"ingredients": [], "message": "No ingredients found"}
 
-        return json.loads(ingredient_data)
+        return FastJSONResponse(ingredients)
 
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid ingredient data")
@@ -381,14 +324,12 @@ async def update_ingredient(
     Update specific ingredient field.
     """
     try:
-        ingredient_key = f"ingredients:{thread_id}"
-        ingredient_data = redis_service.get(ingredient_key)
+        artifacts = ThreadArtifacts(thread_id)
+        ingredients = await artifacts.get(Artifact.INGREDIENTS)
 
-        if not ingredient_data:
+        if not ingredients:
             raise HTTPException(status_code=404, detail="Ingredients not found")
 
-        ingredients = json.loads(ingredient_data)
-
         # Validate ingredient index
         if request.ingredient_index >= len(ingredients.get("ingredients", [])):
             raise HTTPException(status_code=400, detail="Invalid ingredient index")
@@ -398,7 +339,8 @@ async def update_ingredient(
         ingredients["ingredients"][request.ingredient_index]["last_updated"] = time.time()
 
         # Save back to Redis
-        redis_service.set(ingredient_key, json.dumps(ingredients), ex=3600)
+        await artifacts.set(Artifact.INGREDIENTS, ingredients)
+        await workflow_events.publish(thread_id, "ingredients_update", ingredients)
 
         return {
             "message": "Ingredient updated successfully",
@@ -420,12 +362,10 @@ async def add_ingredient(
     Add new ingredient to the list.
     """
     try:
-        ingredient_key = f"ingredients:{thread_id}"
-        ingredient_data = redis_service.get(ingredient_key)
+        artifacts = ThreadArtifacts(thread_id)
+        ingredients = await artifacts.get(Artifact.INGREDIENTS)
 
-        if ingredient_data:
-            ingredients = json.loads(ingredient_data)
-        else:
+        if not ingredients:
             ingredients = {"ingredients": [], "categories": {"containers": [], "fasteners": [], "decorative": [], "tools": []}}
 
         # Create new ingredient
@@ -447,7 +387,8 @@ async def add_ingredient(
                 ingredients["categories"][request.category].append(request.name)
 
         # Save back to Redis
-        redis_service.set(ingredient_key, json.dumps(ingredients), ex=3600)
+        await artifacts.set(Artifact.INGREDIENTS, ingredients)
+        await workflow_events.publish(thread_id, "ingredients_update", ingredients)
 
         return {
             "message": "Ingredient added successfully",
@@ -467,8 +408,7 @@ async def cleanup_ingredients(thread_id: str) -> Dict[str, Any]:
     Clean up temporary ingredient files.
     """
     try:
-        ingredient_key = f"ingredients:{thread_id}"
-        deleted = redis_service.delete(ingredient_key)
+        deleted = await ThreadArtifacts(thread_id).delete(Artifact.INGREDIENTS)
 
         return {
             "message": "Ingredients cleaned up successfully",
@@ -485,13 +425,19 @@ async def get_concepts(thread_id: str) -> Dict[str, Any]:
     Get generated concept images and metadata.
     """
     try:
-        concepts_key = f"concepts:{thread_id}"
-        concepts_data = redis_service.get(concepts_key)
-
-        if not concepts_data:
+        concepts = await ThreadArtifacts(thread_id).get(Artifact.CONCEPTS)
+
+        if not concepts:
+            # Still generating: return the concepts finished so far
+            progress = await redis_service.hgetall(f"concept_progress:{thread_id}")
+            if progress:
+                return FastJSONResponse({
+                    "concepts": [loads(progress[index]) for index in sorted(progress, key=int)],
+                    "status": "in_progress"
+                })
             return {"concepts": [], "message": "No concepts found"}
 
-        return json.loads(concepts_data)
+        return FastJSONResponse(concepts)
 
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid concepts data")
@@ -502,28 +448,23 @@ async def get_concepts(thread_id: str) -> Dict[str, Any]:
 @router.post("/magic-pencil/{thread_id}")
 async def magic_pencil_edit(
     thread_id: str,
-    request: MagicPencilRequest,
-    background_tasks: BackgroundTasks
+    request: MagicPencilRequest
 ) -> Dict[str, Any]:
     """
     Apply Magic Pencil editing to a concept image.
     """
     try:
         # Get current concepts
-        concepts_key = f"concepts:{thread_id}"
-        concepts_data = redis_service.get(concepts_key)
+        concepts = await ThreadArtifacts(thread_id).get(Artifact.CONCEPTS)
 
-        if not concepts_data:
+        if not concepts:
             raise HTTPException(status_code=404, detail="No concepts found")
 
-        concepts = json.loads(concepts_data)
-
         # Validate concept ID
         if request.concept_id >= len(concepts.get("concepts", [])):
             raise HTTPException(status_code=400, detail="Invalid concept ID")
 
         # Store edit request
-        edit_key = f"magic_pencil:{thread_id}:{request.concept_id}"
         edit_data = {
             "concept_id": request.concept_id,
             "edit_instruction": request.edit_instruction,
@@ -531,15 +472,17 @@ async def magic_pencil_edit(
             "timestamp": time.time(),
             "status": "pending"
         }
-        redis_service.set(edit_key, json.dumps(edit_data), ex=3600)
-
-        # Trigger Magic Pencil processing in background
-        background_tasks.add_task(
-            process_magic_pencil_edit,
-            thread_id,
-            request.concept_id,
-            request.edit_instruction,
-            request.edit_type
+        await _store_magic_pencil_edit(thread_id, request.concept_id, edit_data)
+
+        # Trigger Magic Pencil processing on the worker pool
+        await workflow_jobs.enqueue(
+            "magic_pencil",
+            {
+                "thread_id": thread_id,
+                "concept_id": request.concept_id,
+                "edit_instruction": request.edit_instruction,
+                "edit_type": request.edit_type
+            }
         )
 
         return {
@@ -551,10 +494,29 @@ async def magic_pencil_edit(
 
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid concepts data")
+    except QueueUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to initiate edit: {e}")
 
 
+@router.get("/magic-pencil/{thread_id}")
+async def get_magic_pencil_edits(thread_id: str) -> Dict[str, Any]:
+    """
+    Get the latest Magic Pencil edit status for each concept.
+    """
+    try:
+        edits = await redis_service.hgetall(f"magic_pencil:{thread_id}")
+        return FastJSONResponse({
+            "edits": [loads(edits[concept_id]) for concept_id in sorted(edits, key=int)]
+        })
+
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=500, detail="Invalid edit data")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get edits: {e}")
+
+
 class OptionSelectionRequest(BaseModel):
     """Request to select a project option."""
     option_id: str = Field(..., description="ID of selected option")
@@ -563,21 +525,19 @@ class OptionSelectionRequest(BaseModel):
 @router.post("/select-option/{thread_id}")
 async def select_option(
     thread_id: str,
-    request: OptionSelectionRequest,
-    background_tasks: BackgroundTasks
+    request: OptionSelectionRequest
 ) -> Dict[str, Any]:
     """
     Select a project option and proceed to Phase 3.
     """
     try:
         # Get current choices
-        choices_key = f"choices:{thread_id}"
-        choices_data = redis_service.get(choices_key)
+        artifacts = ThreadArtifacts(thread_id)
+        choices = await artifacts.get(Artifact.CHOICES)
 
-        if not choices_data:
+        if not choices:
             raise HTTPException(status_code=404, detail="No choices found")
 
-        choices = json.loads(choices_data)
         viable_options = choices.get("viable_options", [])
 
         # Find the selected option
@@ -586,31 +546,33 @@ async def select_option(
         if not selected_option:
             raise HTTPException(status_code=404, detail="Option not found")
 
-        # Store selection
-        selection_key = f"option_selection:{thread_id}"
+        # Store selection and show progress in one write, before the job can overwrite the state
         selection_data = {
             "option_id": request.option_id,
             "selected_option": selected_option,
             "timestamp": time.time()
         }
-        redis_service.set(selection_key, json.dumps(selection_data), ex=3600)
-
-        # OPTIMIZATION 1: Queue background task to generate details + proceed
-        background_tasks.add_task(
-            generate_detailed_and_continue,
-            thread_id,
-            request.option_id,
-            selected_option
-        )
-        
-        # Update workflow state to show progress
-        state_key = f"workflow_state:{thread_id}"
-        redis_service.set(state_key, json.dumps({
+        detail_state = {
             "status": "running",
             "current_phase": "concept_generation",
             "current_node": "O1_detailed",  # Generating details
             "result": {}
-        }), ex=3600)
+        }
+        await artifacts.set_many({
+            Artifact.OPTION_SELECTION: selection_data,
+            Artifact.WORKFLOW_STATE: detail_state,
+        })
+
+        # OPTIMIZATION 1: Queue job to generate details + proceed
+        await workflow_jobs.enqueue(
+            "select_option",
+            {
+                "thread_id": thread_id,
+                "option_id": request.option_id,
+                "selected_lite_option": selected_option
+            }
+        )
+        await workflow_events.publish(thread_id, "state_update", detail_state)
 
         return {
             "message": "Option selected, generating detailed information...",
@@ -620,6 +582,8 @@ async def select_option(
 
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid choices data")
+    except QueueUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to select option: {e}")
 
@@ -627,51 +591,48 @@ async def select_option(
 @router.post("/select-concept/{thread_id}")
 async def select_concept(
     thread_id: str,
-    request: ConceptSelectionRequest,
-    background_tasks: BackgroundTasks
+    request: ConceptSelectionRequest
 ) -> Dict[str, Any]:
     """
     Select final concept and proceed to packaging phase.
     """
     try:
-        # Get current concepts
-        concepts_key = f"concepts:{thread_id}"
-        concepts_data = redis_service.get(concepts_key)
+        # Get current concepts and state together
+        artifacts = ThreadArtifacts(thread_id)
+        current = await artifacts.get_many(Artifact.CONCEPTS, Artifact.WORKFLOW_STATE)
+        concepts = current[Artifact.CONCEPTS]
 
-        if not concepts_data:
+        if not concepts:
             raise HTTPException(status_code=404, detail="No concepts found")
 
-        concepts = json.loads(concepts_data)
-
         # Validate concept ID
         if request.concept_id >= len(concepts.get("concepts", [])):
             raise HTTPException(status_code=400, detail="Invalid concept ID")
 
-        # Store selection
-        selection_key = f"concept_selection:{thread_id}"
+        # Store selection and move the workflow state on to packaging
         selection_data = {
             "concept_id": request.concept_id,
             "selected_concept": concepts["concepts"][request.concept_id],
             "feedback": request.feedback,
             "timestamp": time.time()
         }
-        redis_service.set(selection_key, json.dumps(selection_data), ex=3600)
-
-        # Update workflow state to proceed to packaging
-        state_key = f"workflow_state:{thread_id}"
-        state_data = redis_service.get(state_key)
-        if state_data:
-            state = json.loads(state_data)
+        updates = {Artifact.CONCEPT_SELECTION: selection_data}
+        state = current[Artifact.WORKFLOW_STATE]
+        if state:
             state["current_phase"] = "packaging"
             state["current_node"] = "H1"
             state["concept_selected"] = True
-            redis_service.set(state_key, json.dumps(state), ex=3600)
+            updates[Artifact.WORKFLOW_STATE] = state
+        await artifacts.set_many(updates)
 
-        # Trigger packaging phase in background
-        background_tasks.add_task(
-            finalize_workflow,
-            thread_id,
-            request.concept_id
+        await workflow_events.publish(thread_id, "concept_selected", selection_data)
+        if state:
+            await workflow_events.publish(thread_id, "state_update", state)
+
+        # Trigger packaging phase on the worker pool
+        await workflow_jobs.enqueue(
+            "finalize_workflow",
+            {"thread_id": thread_id, "concept_id": request.concept_id}
         )
 
         return {
@@ -682,6 +643,8 @@ async def select_concept(
 
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid concepts data")
+    except QueueUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to select concept: {e}")
 
@@ -693,13 +656,12 @@ async def get_project_package(thread_id: str) -> Dict[str, Any]:
     """
     try:
         # Get final project package
-        package_key = f"project_package:{thread_id}"
-        package_data = redis_service.get(package_key)
+        package = await ThreadArtifacts(thread_id).get(Artifact.PROJECT_PACKAGE)
 
-        if not package_data:
+        if not package:
             raise HTTPException(status_code=404, detail="Project package not found")
 
-        return json.loads(package_data)
+        return FastJSONResponse(package)
 
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid package data")
@@ -713,23 +675,20 @@ async def get_project_exports(thread_id: str, export_format: str = Query(..., de
     Get project exports in different formats.
     """
     try:
-        exports_key = f"exports:{thread_id}"
-        exports_data = redis_service.get(exports_key)
+        exports = await ThreadArtifacts(thread_id).get(Artifact.EXPORTS)
 
-        if not exports_data:
+        if not exports:
             raise HTTPException(status_code=404, detail="Exports not found")
 
-        exports = json.loads(exports_data)
-
         if export_format not in exports:
             raise HTTPException(status_code=400, detail=f"Format '{export_format}' not available")
 
-        return {
+        return FastJSONResponse({
             "format": export_format,
             "data": exports[export_format],
             "generated_at": exports.get("metadata", {}).get("timestamp", ""),
             "thread_id": thread_id
-        }
+        })
 
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid exports data")
@@ -743,13 +702,12 @@ async def get_project_analytics(thread_id: str) -> Dict[str, Any]:
     Get comprehensive project analytics and metrics.
     """
     try:
-        analytics_key = f"analytics:{thread_id}"
-        analytics_data = redis_service.get(analytics_key)
+        analytics = await ThreadArtifacts(thread_id).get(Artifact.ANALYTICS)
 
-        if not analytics_data:
+        if not analytics:
             raise HTTPException(status_code=404, detail="Analytics not found")
 
-        return json.loads(analytics_data)
+        return FastJSONResponse(analytics)
 
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid analytics data")
@@ -763,27 +721,24 @@ async def get_sharing_content(thread_id: str, platform: Optional[str] = Query(No
     Get sharing content optimized for social media platforms.
     """
     try:
-        sharing_key = f"sharing:{thread_id}"
-        sharing_data = redis_service.get(sharing_key)
+        sharing_info = await ThreadArtifacts(thread_id).get(Artifact.SHARING)
 
-        if not sharing_data:
+        if not sharing_info:
             raise HTTPException(status_code=404, detail="Sharing content not found")
 
-        sharing_info = json.loads(sharing_data)
-
         if platform:
             platform_content = sharing_info.get("platform_content", {}).get(platform)
             if not platform_content:
                 raise HTTPException(status_code=400, detail=f"Platform '{platform}' not supported")
 
-            return {
+            return FastJSONResponse({
                 "platform": platform,
                 "content": platform_content,
                 "metadata": sharing_info.get("metadata", {}),
                 "analytics_tracking": sharing_info.get("analytics_tracking", {})
-            }
+            })
 
-        return sharing_info
+        return FastJSONResponse(sharing_info)
 
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid sharing data")
@@ -802,13 +757,10 @@ async def share_project(
     """
     try:
         # Get sharing content
-        sharing_key = f"sharing:{thread_id}"
-        sharing_data = redis_service.get(sharing_key)
+        sharing_info = await ThreadArtifacts(thread_id).get(Artifact.SHARING)
 
-        if not sharing_data:
+        if not sharing_info:
             raise HTTPException(status_code=404, detail="Sharing content not found")
-
-        sharing_info = json.loads(sharing_data)
         platform_content = sharing_info.get("platform_content", {}).get(platform)
 
         if not platform_content:
@@ -824,7 +776,7 @@ async def share_project(
         }
 
         share_log_key = f"share_log:{thread_id}:{platform}:{int(time.time())}"
-        redis_service.set(share_log_key, json.dumps(share_record), ex=86400)
+        await redis_service.set(share_log_key, json.dumps(share_record), ex=86400)
 
         # In production, would integrate with actual social media APIs
         background_tasks.add_task(track_share_analytics, thread_id, platform)
@@ -849,14 +801,11 @@ async def get_final_package(thread_id: str) -> Dict[str, Any]:
     Get the complete final project package with all deliverables.
     """
     try:
-        package_key = f"final_package:{thread_id}"
-        package_data = redis_service.get(package_key)
+        final_package = await ThreadArtifacts(thread_id).get(Artifact.FINAL_PACKAGE)
 
-        if not package_data:
+        if not final_package:
             raise HTTPException(status_code=404, detail="Final package not found")
 
-        final_package = json.loads(package_data)
-
         # Add download information
         download_info = {
             "downloads_available": {
@@ -868,12 +817,12 @@ async def get_final_package(thread_id: str) -> Dict[str, Any]:
             "analytics": f"/workflow/analytics/{thread_id}"
         }
 
-        return {
+        return FastJSONResponse({
             "final_package": final_package,
             "download_info": download_info,
             "package_metadata": final_package.get("package_metadata", {}),
             "completion_status": "complete"
-        }
+        })
 
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid package data")
@@ -890,14 +839,11 @@ async def download_project(thread_id: str, format: str):
         if format not in ["json", "html"]:
             raise HTTPException(status_code=400, detail="Unsupported download format")
 
-        exports_key = f"exports:{thread_id}"
-        exports_data = redis_service.get(exports_key)
+        exports = await ThreadArtifacts(thread_id).get(Artifact.EXPORTS)
 
-        if not exports_data:
+        if not exports:
             raise HTTPException(status_code=404, detail="Download not available")
 
-        exports = json.loads(exports_data)
-
         if format not in exports:
             raise HTTPException(status_code=404, detail=f"Format '{format}' not available")
 
@@ -925,16 +871,17 @@ async def download_project(thread_id: str, format: str):
 
 
 @router.get("/health")
-async def health_check() -> Dict[str, str]:
+async def health_check() -> Dict[str, Any]:
     """Health check endpoint."""
     try:
         # Test Redis connection
-        redis_healthy = redis_service.ping()
+        redis_healthy = await redis_service.ping()
 
         return {
             "status": "healthy" if redis_healthy else "degraded",
             "redis": "connected" if redis_healthy else "disconnected",
-            "orchestrator": "initialized"
+            "orchestrator": "initialized",
+            "job_queue": await workflow_jobs.get_stats()
         }
     except Exception as e:
         return {
@@ -945,27 +892,19 @@ async def health_check() -> Dict[str, str]:
 
 # Helper function to convert Pydantic models to dicts recursively
 def serialize_pydantic(obj):
-    """Recursively convert Pydantic models to dictionaries for JSON serialization."""
-    if hasattr(obj, "model_dump"):
-        # It's a Pydantic model, convert to dict
-        return obj.model_dump()
-    elif isinstance(obj, dict):
-        # Recursively process dictionary values
-        return {k: serialize_pydantic(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        # Recursively process list items
-        return [serialize_pydantic(item) for item in obj]
-    elif isinstance(obj, tuple):
-        # Convert tuples to lists (JSON doesn't have tuples)
-        return [serialize_pydantic(item) for item in obj]
-    else:
-        # Return as-is for primitives (str, int, float, bool, None)
-        return obj
+    """Convert Pydantic models (at any depth) to plain JSON data in one native encode/decode pass."""
+    return to_jsonable(obj)
 
 
 # Background task functions
 async def run_workflow_background(thread_id: str, user_input: str):
-    """Run workflow in background task with progress tracking."""
+    """
+    Run workflow in background task with progress tracking.
+
+    A retried ``start_workflow`` job runs the graph again from P1a: nodes
+    overwrite the thread's artifacts and re-publish their events on the same
+    stream, so SSE clients may see a phase's events twice before completion.
+    """
     try:
         import logging
         import asyncio
@@ -973,28 +912,18 @@ async def run_workflow_background(thread_id: str, user_input: str):
         logger.info(f"Starting workflow background task for {thread_id}")
         
         # Initialize workflow state
-        state_key = f"workflow_state:{thread_id}"
+        artifacts = ThreadArtifacts(thread_id)
         initial_state = {
             "status": "running",
             "current_phase": "ingredient_discovery",
             "current_node": "P1a_extract",
             "result": {}
         }
-        redis_service.set(state_key, json.dumps(initial_state), ex=3600)
-        
-        # Run workflow with progress monitoring
-        workflow_task = asyncio.create_task(
-            workflow_orchestrator.start_workflow(thread_id, user_input)
-        )
-        
-        # Monitor progress while workflow runs
-        while not workflow_task.done():
-            await asyncio.sleep(0.5)  # Poll every 500ms
-            
-            # Update state from Redis if nodes are updating it
-            # The nodes themselves will update the state
-        
-        result = await workflow_task
+        await artifacts.set(Artifact.WORKFLOW_STATE, initial_state)
+        await workflow_events.publish(thread_id, "state_update", initial_state)
+
+        # Nodes publish their own progress events while the workflow runs
+        result = await workflow_orchestrator.start_workflow(thread_id, user_input)
         logger.info(f"Workflow result: {result}")
 
         # Store final workflow state (serialize properly)
@@ -1009,11 +938,11 @@ async def run_workflow_background(thread_id: str, user_input: str):
             "current_node": result_data.get("current_node", "END"),
             "result": result_data
         }
-        redis_service.set(state_key, json.dumps(final_state), ex=3600)
+        updates = {Artifact.WORKFLOW_STATE: final_state}
         
         # Store ingredients if present
+        ingredients_data = None
         if result.get("result") and result["result"].get("ingredients_data"):
-            ingredients_key = f"ingredients:{thread_id}"
             # Serialize the Pydantic object first
             ing_data = result["result"]["ingredients_data"]
             if hasattr(ing_data, "model_dump"):
@@ -1030,15 +959,23 @@ async def run_workflow_background(thread_id: str, user_input: str):
                 "needs_clarification": ing_dict.get("needs_clarification", False),
                 "clarification_questions": ing_dict.get("clarification_questions", [])
             }
-            redis_service.set(ingredients_key, json.dumps(ingredients_data), ex=3600)
-            logger.info(f"Stored ingredients for {thread_id}")
+            updates[Artifact.INGREDIENTS] = ingredients_data
 
         # Store final result if complete
+        serialized_result = None
         if result.get("status") == "phase_complete":
-            completion_key = f"workflow_complete:{thread_id}"
             # Serialize Pydantic models before storing
             serialized_result = serialize_pydantic(result)
-            redis_service.set(completion_key, json.dumps(serialized_result), ex=3600)
+            updates[Artifact.WORKFLOW_COMPLETE] = serialized_result
+
+        # One pipelined write for everything the run produced
+        await artifacts.set_many(updates)
+        await workflow_events.publish(thread_id, "state_update", final_state)
+        if ingredients_data is not None:
+            await workflow_events.publish(thread_id, "ingredients_update", ingredients_data)
+            logger.info(f"Stored ingredients for {thread_id}")
+        if serialized_result is not None:
+            await workflow_events.publish(thread_id, "workflow_complete", serialized_result)
 
     except Exception as e:
         import logging
@@ -1046,9 +983,9 @@ async def run_workflow_background(thread_id: str, user_input: str):
         logger = logging.getLogger(__name__)
         logger.error(f"Workflow error for {thread_id}: {str(e)}")
         logger.error(traceback.format_exc())
-        # Store error
-        error_key = f"workflow_error:{thread_id}"
-        redis_service.set(error_key, json.dumps({"error": str(e)}), ex=3600)
+        # Store error; the worker retries the job and reports it once it gives up
+        await ThreadArtifacts(thread_id).set(Artifact.WORKFLOW_ERROR, {"error": str(e)})
+        raise
 
 
 async def generate_detailed_and_continue(thread_id: str, option_id: str, selected_lite_option: Dict[str, Any]):
@@ -1066,22 +1003,15 @@ async def generate_detailed_and_continue(thread_id: str, option_id: str, selecte
         from app.workflows.state import WorkflowState
         from app.workflows.phase4_nodes import final_packaging_node
         
-        state_key = f"workflow_state:{thread_id}"
-        state_data = redis_service.get(state_key)
+        # Load state, goals and concept images in one round trip
+        artifacts = ThreadArtifacts(thread_id)
+        stored = await artifacts.get_many(Artifact.WORKFLOW_STATE, Artifact.GOALS, Artifact.CONCEPTS)
+        state_dict = stored[Artifact.WORKFLOW_STATE]
         
-        if state_data:
-            state_dict = json.loads(state_data)
-            ingredients_data = load_ingredients_from_redis(thread_id)
-            
-            # Load goals from Redis
-            goals_key = f"goals:{thread_id}"
-            goals_data = redis_service.get(goals_key)
-            goals_info = json.loads(goals_data) if goals_data else {}
-            
-            # Load concept images
-            concepts_key = f"concepts:{thread_id}"
-            concepts_data = redis_service.get(concepts_key)
-            concept_images = json.loads(concepts_data) if concepts_data else {}
+        if state_dict:
+            ingredients_data = await load_ingredients_from_redis(thread_id)
+            goals_info = stored[Artifact.GOALS] or {}
+            concept_images = stored[Artifact.CONCEPTS] or {}
             
             # Create WorkflowState for Phase 4
             workflow_state = WorkflowState(
@@ -1111,15 +1041,30 @@ async def generate_detailed_and_continue(thread_id: str, option_id: str, selecte
                 }
             }
             # Serialize Pydantic models before storing
-            redis_service.set(state_key, json.dumps(serialize_pydantic(complete_result)), ex=3600)
+            complete_result = serialize_pydantic(complete_result)
             
             # Mark workflow as complete
-            completion_key = f"workflow_complete:{thread_id}"
             completion_result = {
                 "status": "complete",
                 "final_package": result_h1.get("final_package")
             }
-            redis_service.set(completion_key, json.dumps(serialize_pydantic(completion_result)), ex=3600)
+            completion_result = serialize_pydantic(completion_result)
+
+            # The packages are stored once; state and completion only reference them
+            await artifacts.set_many({
+                Artifact.FINAL_PACKAGE: complete_result["result"]["final_package"],
+                Artifact.PACKAGE_ESSENTIAL: complete_result["result"]["essential_package"],
+                Artifact.WORKFLOW_STATE: {
+                    **complete_result,
+                    "result": {
+                        "final_package": artifact_ref(Artifact.FINAL_PACKAGE),
+                        "essential_package": artifact_ref(Artifact.PACKAGE_ESSENTIAL)
+                    }
+                },
+                Artifact.WORKFLOW_COMPLETE: {**completion_result, "final_package": artifact_ref(Artifact.FINAL_PACKAGE)},
+            })
+            await workflow_events.publish(thread_id, "state_update", complete_result)
+            await workflow_events.publish(thread_id, "workflow_complete", completion_result)
             
             logger.info(f"Phase 4 complete for {thread_id}")
             
@@ -1130,9 +1075,9 @@ async def generate_detailed_and_continue(thread_id: str, option_id: str, selecte
         logger.error(f"Failed to complete Phase 4: {str(e)}")
         logger.error(traceback.format_exc())
         
-        # Store error
-        error_key = f"workflow_error:{thread_id}"
-        redis_service.set(error_key, json.dumps({"error": str(e)}), ex=3600)
+        # Store error; the worker retries the job and reports it once it gives up
+        await ThreadArtifacts(thread_id).set(Artifact.WORKFLOW_ERROR, {"error": str(e)})
+        raise
 
 
 async def resume_workflow_background(thread_id: str, user_input: str):
@@ -1140,21 +1085,29 @@ async def resume_workflow_background(thread_id: str, user_input: str):
     try:
         result = await workflow_orchestrator.continue_workflow(thread_id, user_input)
 
-        # Store workflow state updates
-        state_key = f"workflow_state:{thread_id}"
+        # Store workflow state updates (and the result if the workflow completed)
         # Serialize Pydantic models before storing
         serialized_result = serialize_pydantic(result)
-        redis_service.set(state_key, json.dumps(serialized_result), ex=3600)
+        updates = {Artifact.WORKFLOW_STATE: serialized_result}
+        if result.get("status") == "phase_complete":
+            updates[Artifact.WORKFLOW_COMPLETE] = serialized_result
+        await ThreadArtifacts(thread_id).set_many(updates)
+        await workflow_events.publish(thread_id, "state_update", serialized_result)
 
-        # Store result if workflow completed
         if result.get("status") == "phase_complete":
-            completion_key = f"workflow_complete:{thread_id}"
-            redis_service.set(completion_key, json.dumps(serialized_result), ex=3600)
+            await workflow_events.publish(thread_id, "workflow_complete", serialized_result)
 
     except Exception as e:
-        # Store error
-        error_key = f"workflow_error:{thread_id}"
-        redis_service.set(error_key, json.dumps({"error": str(e)}), ex=3600)
+        # Store error; the worker retries the job and reports it once it gives up
+        await ThreadArtifacts(thread_id).set(Artifact.WORKFLOW_ERROR, {"error": str(e)})
+        raise
+
+
+async def _store_magic_pencil_edit(thread_id: str, concept_id: int, edit_data: Dict[str, Any]):
+    """Record an edit's status in the thread's Magic Pencil hash (one field per concept)."""
+    edit_key = f"magic_pencil:{thread_id}"
+    await redis_service.hset(edit_key, str(concept_id), json.dumps(edit_data))
+    await redis_service.expire(edit_key, 3600)
 
 
 async def process_magic_pencil_edit(thread_id: str, concept_id: int, edit_instruction: str, edit_type: str):
@@ -1163,11 +1116,10 @@ async def process_magic_pencil_edit(thread_id: str, concept_id: int, edit_instru
         from app.workflows.phase3_nodes import apply_magic_pencil_edit
 
         # Get current state
-        state_key = f"workflow_state:{thread_id}"
-        state_data = redis_service.get(state_key)
+        artifacts = ThreadArtifacts(thread_id)
+        state_dict = await artifacts.get(Artifact.WORKFLOW_STATE)
 
-        if state_data:
-            state_dict = json.loads(state_data)
+        if state_dict:
 
             # Apply Magic Pencil edit
             edit_result = await apply_magic_pencil_edit(
@@ -1178,17 +1130,14 @@ async def process_magic_pencil_edit(thread_id: str, concept_id: int, edit_instru
             )
 
             # Update concepts in Redis
-            concepts_key = f"concepts:{thread_id}"
-            concepts_data = redis_service.get(concepts_key)
-            if concepts_data:
-                concepts = json.loads(concepts_data)
+            concepts = await artifacts.get(Artifact.CONCEPTS)
+            if concepts:
                 if concept_id < len(concepts["concepts"]):
                     concepts["concepts"][concept_id] = edit_result["updated_concept"]
                     # Serialize Pydantic models before storing
-                    redis_service.set(concepts_key, json.dumps(serialize_pydantic(concepts)), ex=3600)
+                    await artifacts.set(Artifact.CONCEPTS, serialize_pydantic(concepts))
 
             # Update edit status
-            edit_key = f"magic_pencil:{thread_id}:{concept_id}"
             edit_data = {
                 "concept_id": concept_id,
                 "edit_instruction": edit_instruction,
@@ -1198,11 +1147,12 @@ async def process_magic_pencil_edit(thread_id: str, concept_id: int, edit_instru
                 "result": edit_result
             }
             # Serialize Pydantic models before storing
-            redis_service.set(edit_key, json.dumps(serialize_pydantic(edit_data)), ex=3600)
+            edit_data = serialize_pydantic(edit_data)
+            await _store_magic_pencil_edit(thread_id, concept_id, edit_data)
+            await workflow_events.publish(thread_id, "magic_pencil_complete", edit_data)
 
     except Exception as e:
         # Store error
-        edit_key = f"magic_pencil:{thread_id}:{concept_id}"
         edit_data = {
             "concept_id": concept_id,
             "edit_instruction": edit_instruction,
@@ -1211,7 +1161,8 @@ async def process_magic_pencil_edit(thread_id: str, concept_id: int, edit_instru
             "status": "failed",
             "error": str(e)
         }
-        redis_service.set(edit_key, json.dumps(edit_data), ex=3600)
+        await _store_magic_pencil_edit(thread_id, concept_id, edit_data)
+        raise
 
 
 async def finalize_workflow(thread_id: str, concept_id: int):
@@ -1222,23 +1173,17 @@ async def finalize_workflow(thread_id: str, concept_id: int):
     try:
         logger.info(f"[Phase 4] Starting background packaging for thread {thread_id}")
         
-        # Get all workflow data
-        state_key = f"workflow_state:{thread_id}"
-        state_data = redis_service.get(state_key)
-
-        concepts_key = f"concepts:{thread_id}"
-        concepts_data = redis_service.get(concepts_key)
-
-        selection_key = f"concept_selection:{thread_id}"
-        selection_data = redis_service.get(selection_key)
-
-        if not (state_data and concepts_data and selection_data):
+        # Get all workflow data in one round trip
+        artifacts = ThreadArtifacts(thread_id)
+        stored = await artifacts.get_many(Artifact.WORKFLOW_STATE, Artifact.CONCEPTS, Artifact.CONCEPT_SELECTION)
+        state_dict = stored[Artifact.WORKFLOW_STATE]
+        concepts = stored[Artifact.CONCEPTS]
+        selection = stored[Artifact.CONCEPT_SELECTION]
+
+        if not (state_dict and concepts and selection):
             logger.error(f"[Phase 4] Missing data for thread {thread_id}")
             return
 
-        state_dict = json.loads(state_data)
-        concepts = json.loads(concepts_data)
-        selection = json.loads(selection_data)
         selected_concept = concepts["concepts"][concept_id]
 
         # STEP 1: Create ESSENTIAL package immediately (no AI calls)
@@ -1272,15 +1217,14 @@ async def finalize_workflow(thread_id: str, concept_id: int):
             "key_materials": ingredients[:5],
         }
         
-        # Store ESSENTIAL package immediately
-        essential_key = f"package_essential:{thread_id}"
-        redis_service.set(essential_key, json.dumps(essential_package), ex=3600)
+        # Store ESSENTIAL package immediately, also as final package for immediate access (will be enhanced)
+        await artifacts.set_many({
+            Artifact.PACKAGE_ESSENTIAL: essential_package,
+            Artifact.FINAL_PACKAGE: artifact_ref(Artifact.PACKAGE_ESSENTIAL),
+        })
+        await workflow_events.publish(thread_id, "package_essential_ready", essential_package)
         logger.info("[Phase 4] Essential package stored for thread %s", thread_id)
         
-        # Also store as final package for immediate access (will be enhanced)
-        package_key = f"final_package:{thread_id}"
-        redis_service.set(package_key, json.dumps(essential_package), ex=3600)
-        
         # STEP 2: Generate DETAILED content in background (with AI)
         logger.info("[Phase 4] Starting detailed content generation for thread %s", thread_id)
         
@@ -1299,33 +1243,53 @@ async def finalize_workflow(thread_id: str, concept_id: int):
             else:
                 logger.error("[Phase 4] ⚠️ Full package missing or None detailed_esg_metrics!")
             
-            # Store FULL package (overwrite essential)
-            redis_service.set(package_key, json.dumps(full_package), ex=3600)
-            logger.info("[Phase 4] Full package with detailed ESG/tools stored for thread %s", thread_id)
+            logger.info("[Phase 4] Full package with detailed ESG/tools created for thread %s", thread_id)
         except Exception as pkg_error:
             logger.error(f"[Phase 4] ❌ create_final_package failed: {pkg_error}", exc_info=True)
             # Essential package will remain as fallback (already stored above)
-            
-        # Store project package for compatibility
-        redis_service.set(f"project_package:{thread_id}", json.dumps(full_package), ex=3600)
 
         # Mark workflow as complete
-        completion_key = f"workflow_complete:{thread_id}"
         completion_data = {
             "status": "complete",
             "thread_id": thread_id,
             "final_package": full_package,
             "completion_time": time.time()
         }
-        redis_service.set(completion_key, json.dumps(completion_data), ex=3600)
+
+        # Store FULL package (overwrite essential), project package for compatibility, and completion
+        # together; the package is stored once and referenced by the other two
+        await artifacts.set_many({
+            Artifact.FINAL_PACKAGE: (
+                full_package if full_package is not essential_package else artifact_ref(Artifact.PACKAGE_ESSENTIAL)
+            ),
+            Artifact.PROJECT_PACKAGE: artifact_ref(Artifact.FINAL_PACKAGE),
+            Artifact.WORKFLOW_COMPLETE: {**completion_data, "final_package": artifact_ref(Artifact.FINAL_PACKAGE)},
+        })
+        await workflow_events.publish(thread_id, "project_package", full_package)
+        await workflow_events.publish(thread_id, "workflow_complete", completion_data)
         
         logger.info(f"[Phase 4] ✓ Workflow finalization complete for thread {thread_id}")
 
     except Exception as e:
         logger.error(f"[Phase 4] Error in finalize_workflow: {e}")
-        # Store error
-        error_key = f"workflow_error:{thread_id}"
-        redis_service.set(error_key, json.dumps({"error": str(e), "phase": "finalization"}), ex=3600)
+        # Store error; the worker retries the job and reports it once it gives up
+        await ThreadArtifacts(thread_id).set(Artifact.WORKFLOW_ERROR, {"error": str(e), "phase": "finalization"})
+        raise
+
+
+async def report_job_failure(job: Job, error: str):
+    """
+    Worker dead-letter hook: tell the thread's stream that its job gave up.
+    Retryable attempts stay silent so clients don't see transient failures.
+    """
+    thread_id = job.payload.get("thread_id")
+    if not thread_id or job.kind == "magic_pencil":
+        # Magic Pencil failures are reported through the stored edit record
+        return
+    data = {"error": error}
+    if job.kind == "finalize_workflow":
+        data["phase"] = "finalization"
+    await workflow_events.publish(thread_id, "error", data)
 
 
 async def track_share_analytics(thread_id: str, platform: str):
@@ -1341,12 +1305,12 @@ async def track_share_analytics(thread_id: str, platform: str):
             "campaign": "user_project_share"
         }
 
-        redis_service.set(analytics_key, json.dumps(analytics_data), ex=86400)
+        await redis_service.set(analytics_key, json.dumps(analytics_data), ex=86400)
 
         # Update aggregate sharing stats
         daily_key = f"daily_shares:{time.strftime('%Y-%m-%d')}"
-        redis_service.incr(daily_key, 1)
-        redis_service.expire(daily_key, 86400 * 30)  # Keep for 30 days
+        await redis_service.incr(daily_key, 1)
+        await redis_service.expire(daily_key, 86400 * 30)  # Keep for 30 days
 
     except Exception as e:
         logger.error(f"Failed to track share analytics: {str(e)}")
\ No newline at end of file
@@ -1,5 +1,6 @@
-from google import genai
 from google.genai import types
+from app.ai_service.client_pool import get_client_registry
+from app.ai_service.offline_gemini import offline_enabled
 from app.core.config import settings
 import logging
 import traceback
@@ -15,11 +16,14 @@ logger = logging.getLogger(__name__)
 
 class GeminiImageEditor:
     def __init__(self):
-        if settings.GEMINI_API_KEY:
-            self.client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+        if settings.GEMINI_API_KEY or offline_enabled():
+            # Shared google-genai client from the process-wide pool
+            self.pooled = get_client_registry().get_genai_client()
+            self.client = self.pooled.client
             logger.info("Gemini Image Editor initialized with Nano Banana client")
         else:
             logger.warning("No Gemini API key found")
+            self.pooled = None
             self.client = None
     
     def create_magic_pencil_system_prompt(self, user_prompt: str) -> str:
@@ -115,17 +119,18 @@ TASK: {user_prompt}
 
 Generate the edited image with changes ONLY in white mask areas."""
 
-            # Call Gemini API with Nano Banana format
+            # Call Gemini API with Nano Banana format (async API, no event loop blocking)
             # Note: This model may require paid tier access
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash-image",
-                contents=[
-                    simple_prompt,
-                    types.Part.from_bytes(data=original_bytes, mime_type="image/png"),
-                    types.Part.from_bytes(data=drawn_bytes, mime_type="image/png"),
-                    types.Part.from_bytes(data=mask_bytes, mime_type="image/png")
-                ]
-            )
+            async with self.pooled.track():
+                response = await self.client.aio.models.generate_content(
+                    model="gemini-2.5-flash-image",
+                    contents=[
+                        simple_prompt,
+                        types.Part.from_bytes(data=original_bytes, mime_type="image/png"),
+                        types.Part.from_bytes(data=drawn_bytes, mime_type="image/png"),
+                        types.Part.from_bytes(data=mask_bytes, mime_type="image/png")
+                    ]
+                )
             
             logger.info("Received response from Gemini")
             
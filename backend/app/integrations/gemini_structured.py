@@ -6,9 +6,10 @@ import asyncio
 import json
 import logging
 import time
-from copy import deepcopy
 from typing import Any, Dict, List, Optional, AsyncIterator
 import google.generativeai as genai
+from app.ai_service.client_pool import get_client_registry
+from app.ai_service.offline_gemini import offline_enabled
 from app.core.config import settings
 from app.workflows.optimized_state import GeminiModelConfig
 
@@ -65,10 +66,11 @@ class GeminiStructuredClient:
 
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or settings.GEMINI_API_KEY
-        if not self.api_key:
+        if not self.api_key and not offline_enabled():
             raise ValueError("GEMINI_API_KEY is required")
 
-        genai.configure(api_key=self.api_key)
+        if self.api_key:
+            genai.configure(api_key=self.api_key)
 
         # Default safety settings for recycling content
         self.safety_settings = [
@@ -122,29 +124,28 @@ class GeminiStructuredClient:
 
         # Add response schema if structured output is enabled
         if model_config.use_structured_output:
-            normalized_schema = _normalize_response_schema(deepcopy(response_schema))
+            # Sanitized once per distinct schema and shared by the pool
+            normalized_schema = get_client_registry().sanitize_schema(response_schema, _normalize_response_schema)
             generation_config["response_mime_type"] = "application/json"
             generation_config["response_schema"] = normalized_schema
 
-        # Prepare model kwargs
-        model_kwargs = {
-            "model_name": model_config.model_name,
-            "generation_config": generation_config,
-            "safety_settings": self.safety_settings,
-        }
-
-        if system_instruction:
-            model_kwargs["system_instruction"] = system_instruction
+        # Pooled model for this configuration (created once per process)
+        pooled = get_client_registry().get_model(
+            model_config.model_name,
+            generation_config,
+            self.safety_settings,
+            system_instruction,
+        )
 
         for attempt in range(self.retry_config["max_retries"]):
             try:
-                # Create model
-                model = genai.GenerativeModel(**model_kwargs)
+                model = pooled.client
 
                 # Generate content
                 if model_config.use_structured_output:
                     # For structured output, use the prompt directly
-                    response = await model.generate_content_async(prompt)
+                    async with pooled.track():
+                        response = await model.generate_content_async(prompt)
                 else:
                     # For non-structured output, add JSON formatting instruction
                     structured_prompt = f"""
@@ -155,7 +156,8 @@ class GeminiStructuredClient:
 
                     Response:
                     """
-                    response = await model.generate_content_async(structured_prompt)
+                    async with pooled.track():
+                        response = await model.generate_content_async(structured_prompt)
 
                 # Parse response
                 if response.text:
@@ -443,22 +445,20 @@ class GeminiStructuredClient:
             "max_output_tokens": model_config.max_tokens,
         }
 
-        model_kwargs = {
-            "model_name": model_config.model_name,
-            "generation_config": generation_config,
-            "safety_settings": self.safety_settings,
-        }
-
-        if system_instruction:
-            model_kwargs["system_instruction"] = system_instruction
+        pooled = get_client_registry().get_model(
+            model_config.model_name,
+            generation_config,
+            self.safety_settings,
+            system_instruction,
+        )
 
         try:
-            model = genai.GenerativeModel(**model_kwargs)
-            response = await model.generate_content_async(prompt, stream=True)
+            async with pooled.track() as model:
+                response = await model.generate_content_async(prompt, stream=True)
 
-            async for chunk in response:
-                if chunk.text:
-                    yield chunk.text
+                async for chunk in response:
+                    if chunk.text:
+                        yield chunk.text
 
         except Exception as e:
             logger.error(f"Streaming generation error: {e}")
@@ -408,7 +408,29 @@ class MaterialAffordanceKnowledgeBase:
             "cloth": MaterialType.FABRIC,
             "textile": MaterialType.FABRIC,
             "ceramic": MaterialType.CERAMIC,
-            "rubber": MaterialType.RUBBER
+            "rubber": MaterialType.RUBBER,
+            "steel": MaterialType.METAL,
+            "tin": MaterialType.METAL,
+            "iron": MaterialType.METAL,
+            "copper": MaterialType.METAL,
+            "polyethylene": MaterialType.PLASTIC,
+            "polypropylene": MaterialType.PLASTIC,
+            "ldpe": MaterialType.PLASTIC,
+            "pp": MaterialType.PLASTIC,
+            "pvc": MaterialType.PLASTIC,
+            "acrylic": MaterialType.PLASTIC,
+            "corrugated": MaterialType.CARDBOARD,
+            "paperboard": MaterialType.CARDBOARD,
+            "newspaper": MaterialType.PAPER,
+            "kraft": MaterialType.PAPER,
+            "plywood": MaterialType.WOOD,
+            "bamboo": MaterialType.WOOD,
+            "cotton": MaterialType.FABRIC,
+            "denim": MaterialType.FABRIC,
+            "wool": MaterialType.FABRIC,
+            "polyester": MaterialType.FABRIC,
+            "porcelain": MaterialType.CERAMIC,
+            "latex": MaterialType.RUBBER
         }
 
         return material_map.get(material_name)
@@ -0,0 +1,164 @@
+"""
+Deterministic ingredient categorization on top of the material knowledge base.
+Resolves material and category from the extraction (P1a) output with keyword
+rules, so P1c only needs Gemini for the ingredients these rules can't settle.
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+
+from app.knowledge.material_affordances import (
+    MaterialAffordanceKnowledgeBase,
+    MaterialType,
+    material_kb,
+)
+
+# Category values that carry no information
+UNKNOWN_VALUES = {None, "", "unknown", "general", "other", "misc", "recyclable"}
+
+# Item-name keywords -> category (same vocabulary as the P1c prompt)
+CATEGORY_KEYWORDS = {
+    "bottle": "beverage_container",
+    # "can" alone is ambiguous (soup, paint); only the drink says it held a beverage
+    "soda": "beverage_container",
+    "beer": "beverage_container",
+    "cup": "beverage_container",
+    "jug": "beverage_container",
+    "box": "packaging",
+    "bag": "packaging",
+    "container": "packaging",
+    "jar": "packaging",
+    "tub": "packaging",
+    "carton": "packaging",
+    "crate": "packaging",
+    "tube": "packaging",
+    "wrapper": "packaging",
+    "shirt": "textiles",
+    "jeans": "textiles",
+    "sweater": "textiles",
+    "sock": "textiles",
+    "towel": "textiles",
+    "fabric": "textiles",
+    "clothing": "textiles",
+    "textile": "textiles",
+    "cable": "electronics",
+    "charger": "electronics",
+    "keyboard": "electronics",
+    "phone": "electronics",
+    "electronics": "electronics",
+    "newspaper": "paper_goods",
+    "magazine": "paper_goods",
+    "pallet": "wood_scrap",
+    "plank": "wood_scrap",
+    "tire": "rubber_goods",
+}
+
+# Item-name keywords that imply a material when extraction left it empty
+NAME_MATERIAL_HINTS = {
+    "can": MaterialType.ALUMINUM,
+    "jar": MaterialType.GLASS,
+    "newspaper": MaterialType.PAPER,
+    "magazine": MaterialType.PAPER,
+    "pallet": MaterialType.WOOD,
+    "plank": MaterialType.WOOD,
+    "jeans": MaterialType.FABRIC,
+    "shirt": MaterialType.FABRIC,
+    "sweater": MaterialType.FABRIC,
+    "towel": MaterialType.FABRIC,
+    "tire": MaterialType.RUBBER,
+}
+
+
+@dataclass
+class RuleCategorization:
+    """Outcome of the rules for one ingredient."""
+    material: Optional[str]
+    category: Optional[str]
+    material_type: Optional[MaterialType]
+    confidence: float
+
+
+def _tokens(text: Optional[str]) -> List[str]:
+    return re.findall(r"[a-z]+", (text or "").lower())
+
+
+def _singular(token: str) -> str:
+    if token.endswith("es") and token[:-2] in CATEGORY_KEYWORDS:
+        return token[:-2]
+    if token.endswith("s") and token[:-1] in CATEGORY_KEYWORDS:
+        return token[:-1]
+    return token
+
+
+class RuleBasedCategorizer:
+    """
+    Categorizes ingredients from their extracted fields and the knowledge base.
+    Confidence is the weaker of the material and category evidence, capped by
+    the extraction's own confidence, so anything uncertain is left for Gemini.
+    """
+
+    def __init__(self, knowledge_base: Optional[MaterialAffordanceKnowledgeBase] = None):
+        self.kb = knowledge_base or material_kb
+
+    def resolve_material(self, material: Optional[str], name: Optional[str]) -> Tuple[Optional[MaterialType], float]:
+        """Material type with the confidence of the match (1.0 exact, lower when inferred or ambiguous)."""
+        if material and material.lower().strip() not in UNKNOWN_VALUES:
+            exact = self.kb.get_material_by_name(material)
+            if exact:
+                return exact, 1.0
+            found = {self.kb.get_material_by_name(token) for token in _tokens(material)} - {None}
+            if len(found) == 1:
+                return found.pop(), 0.9
+            if found:
+                # "plastic or glass": let the model decide
+                return None, 0.0
+
+        hints = {NAME_MATERIAL_HINTS[_singular(token)] for token in _tokens(name) if _singular(token) in NAME_MATERIAL_HINTS}
+        if len(hints) == 1:
+            return hints.pop(), 0.8
+        return None, 0.0
+
+    def resolve_category(self, category: Optional[str], name: Optional[str]) -> Tuple[Optional[str], float]:
+        inferred = {CATEGORY_KEYWORDS[_singular(token)] for token in _tokens(name) if _singular(token) in CATEGORY_KEYWORDS}
+        if category and category.lower().strip() not in UNKNOWN_VALUES:
+            if not inferred or category in inferred:
+                return category, 1.0
+            # Extraction and keywords disagree
+            return category, 0.6
+        if len(inferred) == 1:
+            return inferred.pop(), 0.85
+        return None, 0.0
+
+    def categorize(self, ingredient: Any) -> RuleCategorization:
+        """Categorize one ingredient (anything with name/material/category/confidence attributes)."""
+        name = getattr(ingredient, "name", None)
+        material = getattr(ingredient, "material", None)
+        material_type, material_confidence = self.resolve_material(material, name)
+        category, category_confidence = self.resolve_category(getattr(ingredient, "category", None), name)
+
+        confidence = min(material_confidence, category_confidence, getattr(ingredient, "confidence", 0.0) or 0.0)
+        if material_type is not None and (not material or material.lower().strip() in UNKNOWN_VALUES):
+            material = material_type.value
+        return RuleCategorization(
+            material=material,
+            category=category,
+            material_type=material_type,
+            confidence=confidence,
+        )
+
+    def assess_collection(self, ingredients: List[Any]) -> Dict[str, Any]:
+        """The P1c ``overall_assessment`` block, from compatibility and project patterns."""
+        material_types = [self.resolve_material(getattr(item, "material", None), getattr(item, "name", None))[0] for item in ingredients]
+        distinct = [material for material in dict.fromkeys(material_types) if material is not None]
+        compatibility = self.kb.assess_material_compatibility(distinct)
+        suggestions = self.kb.suggest_project_type(distinct)["suggestions"]
+        return {
+            "suitable_for_upcycling": bool(distinct) and bool(suggestions) and compatibility["is_safe"],
+            "material_synergy": compatibility["compatibility_score"],
+            "project_complexity": suggestions[0]["complexity"] if suggestions else "moderate",
+            "recommended_project_types": [suggestion["project_type"] for suggestion in suggestions],
+        }
+
+
+# Global categorizer instance
+rule_categorizer = RuleBasedCategorizer()
@@ -6,6 +6,7 @@ import os
 import logging
 from typing import List, Dict, Any, AsyncIterator, Optional
 import google.generativeai as genai
+from app.ai_service.client_pool import get_client_registry
 
 logger = logging.getLogger(__name__)
 
@@ -149,38 +150,35 @@ class GeminiClient:
         )
         
         try:
-            # Create model instance with system instruction if present
-            model_kwargs = {
-                "model_name": self.model_name,
-                "generation_config": generation_config,
-                "safety_settings": self.safety_settings,
-            }
+            # Pooled model instance (keyed by config and system instruction)
+            pooled = get_client_registry().get_model(
+                self.model_name,
+                generation_config,
+                self.safety_settings,
+                system_instruction,
+            )
+            # Tracked for the whole stream so chat shows up in per-client concurrency/latency stats
+            async with pooled.track() as model:
+                # For streaming, we need to use the last user message
+                # and any previous history
+                if len(chat_history) > 1:
+                    # Multi-turn conversation
+                    chat = model.start_chat(history=chat_history[:-1])
+                    response = await chat.send_message_async(
+                        chat_history[-1]["parts"][0],
+                        stream=True
+                    )
+                else:
+                    # Single message
+                    response = await model.generate_content_async(
+                        chat_history[-1]["parts"][0],
+                        stream=True
+                    )
             
-            if system_instruction:
-                model_kwargs["system_instruction"] = system_instruction
-            
-            model = genai.GenerativeModel(**model_kwargs)
-            
-            # For streaming, we need to use the last user message
-            # and any previous history
-            if len(chat_history) > 1:
-                # Multi-turn conversation
-                chat = model.start_chat(history=chat_history[:-1])
-                response = await chat.send_message_async(
-                    chat_history[-1]["parts"][0],
-                    stream=True
-                )
-            else:
-                # Single message
-                response = await model.generate_content_async(
-                    chat_history[-1]["parts"][0],
-                    stream=True
-                )
-            
-            # Stream tokens as they arrive
-            async for chunk in response:
-                if chunk.text:
-                    yield chunk.text
+                # Stream tokens as they arrive
+                async for chunk in response:
+                    if chunk.text:
+                        yield chunk.text
                     
         except Exception as e:
             logger.error(f"Gemini API error: {str(e)}")
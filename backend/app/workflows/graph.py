@@ -38,10 +38,26 @@ from app.workflows.phase4_nodes import (
     is_phase4_complete
 )
 from app.core.checkpointer import create_redis_checkpointer
+from app.core.tracing import trace_node
+from app.workflows.performance_monitor import monitor_node, performance_monitor
+try:
+    from app.core.metrics import track_node_metrics
+    METRICS_AVAILABLE = True
+except ImportError:
+    METRICS_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
 
+def _add_node(workflow: StateGraph, name: str, node) -> None:
+    """
+    Register a node in its own trace span and performance monitor entry, timed
+    per execution when Prometheus metrics are available.
+    """
+    node = monitor_node(name, trace_node(name, node))
+    workflow.add_node(name, track_node_metrics(name, node) if METRICS_AVAILABLE else node)
+
+
 class RecycleWorkflowOrchestrator:
     """
     LangGraph orchestrator for the complete AI Recycle-to-Market Generator workflow.
@@ -59,17 +75,17 @@ class RecycleWorkflowOrchestrator:
         workflow = StateGraph(WorkflowState)
 
         # Phase 1: Ingredient Discovery Nodes (simplified - no user questions)
-        workflow.add_node("P1a_extract", ingredient_extraction_node)
-        workflow.add_node("P1c_categorize", ingredient_categorizer_node)
+        _add_node(workflow, "P1a_extract", ingredient_extraction_node)
+        _add_node(workflow, "P1c_categorize", ingredient_categorizer_node)
 
         # Phase 2: Goal Formation & Choice Generation (simplified - no evaluation)
-        workflow.add_node("G1_goal_formation", goal_formation_node)
-        workflow.add_node("O1_choice_generation", choice_proposer_node)
+        _add_node(workflow, "G1_goal_formation", goal_formation_node)
+        _add_node(workflow, "O1_choice_generation", choice_proposer_node)
         # E1_evaluation removed - user selects directly from O1 options
 
         # Phase 3: Image Generation (runs automatically after O1)
-        workflow.add_node("PR1_prompt_builder", prompt_builder_node)
-        workflow.add_node("IMG_generation", image_generation_node)
+        _add_node(workflow, "PR1_prompt_builder", prompt_builder_node)
+        _add_node(workflow, "IMG_generation", image_generation_node)
         # A1_assembly REMOVED - Phase 2 already has lite descriptions, Phase 4 generates full docs
         # workflow.add_node("A1_assembly", preview_assembly_node)
         
@@ -175,6 +191,7 @@ class RecycleWorkflowOrchestrator:
             start_time=__import__('time').time()
         )
 
+        performance_monitor.start_workflow_tracking(thread_id)
         try:
             # Run the workflow with interrupts enabled
             config = {
@@ -215,6 +232,8 @@ class RecycleWorkflowOrchestrator:
                 "thread_id": thread_id,
                 "error": str(e)
             }
+        finally:
+            performance_monitor.complete_workflow_tracking(thread_id)
 
     # continue_workflow removed - no longer needed without clarification flow
 
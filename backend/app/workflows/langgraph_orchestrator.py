@@ -23,7 +23,7 @@ from app.workflows.optimized_state import (
     GeminiModelConfig
 )
 from app.integrations.gemini import GeminiStructuredClient
-from app.core.redis import redis_service
+from app.core.thread_store import Artifact, ThreadArtifacts
 
 
 class RecycleWorkflowOrchestrator:
@@ -186,8 +186,9 @@ class RecycleWorkflowOrchestrator:
             ingredients_data.extraction_attempts += 1
 
             # Store in Redis temp file
-            redis_key = f"ingredients:{state.thread_id}"
-            redis_service.set(redis_key, ingredients_data.to_json(), ex=3600)  # 1 hour TTL
+            await ThreadArtifacts(state.thread_id).set(
+                Artifact.INGREDIENTS, json.loads(ingredients_data.to_json())
+            )
 
             # Update state
             state.ingredients_data = ingredients_data
@@ -257,8 +258,9 @@ class RecycleWorkflowOrchestrator:
             state.interrupt_reason = "ingredient_clarification"
 
             # Update Redis
-            redis_key = f"ingredients:{state.thread_id}"
-            redis_service.set(redis_key, state.ingredients_data.to_json(), ex=3600)
+            await ThreadArtifacts(state.thread_id).set(
+                Artifact.INGREDIENTS, json.loads(state.ingredients_data.to_json())
+            )
 
             execution_time = time.time() - start_time
             state.performance_metrics.record_node_execution("P1b", execution_time)
@@ -313,8 +315,9 @@ class RecycleWorkflowOrchestrator:
                         )
 
             # Update Redis
-            redis_key = f"ingredients:{state.thread_id}"
-            redis_service.set(redis_key, state.ingredients_data.to_json(), ex=3600)
+            await ThreadArtifacts(state.thread_id).set(
+                Artifact.INGREDIENTS, json.loads(state.ingredients_data.to_json())
+            )
 
             # Clear user questions
             state.clear_user_questions()
@@ -414,8 +417,9 @@ class RecycleWorkflowOrchestrator:
                     new_nulls_added = True
 
             # Update Redis
-            redis_key = f"ingredients:{state.thread_id}"
-            redis_service.set(redis_key, state.ingredients_data.to_json(), ex=3600)
+            await ThreadArtifacts(state.thread_id).set(
+                Artifact.INGREDIENTS, json.loads(state.ingredients_data.to_json())
+            )
 
             # Check if categorization is complete
             if new_nulls_added:
@@ -7,12 +7,15 @@ import time
 import logging
 import os
 import re
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import google.generativeai as genai
 from google.generativeai.types import protos as genai_protos
 from app.workflows.state import WorkflowState, IngredientsData, IngredientItem
 from app.core.config import settings
-from app.core.redis import redis_service
+from app.core.redis import async_redis_service as redis_service
+from app.core.thread_store import Artifact, ThreadArtifacts
+from app.core.event_bus import workflow_events
+from app.knowledge.rule_categorizer import rule_categorizer
 from app.ai_service.production_gemini import call_gemini_with_retry as production_call_gemini
 import backoff
 
@@ -192,26 +195,26 @@ def _manual_clarification_update(
 
 
 
-def save_ingredients_to_redis(thread_id: str, ingredients_data: IngredientsData) -> bool:
+async def save_ingredients_to_redis(thread_id: str, ingredients_data: IngredientsData) -> bool:
     """Save ingredients JSON to Redis with thread_id key."""
     try:
-        key = f"ingredients:{thread_id}"
-        redis_service.set(key, ingredients_data.to_json(), ex=3600)  # 1 hour TTL
-        logger.info(f"Saved ingredients to Redis key: {key}")
+        payload = json.loads(ingredients_data.to_json())
+        await ThreadArtifacts(thread_id, redis_service).set(Artifact.INGREDIENTS, payload)
+        await workflow_events.publish(thread_id, "ingredients_update", payload)
+        logger.info(f"Saved ingredients for thread {thread_id}")
         return True
     except Exception as e:
         logger.error(f"Failed to save ingredients to Redis: {str(e)}")
         return False
 
 
-def load_ingredients_from_redis(thread_id: str) -> IngredientsData:
+async def load_ingredients_from_redis(thread_id: str) -> IngredientsData:
     """Load ingredients JSON from Redis, return empty if not found."""
     try:
-        key = f"ingredients:{thread_id}"
-        json_str = redis_service.get(key)
-        if json_str:
-            logger.info(f"Loaded ingredients from Redis key: {key}")
-            return IngredientsData.from_json(json_str)
+        data = await ThreadArtifacts(thread_id, redis_service).get(Artifact.INGREDIENTS)
+        if data:
+            logger.info(f"Loaded ingredients for thread {thread_id}")
+            return IngredientsData.model_validate(data)
     except Exception as e:
         logger.error(f"Failed to load ingredients from Redis: {str(e)}")
 
@@ -233,22 +236,22 @@ async def ingredient_extraction_node(state: WorkflowState) -> Dict[str, Any]:
         return {"ingredients_data": state.ingredients_data, "current_node": "P1b"}
     
     # Also check Redis in case state doesn't have them
-    existing_ingredients = load_ingredients_from_redis(state.thread_id)
+    existing_ingredients = await load_ingredients_from_redis(state.thread_id)
     if existing_ingredients and existing_ingredients.ingredients and len(existing_ingredients.ingredients) > 0:
         logger.info(f"P1a: Skipping extraction - {len(existing_ingredients.ingredients)} ingredients found in Redis (resuming from clarification)")
         state.ingredients_data = existing_ingredients
         return {"ingredients_data": existing_ingredients, "current_node": "P1b"}
     
     # Update Redis with current state
-    from app.core.redis import redis_service
     import json
-    state_key = f"workflow_state:{state.thread_id}"
-    redis_service.set(state_key, json.dumps({
+    node_state = {
         "status": "running",
         "current_phase": "ingredient_discovery",
         "current_node": "P1a_extract",
         "result": {}
-    }), ex=3600)
+    }
+    await ThreadArtifacts(state.thread_id, redis_service).set(Artifact.WORKFLOW_STATE, node_state)
+    await workflow_events.publish(state.thread_id, "state_update", node_state)
 
     # Build extraction prompt with input sanitization protection
     extraction_prompt = f"""
@@ -299,7 +302,7 @@ async def ingredient_extraction_node(state: WorkflowState) -> Dict[str, Any]:
             )
 
             # Save to Redis
-            save_ingredients_to_redis(state.thread_id, ingredients_data)
+            await save_ingredients_to_redis(state.thread_id, ingredients_data)
 
             # Update state
             state.ingredients_data = ingredients_data
@@ -323,7 +326,7 @@ async def ingredient_extraction_node(state: WorkflowState) -> Dict[str, Any]:
         needs_clarification=True
     )
     state.ingredients_data = fallback_data
-    save_ingredients_to_redis(state.thread_id, fallback_data)
+    await save_ingredients_to_redis(state.thread_id, fallback_data)
 
     return {"ingredients_data": fallback_data, "current_node": "P1b"}
 
@@ -336,15 +339,15 @@ async def null_checker_node(state: WorkflowState) -> Dict[str, Any]:
     logger.info(f"P1b: Checking for null fields in thread {state.thread_id}")
     
     # Update Redis with current state
-    from app.core.redis import redis_service
     import json
-    state_key = f"workflow_state:{state.thread_id}"
-    redis_service.set(state_key, json.dumps({
+    node_state = {
         "status": "running",
         "current_phase": "ingredient_discovery",
         "current_node": "P1b_null_check",
         "result": {}
-    }), ex=3600)
+    }
+    await ThreadArtifacts(state.thread_id, redis_service).set(Artifact.WORKFLOW_STATE, node_state)
+    await workflow_events.publish(state.thread_id, "state_update", node_state)
 
     # Check clarification retry count to prevent infinite loops
     clarification_count = getattr(state, '_clarification_retry_count', 0)
@@ -356,7 +359,7 @@ async def null_checker_node(state: WorkflowState) -> Dict[str, Any]:
         return {"needs_user_input": False, "user_questions": [], "current_node": "P1c"}
 
     # Load current ingredients from Redis
-    ingredients_data = load_ingredients_from_redis(state.thread_id)
+    ingredients_data = await load_ingredients_from_redis(state.thread_id)
     if not ingredients_data.ingredients:
         # If no ingredients, try to use state data
         ingredients_data = state.ingredients_data or IngredientsData()
@@ -420,7 +423,7 @@ async def null_checker_node(state: WorkflowState) -> Dict[str, Any]:
         ingredients_data.needs_clarification = True
 
         # Save updated data
-        save_ingredients_to_redis(state.thread_id, ingredients_data)
+        await save_ingredients_to_redis(state.thread_id, ingredients_data)
         state.ingredients_data = ingredients_data
 
         logger.info(f"P1b: Generated {len(questions)} clarification questions (attempt {state._clarification_retry_count}/{MAX_CLARIFICATION_RETRIES})")
@@ -440,6 +443,112 @@ async def null_checker_node(state: WorkflowState) -> Dict[str, Any]:
     }
 
 
+async def _finalize_categorization(
+    state: WorkflowState,
+    ingredients_data: IngredientsData,
+    ingredients: List[IngredientItem],
+    assessment: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Save the finalized ingredient list and move the workflow on to goal formation."""
+    # Update ingredients data
+    ingredients_data.ingredients = ingredients
+    ingredients_data.confidence = 0.9  # High confidence after categorization
+    ingredients_data.needs_clarification = False
+    ingredients_data.clarification_questions = []
+
+    # Save final ingredients to Redis
+    await save_ingredients_to_redis(state.thread_id, ingredients_data)
+
+    # Update state
+    state.ingredients_data = ingredients_data
+    state.extraction_complete = True
+    state.current_node = "G1"  # Move to goal formation
+    state.current_phase = "goal_formation"
+
+    # Store assessment data for later use
+    state.user_constraints.update({
+        "material_synergy": assessment.get("material_synergy", 0.5),
+        "project_complexity": assessment.get("project_complexity", "moderate"),
+        "recommended_types": assessment.get("recommended_project_types", [])
+    })
+
+    logger.info(f"P1c: Categorization complete, {len(ingredients)} ingredients finalized")
+    return {
+        "extraction_complete": True,
+        "current_node": "G1",
+        "current_phase": "goal_formation",
+        "ingredients_data": ingredients_data
+    }
+
+
+def categorize_with_rules(ingredients: List[IngredientItem]) -> Tuple[List[IngredientItem], List[IngredientItem]]:
+    """
+    Split ingredients into those the material knowledge base categorizes with
+    at least P1C_RULE_CONFIDENCE_THRESHOLD confidence (returned finalized) and
+    the ambiguous rest, which still need Gemini.
+    """
+    if not settings.P1C_RULE_CATEGORIZATION_ENABLED:
+        return [], list(ingredients)
+
+    finalized, ambiguous = [], []
+    for ingredient in ingredients:
+        rules = rule_categorizer.categorize(ingredient)
+        if rules.confidence >= settings.P1C_RULE_CONFIDENCE_THRESHOLD:
+            finalized.append(ingredient.model_copy(update={
+                "material": rules.material,
+                "category": rules.category,
+                "condition": ingredient.condition or "unknown",
+                "size": ingredient.size or "unknown",
+                "confidence": rules.confidence
+            }))
+        else:
+            ambiguous.append(ingredient)
+    return finalized, ambiguous
+
+
+def _finalized_context(finalized: List[IngredientItem]) -> str:
+    """Prompt line listing ingredients already finalized by rules, for the collection assessment."""
+    if not finalized:
+        return ""
+    names = ", ".join(f"{item.name} ({item.material})" for item in finalized)
+    return f"Already categorized (do not return these, but include them in the overall assessment): {names}"
+
+
+def merge_in_original_order(
+    ingredients: List[IngredientItem],
+    finalized: List[IngredientItem],
+    ambiguous: List[IngredientItem],
+    categorized: List[IngredientItem]
+) -> List[IngredientItem]:
+    """
+    Recombine rule-finalized ingredients with the categorized ambiguous ones in
+    the extraction's order. Categorized items take the slot of the ambiguous
+    ingredient with the same name, then fill the remaining ambiguous slots in
+    order; any extras (e.g. Gemini split an item) go at the end.
+    """
+    pending = list(categorized)
+
+    def take(name: Optional[str]) -> Optional[IngredientItem]:
+        key = (name or "").strip().lower()
+        for position, item in enumerate(pending):
+            if (item.name or "").strip().lower() == key:
+                return pending.pop(position)
+        return None
+
+    rules_iter = iter(finalized)
+    # Claim name matches first so an unmatched item can't take a later ingredient's slot
+    claimed = {id(item): take(item.name) for item in ambiguous}
+    merged = []
+    for ingredient in ingredients:
+        if id(ingredient) not in claimed:
+            merged.append(next(rules_iter))
+        elif claimed[id(ingredient)] is not None:
+            merged.append(claimed[id(ingredient)])
+        elif pending:
+            merged.append(pending.pop(0))
+    return merged + pending
+
+
 async def ingredient_categorizer_node(state: WorkflowState) -> Dict[str, Any]:
     """
     P1c Node: Categorize and finalize ingredient discovery.
@@ -448,24 +557,31 @@ async def ingredient_categorizer_node(state: WorkflowState) -> Dict[str, Any]:
     logger.info(f"P1c: Categorizing ingredients for thread {state.thread_id}")
     
     # Update Redis with current state
-    from app.core.redis import redis_service
     import json
-    state_key = f"workflow_state:{state.thread_id}"
-    redis_service.set(state_key, json.dumps({
+    node_state = {
         "status": "running",
         "current_phase": "ingredient_discovery",
         "current_node": "P1c_categorize",
         "result": {}
-    }), ex=3600)
+    }
+    await ThreadArtifacts(state.thread_id, redis_service).set(Artifact.WORKFLOW_STATE, node_state)
+    await workflow_events.publish(state.thread_id, "state_update", node_state)
 
     # Load current ingredients from Redis
-    ingredients_data = load_ingredients_from_redis(state.thread_id)
+    ingredients_data = await load_ingredients_from_redis(state.thread_id)
     if not ingredients_data.ingredients:
         ingredients_data = state.ingredients_data or IngredientsData()
 
-    # Build categorization prompt
+    # Fast path: finalize what the material knowledge base resolves confidently
+    finalized, ambiguous = categorize_with_rules(ingredients_data.ingredients)
+    if finalized and not ambiguous:
+        assessment = rule_categorizer.assess_collection(finalized)
+        logger.info(f"P1c: All {len(finalized)} ingredients categorized by rules, skipping Gemini")
+        return await _finalize_categorization(state, ingredients_data, finalized, assessment)
+
+    # Build categorization prompt for the ingredients the rules left open
     ingredients_list = []
-    for ingredient in ingredients_data.ingredients:
+    for ingredient in ambiguous:
         ingredients_list.append({
             "name": ingredient.name,
             "size": ingredient.size,
@@ -478,6 +594,7 @@ async def ingredient_categorizer_node(state: WorkflowState) -> Dict[str, Any]:
     You are an expert in recycling and upcycling materials. Categorize and finalize this list of ingredients:
 
     Current ingredients: {json.dumps(ingredients_list, indent=2)}
+    {_finalized_context(finalized)}
 
     For each ingredient:
     1. Ensure the category is accurate (beverage_container, packaging, electronics, textiles, etc.)
@@ -550,36 +667,15 @@ async def ingredient_categorizer_node(state: WorkflowState) -> Dict[str, Any]:
                 )
                 updated_ingredients.append(ingredient)
 
-            # Update ingredients data
-            ingredients_data.ingredients = updated_ingredients
-            ingredients_data.confidence = 0.9  # High confidence after categorization
-            ingredients_data.needs_clarification = False
-            ingredients_data.clarification_questions = []
-
-            # Save final ingredients to Redis
-            save_ingredients_to_redis(state.thread_id, ingredients_data)
-
-            # Update state
-            state.ingredients_data = ingredients_data
-            state.extraction_complete = True
-            state.current_node = "G1"  # Move to goal formation
-            state.current_phase = "goal_formation"
-
-            # Store assessment data for later use
-            assessment = result_data.get("overall_assessment", {})
-            state.user_constraints.update({
-                "material_synergy": assessment.get("material_synergy", 0.5),
-                "project_complexity": assessment.get("project_complexity", "moderate"),
-                "recommended_types": assessment.get("recommended_project_types", [])
-            })
-
-            logger.info(f"P1c: Categorization complete, {len(updated_ingredients)} ingredients finalized")
-            return {
-                "extraction_complete": True,
-                "current_node": "G1",
-                "current_phase": "goal_formation",
-                "ingredients_data": ingredients_data
-            }
+            logger.info(
+                f"P1c: Gemini categorized {len(ambiguous)} ambiguous ingredients, "
+                f"{len(finalized)} finalized by rules"
+            )
+            return await _finalize_categorization(
+                state, ingredients_data,
+                merge_in_original_order(ingredients_data.ingredients, finalized, ambiguous, updated_ingredients),
+                result_data.get("overall_assessment", {})
+            )
         else:
             error_message = response.get("error", "Unknown error") if response else "No response"
             logger.error(f"P1c: AI agent call failed: {error_message}")
@@ -589,6 +685,13 @@ async def ingredient_categorizer_node(state: WorkflowState) -> Dict[str, Any]:
         logger.error(f"P1c: Categorization failed: {str(e)}")
         state.errors.append(f"Categorization failed: {str(e)}")
 
+        # Keep what the rules settled; ambiguous ingredients stay as extracted
+        if finalized:
+            ingredients_data.ingredients = merge_in_original_order(
+                ingredients_data.ingredients, finalized, ambiguous, ambiguous
+            )
+            await save_ingredients_to_redis(state.thread_id, ingredients_data)
+
         # Mark as complete anyway with current data
         state.extraction_complete = True
         state.current_node = "G1"
@@ -615,7 +718,7 @@ async def process_user_clarification(state: WorkflowState) -> Dict[str, Any]:
     logger.info(f"Processing user clarification for thread {state.thread_id}")
 
     # FALLBACK #1: Load existing ingredients (always have baseline)
-    ingredients_data = load_ingredients_from_redis(state.thread_id)
+    ingredients_data = await load_ingredients_from_redis(state.thread_id)
     if not ingredients_data.ingredients and state.ingredients_data:
         ingredients_data = state.ingredients_data
 
@@ -697,7 +800,7 @@ async def process_user_clarification(state: WorkflowState) -> Dict[str, Any]:
                 )
                 ingredients_data.needs_clarification = result_data.get("needs_clarification", False)
 
-                save_ingredients_to_redis(state.thread_id, ingredients_data)
+                await save_ingredients_to_redis(state.thread_id, ingredients_data)
                 state.ingredients_data = ingredients_data
 
                 logger.info("✅ Clarification processed successfully via AI")
@@ -709,7 +812,7 @@ async def process_user_clarification(state: WorkflowState) -> Dict[str, Any]:
                     user_response,
                     state.user_questions
                 )
-                save_ingredients_to_redis(state.thread_id, ingredients_data)
+                await save_ingredients_to_redis(state.thread_id, ingredients_data)
                 state.ingredients_data = ingredients_data
                 logger.info("✅ Clarification processed via manual keyword parsing")
         else:
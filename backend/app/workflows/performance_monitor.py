@@ -1,17 +1,32 @@
 """
 Performance monitoring and optimization for LangGraph workflows.
 Tracks ML pipeline performance and provides optimization recommendations.
+
+Memory stays fixed however long the process runs: node latencies go into
+log-bucketed quantile sketches (bounded bucket count, relative error
+PERFORMANCE_SKETCH_ACCURACY) instead of raw sample lists, finished workflows
+are kept in a ring buffer of the PERFORMANCE_RECENT_WORKFLOWS most recent, and
+workflows that never finish are evicted past PERFORMANCE_MAX_ACTIVE_WORKFLOWS.
+Graph nodes are fed in automatically through ``monitor_node`` (see graph.py).
 """
+import math
+import threading
 import time
-import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+from collections import OrderedDict, deque
+from functools import wraps
+from typing import Callable, Deque, Dict, List, Optional, Any
 from dataclasses import dataclass, field
 from enum import Enum
 import statistics
 
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
+# Durations below this (in seconds) share one bucket
+MIN_TRACKED_SECONDS = 1e-6
+
 
 class PerformanceLevel(Enum):
     """Performance levels for optimization."""
@@ -21,42 +36,121 @@ class PerformanceLevel(Enum):
     POOR = "poor"            # >10s per node
 
 
+def _performance_level(seconds: float) -> PerformanceLevel:
+    if seconds < 2.0:
+        return PerformanceLevel.OPTIMAL
+    elif seconds < 5.0:
+        return PerformanceLevel.GOOD
+    elif seconds < 10.0:
+        return PerformanceLevel.DEGRADED
+    else:
+        return PerformanceLevel.POOR
+
+
+class LatencySketch:
+    """
+    Streaming quantile sketch over logarithmic buckets (as in DDSketch/HDR
+    histograms): any quantile is within ``relative_accuracy`` of the true value,
+    and memory is bounded by ``max_buckets`` regardless of how many values are added.
+    """
+
+    def __init__(self, relative_accuracy: Optional[float] = None, max_buckets: int = 2048):
+        alpha = relative_accuracy or settings.PERFORMANCE_SKETCH_ACCURACY
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value < MIN_TRACKED_SECONDS:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            # Fold the two lowest buckets: only the fastest values lose accuracy
+            lowest, second = sorted(self.buckets)[:2]
+            self.buckets[second] += self.buckets.pop(lowest)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return self.min
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "p50": self.quantile(0.50),
+            "p90": self.quantile(0.90),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
 @dataclass
 class NodeMetrics:
     """Metrics for individual workflow nodes."""
     node_name: str
-    execution_times: List[float] = field(default_factory=list)
+    latency: LatencySketch = field(default_factory=LatencySketch)
     error_count: int = 0
     retry_count: int = 0
     gemini_calls: int = 0
     redis_operations: int = 0
 
+    @property
+    def execution_count(self) -> int:
+        return self.latency.count
+
     @property
     def average_time(self) -> float:
         """Calculate average execution time."""
-        return statistics.mean(self.execution_times) if self.execution_times else 0.0
+        return self.latency.mean
 
     @property
     def p95_time(self) -> float:
-        """Calculate 95th percentile execution time."""
-        if not self.execution_times:
-            return 0.0
-        sorted_times = sorted(self.execution_times)
-        index = int(0.95 * len(sorted_times))
-        return sorted_times[min(index, len(sorted_times) - 1)]
+        """Estimate 95th percentile execution time."""
+        return self.latency.quantile(0.95)
 
     @property
     def performance_level(self) -> PerformanceLevel:
         """Determine performance level based on average time."""
-        avg_time = self.average_time
-        if avg_time < 2.0:
-            return PerformanceLevel.OPTIMAL
-        elif avg_time < 5.0:
-            return PerformanceLevel.GOOD
-        elif avg_time < 10.0:
-            return PerformanceLevel.DEGRADED
-        else:
-            return PerformanceLevel.POOR
+        return _performance_level(self.average_time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "node": self.node_name,
+            **self.latency.to_dict(),
+            "error_count": self.error_count,
+            "retry_count": self.retry_count,
+            "gemini_calls": self.gemini_calls,
+            "redis_operations": self.redis_operations,
+            "performance_level": self.performance_level.value,
+        }
 
 
 @dataclass
@@ -82,22 +176,13 @@ class WorkflowMetrics:
     @property
     def overall_performance_level(self) -> PerformanceLevel:
         """Determine overall performance level."""
-        if not self.node_metrics:
-            return PerformanceLevel.OPTIMAL
-
-        avg_node_time = statistics.mean([
+        node_averages = [
             metrics.average_time for metrics in self.node_metrics.values()
-            if metrics.execution_times
-        ])
-
-        if avg_node_time < 2.0:
+            if metrics.execution_count
+        ]
+        if not node_averages:
             return PerformanceLevel.OPTIMAL
-        elif avg_node_time < 5.0:
-            return PerformanceLevel.GOOD
-        elif avg_node_time < 10.0:
-            return PerformanceLevel.DEGRADED
-        else:
-            return PerformanceLevel.POOR
+        return _performance_level(statistics.mean(node_averages))
 
 
 class PerformanceMonitor:
@@ -105,22 +190,42 @@ class PerformanceMonitor:
     Monitor and optimize LangGraph workflow performance.
     """
 
-    def __init__(self):
-        self.active_workflows: Dict[str, WorkflowMetrics] = {}
-        self.completed_workflows: List[WorkflowMetrics] = []
+    def __init__(self, recent_workflows: Optional[int] = None, max_active_workflows: Optional[int] = None):
+        self.active_workflows: "OrderedDict[str, WorkflowMetrics]" = OrderedDict()
+        self.completed_workflows: Deque[WorkflowMetrics] = deque(
+            maxlen=recent_workflows or settings.PERFORMANCE_RECENT_WORKFLOWS
+        )
+        self.max_active_workflows = max_active_workflows or settings.PERFORMANCE_MAX_ACTIVE_WORKFLOWS
         self.optimization_rules = self._load_optimization_rules()
 
+        # Process-lifetime aggregates; one entry per graph node
+        self.node_stats: Dict[str, NodeMetrics] = {}
+        self.workflow_durations = LatencySketch()
+        self.total_workflows = 0
+        self.abandoned_workflows = 0
+        self.total_gemini_calls = 0
+        self.total_errors = 0
+        self.performance_distribution = {level.value: 0 for level in PerformanceLevel}
+        self._lock = threading.Lock()
+
     def start_workflow_tracking(self, thread_id: str):
         """Start tracking a new workflow."""
-        self.active_workflows[thread_id] = WorkflowMetrics(
-            thread_id=thread_id,
-            start_time=time.time()
-        )
+        with self._lock:
+            self.active_workflows[thread_id] = WorkflowMetrics(
+                thread_id=thread_id,
+                start_time=time.time()
+            )
+            self.active_workflows.move_to_end(thread_id)
+            while len(self.active_workflows) > self.max_active_workflows:
+                # Never completed (crashed or abandoned mid-run); stop holding it
+                evicted, _ = self.active_workflows.popitem(last=False)
+                self.abandoned_workflows += 1
+                logger.debug(f"Dropped stale performance tracking for workflow {evicted}")
         logger.info(f"Started performance tracking for workflow {thread_id}")
 
     def record_node_execution(
         self,
-        thread_id: str,
+        thread_id: Optional[str],
         node_name: str,
         duration: float,
         gemini_calls: int = 0,
@@ -129,31 +234,40 @@ class PerformanceMonitor:
         retries: int = 0
     ):
         """Record node execution metrics."""
-        if thread_id not in self.active_workflows:
-            logger.warning(f"Workflow {thread_id} not being tracked")
-            return
+        with self._lock:
+            stats = self.node_stats.get(node_name)
+            if stats is None:
+                stats = self.node_stats[node_name] = NodeMetrics(node_name)
+            self._add_execution(stats, duration, gemini_calls, redis_ops, errors, retries)
 
-        workflow_metrics = self.active_workflows[thread_id]
+            workflow_metrics = self.active_workflows.get(thread_id) if thread_id else None
+            if workflow_metrics is None:
+                logger.debug(f"Workflow {thread_id} not being tracked")
+                return
 
-        if node_name not in workflow_metrics.node_metrics:
-            workflow_metrics.node_metrics[node_name] = NodeMetrics(node_name)
+            if node_name not in workflow_metrics.node_metrics:
+                workflow_metrics.node_metrics[node_name] = NodeMetrics(node_name)
 
-        node_metrics = workflow_metrics.node_metrics[node_name]
-        node_metrics.execution_times.append(duration)
-        node_metrics.gemini_calls += gemini_calls
-        node_metrics.redis_operations += redis_ops
-        node_metrics.error_count += errors
-        node_metrics.retry_count += retries
+            node_metrics = workflow_metrics.node_metrics[node_name]
+            self._add_execution(node_metrics, duration, gemini_calls, redis_ops, errors, retries)
 
-        # Update workflow totals
-        workflow_metrics.total_gemini_calls += gemini_calls
-        workflow_metrics.total_redis_operations += redis_ops
-        workflow_metrics.error_count += errors
-        workflow_metrics.retry_count += retries
+            # Update workflow totals
+            workflow_metrics.total_gemini_calls += gemini_calls
+            workflow_metrics.total_redis_operations += redis_ops
+            workflow_metrics.error_count += errors
+            workflow_metrics.retry_count += retries
 
         # Check if optimization is needed
         if node_metrics.performance_level in [PerformanceLevel.DEGRADED, PerformanceLevel.POOR]:
-            self._trigger_optimization_analysis(thread_id, node_name)
+            self._trigger_optimization_analysis(thread_id, node_name, node_metrics)
+
+    @staticmethod
+    def _add_execution(metrics: NodeMetrics, duration: float, gemini_calls: int, redis_ops: int, errors: int, retries: int):
+        metrics.latency.add(duration)
+        metrics.gemini_calls += gemini_calls
+        metrics.redis_operations += redis_ops
+        metrics.error_count += errors
+        metrics.retry_count += retries
 
     def record_phase_completion(self, thread_id: str, phase: str, duration: float):
         """Record phase completion time."""
@@ -162,16 +276,21 @@ class PerformanceMonitor:
 
     def complete_workflow_tracking(self, thread_id: str):
         """Complete workflow tracking and analyze results."""
-        if thread_id not in self.active_workflows:
-            logger.warning(f"Workflow {thread_id} not being tracked")
-            return
-
-        workflow_metrics = self.active_workflows[thread_id]
-        workflow_metrics.end_time = time.time()
-
-        # Move to completed workflows
-        self.completed_workflows.append(workflow_metrics)
-        del self.active_workflows[thread_id]
+        with self._lock:
+            workflow_metrics = self.active_workflows.pop(thread_id, None)
+            if workflow_metrics is None:
+                logger.warning(f"Workflow {thread_id} not being tracked")
+                return
+
+            workflow_metrics.end_time = time.time()
+
+            # Ring buffer of recent workflows; totals keep the long-run picture
+            self.completed_workflows.append(workflow_metrics)
+            self.total_workflows += 1
+            self.total_gemini_calls += workflow_metrics.total_gemini_calls
+            self.total_errors += workflow_metrics.error_count
+            self.workflow_durations.add(workflow_metrics.total_duration)
+            self.performance_distribution[workflow_metrics.overall_performance_level.value] += 1
 
         # Generate performance report
         self._generate_performance_report(workflow_metrics)
@@ -185,9 +304,9 @@ class PerformanceMonitor:
         if thread_id in self.active_workflows:
             workflow_metrics = self.active_workflows[thread_id]
         else:
-            # Look in completed workflows
+            # Look in recently completed workflows
             workflow_metrics = next(
-                (wm for wm in self.completed_workflows if wm.thread_id == thread_id),
+                (wm for wm in reversed(self.completed_workflows) if wm.thread_id == thread_id),
                 None
             )
 
@@ -227,41 +346,24 @@ class PerformanceMonitor:
 
     def get_performance_summary(self) -> Dict[str, Any]:
         """Get overall performance summary."""
-        if not self.completed_workflows:
+        if not self.total_workflows:
             return {"message": "No completed workflows to analyze"}
 
-        # Calculate aggregated metrics
-        total_workflows = len(self.completed_workflows)
-        avg_duration = statistics.mean([wm.total_duration for wm in self.completed_workflows])
-        avg_gemini_calls = statistics.mean([wm.total_gemini_calls for wm in self.completed_workflows])
-        avg_errors = statistics.mean([wm.error_count for wm in self.completed_workflows])
-
-        # Performance distribution
-        performance_levels = [wm.overall_performance_level.value for wm in self.completed_workflows]
-        performance_distribution = {
-            level.value: performance_levels.count(level.value)
-            for level in PerformanceLevel
-        }
-
-        # Slowest nodes analysis
-        all_node_metrics = []
-        for wm in self.completed_workflows:
-            all_node_metrics.extend(wm.node_metrics.values())
-
         slowest_nodes = sorted(
-            all_node_metrics,
+            list(self.node_stats.values()),
             key=lambda nm: nm.average_time,
             reverse=True
         )[:5]
 
         return {
             "summary": {
-                "total_workflows": total_workflows,
-                "average_duration": avg_duration,
-                "average_gemini_calls": avg_gemini_calls,
-                "average_errors": avg_errors
+                "total_workflows": self.total_workflows,
+                "average_duration": self.workflow_durations.mean,
+                "p95_duration": self.workflow_durations.quantile(0.95),
+                "average_gemini_calls": self.total_gemini_calls / self.total_workflows,
+                "average_errors": self.total_errors / self.total_workflows
             },
-            "performance_distribution": performance_distribution,
+            "performance_distribution": dict(self.performance_distribution),
             "slowest_nodes": [
                 {
                     "node": nm.node_name,
@@ -273,13 +375,26 @@ class PerformanceMonitor:
             ]
         }
 
-    def _trigger_optimization_analysis(self, thread_id: str, node_name: str):
+    def get_node_percentiles(self) -> Dict[str, Dict[str, Any]]:
+        """Per-node latency percentiles (seconds) and error counts since process start."""
+        return {name: stats.to_dict() for name, stats in sorted(list(self.node_stats.items()))}
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        """Everything the admin endpoint reports, in one JSON-ready dict."""
+        return {
+            "active_workflows": len(self.active_workflows),
+            "recent_workflows": len(self.completed_workflows),
+            "abandoned_workflows": self.abandoned_workflows,
+            "workflow_duration": self.workflow_durations.to_dict(),
+            "nodes": self.get_node_percentiles(),
+            **self.get_performance_summary(),
+        }
+
+    def _trigger_optimization_analysis(self, thread_id: str, node_name: str, node_metrics: NodeMetrics):
         """Trigger optimization analysis for slow nodes."""
         logger.warning(f"Performance degradation detected in {node_name} for workflow {thread_id}")
 
         # Immediate optimizations that could be applied
-        workflow_metrics = self.active_workflows[thread_id]
-        node_metrics = workflow_metrics.node_metrics[node_name]
 
         if node_name in ["P1a_ingredient_extraction", "P1c_categorize_ingredients"]:
             # For extraction nodes, consider switching to faster model
@@ -376,4 +491,21 @@ class PerformanceMonitor:
 
 
 # Global performance monitor instance
-performance_monitor = PerformanceMonitor()
\ No newline at end of file
+performance_monitor = PerformanceMonitor()
+
+def monitor_node(name: str, node: Callable, monitor: Optional[PerformanceMonitor] = None) -> Callable:
+    """Wrap a LangGraph node so every execution is recorded by the performance monitor."""
+    @wraps(node)
+    async def wrapper(state, *args, **kwargs):
+        start_time = time.perf_counter()
+        errors = 1
+        try:
+            result = await node(state, *args, **kwargs)
+            errors = 0
+            return result
+        finally:
+            (monitor or performance_monitor).record_node_execution(
+                getattr(state, "thread_id", None), name, time.perf_counter() - start_time, errors=errors
+            )
+
+    return wrapper
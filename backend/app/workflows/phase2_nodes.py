@@ -11,7 +11,9 @@ from app.workflows.state import WorkflowState, ConceptVariant
 from app.ai_service.production_gemini import call_gemini_with_retry as production_call_gemini
 
 from app.core.config import settings
-from app.core.redis import redis_service
+from app.core.redis import async_redis_service as redis_service
+from app.core.thread_store import Artifact, ThreadArtifacts
+from app.core.event_bus import workflow_events
 
 logger = logging.getLogger(__name__)
 
@@ -222,14 +224,14 @@ async def goal_formation_node(state: WorkflowState) -> Dict[str, Any]:
     logger.info(f"G1: Starting goal formation for thread {state.thread_id}")
     
     # Update Redis with current state
-    from app.core.redis import redis_service
-    state_key = f"workflow_state:{state.thread_id}"
-    redis_service.set(state_key, json.dumps({
+    node_state = {
         "status": "running",
         "current_phase": "goal_formation",
         "current_node": "G1_goal_formation",
         "result": {}
-    }), ex=3600)
+    }
+    await ThreadArtifacts(state.thread_id, redis_service).set(Artifact.WORKFLOW_STATE, node_state)
+    await workflow_events.publish(state.thread_id, "state_update", node_state)
 
     # Validate that we have ingredient data
     if not state.ingredients_data or not state.ingredients_data.ingredients:
@@ -239,9 +241,7 @@ async def goal_formation_node(state: WorkflowState) -> Dict[str, Any]:
         clarification_question = "I couldn't identify any specific materials from your input. Could you tell me what you'd like to make? For example: 'a lamp from glass bottles' or 'jewelry from plastic caps'"
         
         # Save question to Redis for frontend
-        from app.core.redis import redis_service
-        question_key = f"clarification:{state.thread_id}"
-        redis_service.set(question_key, clarification_question, ex=3600)
+        await ThreadArtifacts(state.thread_id, redis_service).set(Artifact.CLARIFICATION, clarification_question)
         
         # Add question to state and mark as needing input
         state.add_user_question(clarification_question)
@@ -323,8 +323,7 @@ async def goal_formation_node(state: WorkflowState) -> Dict[str, Any]:
                 })
 
                 # Save goal data to Redis
-                goal_key = f"goals:{state.thread_id}"
-                redis_service.set(goal_key, json.dumps(goal_data), ex=3600)
+                await ThreadArtifacts(state.thread_id, redis_service).set(Artifact.GOALS, goal_data)
 
                 state.current_node = "O1"
                 logger.info(f"✅ G1: Goal formation complete - {goal_data['artifact_type']}")
@@ -368,8 +367,7 @@ async def goal_formation_node(state: WorkflowState) -> Dict[str, Any]:
             "artifact_type": "household_utility",
             "project_complexity": "moderate"
         }
-        goal_key = f"goals:{state.thread_id}"
-        redis_service.set(goal_key, json.dumps(fallback_goal_data), ex=3600)
+        await ThreadArtifacts(state.thread_id, redis_service).set(Artifact.GOALS, fallback_goal_data)
 
     return {
         "goals": state.goals,
@@ -386,14 +384,14 @@ async def choice_proposer_node(state: WorkflowState) -> Dict[str, Any]:
     logger.info(f"O1: Starting choice generation for thread {state.thread_id}")
     
     # Update Redis with current state
-    from app.core.redis import redis_service
-    state_key = f"workflow_state:{state.thread_id}"
-    redis_service.set(state_key, json.dumps({
+    node_state = {
         "status": "running",
         "current_phase": "goal_formation",
         "current_node": "O1_choice_generation",
         "result": {}
-    }), ex=3600)
+    }
+    await ThreadArtifacts(state.thread_id, redis_service).set(Artifact.WORKFLOW_STATE, node_state)
+    await workflow_events.publish(state.thread_id, "state_update", node_state)
 
     # Validate inputs
     if not state.goals or not state.ingredients_data:
@@ -442,12 +440,18 @@ async def choice_proposer_node(state: WorkflowState) -> Dict[str, Any]:
     Focus on helping users choose between different creative approaches.
     """
 
+    async def publish_option(index: int, option: Dict[str, Any]):
+        # PROGRESSIVE UPDATE: each option goes out as soon as its JSON closes
+        await workflow_events.publish(state.thread_id, "choice_option", {"index": index, "option": option})
+
     try:
         # Call Gemini Pro for LITE creative choice generation (MUCH FASTER!)
         response = await production_call_gemini(
             prompt=choice_prompt_lite,
             task_type="creative",
-            response_schema=CHOICE_GENERATION_LITE_SCHEMA  # Use lite schema
+            response_schema=CHOICE_GENERATION_LITE_SCHEMA,  # Use lite schema
+            stream_key="viable_options",
+            on_item=publish_option
         )
 
         if response and not response.get("error"):
@@ -458,8 +462,8 @@ async def choice_proposer_node(state: WorkflowState) -> Dict[str, Any]:
             state.viable_options = viable_options
 
             # Save choices to Redis
-            choices_key = f"choices:{state.thread_id}"
-            redis_service.set(choices_key, json.dumps(choice_data), ex=3600)
+            await ThreadArtifacts(state.thread_id, redis_service).set(Artifact.CHOICES, choice_data)
+            await workflow_events.publish(state.thread_id, "choices_generated", choice_data)
 
             # Continue to image generation for these ideas (don't pause yet!)
             state.current_node = "IMG"
@@ -505,8 +509,8 @@ async def choice_proposer_node(state: WorkflowState) -> Dict[str, Any]:
                 "creativity_score": 0.3
             }
         }
-        choices_key = f"choices:{state.thread_id}"
-        redis_service.set(choices_key, json.dumps(fallback_choices_data), ex=3600)
+        await ThreadArtifacts(state.thread_id, redis_service).set(Artifact.CHOICES, fallback_choices_data)
+        await workflow_events.publish(state.thread_id, "choices_generated", fallback_choices_data)
 
     return {
         "viable_options": state.viable_options,
@@ -584,14 +588,14 @@ async def evaluation_node(state: WorkflowState) -> Dict[str, Any]:
     logger.info(f"E1: Starting option evaluation for thread {state.thread_id}")
     
     # Update Redis with current state
-    from app.core.redis import redis_service
-    state_key = f"workflow_state:{state.thread_id}"
-    redis_service.set(state_key, json.dumps({
+    node_state = {
         "status": "running",
         "current_phase": "goal_formation",
         "current_node": "E1_evaluation",
         "result": {}
-    }), ex=3600)
+    }
+    await ThreadArtifacts(state.thread_id, redis_service).set(Artifact.WORKFLOW_STATE, node_state)
+    await workflow_events.publish(state.thread_id, "state_update", node_state)
 
     # Validate inputs
     if not state.viable_options:
@@ -693,8 +697,7 @@ async def evaluation_node(state: WorkflowState) -> Dict[str, Any]:
                 option["ranking"] = i + 1
 
             # Store evaluation results
-            eval_key = f"evaluation:{state.thread_id}"
-            redis_service.set(eval_key, json.dumps(eval_data), ex=3600)
+            await ThreadArtifacts(state.thread_id, redis_service).set(Artifact.EVALUATION, eval_data)
 
             # Update state with top options
             recommended_options = [
@@ -759,8 +762,7 @@ async def evaluation_node(state: WorkflowState) -> Dict[str, Any]:
                     "fallback_mode": True
                 }
             }
-            eval_key = f"evaluation:{state.thread_id}"
-            redis_service.set(eval_key, json.dumps(fallback_eval_data), ex=3600)
+            await ThreadArtifacts(state.thread_id, redis_service).set(Artifact.EVALUATION, fallback_eval_data)
 
             return {
                 "evaluated_options": fallback_evaluated,
@@ -6,17 +6,22 @@ import json
 import time
 import logging
 import asyncio
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set
 import os
 import google.generativeai as genai
 from app.workflows.state import WorkflowState, ConceptVariant, StepImage
 from app.ai_service.production_gemini import call_gemini_with_retry as production_call_gemini
 from app.core.config import settings
-from app.core.redis import redis_service
+from app.core.redis import async_redis_service as redis_service
+from app.core.thread_store import Artifact, ThreadArtifacts
+from app.core.event_bus import workflow_events
+from app.core.tracing import traced
+from app.ai_service.image_generation import get_image_engine
+from app.core.image_store import get_image_store
+from app.core.image_variants import THUMBNAIL_WIDTH, pregenerate_variants
 from app.knowledge.material_affordances import material_kb, MaterialType
 from app.workflows.step_image_generator import get_step_image_generator
 import httpx
-import base64
 from io import BytesIO
 
 logger = logging.getLogger(__name__)
@@ -24,6 +29,15 @@ logger = logging.getLogger(__name__)
 # Get API base URL from environment (for image URLs)
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 
+# Background variant renders, held until done so they aren't garbage-collected mid-run
+_variant_tasks: Set[asyncio.Task] = set()
+
+
+def _variant_task_done(task: asyncio.Task) -> None:
+    _variant_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"IMG: Variant pre-generation failed: {task.exception()}")
+
 # Structured output schemas for Phase 3
 PROMPT_BUILDER_SCHEMA = {
     "type": "object",
@@ -255,6 +269,16 @@ IMPORTANT: The upcycled product must be completely finished and polished. Show O
     }
 
 
+def _encode_hero_webp(image_bytes: bytes) -> bytes:
+    """Re-encode generated image bytes as compressed WebP."""
+    from PIL import Image as PILImage
+
+    img = PILImage.open(BytesIO(image_bytes))
+    buffer = BytesIO()
+    img.save(buffer, "WEBP", quality=85, optimize=True)
+    return buffer.getvalue()
+
+
 async def image_generation_node(state: WorkflowState) -> Dict[str, Any]:
     """
     IMG Node: Generate high-quality HERO images for all 3 concept variations.
@@ -271,142 +295,125 @@ async def image_generation_node(state: WorkflowState) -> Dict[str, Any]:
             "current_node": "IMG"
         }
 
-    async def generate_single_image(variant: ConceptVariant, semaphore: asyncio.Semaphore, title: str = "Concept", index: int = 0) -> ConceptVariant:
-        """Generate a single high-quality hero image with rate limiting using Gemini.
-        Updates Redis progress as each image completes for real-time streaming."""
-        async with semaphore:
-            try:
-                from google import genai as google_genai
-                from google.genai import types
-                
-                # Initialize Gemini client for image generation
-                gemini_api_key = os.getenv("GEMINI_API_KEY")
-                if not gemini_api_key:
-                    raise ValueError("GEMINI_API_KEY not found")
-                
-                client = google_genai.Client(api_key=gemini_api_key)
-                
-                logger.info(f"IMG: Calling Gemini to generate {variant.style} image for: {title}")
-                logger.info(f"IMG: Using prompt: {variant.image_prompt[:200]}...")
-                
-                # Call Gemini Nano Banana (gemini-2.5-flash-image) for image generation
-                response = client.models.generate_content(
-                    model="gemini-2.5-flash-image",
-                    contents=[variant.image_prompt]  # Use our detailed hero prompt
-                )
-                
-                logger.info("IMG: Received response from Gemini")
-                
-                # Extract generated image from response
-                image_base64 = None
-                if hasattr(response, 'candidates') and response.candidates:
-                    candidate = response.candidates[0]
-                    if hasattr(candidate, 'content') and candidate.content:
-                        if hasattr(candidate.content, 'parts') and candidate.content.parts:
-                            for part in candidate.content.parts:
-                                if hasattr(part, 'inline_data') and part.inline_data is not None:
-                                    logger.info("IMG: ✓ Found generated image in Gemini response")
-                                    image_base64 = base64.b64encode(part.inline_data.data).decode()
-                                    break
-                                elif hasattr(part, 'text') and part.text is not None:
-                                    logger.info(f"IMG: Gemini text response: {part.text[:200]}...")
-                
-                variant.image_id = f"hero_{state.thread_id}_{variant.style}_{int(time.time())}"
-                variant.aesthetic_score = 0.95 if image_base64 else 0.5
-
-                # OPTIMIZATION: Store image directly to filesystem cache (MUCH faster!)
-                if image_base64:
-                    from pathlib import Path
-                    CACHE_DIR = Path("/tmp/orbit_image_cache")
-                    CACHE_DIR.mkdir(exist_ok=True)
-                    
-                    # Decode and save as WebP (compressed)
-                    image_bytes = base64.b64decode(image_base64)
-                    from PIL import Image as PILImage
-                    img = PILImage.open(BytesIO(image_bytes))
-                    
-                    cache_file = CACHE_DIR / f"{variant.image_id}.webp"
-                    img.save(cache_file, "WEBP", quality=85, optimize=True)
-                    logger.info(f"IMG: ✓ Saved image to filesystem cache: {cache_file}")
-                
-                # Store lightweight metadata in Redis (NO base64!)
-                image_key = f"image:{variant.image_id}"
-                image_metadata = {
-                    "thread_id": state.thread_id,
-                    "style": variant.style,
-                    "title": title,
-                    "prompt": variant.image_prompt,
-                    "generated_at": time.time(),
-                    "quality": "hero",
-                    "model": "gemini-2.5-flash-image",
-                    "status": "generated" if image_base64 else "placeholder",
-                    # NO base64_data - stored on filesystem instead!
-                    "cached": True if image_base64 else False
-                }
-                redis_service.set(image_key, json.dumps(image_metadata), ex=7200)
+    engine = get_image_engine()
 
-                if image_base64:
-                    logger.info(f"IMG: ✓ Successfully generated real AI image for {title}")
-                else:
-                    logger.warning(f"IMG: ✗ No image in Gemini response, will use placeholder for {title}")
-                
-                # OPTIMIZATION: Update Redis with this single concept's image immediately
-                # This allows streaming to frontend as each image completes
-                image_url = f"{API_BASE_URL}/images/{variant.image_id}" if variant.image_id else f"{API_BASE_URL}/images/placeholder/{variant.style}"
-                
-                concept_update = {
-                    "concept_id": f"concept_{index}",
-                    "title": title,
-                    "description": variant.description,
-                    "style": variant.style,
-                    "image_url": image_url,
-                    "status": "ready",  # Mark as complete
-                    "url": image_url
-                }
-                
-                # Update Redis with completed concept
-                concept_progress_key = f"concept_progress:{state.thread_id}:{index}"
-                redis_service.set(concept_progress_key, json.dumps(concept_update), ex=3600)
-                logger.info(f"IMG: ✓ Concept {index+1} ready for streaming with image")
-                
-                return variant
+    async def generate_single_image(variant: ConceptVariant, title: str = "Concept", index: int = 0) -> ConceptVariant:
+        """Generate a single high-quality hero image using Gemini.
+        Concurrency is bounded by the shared image engine; Redis progress is
+        updated as each image completes for real-time streaming."""
+        try:
+            logger.info(f"IMG: Calling Gemini to generate {variant.style} image for: {title}")
+            logger.info(f"IMG: Using prompt: {variant.image_prompt[:200]}...")
+
+            # Call Gemini Nano Banana (gemini-2.5-flash-image) on the async API
+            image_bytes = await engine.generate_image(variant.image_prompt, label=f"concept {index + 1}")
+            if image_bytes:
+                logger.info("IMG: ✓ Found generated image in Gemini response")
+
+            # Index keeps IDs unique when variants share a style and finish in the same second
+            variant.image_id = f"hero_{state.thread_id}_{variant.style}_{index}_{int(time.time())}"
+            variant.aesthetic_score = 0.95 if image_bytes else 0.5
+
+            # OPTIMIZATION: Store image in the content-addressed image store (NOT Redis)
+            content_hash = None
+            if image_bytes:
+                # WebP encoding is CPU-bound; keep it off the event loop
+                webp_bytes = await asyncio.to_thread(_encode_hero_webp, image_bytes)
+                image_store = get_image_store()
+                content_hash = await image_store.put_image(variant.image_id, webp_bytes)
+                logger.info(f"IMG: ✓ Saved image to image store: {variant.image_id} ({content_hash[:12]})")
+            
+            # Store lightweight metadata in Redis (NO base64!)
+            image_key = f"image:{variant.image_id}"
+            image_metadata = {
+                "thread_id": state.thread_id,
+                "style": variant.style,
+                "title": title,
+                "prompt": variant.image_prompt,
+                "generated_at": time.time(),
+                "quality": "hero",
+                "model": engine.model,
+                "status": "generated" if image_bytes else "placeholder",
+                # NO base64_data - stored in the image store instead!
+                "cached": True if image_bytes else False,
+                "content_hash": content_hash
+            }
+            await redis_service.set(image_key, json.dumps(image_metadata), ex=7200)
 
-            except Exception as e:
-                logger.error(f"IMG: Failed to create image metadata for {variant.style}: {str(e)}")
-                variant.image_id = f"fallback_{state.thread_id}_{variant.style}_{int(time.time())}"
-                variant.aesthetic_score = 0.5
-                
-                # Create fallback metadata
-                fallback_metadata = {
-                    "thread_id": state.thread_id,
-                    "style": variant.style,
-                    "title": title,
-                    "prompt": variant.image_prompt,
-                    "generated_at": time.time(),
-                    "status": "fallback",
-                    "notes": "Failed to generate image"
-                }
-                redis_service.set(
-                    f"image:{variant.image_id}",
-                    json.dumps(fallback_metadata),
-                    ex=7200
-                )
-                return variant
+            if image_bytes:
+                logger.info(f"IMG: ✓ Successfully generated real AI image for {title}")
+            else:
+                logger.warning(f"IMG: ✗ No image in Gemini response, will use placeholder for {title}")
+            
+            # OPTIMIZATION: Update Redis with this single concept's image immediately
+            # This allows streaming to frontend as each image completes
+            image_url = f"{API_BASE_URL}/images/{variant.image_id}" if variant.image_id else f"{API_BASE_URL}/images/placeholder/{variant.style}"
+            
+            concept_update = {
+                "concept_id": f"concept_{index}",
+                "title": title,
+                "description": variant.description,
+                "style": variant.style,
+                "image_url": image_url,
+                "thumbnail_url": f"{image_url}?w={THUMBNAIL_WIDTH}",
+                "status": "ready",  # Mark as complete
+                "url": image_url
+            }
+            
+            # Update the thread's progress hash (one field per concept, readable without KEYS scans)
+            concept_progress_key = f"concept_progress:{state.thread_id}"
+            await redis_service.hset(concept_progress_key, str(index), json.dumps(concept_update))
+            await redis_service.expire(concept_progress_key, 3600)
+            await workflow_events.publish(state.thread_id, "concept_progress", concept_update)
+            logger.info(f"IMG: ✓ Concept {index+1} ready for streaming with image")
+
+            if content_hash:
+                # Render grid/card sizes after the concept is announced;
+                # a thumbnail requested before they land is rendered on demand
+                task = asyncio.create_task(pregenerate_variants(image_store, content_hash, webp_bytes))
+                _variant_tasks.add(task)
+                task.add_done_callback(_variant_task_done)
+            
+            return variant
+
+        except Exception as e:
+            logger.error(f"IMG: Failed to create image metadata for {variant.style}: {str(e)}")
+            variant.image_id = f"fallback_{state.thread_id}_{variant.style}_{index}_{int(time.time())}"
+            variant.aesthetic_score = 0.5
+            
+            # Create fallback metadata
+            fallback_metadata = {
+                "thread_id": state.thread_id,
+                "style": variant.style,
+                "title": title,
+                "prompt": variant.image_prompt,
+                "generated_at": time.time(),
+                "status": "fallback",
+                "notes": "Failed to generate image"
+            }
+            await redis_service.set(
+                f"image:{variant.image_id}",
+                json.dumps(fallback_metadata),
+                ex=7200
+            )
+            return variant
 
     try:
-        # Generate all 3 hero images sequentially for consistent quality
-        semaphore = asyncio.Semaphore(1)
-        generated_variants = []
-        
-        logger.info(f"IMG: Generating {len(state.concept_variants)} hero images with detailed prompts")
-        
+        # Generate all hero images in parallel; each publishes its own progress as it lands
+        logger.info(
+            f"IMG: Generating {len(state.concept_variants)} hero images with detailed prompts "
+            f"(concurrency {engine.concurrency})"
+        )
+
+        tasks = []
         for idx, variant in enumerate(state.concept_variants):
             # Get the title from the corresponding option
             title = state.viable_options[idx].get("title", "Concept") if idx < len(state.viable_options) else "Concept"
-            logger.info(f"IMG: Generating HERO image {idx+1}/{len(state.concept_variants)} ({variant.style}): {title}")
-            logger.info(f"IMG: Using detailed prompt: {variant.image_prompt[:150]}...")
-            generated = await generate_single_image(variant, semaphore, title, idx)  # Pass index for progress tracking
-            generated_variants.append(generated)
+            logger.info(f"IMG: Queueing HERO image {idx+1}/{len(state.concept_variants)} ({variant.style}): {title}")
+            tasks.append(generate_single_image(variant, title, idx))  # Pass index for progress tracking
+
+        # gather preserves input order so images stay matched to their ideas
+        generated_variants = await asyncio.gather(*tasks)
 
         # Filter successful generations
         successful_variants = [
@@ -438,6 +445,7 @@ async def image_generation_node(state: WorkflowState) -> Dict[str, Any]:
                 "style": variant.style,
                 "description": variant.description,
                 "image_url": image_url,
+                "thumbnail_url": f"{image_url}?w={THUMBNAIL_WIDTH}",
                 "version": 1,
                 "edit_history": []
             })
@@ -454,8 +462,8 @@ async def image_generation_node(state: WorkflowState) -> Dict[str, Any]:
         }
 
         # Save for frontend display (ideas + images together!)
-        concepts_key = f"concepts:{state.thread_id}"
-        redis_service.set(concepts_key, json.dumps(state.concept_images), ex=3600)
+        await ThreadArtifacts(state.thread_id, redis_service).set(Artifact.CONCEPTS, state.concept_images)
+        await workflow_events.publish(state.thread_id, "concepts_generated", state.concept_images)
         logger.info(f"IMG: Saved final concepts payload to Redis with status='complete'")
         
         state.current_node = "COMPLETE"  # End workflow after images (A1 removed)
@@ -622,8 +630,7 @@ async def preview_assembly_node(state: WorkflowState) -> Dict[str, Any]:
             }
 
             # Save complete assembly to Redis
-            assembly_key = f"assembly:{state.thread_id}"
-            redis_service.set(assembly_key, json.dumps(assembly_data), ex=7200)
+            await ThreadArtifacts(state.thread_id, redis_service).set(Artifact.ASSEMBLY, assembly_data)
 
             # NEW: Trigger background step image generation (don't await!)
             construction_steps = assembly_data.get("construction_steps", [])
@@ -870,6 +877,8 @@ def should_proceed_to_magic_pencil(state: WorkflowState) -> str:
     return "packaging"
 
 
+# Started with create_task from A1; the span nests under A1's through the copied context
+@traced("step_images.background")
 async def generate_step_images_background(
     thread_id: str,
     project_preview: Dict[str, Any],
@@ -917,7 +926,7 @@ async def generate_step_images_background(
             "status": "completed",
             "generated_at": time.time()
         }
-        redis_service.set(results_key, json.dumps(results_data), ex=7200)
+        await redis_service.set(results_key, json.dumps(results_data), ex=7200)
         
         logger.info(f"BACKGROUND: ✓ Step image generation completed for thread {thread_id}")
         
@@ -933,7 +942,7 @@ async def generate_step_images_background(
             "error": str(e),
             "failed_at": time.time()
         }
-        redis_service.set(progress_key, json.dumps(error_data), ex=7200)
+        await redis_service.set(progress_key, json.dumps(error_data), ex=7200)
 
 
 # API-specific helper functions
@@ -1031,38 +1040,19 @@ async def create_final_package(
         selected_option = state_dict.get("selected_option", {})
         goals = state_dict.get("goals", "")
         
-        # Calculate detailed ESG metrics with AI
-        from app.workflows.phase4_nodes import _calculate_detailed_esg_metrics, _extract_detailed_tools
+        from app.workflows.phase4_nodes import _ai_detail_sections, _section_publisher
+        from app.workflows.section_executor import PackageSection, SectionExecutor
         
         project_context = {
             "title": selected_option.get("title", "DIY Project"),
             "goals": goals
         }
-        
-        # Calculate detailed ESG metrics with AI
-        logger.info("[Phase 4] Calculating detailed ESG metrics...")
-        try:
-            detailed_esg = await _calculate_detailed_esg_metrics(ingredients, selected_option, project_context)
-            logger.info(f"[Phase 4] ESG calculation result type: {type(detailed_esg)}")
-            logger.info(f"[Phase 4] ESG keys: {list(detailed_esg.keys()) if detailed_esg else 'None'}")
-            logger.info(f"[Phase 4] Overall ESG score from function: {detailed_esg.get('overall_esg_score') if detailed_esg else 'None'}")
-            
-            if not detailed_esg or not isinstance(detailed_esg, dict):
-                logger.error(f"[Phase 4] ❌ ESG calculation returned invalid data: {detailed_esg}")
-                detailed_esg = None
-        except Exception as esg_err:
-            logger.error(f"[Phase 4] ❌ ESG calculation failed: {esg_err}", exc_info=True)
-            detailed_esg = None
-        
-        # Extract detailed tools and materials with AI
-        logger.info("[Phase 4] Extracting detailed tools and materials...")
-        try:
-            detailed_tools_list = await _extract_detailed_tools(selected_option, ingredients)
-            
+
+        async def split_tools(inputs: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
             # Separate tools and materials, add icon names
             tools = []
             materials = []
-            for item in detailed_tools_list:
+            for item in inputs["tools"]:
                 # Add default icon_name based on category
                 if item.get("category") == "tool":
                     item["icon_name"] = item.get("icon_name", "Wrench")
@@ -1070,12 +1060,34 @@ async def create_final_package(
                 else:
                     item["icon_name"] = item.get("icon_name", "Package")
                     materials.append(item)
-            
-            tools_with_icons = {"tools": tools, "materials": materials}
             logger.info(f"[Phase 4] Tools extracted: {len(tools)} tools, {len(materials)} materials")
-        except Exception as tools_err:
-            logger.error(f"[Phase 4] ❌ Tools extraction failed: {tools_err}", exc_info=True)
-            tools_with_icons = {"tools": [], "materials": []}
+            return {"tools": tools, "materials": materials}
+
+        async def instructions(_inputs: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                "overview": selected_option.get("overview", ""),
+                "steps": selected_option.get("steps", []),
+                "tips": selected_option.get("tips", []),
+                "troubleshooting": selected_option.get("troubleshooting", [])
+            }
+
+        # ESG metrics and tools are independent AI calls: run them concurrently and
+        # stream each section as soon as it is ready (fallbacks on deadline/error)
+        logger.info("[Phase 4] Generating ESG metrics, tools and instructions concurrently...")
+        sections = _ai_detail_sections(ingredients, selected_option, project_context) + [
+            PackageSection(
+                "tools_and_materials", split_tools, depends_on=("tools",),
+                fallback=lambda: {"tools": [], "materials": []}
+            ),
+            PackageSection("instructions", instructions, fallback=dict),
+        ]
+        on_section = _section_publisher(state_dict["thread_id"]) if state_dict.get("thread_id") else None
+        results = await SectionExecutor(sections).run(on_section=on_section)
+
+        detailed_esg = results["esg"].value
+        logger.info(f"[Phase 4] Overall ESG score: {detailed_esg.get('overall_esg_score')} ({results['esg'].status})")
+        tools_with_icons = results["tools_and_materials"].value
+        instruction_section = results["instructions"].value
 
         # Create comprehensive package with detailed ESG and tools
         logger.info("[Phase 4] Assembling final package...")
@@ -1111,7 +1123,7 @@ async def create_final_package(
                 "user_feedback": selection_info.get("feedback", "")
             },
 
-            # NEW: Detailed ESG metrics generated by AI (None if generation failed)
+            # NEW: Detailed ESG metrics generated by AI (formula fallback if generation failed)
             "detailed_esg_metrics": detailed_esg,
             
             # NEW: Detailed tools and materials with icons
@@ -1136,12 +1148,7 @@ async def create_final_package(
                 "safety_requirements": selected_option.get("safety_requirements", ["Safety glasses"])
             },
 
-            "instructions": {
-                "overview": selected_option.get("overview", ""),
-                "steps": selected_option.get("steps", []),
-                "tips": selected_option.get("tips", []),
-                "troubleshooting": selected_option.get("troubleshooting", [])
-            },
+            "instructions": instruction_section,
 
             "safety_information": {
                 "safety_level": selected_option.get("safety_assessment", {}).get("safety_level", "medium"),
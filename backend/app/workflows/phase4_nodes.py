@@ -3,14 +3,16 @@ Phase 4 LangGraph nodes for Output Assembly & Delivery.
 Provides deterministic project packaging, export preparation, analytics, and sharing assets
 without depending on external model calls so tests can run offline.
 """
-import json
 import time
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from datetime import datetime, timezone
 
 from app.workflows.state import WorkflowState
-from app.core.redis import redis_service
+from app.workflows.section_executor import PackageSection, SectionExecutor
+from app.core.redis import async_redis_service as redis_service
+from app.core.thread_store import Artifact, ThreadArtifacts
+from app.core.event_bus import workflow_events
 
 logger = logging.getLogger(__name__)
 
@@ -369,13 +371,17 @@ Rules:
             return tools_data
         else:
             logger.warning("TOOLS: AI extraction failed, using basic list")
-            return [{"name": tool, "category": "tool", "purpose": "Required for assembly", "is_optional": False} 
-                    for tool in basic_tools]
+            return _fallback_tools(selected_option)
             
     except Exception as e:
         logger.error(f"TOOLS: Error in extraction: {e}")
-        return [{"name": tool, "category": "tool", "purpose": "Required for assembly", "is_optional": False} 
-                for tool in basic_tools]
+        return _fallback_tools(selected_option)
+
+
+def _fallback_tools(selected_option: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Basic tool list from the selected option, used if AI extraction fails."""
+    return [{"name": tool, "category": "tool", "purpose": "Required for assembly", "is_optional": False}
+            for tool in selected_option.get("tools_required", [])]
 
 
 def _build_materials_guide(ingredients: List[Dict[str, Any]], selected_option: Dict[str, Any]) -> Dict[str, Any]:
@@ -649,8 +655,12 @@ def _build_sharing_stub(selected_option: Dict[str, Any], ingredients: List[Dict[
     }
 
 
-def _build_final_package(state: WorkflowState) -> Dict[str, Any]:
-    """Construct the full final package structure expected by downstream nodes."""
+def _build_final_package(
+    state: WorkflowState,
+    instructions: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """Construct the full final package structure expected by downstream nodes.
+    Pass ``instructions`` when the steps were already built (H1 streams them as a section)."""
     ingredients = _serialize_ingredients(state)
     selected_option = state.selected_option or {}
     project_preview = state.project_preview or {}
@@ -665,7 +675,10 @@ def _build_final_package(state: WorkflowState) -> Dict[str, Any]:
         },
         "executive_summary": _build_executive_summary(state, ingredients, selected_option),
         "project_documentation": {
-            "detailed_instructions": _build_instruction_steps(project_preview, selected_option),
+            "detailed_instructions": (
+                instructions if instructions is not None
+                else _build_instruction_steps(project_preview, selected_option)
+            ),
             "visual_guide": _build_visual_guide(state),
             "troubleshooting": _build_troubleshooting(ingredients),
         },
@@ -678,12 +691,40 @@ def _build_final_package(state: WorkflowState) -> Dict[str, Any]:
     return final_package
 
 
-def _safe_set_redis(key: str, payload: Dict[str, Any], ttl_seconds: int = 86400) -> None:
-    """Persist data to Redis but ignore failures during tests."""
+async def _safe_set_artifacts(thread_id: str, values: Dict[Artifact, Any]) -> None:
+    """Persist thread artifacts in one round trip but ignore failures during tests."""
     try:
-        redis_service.set(key, json.dumps(payload), ex=ttl_seconds)
+        await ThreadArtifacts(thread_id, redis_service).set_many(values)
     except Exception as exc:
-        logger.warning("Redis persistence skipped for %s: %s", key, exc)
+        logger.warning("Redis persistence skipped for %s: %s", thread_id, exc)
+
+
+def _ai_detail_sections(
+    ingredients: List[Dict[str, Any]],
+    selected_option: Dict[str, Any],
+    project_context: Dict[str, Any]
+) -> List[PackageSection]:
+    """Independent AI sections of the full package (ESG and tools run concurrently)."""
+
+    async def esg(_inputs: Dict[str, Any]) -> Dict[str, Any]:
+        return await _calculate_detailed_esg_metrics(ingredients, selected_option, project_context)
+
+    async def tools(_inputs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return await _extract_detailed_tools(selected_option, ingredients)
+
+    return [
+        PackageSection("esg", esg, fallback=lambda: _fallback_esg_calculation(ingredients)),
+        PackageSection("tools", tools, fallback=lambda: _fallback_tools(selected_option)),
+    ]
+
+
+def _section_publisher(thread_id: str):
+    """Callback that streams each package section as soon as it is ready (persisted with the full package)."""
+
+    async def publish(name: str, data: Any) -> None:
+        await workflow_events.publish(thread_id, "package_section", {"section": name, "data": data})
+
+    return publish
 
 
 # ---------------------------------------------------------------------------
@@ -721,26 +762,34 @@ async def final_packaging_node(state: WorkflowState) -> Dict[str, Any]:
     }
     
     # Store ESSENTIAL package immediately (fast!)
-    _safe_set_redis(f"package_essential:{state.thread_id}", essential_package)
+    await _safe_set_artifacts(state.thread_id, {Artifact.PACKAGE_ESSENTIAL: essential_package})
+    await workflow_events.publish(state.thread_id, "package_essential_ready", essential_package)
     
-    # Calculate detailed ESG metrics with AI
-    logger.info("H1: Calculating detailed ESG metrics with AI...")
+    # ESG metrics and tools are independent AI calls: run them concurrently and
+    # stream each section as it lands (per-section deadline with fallback)
+    logger.info("H1: Generating detailed ESG metrics, tools and instructions concurrently...")
     project_context = {
         "title": selected_option.get("title", "DIY Project"),
         "goals": state.goals or state.user_input
     }
-    detailed_esg = await _calculate_detailed_esg_metrics(ingredients, selected_option, project_context)
-    
-    # Extract detailed tools and materials with AI
-    logger.info("H1: Extracting detailed tools and materials...")
-    detailed_tools = await _extract_detailed_tools(selected_option, ingredients)
-    
-    # Assign Lucide icon names to tools
-    logger.info("H1: Assigning Lucide icons to tools...")
-    tools_with_icons = _assign_tool_icons(detailed_tools)
-    
+
+    async def tool_icons(inputs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Assign Lucide icon names to tools
+        return _assign_tool_icons(inputs["tools"])
+
+    async def instructions(_inputs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return _build_instruction_steps(state.project_preview or {}, selected_option)
+
+    sections = _ai_detail_sections(ingredients, selected_option, project_context) + [
+        PackageSection("tool_icons", tool_icons, depends_on=("tools",), fallback=lambda: []),
+        PackageSection("instructions", instructions, fallback=lambda: []),
+    ]
+    results = await SectionExecutor(sections).run(on_section=_section_publisher(state.thread_id))
+    detailed_esg = results["esg"].value
+    tools_with_icons = results["tool_icons"].value
+
     # Also store as full package for compatibility (will be enhanced later)
-    full_package = _build_final_package(state)
+    full_package = _build_final_package(state, instructions=results["instructions"].value)
     
     # Add detailed ESG metrics and tools to the package
     full_package["detailed_esg_metrics"] = detailed_esg
@@ -751,11 +800,12 @@ async def final_packaging_node(state: WorkflowState) -> Dict[str, Any]:
     state.current_phase = "complete"
     state.current_node = "COMPLETE"
     
-    _safe_set_redis(f"final_package:{state.thread_id}", full_package)
-    
-    # Also store ESG metrics and tools separately for easy access
-    _safe_set_redis(f"esg_metrics:{state.thread_id}", detailed_esg)
-    _safe_set_redis(f"tools_materials:{state.thread_id}", {"items": tools_with_icons})
+    # Also store ESG metrics and tools separately for easy access (one pipelined write)
+    await _safe_set_artifacts(state.thread_id, {
+        Artifact.FINAL_PACKAGE: full_package,
+        Artifact.ESG_METRICS: detailed_esg,
+        Artifact.TOOLS_MATERIALS: {"items": tools_with_icons},
+    })
     
     duration = time.time() - start_time
     logger.info("H1: ESSENTIAL package ready in %.2fs (with detailed ESG metrics)", duration)
@@ -830,7 +880,7 @@ async def export_generation_node(state: WorkflowState) -> Dict[str, Any]:
     }
 
     state.exports = exports
-    _safe_set_redis(f"exports:{state.thread_id}", exports)
+    await _safe_set_artifacts(state.thread_id, {Artifact.EXPORTS: exports})
 
     logger.info("EXP: Generated exports for %s", state.thread_id)
     return {
@@ -917,7 +967,7 @@ async def analytics_node(state: WorkflowState) -> Dict[str, Any]:
     }
 
     state.analytics = analytics_data
-    _safe_set_redis(f"analytics:{state.thread_id}", analytics_data)
+    await _safe_set_artifacts(state.thread_id, {Artifact.ANALYTICS: analytics_data})
 
     logger.info("ANALYTICS: Metrics ready for %s", state.thread_id)
     return {
@@ -1014,10 +1064,7 @@ async def sharing_preparation_node(state: WorkflowState) -> Dict[str, Any]:
     }
 
     state.sharing_assets = sharing_assets
-    _safe_set_redis(
-        f"sharing:{state.thread_id}",
-        {**sharing_assets, "metadata": share_metadata},
-    )
+    await _safe_set_artifacts(state.thread_id, {Artifact.SHARING: {**sharing_assets, "metadata": share_metadata}})
 
     logger.info("SHARE: Sharing content prepared for thread %s", state.thread_id)
     return {
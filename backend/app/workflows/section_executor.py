@@ -0,0 +1,113 @@
+"""
+Small DAG executor for independent AI sub-tasks (Phase 4 packaging).
+
+Each section starts as soon as the sections it depends on have finished, runs
+under its own deadline, and falls back to a deterministic result on timeout or
+error. Completed sections are handed to ``on_section`` immediately so callers
+can stream partial packages instead of waiting for the slowest call.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SectionCallback = Callable[[str, Any], Awaitable[None]]
+
+
+@dataclass
+class PackageSection:
+    """
+    One node of the packaging DAG.
+    ``run`` receives the results of ``depends_on`` keyed by section name;
+    ``fallback`` (sync, no I/O) is used when ``run`` fails or misses its deadline.
+    """
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    depends_on: Tuple[str, ...] = ()
+    fallback: Optional[Callable[[], Any]] = None
+    deadline: Optional[float] = None
+
+
+@dataclass
+class SectionResult:
+    value: Any
+    duration: float
+    status: str  # "ok" | "timeout" | "error"
+
+
+@dataclass
+class SectionExecutor:
+    """Runs a list of ``PackageSection`` with maximal concurrency."""
+    sections: List[PackageSection]
+    default_deadline: float = field(default_factory=lambda: settings.PACKAGE_SECTION_TIMEOUT)
+
+    def __post_init__(self):
+        names = [section.name for section in self.sections]
+        if len(set(names)) != len(names):
+            raise ValueError("Duplicate section names")
+        for section in self.sections:
+            missing = set(section.depends_on) - set(names)
+            if missing:
+                raise ValueError(f"Section {section.name} depends on unknown sections: {sorted(missing)}")
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        deps = {section.name: set(section.depends_on) for section in self.sections}
+        done = set()
+        while deps:
+            ready = [name for name, needs in deps.items() if needs <= done]
+            if not ready:
+                raise ValueError(f"Cycle between sections: {sorted(deps)}")
+            for name in ready:
+                done.add(name)
+                del deps[name]
+
+    async def _run_section(
+        self,
+        section: PackageSection,
+        tasks: Dict[str, "asyncio.Task[SectionResult]"],
+        on_section: Optional[SectionCallback],
+    ) -> SectionResult:
+        inputs = {}
+        for dependency in section.depends_on:
+            inputs[dependency] = (await tasks[dependency]).value
+
+        deadline = section.deadline or self.default_deadline
+        start = time.time()
+        try:
+            value = await asyncio.wait_for(section.run(inputs), timeout=deadline)
+            status = "ok"
+        except asyncio.TimeoutError:
+            logger.warning(f"SECTION: {section.name} missed its {deadline:.0f}s deadline, using fallback")
+            value, status = self._fallback(section), "timeout"
+        except Exception as e:
+            logger.error(f"SECTION: {section.name} failed: {str(e)}, using fallback")
+            value, status = self._fallback(section), "error"
+
+        result = SectionResult(value=value, duration=time.time() - start, status=status)
+        logger.info(f"SECTION: ✓ {section.name} ready in {result.duration:.2f}s ({status})")
+
+        if on_section is not None:
+            try:
+                await on_section(section.name, value)
+            except Exception as e:
+                logger.warning(f"SECTION: Failed to publish {section.name}: {str(e)}")
+        return result
+
+    @staticmethod
+    def _fallback(section: PackageSection) -> Any:
+        return section.fallback() if section.fallback else None
+
+    async def run(self, on_section: Optional[SectionCallback] = None) -> Dict[str, SectionResult]:
+        """Execute every section; returns results keyed by section name."""
+        tasks: Dict[str, "asyncio.Task[SectionResult]"] = {}
+        for section in self.sections:
+            # Tasks await their dependencies' tasks, so creation order does not matter
+            tasks[section.name] = asyncio.create_task(self._run_section(section, tasks, on_section))
+        await asyncio.gather(*tasks.values())
+        return {name: task.result() for name, task in tasks.items()}
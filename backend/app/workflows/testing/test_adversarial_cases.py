@@ -44,7 +44,7 @@ async def test_edge_case_dangerous_materials_are_flagged(mock_state):
 
     # Act
     with mock.patch('app.workflows.phase2_nodes.production_call_gemini', new_callable=mock.AsyncMock) as mock_ai_call, \
-         mock.patch('app.workflows.phase2_nodes.redis_service') as mock_redis:
+         mock.patch('app.workflows.phase2_nodes.redis_service', new_callable=mock.AsyncMock) as mock_redis:
         mock_ai_call.return_value = mock_ai_response
         result = await evaluation_node(mock_state)
 
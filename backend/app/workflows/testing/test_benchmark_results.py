@@ -0,0 +1,75 @@
+from load_testing.results import compare, load_baseline, make_result, metrics_from_locust_csv, promote_baseline
+
+
+def _run(p95_ms: float, throughput: float) -> dict:
+    return make_result("journey", {"SSE full_workflow": {
+        "p50_ms": 1000.0, "p95_ms": p95_ms, "p99_ms": 3000.0, "throughput": throughput, "count": 50,
+    }})
+
+
+def test_compare_flags_slower_percentiles_and_lower_throughput(tmp_path):
+    """
+    Tests that a run is diffed against its promoted baseline and only changes beyond tolerance regress.
+    """
+    promote_baseline(_run(p95_ms=2000.0, throughput=10.0), tmp_path)
+    baseline = load_baseline("journey", tmp_path)
+
+    within = compare(_run(p95_ms=2200.0, throughput=9.5), baseline, tolerance=0.15)
+    slower = compare(_run(p95_ms=2600.0, throughput=7.0), baseline, tolerance=0.15)
+
+    assert within.passed
+    assert not slower.passed
+    assert {(delta.metric, delta.key) for delta in slower.regressions} == {
+        ("SSE full_workflow", "p95_ms"), ("SSE full_workflow", "throughput"),
+    }
+    assert "REGRESSION" in slower.format_report()
+
+
+def test_locust_stats_csv_is_read_into_results_format(tmp_path):
+    """
+    Tests that Locust's stats CSV rows become per-request metrics keyed by type and name.
+    """
+    stats_csv = tmp_path / "normal_stats.csv"
+    stats_csv.write_text(
+        "Type,Name,Request Count,Failure Count,Requests/s,50%,95%,99%\n"
+        "SSE,choices_generated,20,1,0.5,4200,7100,9000\n"
+        ",Aggregated,120,1,3.2,40,5200,8800\n"
+    )
+
+    metrics = metrics_from_locust_csv(stats_csv)
+
+    assert metrics["SSE choices_generated"] == {
+        "p50_ms": 4200.0, "p95_ms": 7100.0, "p99_ms": 9000.0, "throughput": 0.5, "count": 20, "failures": 1,
+    }
+    assert metrics["Aggregated"]["count"] == 120
+
+
+def test_throughput_drop_within_noise_floor_is_ignored():
+    """
+    Tests that a throughput drop whose implied per-call slowdown is below min_delta_ms does not regress.
+    """
+    def micro(throughput: float) -> dict:
+        return make_result("micro", {"fingerprint": {
+            "p50_ms": 0.04, "p95_ms": 0.05, "p99_ms": 0.06, "throughput": throughput, "count": 2000,
+        }})
+
+    noisy = compare(micro(20000.0), micro(25000.0), tolerance=0.15, min_delta_ms=0.05)
+    slower = compare(micro(5000.0), micro(25000.0), tolerance=0.15, min_delta_ms=0.05)
+
+    assert noisy.passed
+    assert [delta.key for delta in slower.regressions] == ["throughput"]
+
+
+def test_regressions_are_not_enforced_across_environments():
+    """
+    Tests that a baseline recorded on a different machine or Python is reported but does not fail the run.
+    """
+    baseline = _run(p95_ms=2000.0, throughput=10.0)
+    baseline["metadata"].update(machine="arm64", python="3.10.0")
+
+    comparison = compare(_run(p95_ms=2600.0, throughput=10.0), baseline, tolerance=0.15)
+
+    assert comparison.regressions
+    assert comparison.passed
+    assert set(comparison.environment_mismatch) == {"machine", "python"}
+    assert "WARNING: machine differs" in comparison.format_report()
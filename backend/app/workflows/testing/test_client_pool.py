@@ -0,0 +1,125 @@
+import pytest
+import asyncio
+from types import SimpleNamespace
+
+from app.ai_service.client_pool import GeminiClientRegistry
+from app.core.config import settings
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Provides a small registry configured with a dummy API key."""
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "test-key")
+    return GeminiClientRegistry(max_models=2)
+
+
+def test_models_are_reused_per_configuration(registry):
+    """
+    Tests that equal configurations share one model and the pool stays bounded.
+    """
+    first = registry.get_model("gemini-2.5-flash", {"temperature": 0.1})
+    again = registry.get_model("gemini-2.5-flash", {"temperature": 0.1})
+    other = registry.get_model("gemini-2.5-flash", {"temperature": 0.8})
+    registry.get_model("gemini-2.5-flash", {"temperature": 0.3})
+
+    assert first is again
+    assert other is not first
+    assert registry.get_stats()["models_cached"] == 2
+    assert registry.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_track_records_concurrency_latency_and_errors(registry):
+    """
+    Tests per-client in-flight, latency and error accounting.
+    """
+    pooled = registry.get_model("gemini-2.5-flash", {"temperature": 0.1})
+
+    async def call():
+        async with pooled.track():
+            await asyncio.sleep(0.02)
+
+    await asyncio.gather(call(), call())
+    with pytest.raises(RuntimeError):
+        async with pooled.track():
+            raise RuntimeError("upstream failed")
+
+    stats = registry.get_stats()["clients"][pooled.label]
+    assert stats["requests"] == 3
+    assert stats["errors"] == 1
+    assert stats["peak_in_flight"] == 2
+    assert stats["in_flight"] == 0
+    assert stats["max_latency"] >= 0.02
+
+
+def test_sanitized_schemas_are_memoized(registry):
+    """
+    Tests that a schema is sanitized once per distinct content.
+    """
+    calls = []
+
+    def sanitizer(schema):
+        calls.append(schema)
+        return {"type": schema["type"]}
+
+    schema = {"type": "object", "minProperties": 1}
+    first = registry.sanitize_schema(schema, sanitizer)
+    second = registry.sanitize_schema(dict(schema), sanitizer)
+
+    assert first is second
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_calls_are_not_counted_as_errors(registry):
+    """
+    Tests that a cancelled call (a losing hedge) is recorded as cancelled and the cancellation propagates.
+    """
+    pooled = registry.get_model("gemini-2.5-flash", {"temperature": 0.1})
+
+    async def call():
+        async with pooled.track():
+            await asyncio.sleep(10)
+
+    task = asyncio.create_task(call())
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    stats = registry.get_stats()["clients"][pooled.label]
+    assert stats["cancelled"] == 1
+    assert stats["errors"] == 0
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_is_tracked_by_its_pooled_client(registry, monkeypatch):
+    """
+    Tests that chat calls go through the pooled client's tracking, so they appear in its stats.
+    """
+    from app.lib.gemini_client import ChatMessage, GeminiClient
+
+    class FakeModel:
+        async def generate_content_async(self, prompt, stream=False):
+            async def chunks():
+                for text in ("Hel", "lo"):
+                    yield SimpleNamespace(text=text)
+            return chunks()
+
+    monkeypatch.setattr("app.lib.gemini_client.get_client_registry", lambda: registry)
+    client = GeminiClient(api_key="test-key")
+    pooled = registry.get_model(
+        client.model_name,
+        {**client.generation_config, "temperature": 0.7, "max_output_tokens": 1024},
+        client.safety_settings,
+        "Be brief.",
+    )
+    pooled.client = FakeModel()
+
+    tokens = [token async for token in client.send_message_stream([
+        ChatMessage("system", "Be brief."), ChatMessage("user", "Hi"),
+    ])]
+
+    assert tokens == ["Hel", "lo"]
+    assert registry.get_stats()["clients"][pooled.label]["requests"] == 1
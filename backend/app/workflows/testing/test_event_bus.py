@@ -0,0 +1,86 @@
+import pytest
+import asyncio
+from types import SimpleNamespace
+from unittest import mock
+
+from app.core.config import settings
+from app.core.event_bus import WorkflowEventBus
+
+
+@pytest.fixture
+def event_bus():
+    """Provides an event bus running on the in-process fallback."""
+    bus = WorkflowEventBus()
+    bus._use_fallback = True
+    return bus
+
+
+@pytest.mark.asyncio
+async def test_read_resumes_after_last_event_id(event_bus):
+    """
+    Tests that readers only receive events published after their cursor.
+    """
+    first_id = await event_bus.publish("t1", "state_update", {"current_node": "P1a_extract"})
+    await event_bus.publish("t1", "choices_generated", {"viable_options": []})
+    await event_bus.publish("t2", "state_update", {"current_node": "G1_goal_formation"})
+
+    all_events = await event_bus.read("t1", "0", block_ms=0)
+    resumed = await event_bus.read("t1", first_id, block_ms=0)
+
+    assert [e["type"] for _, e in all_events] == ["state_update", "choices_generated"]
+    assert [e["type"] for _, e in resumed] == ["choices_generated"]
+
+
+@pytest.mark.asyncio
+async def test_blocked_reader_is_woken_by_publish(event_bus):
+    """
+    Tests that a blocking read returns as soon as an event is published.
+    """
+    reader = asyncio.create_task(event_bus.read("t1", "0", block_ms=5000))
+    await asyncio.sleep(0.01)
+    event_bus.publish_nowait("t1", "workflow_complete", {"status": "complete"})
+
+    events = await asyncio.wait_for(reader, timeout=1)
+
+    assert events[0][1] == {"type": "workflow_complete", "data": {"status": "complete"}}
+
+
+@pytest.mark.asyncio
+async def test_blocking_read_times_out_empty(event_bus):
+    """
+    Tests that a blocking read with no events returns an empty list.
+    """
+    events = await event_bus.read("idle", "0", block_ms=20)
+
+    assert events == []
+
+
+@pytest.mark.asyncio
+async def test_returns_to_redis_once_probe_succeeds(event_bus, monkeypatch):
+    """
+    Tests that a bus in fallback probes Redis and reads the stream there once it answers again.
+    """
+    client = mock.AsyncMock()
+    client.xread.return_value = [("workflow_events:t1", [("5-0", {"type": "state_update", "data": "{}"})])]
+    monkeypatch.setattr(event_bus, "_redis", SimpleNamespace(client=client))
+    await event_bus.publish("t1", "state_update", {})
+
+    event_bus._last_probe -= settings.REDIS_FALLBACK_PROBE_INTERVAL
+    events = await event_bus.read("t1", "0", block_ms=0)
+
+    client.ping.assert_awaited_once()
+    assert not event_bus._use_fallback
+    assert events == [("5-0", {"type": "state_update", "data": {}})]
+    assert not event_bus._local_streams
+
+
+@pytest.mark.asyncio
+async def test_local_streams_are_bounded(event_bus):
+    """
+    Tests that the in-process fallback evicts the least recently published threads.
+    """
+    event_bus.LOCAL_MAX_THREADS = 2
+    for thread_id in ("t1", "t2", "t1", "t3"):
+        await event_bus.publish(thread_id, "state_update", {})
+
+    assert list(event_bus._local_streams) == ["t1", "t3"]
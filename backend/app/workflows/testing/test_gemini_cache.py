@@ -0,0 +1,77 @@
+import pytest
+import asyncio
+from unittest import mock
+
+from app.ai_service import production_gemini
+from app.ai_service.production_gemini import ProductionGeminiClient
+
+
+@pytest.fixture
+def gemini_client(monkeypatch):
+    """Provides a client with an in-memory cache and a counting upstream stub."""
+    monkeypatch.setattr(production_gemini.settings, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(production_gemini.settings, "GEMINI_CACHE_ENABLED", True)
+    client = ProductionGeminiClient()
+    client.upstream_calls = 0
+
+    async def fake_call(prompt, task_type, model_name, generation_config, response_schema, max_retries, stream=None):
+        client.upstream_calls += 1
+        await asyncio.sleep(0.05)
+        return {"ingredients": [], "_metadata": {"model_used": model_name}}
+
+    client._call_with_retries = fake_call
+
+    store = {}
+    fake_redis = mock.AsyncMock()
+    fake_redis.get.side_effect = store.get
+    fake_redis.setex.side_effect = lambda key, ttl, value: store.__setitem__(key, value)
+    with mock.patch.object(production_gemini, "redis_service", fake_redis):
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_ignores_whitespace_differences(gemini_client):
+    """
+    Tests that a repeated prompt differing only in whitespace is served from cache.
+    """
+    first = await gemini_client.call_gemini_with_retry("extract  ingredients\nfrom: can", task_type="extraction")
+    second = await gemini_client.call_gemini_with_retry("extract ingredients from: can", task_type="extraction")
+
+    assert gemini_client.upstream_calls == 1
+    assert second["_metadata"]["cache_hit"] is True
+    assert "cache_hit" not in first["_metadata"]
+    assert gemini_client.get_usage_stats()["cache"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_are_coalesced(gemini_client):
+    """
+    Tests that identical in-flight requests share a single upstream call.
+    """
+    results = await asyncio.gather(*[
+        gemini_client.call_gemini_with_retry("categorize bottle", task_type="analysis")
+        for _ in range(5)
+    ])
+
+    assert gemini_client.upstream_calls == 1
+    assert gemini_client.cache_coalesced == 4
+    assert all(r["ingredients"] == [] for r in results)
+    # Each caller gets its own copy
+    assert len({id(r) for r in results}) == 5
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached(gemini_client):
+    """
+    Tests that error responses are returned but never written to the cache.
+    """
+    async def failing_call(*args):
+        gemini_client.upstream_calls += 1
+        return {"error": "Max retries exceeded"}
+
+    gemini_client._call_with_retries = failing_call
+
+    await gemini_client.call_gemini_with_retry("creative prompt", task_type="creative")
+    await gemini_client.call_gemini_with_retry("creative prompt", task_type="creative")
+
+    assert gemini_client.upstream_calls == 2
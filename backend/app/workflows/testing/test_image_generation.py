@@ -0,0 +1,33 @@
+import pytest
+import asyncio
+from types import SimpleNamespace
+
+from app.ai_service.image_generation import ImageGenerationEngine
+
+
+def _image_response(data: bytes):
+    part = SimpleNamespace(inline_data=SimpleNamespace(data=data), text=None)
+    return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+
+@pytest.mark.asyncio
+async def test_engine_runs_in_parallel_up_to_concurrency_limit():
+    """
+    Tests that image calls overlap but never exceed the configured concurrency.
+    """
+    engine = ImageGenerationEngine(concurrency=2)
+    peak = {"current": 0, "max": 0}
+
+    async def fake_generate_content(model, contents):
+        peak["current"] += 1
+        peak["max"] = max(peak["max"], peak["current"])
+        await asyncio.sleep(0.02)
+        peak["current"] -= 1
+        return _image_response(contents[0].encode())
+
+    engine._client = SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content=fake_generate_content)))
+
+    results = await asyncio.gather(*[engine.generate_image(f"prompt {i}") for i in range(5)])
+
+    assert peak["max"] == 2
+    assert results == [f"prompt {i}".encode() for i in range(5)]
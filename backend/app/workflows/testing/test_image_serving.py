@@ -0,0 +1,108 @@
+import pytest
+from io import BytesIO
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.core.image_store import ImageStore, LRULocalBackend, blob_name
+from app.endpoints import images
+
+
+@pytest.fixture
+def client(tmp_path):
+    """Provides a test client whose image store lives in a temp dir."""
+    store = ImageStore(LRULocalBackend(tmp_path, max_bytes=10 * 1024 * 1024))
+    buffer = BytesIO()
+    Image.new("RGB", (32, 32), "#1976d2").save(buffer, "WEBP")
+    store._put_sync("hero_test", buffer.getvalue(), "webp")
+
+    app = FastAPI()
+    app.include_router(images.router)
+    with mock.patch.object(images, "get_image_store", return_value=store), \
+         mock.patch.object(images, "hot_images", images.HotImageSet()):
+        yield TestClient(app)
+
+
+def test_conditional_get_returns_304(client):
+    """
+    Tests that a matching If-None-Match yields 304 with the same strong ETag.
+    """
+    first = client.get("/images/hero_test", headers={"Accept": "image/webp"})
+    etag = first.headers["etag"]
+
+    second = client.get("/images/hero_test", headers={"Accept": "image/webp", "If-None-Match": etag})
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert second.headers["etag"] == etag
+
+
+def test_accept_negotiates_jpeg_with_distinct_etag(client):
+    """
+    Tests that clients without WebP support get a JPEG representation.
+    """
+    webp = client.get("/images/hero_test", headers={"Accept": "image/webp"})
+    jpeg = client.get("/images/hero_test", headers={"Accept": "image/jpeg"})
+
+    assert jpeg.headers["content-type"] == "image/jpeg"
+    assert jpeg.headers["etag"] != webp.headers["etag"]
+    assert jpeg.headers["vary"] == "Accept"
+
+
+def test_range_request_returns_partial_content(client):
+    """
+    Tests byte-range requests and unsatisfiable ranges.
+    """
+    full = client.get("/images/hero_test").content
+    partial = client.get("/images/hero_test", headers={"Range": "bytes=0-9"})
+    invalid = client.get("/images/hero_test", headers={"Range": f"bytes={len(full) + 10}-"})
+
+    assert partial.status_code == 206
+    assert partial.content == full[:10]
+    assert partial.headers["content-range"] == f"bytes 0-9/{len(full)}"
+    assert invalid.status_code == 416
+
+
+def test_unparseable_range_is_ignored(client):
+    """
+    Tests that malformed and multi-range headers get the full image with a plain 200.
+    """
+    full = client.get("/images/hero_test").content
+
+    for header in ("bytes=abc-", "bytes=0-4,10-14"):
+        response = client.get("/images/hero_test", headers={"Range": header})
+        assert response.status_code == 200
+        assert response.content == full
+        assert "content-range" not in response.headers
+
+
+def test_resized_variant_is_rendered_and_stored(client):
+    """
+    Tests that ?w= serves a smaller representation and persists it as a variant.
+    """
+    resized = client.get("/images/hero_test?w=16", headers={"Accept": "image/webp"})
+    original = client.get("/images/hero_test", headers={"Accept": "image/webp"})
+
+    assert Image.open(BytesIO(resized.content)).size == (16, 16)
+    assert resized.headers["etag"] != original.headers["etag"]
+
+    store = images.get_image_store()
+    ref = store._resolve_sync("hero_test")
+    assert store._read_blob(blob_name(ref["hash"], "webp", "w16")) == resized.content
+
+
+def test_placeholder_is_memoized_per_size(client):
+    """
+    Tests that placeholders are rendered once per (style, title, size).
+    """
+    images.render_placeholder_png.cache_clear()
+
+    client.get("/images/placeholder/minimalist?title=Lamp&w=128")
+    client.get("/images/placeholder/minimalist?title=Lamp&w=128")
+    response = client.get("/images/placeholder/minimalist?title=Lamp&w=256")
+
+    assert images.render_placeholder_png.cache_info().hits == 1
+    assert images.render_placeholder_png.cache_info().misses == 2
+    assert Image.open(BytesIO(response.content)).size == (256, 256)
@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+
+from app.core.image_store import (
+    ImageStore,
+    ImageStoreBackend,
+    LocalDirBackend,
+    LRULocalBackend,
+    blob_name,
+    content_hash,
+)
+
+
+@pytest.fixture
+def shared_store(tmp_path):
+    """Provides a store with a small local tier over a shared directory."""
+    local = LRULocalBackend(tmp_path / "local", max_bytes=150)
+    return ImageStore(local, LocalDirBackend(tmp_path / "shared"))
+
+
+@pytest.mark.asyncio
+async def test_identical_images_are_stored_once(shared_store, tmp_path):
+    """
+    Tests that two image IDs with identical bytes share a single blob.
+    """
+    first = await shared_store.put_image("hero_a", b"same-bytes")
+    second = await shared_store.put_image("hero_b", b"same-bytes")
+
+    assert first == second == content_hash(b"same-bytes")
+    assert shared_store.dedup_writes == 1
+    assert len(list((tmp_path / "shared" / "blobs").rglob("*.webp"))) == 1
+    assert (await shared_store.get_image("hero_b")).data == b"same-bytes"
+
+
+@pytest.mark.asyncio
+async def test_local_tier_evicts_but_backing_still_serves(shared_store):
+    """
+    Tests that the size cap evicts old local blobs and misses refill from backing.
+    """
+    await shared_store.put_image("hero_old", b"o" * 60)
+    await shared_store.put_image("hero_new", b"n" * 60)
+
+    assert shared_store.local.total_bytes <= 150
+    assert not shared_store.local.exists(blob_name(content_hash(b"o" * 60), "webp"))
+
+    stored = await shared_store.get_image("hero_old")
+
+    assert stored.data == b"o" * 60
+    assert shared_store.backing_hits >= 1
+
+
+@pytest.mark.asyncio
+async def test_invalid_or_unknown_ids_return_none(shared_store):
+    """
+    Tests that path-traversal IDs and unknown IDs are treated as missing.
+    """
+    assert await shared_store.get_image("../etc/passwd") is None
+    assert await shared_store.get_image("hero_missing") is None
+
+
+def test_incomplete_backend_fails_on_construction():
+    """
+    Tests that a backend missing read/write cannot be instantiated.
+    """
+    class ReadOnlyBackend(ImageStoreBackend):
+        def read(self, name):
+            return None
+
+    with pytest.raises(TypeError):
+        ReadOnlyBackend()
+
+
+def test_shared_directory_cap_holds_across_processes(tmp_path):
+    """
+    Tests that two processes' LRU tiers over one directory keep its total size within the cap.
+    """
+    workers = [LRULocalBackend(tmp_path / "local", max_bytes=100, rescan_bytes=20) for _ in range(2)]
+    for index in range(12):
+        workers[index % 2].write(f"blobs/{index:02d}.webp", b"x" * 20)
+
+    on_disk = sum(path.stat().st_size for path in (tmp_path / "local").rglob("*") if path.is_file())
+    assert on_disk <= 100
+
+
+@pytest.mark.asyncio
+async def test_dedup_hit_refreshes_recency(tmp_path):
+    """
+    Tests that re-storing an existing image keeps its blob from being evicted first.
+    """
+    store = ImageStore(LRULocalBackend(tmp_path / "local", max_bytes=700, rescan_bytes=10**6))
+    await store.put_image("hero_a", b"a" * 200)
+    await store.put_image("hero_b", b"b" * 200)
+    await store.put_image("hero_a2", b"a" * 200)
+    await store.put_image("hero_c", b"c" * 200)
+
+    assert store.local.exists(blob_name(content_hash(b"a" * 200), "webp"))
+    assert not store.local.exists(blob_name(content_hash(b"b" * 200), "webp"))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_puts_keep_ref_cache_bounded(tmp_path):
+    """
+    Tests that refs remembered from many worker threads at once stay within the cache limit.
+    """
+    store = ImageStore(LRULocalBackend(tmp_path / "local", max_bytes=10**6))
+    store.MAX_CACHED_REFS = 5
+
+    await asyncio.gather(*(store.put_image(f"hero_{index}", f"image-{index}".encode()) for index in range(40)))
+
+    assert len(store._refs) == 5
+    assert (await store.get_image("hero_0")).data == b"image-0"
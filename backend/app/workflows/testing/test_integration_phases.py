@@ -25,7 +25,7 @@ async def test_phase1_full_ingredient_discovery_flow(mock_gemini_client):
 
     initial_input = {"user_input": "A can of soup", "thread_id": thread_id}
 
-    with mock.patch('app.workflows.nodes.redis_service') as mock_redis:
+    with mock.patch('app.workflows.nodes.redis_service', new_callable=mock.AsyncMock) as mock_redis:
         mock_redis.get.return_value = None
         mock_redis.setex.return_value = True
 
@@ -49,7 +49,7 @@ async def test_phase2_safety_blocking_integration():
     state.goals = "cleaning solution"
 
     with mock.patch('app.workflows.phase2_nodes.production_call_gemini', new_callable=mock.AsyncMock) as mock_ai_call, \
-         mock.patch('app.workflows.phase2_nodes.redis_service') as mock_redis:
+         mock.patch('app.workflows.phase2_nodes.redis_service', new_callable=mock.AsyncMock) as mock_redis:
 
         mock_ai_call.return_value = {"evaluated_options": [{"feasibility_score": 0.9, "esg_score": 0.1, "safety_check": False, "safety_notes": ["Mixing bleach and ammonia creates toxic chloramine gas."]}]}
 
@@ -0,0 +1,183 @@
+import asyncio
+import pytest
+from unittest import mock
+
+from app.core import job_queue
+from app.core.job_queue import CLAIM_SCRIPT, ENQUEUE_SCRIPT, JobQueue, QueueUnavailableError, _LocalJobQueue
+from app.workflows.worker import WorkflowWorker
+
+
+@pytest.fixture
+def local_redis():
+    """Routes queue scripts to the in-process stand-in, as when Redis is down."""
+    fake_redis = mock.AsyncMock()
+    fake_redis._use_fallback = True
+    fake_redis.eval.side_effect = lambda script, keys, args, fallback: fallback()
+    with mock.patch.object(job_queue, "redis_service", fake_redis):
+        yield fake_redis
+
+
+@pytest.mark.asyncio
+async def test_lapsed_visibility_requeues_job(local_redis):
+    """
+    Tests that a job whose worker stopped heartbeating is handed out again with its attempt counted.
+    """
+    queue = JobQueue("test_jobs", visibility_timeout=0.05)
+    job = await queue.enqueue("start_workflow", {"thread_id": "t1", "user_input": "bottles"})
+
+    first = await queue.claim()
+    assert first.id == job.id and first.attempts == 1
+    assert await queue.claim() is None
+
+    await asyncio.sleep(0.1)
+    second = await queue.claim()
+
+    assert second.id == job.id
+    assert second.attempts == 2
+    assert second.payload == {"thread_id": "t1", "user_input": "bottles"}
+
+
+@pytest.mark.asyncio
+async def test_worker_acks_successful_jobs(local_redis):
+    """
+    Tests that the worker runs the handler with the job payload and acknowledges it.
+    """
+    queue = JobQueue("test_jobs")
+    calls = []
+
+    async def handler(thread_id, user_input):
+        calls.append((thread_id, user_input))
+
+    worker = WorkflowWorker(queue, {"start_workflow": handler}, concurrency=2, poll_interval=0.01)
+    await queue.enqueue("start_workflow", {"thread_id": "t1", "user_input": "cans"})
+    await queue.enqueue("start_workflow", {"thread_id": "t2", "user_input": "jars"})
+
+    runner = asyncio.create_task(worker.run())
+    await asyncio.sleep(0.1)
+    worker.stop()
+    await runner
+
+    assert sorted(calls) == [("t1", "cans"), ("t2", "jars")]
+    assert worker.completed == 2
+    assert await queue.get_stats() == {"pending": 0, "processing": 0, "dead": 0}
+
+
+@pytest.mark.asyncio
+async def test_worker_dead_letters_after_max_attempts(local_redis):
+    """
+    Tests that a job failing on its final attempt is moved to the dead-letter list.
+    """
+    queue = JobQueue("test_jobs")
+
+    async def failing_handler(thread_id):
+        raise RuntimeError("orchestrator crashed")
+
+    worker = WorkflowWorker(queue, {"finalize_workflow": failing_handler}, poll_interval=0.01)
+    await queue.enqueue("finalize_workflow", {"thread_id": "t1"}, max_attempts=1)
+
+    runner = asyncio.create_task(worker.run())
+    await asyncio.sleep(0.1)
+    worker.stop()
+    await runner
+
+    assert worker.dead_lettered == 1
+    assert await queue.get_stats() == {"pending": 0, "processing": 0, "dead": 1}
+
+
+@pytest.mark.asyncio
+async def test_failure_is_reported_only_when_dead_lettered(local_redis):
+    """
+    Tests that a failed attempt with retries left stays silent and the final failure is reported once.
+    """
+    queue = JobQueue("test_jobs")
+    reports = []
+
+    async def failing_handler(thread_id):
+        raise RuntimeError("orchestrator crashed")
+
+    async def report(job, error):
+        reports.append((job.payload["thread_id"], error))
+
+    worker = WorkflowWorker(queue, {"finalize_workflow": failing_handler}, poll_interval=0.01, on_dead_letter=report)
+    await queue.enqueue("finalize_workflow", {"thread_id": "t1"}, max_attempts=3)
+    await queue.enqueue("finalize_workflow", {"thread_id": "t2"}, max_attempts=1)
+
+    runner = asyncio.create_task(worker.run())
+    await asyncio.sleep(0.1)
+    worker.stop()
+    await runner
+
+    assert worker.retried == 1
+    assert reports == [("t2", "orchestrator crashed")]
+
+
+@pytest.mark.asyncio
+async def test_enqueue_fails_without_redis_or_local_worker(local_redis, monkeypatch):
+    """
+    Tests that an API process with a separate worker deployment refuses jobs while Redis is down.
+    """
+    monkeypatch.setattr(job_queue.settings, "WORKFLOW_EMBEDDED_WORKER", False)
+    queue = JobQueue("test_jobs")
+    calls = []
+
+    async def handler(thread_id, user_input):
+        calls.append(thread_id)
+
+    with pytest.raises(QueueUnavailableError):
+        await queue.enqueue("start_workflow", {"thread_id": "t1", "user_input": "cans"})
+
+    worker = WorkflowWorker(queue, {"start_workflow": handler}, poll_interval=0.01)
+    runner = asyncio.create_task(worker.run())
+    await asyncio.sleep(0)
+    await queue.enqueue("start_workflow", {"thread_id": "t2", "user_input": "jars"})
+    await asyncio.sleep(0.1)
+    worker.stop()
+    await runner
+
+    assert calls == ["t2"]
+
+
+@pytest.mark.asyncio
+async def test_jobs_enqueued_during_outage_move_to_redis_on_recovery(local_redis):
+    """
+    Tests that a job held by the in-process stand-in is claimed from Redis once it is reachable again.
+    """
+    redis_side = _LocalJobQueue()
+
+    def run_script(script, keys, args, fallback):
+        if local_redis._use_fallback:
+            return fallback()
+        if script is ENQUEUE_SCRIPT:
+            return redis_side.enqueue(*args)
+        if script is CLAIM_SCRIPT:
+            return redis_side.claim(*args)
+
+    local_redis.eval.side_effect = run_script
+    queue = JobQueue("test_jobs")
+    queue.local_workers = 1
+    job = await queue.enqueue("start_workflow", {"thread_id": "t1", "user_input": "jars"})
+
+    local_redis._use_fallback = False
+    claimed = await queue.claim()
+
+    assert claimed.id == job.id
+    assert not queue._local.pending and not queue._local.data
+    assert job.id in redis_side.processing
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_survives_a_failed_extend(local_redis):
+    """
+    Tests that an error extending the visibility deadline is logged and the heartbeat keeps running.
+    """
+    queue = JobQueue("test_jobs", visibility_timeout=0.03)
+    queue.extend = mock.AsyncMock(side_effect=[RuntimeError("redis blip"), True, True, True])
+    worker = WorkflowWorker(queue, {}, poll_interval=0.01)
+    job = await queue.enqueue("start_workflow", {"thread_id": "t1"})
+
+    heartbeat = asyncio.create_task(worker._heartbeat(job))
+    await asyncio.sleep(0.05)
+
+    assert not heartbeat.done()
+    heartbeat.cancel()
+    assert queue.extend.await_count >= 2
@@ -0,0 +1,108 @@
+import json
+import pytest
+
+from app.ai_service.json_stream import JSONArrayStreamParser
+
+
+def _feed_in_chunks(parser, text, size):
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(parser.feed(text[start:start + size]))
+    return items
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64])
+def test_emits_each_option_as_it_closes(chunk_size):
+    """
+    Tests that every element of the target array is emitted, in order, however the text is chunked.
+    """
+    document = {
+        "generation_metadata": {"viable_options": ["decoy"], "total_options": 3},
+        "viable_options": [
+            {"title": "Bottle \"Lamp\"", "key_materials": ["glass", "wire"], "tagline": "a, b ] } {"},
+            {"title": "Planter\\Stand", "nested": {"list": [1, [2, 3]]}},
+            {"title": "Bird Feeder"},
+        ],
+        "notes": [4, 5],
+    }
+    parser = JSONArrayStreamParser("viable_options")
+
+    items = _feed_in_chunks(parser, json.dumps(document), chunk_size)
+
+    assert items == document["viable_options"]
+    assert parser.done is True
+
+
+def test_element_is_available_before_the_response_ends():
+    """
+    Tests that the first option is returned before the rest of the response has arrived.
+    """
+    parser = JSONArrayStreamParser("viable_options")
+
+    first = parser.feed('```json\n{"viable_options": [{"title": "Lamp"}, {"title": "Pla')
+    rest = parser.feed('nter"}]}\n```')
+
+    assert first == [{"title": "Lamp"}]
+    assert rest == [{"title": "Planter"}]
+
+
+def test_root_array_with_primitive_elements():
+    """
+    Tests that primitives in a root-level array are emitted when their delimiter arrives.
+    """
+    parser = JSONArrayStreamParser()
+
+    items = _feed_in_chunks(parser, '[1, "two, three", true, null, {"x": 4}]', 2)
+
+    assert items == [1, "two, three", True, None, {"x": 4}]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunks", [
+    ['{"viable_options": [{"title": "A"}', ', {"title": "B"}]}', None],
+    ['{"viable_options": [{"title": "A"}, {"title": "B"}, {"title": "C"}]}'],
+])
+async def test_client_streams_items_to_callback(monkeypatch, chunks):
+    """
+    Tests that the production client hands each streamed option to the callback by index,
+    including several options closed by the same chunk.
+    """
+    from app.ai_service import production_gemini
+
+    class FakeChunk:
+        def __init__(self, text):
+            self._text = text
+
+        @property
+        def text(self):
+            if self._text is None:
+                raise ValueError("no text part")
+            return self._text
+
+    class FakeStream:
+        def __init__(self, chunks):
+            self.chunks = chunks
+
+        def __aiter__(self):
+            return self._iterate()
+
+        async def _iterate(self):
+            for chunk in self.chunks:
+                yield FakeChunk(chunk)
+
+    class FakeModel:
+        async def generate_content_async(self, prompt, stream=False):
+            assert stream is True
+            return FakeStream(chunks)
+
+    monkeypatch.setattr(production_gemini.settings, "GEMINI_API_KEY", "test-key")
+    client = production_gemini.ProductionGeminiClient()
+    received = []
+
+    async def on_item(index, item):
+        received.append((index, item["title"]))
+
+    await client._consume_stream(FakeModel(), "prompt", "viable_options", on_item)
+
+    titles = [item["title"] for item in json.loads("".join(chunk for chunk in chunks if chunk))["viable_options"]]
+    assert received == list(enumerate(titles))
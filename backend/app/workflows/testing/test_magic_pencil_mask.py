@@ -0,0 +1,32 @@
+from PIL import Image
+
+from app.endpoints.magic_pencil.masking import build_edit_mask, prepare_edit_inputs
+
+
+def test_edit_mask_matches_green_and_alpha_thresholds():
+    """
+    Tests that only pixels with green > 100 and alpha > 50 end up in the mask.
+    """
+    overlay = Image.new("RGBA", (4, 1), (0, 0, 0, 0))
+    overlay.putpixel((0, 0), (76, 222, 128, 128))  # frontend stroke
+    overlay.putpixel((1, 0), (76, 222, 128, 50))   # too transparent
+    overlay.putpixel((2, 0), (76, 100, 128, 255))  # not green enough
+    overlay.putpixel((3, 0), (0, 101, 0, 51))      # just over both thresholds
+
+    mask = build_edit_mask(overlay)
+
+    assert mask.mode == "L"
+    assert list(mask.getdata()) == [255, 0, 0, 255]
+
+
+def test_prepare_edit_inputs_resizes_overlay_to_original():
+    """
+    Tests that payloads are produced even when the overlay size differs.
+    """
+    original = Image.new("RGBA", (64, 48), (200, 200, 200, 255))
+    overlay = Image.new("RGBA", (32, 24), (76, 222, 128, 128))
+
+    inputs = prepare_edit_inputs(original, overlay)
+
+    assert set(inputs) == {"original_b64", "drawn_b64", "mask_b64", "composite_b64"}
+    assert all(inputs.values())
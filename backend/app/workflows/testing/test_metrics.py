@@ -0,0 +1,30 @@
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.metrics import UNMATCHED_ROUTE, MetricsMiddleware, http_requests_total
+
+
+def test_requests_are_labelled_by_route_template():
+    """
+    Tests that path parameters collapse into the route template label instead of one series per ID.
+    """
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/workflow/status/{thread_id}")
+    async def status(thread_id: str):
+        return {"thread_id": thread_id}
+
+    client = TestClient(app)
+    before = http_requests_total.labels("GET", "/workflow/status/{thread_id}", "200")._value.get()
+    client.get("/workflow/status/abc")
+    client.get("/workflow/status/def")
+    client.get("/no/such/route")
+
+    after = http_requests_total.labels("GET", "/workflow/status/{thread_id}", "200")._value.get()
+    assert after - before == 2
+    assert http_requests_total.labels("GET", UNMATCHED_ROUTE, "404")._value.get() >= 1
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from app.ai_service import client_pool, offline_gemini
+from app.ai_service.image_generation import ImageGenerationEngine
+from app.ai_service.offline_gemini import OfflineBackend, OfflineGenerativeModel
+from app.ai_service.production_gemini import ProductionGeminiClient
+from app.core.config import settings
+from app.workflows.phase2_nodes import CHOICE_GENERATION_LITE_SCHEMA
+
+
+@pytest.fixture
+def offline_gemini_backend(monkeypatch):
+    monkeypatch.setattr(settings, "GEMINI_BACKEND", "offline")
+    monkeypatch.setattr(settings, "GEMINI_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "GEMINI_RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(settings, "GEMINI_HEDGE_ENABLED", False)
+    monkeypatch.setattr(client_pool, "_client_registry", None)
+    backend = OfflineBackend(profile="instant", throttle_rate=0.0, error_rate=0.0, seed=7)
+    monkeypatch.setattr(offline_gemini, "_offline_backend", backend)
+    return backend
+
+
+@pytest.mark.asyncio
+async def test_offline_model_answers_with_schema_valid_json():
+    """
+    Tests that structured calls get JSON with every schema property and distinct option IDs.
+    """
+    backend = OfflineBackend(profile="instant", throttle_rate=0.0, error_rate=0.0, seed=1)
+    model = OfflineGenerativeModel("gemini-2.5-flash", {"response_schema": CHOICE_GENERATION_LITE_SCHEMA}, backend)
+
+    response = await model.generate_content_async("Generate options", stream=True)
+    chunks = [chunk.text async for chunk in response]
+    result = json.loads(response.text)
+
+    assert "".join(chunks) == response.text
+    options = result["viable_options"]
+    assert len({option["option_id"] for option in options}) == len(options) == 3
+    assert set(options[0]) == set(CHOICE_GENERATION_LITE_SCHEMA["properties"]["viable_options"]["items"]["properties"])
+    assert options[0]["difficulty_level"] == "beginner"
+    assert response.usage_metadata.candidates_token_count > 0
+
+
+@pytest.mark.asyncio
+async def test_production_client_runs_offline_without_api_key(offline_gemini_backend, monkeypatch):
+    """
+    Tests that the production client works against the stand-in without a key and surfaces injected 429s.
+    """
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", None)
+    client = ProductionGeminiClient()
+
+    result = await client.call_gemini_with_retry("Form a goal", task_type="goal_formation", response_schema={
+        "type": "object",
+        "properties": {"primary_goal": {"type": "string"}, "needs_clarification": {"type": "boolean"}},
+    })
+    assert result["primary_goal"].startswith("primary goal 1")
+    assert result["needs_clarification"] is False
+    assert result["_metadata"]["attempt"] == 1
+
+    offline_gemini_backend.throttle_rate = 1.0
+    throttled = await client.call_gemini_with_retry("Form another goal", task_type="goal_formation", max_retries=1)
+    assert "quota" in throttled["error"].lower()
+    assert offline_gemini_backend.get_stats()["throttled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_image_engine_gets_png_offline(offline_gemini_backend):
+    """
+    Tests that image generation returns PNG bytes from the offline image model.
+    """
+    image = await ImageGenerationEngine(concurrency=2).generate_image("a lamp made of jars", label="concept 1")
+
+    assert image.startswith(b"\x89PNG")
+    assert offline_gemini_backend.get_stats()["requests"] == 1
@@ -0,0 +1,70 @@
+import random
+import pytest
+
+from app.workflows.performance_monitor import LatencySketch, PerformanceMonitor, WorkflowMetrics, monitor_node
+from app.workflows.state import WorkflowState
+
+
+def test_latency_sketch_quantiles_within_accuracy():
+    """
+    Tests that sketch quantiles stay within the configured relative error while bucket count stays bounded.
+    """
+    rng = random.Random(7)
+    samples = [rng.lognormvariate(0.5, 1.0) for _ in range(20000)]
+    sketch = LatencySketch(relative_accuracy=0.01)
+    for value in samples:
+        sketch.add(value)
+
+    ordered = sorted(samples)
+    for q in (0.5, 0.95, 0.99):
+        exact = ordered[int(q * (len(ordered) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.02)
+    assert sketch.count == 20000
+    assert len(sketch.buckets) < 1000
+
+
+def test_monitor_memory_is_bounded():
+    """
+    Tests that finished workflows are kept in a ring buffer and never-finished ones are evicted.
+    """
+    monitor = PerformanceMonitor(recent_workflows=3, max_active_workflows=2)
+    for index in range(10):
+        monitor.start_workflow_tracking(f"t{index}")
+        monitor.record_node_execution(f"t{index}", "P1a_extract", 0.5)
+        monitor.complete_workflow_tracking(f"t{index}")
+    for index in range(5):
+        monitor.start_workflow_tracking(f"stuck{index}")
+
+    assert [wm.thread_id for wm in monitor.completed_workflows] == ["t7", "t8", "t9"]
+    assert list(monitor.active_workflows) == ["stuck3", "stuck4"]
+    assert monitor.abandoned_workflows == 3
+
+    snapshot = monitor.get_snapshot()
+    assert snapshot["summary"]["total_workflows"] == 10
+    assert snapshot["nodes"]["P1a_extract"]["count"] == 10
+    assert snapshot["nodes"]["P1a_extract"]["p95"] == pytest.approx(0.5, rel=0.02)
+
+
+@pytest.mark.asyncio
+async def test_monitor_node_records_successes_and_errors():
+    """
+    Tests that the node wrapper records durations against the state's thread, counting raised errors.
+    """
+    monitor = PerformanceMonitor()
+    monitor.start_workflow_tracking("t1")
+
+    async def extract(state):
+        return {"current_node": "P1c"}
+
+    async def categorize(state):
+        raise RuntimeError("model unavailable")
+
+    state = WorkflowState(thread_id="t1", user_input="bottles")
+    assert await monitor_node("P1a_extract", extract, monitor)(state) == {"current_node": "P1c"}
+    with pytest.raises(RuntimeError):
+        await monitor_node("P1c_categorize", categorize, monitor)(state)
+
+    workflow: WorkflowMetrics = monitor.active_workflows["t1"]
+    assert workflow.node_metrics["P1a_extract"].execution_count == 1
+    assert workflow.node_metrics["P1c_categorize"].error_count == 1
+    assert monitor.node_stats["P1c_categorize"].error_count == 1
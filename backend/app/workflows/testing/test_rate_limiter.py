@@ -0,0 +1,64 @@
+import pytest
+import asyncio
+
+from app.ai_service.rate_limiter import AdaptiveRateLimiter, Priority, RateLimitTimeoutError
+from app.core.redis import async_redis_service
+
+
+@pytest.fixture(autouse=True)
+def local_buckets(monkeypatch):
+    """Runs the limiter on its in-process bucket (no Redis server in tests)."""
+    monkeypatch.setattr(async_redis_service, "_use_fallback", True)
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_are_admitted_before_background():
+    """
+    Tests that queued interactive callers overtake earlier background callers.
+    """
+    limiter = AdaptiveRateLimiter("test", requests_per_minute=600, burst=1, max_wait=5)
+    await limiter.acquire()  # drain the burst
+    order = []
+
+    async def call(name, priority):
+        await limiter.acquire(priority)
+        order.append(name)
+
+    background = [asyncio.create_task(call(f"bg{i}", Priority.BACKGROUND)) for i in range(2)]
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(call("p1a", Priority.INTERACTIVE))
+    await asyncio.gather(*background, interactive)
+
+    assert order[0] == "p1a"
+    assert limiter.get_stats()["queue_depth"] == {"interactive": 0, "standard": 0, "background": 0}
+
+
+@pytest.mark.asyncio
+async def test_throttle_halves_rate_and_success_recovers():
+    """
+    Tests AIMD adaptation: multiplicative decrease, additive increase.
+    """
+    limiter = AdaptiveRateLimiter("test", requests_per_minute=600, increase_fraction=0.25)
+
+    await limiter.record_throttle()
+    assert limiter.rate == pytest.approx(5.0)
+
+    await limiter.record_success()
+    assert limiter.rate == pytest.approx(7.5)
+
+    for _ in range(5):
+        await limiter.record_success()
+    assert limiter.rate == pytest.approx(10.0)
+
+
+@pytest.mark.asyncio
+async def test_acquire_times_out_when_budget_is_exhausted():
+    """
+    Tests that callers give up after the maximum wait instead of queueing forever.
+    """
+    limiter = AdaptiveRateLimiter("test", requests_per_minute=1, burst=1, max_wait=0.2)
+    await limiter.acquire()
+
+    with pytest.raises(RateLimitTimeoutError):
+        await limiter.acquire(Priority.BACKGROUND)
+    assert limiter.timeouts == 1
@@ -0,0 +1,149 @@
+import asyncio
+import time
+from unittest import mock
+
+import pytest
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.core import redis as redis_module
+from app.core.redis import AsyncRedisService, FallbackStore, RedisService
+
+
+def test_fallback_store_honours_ttl():
+    """
+    Tests that expired keys disappear from reads, existence checks and key listings.
+    """
+    store = FallbackStore(max_bytes=1024, sweep_interval=0)
+    store.set("concepts:t1", "{}", ex=0.05)
+    store.set("goals:t1", "{}")
+
+    assert store.get("concepts:t1") == "{}"
+    time.sleep(0.1)
+
+    assert store.get("concepts:t1") is None
+    assert not store.exists("concepts:t1")
+    assert store.keys("*:t1") == ["goals:t1"]
+
+
+def test_fallback_store_evicts_least_recently_used():
+    """
+    Tests that the memory cap evicts the least recently used key first.
+    """
+    store = FallbackStore(max_bytes=25, sweep_interval=0)
+    store.set("a", "x" * 9)
+    store.set("b", "x" * 9)
+    store.get("a")  # "b" is now the least recently used
+    store.set("c", "x" * 9)
+
+    assert store.get("b") is None
+    assert store.get("a") == "x" * 9
+    assert store.get_stats()["evictions"] == 1
+
+
+def test_incr_keeps_existing_ttl():
+    """
+    Tests that incrementing a counter does not make it persistent.
+    """
+    store = FallbackStore(sweep_interval=0)
+    store.set("rate:ip", "1", ex=0.05)
+    assert store.incr("rate:ip") == 2
+
+    time.sleep(0.1)
+
+    assert store.get("rate:ip") is None
+
+
+def test_service_recovers_and_replays_hot_keys(monkeypatch):
+    """
+    Tests that the service probes Redis, replays fallback writes with NX and leaves fallback mode.
+    """
+    monkeypatch.setattr(redis_module.settings, "REDIS_FALLBACK_PROBE_INTERVAL", 0)
+    service = RedisService(fallback_store=FallbackStore(sweep_interval=0))
+    client = mock.MagicMock()
+    client.set.side_effect = RedisConnectionError("down")
+    service.client = client
+
+    assert service.set("package:t1", "{}", ex=60) is True
+    assert service._use_fallback is True
+
+    client.get.return_value = "from-redis"
+    value = service.get("other")
+
+    assert value == "from-redis"
+    assert service._use_fallback is False
+    pipe = client.pipeline.return_value
+    key, stored = pipe.set.call_args.args
+    assert (key, stored) == ("package:t1", "{}")
+    assert pipe.set.call_args.kwargs["nx"] is True
+    assert 0 < pipe.set.call_args.kwargs["ex"] <= 60
+    assert len(service._fallback_store) == 0
+
+
+def test_fallback_hash_round_trip_and_replay():
+    """
+    Tests that per-thread hashes work in fallback mode and are replayed field by field.
+    """
+    store = FallbackStore(sweep_interval=0)
+    store.set("concept_progress:t1", "stale")
+    store.hset("concept_progress:t1", "1", '{"title": "B"}')
+    store.hset("concept_progress:t1", "0", '{"title": "A"}')
+    store.expire("concept_progress:t1", 60)
+
+    assert store.hgetall("concept_progress:t1") == {"0": '{"title": "A"}', "1": '{"title": "B"}'}
+    assert store.get("concept_progress:t1") is None
+
+    pipe = mock.MagicMock()
+    for key, value, ttl in store.hottest(10):
+        redis_module._queue_replay(pipe, key, value, ttl)
+
+    assert pipe.hsetnx.call_count == 2
+    pipe.expire.assert_called_once()
+    pipe.set.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_keys_uses_scan_not_keys():
+    """
+    Tests that pattern lookups iterate with SCAN instead of issuing KEYS.
+    """
+    service = AsyncRedisService(fallback_store=FallbackStore())
+    client = mock.MagicMock()
+
+    async def scan_iter(match, count):
+        for key in ["magic_pencil:t1", "magic_pencil:t2"]:
+            yield key
+
+    client.scan_iter.side_effect = scan_iter
+    service._client = client
+    service._client_loop = asyncio.get_running_loop()
+
+    assert await service.keys("magic_pencil:*") == ["magic_pencil:t1", "magic_pencil:t2"]
+    client.keys.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_services_sharing_a_store_leave_fallback_together(monkeypatch):
+    """
+    Tests that when one service recovers, a service sharing its fallback store reads Redis again
+    instead of the store that was just cleared.
+    """
+    monkeypatch.setattr(redis_module.settings, "REDIS_FALLBACK_PROBE_INTERVAL", 0)
+    store = FallbackStore(sweep_interval=0)
+    sync_service = RedisService(fallback_store=store)
+    sync_service.client = mock.MagicMock()
+    aio_service = AsyncRedisService(fallback_store=store)
+    aio_client = mock.MagicMock()
+    aio_client.set = mock.AsyncMock(side_effect=RedisConnectionError("down"))
+    aio_client.get = mock.AsyncMock(return_value='{"status": "running"}')
+    aio_service._client = aio_client
+    aio_service._client_loop = asyncio.get_running_loop()
+
+    await aio_service.set("thread:abc", '{"status": "running"}')
+    sync_service._enter_fallback(RedisConnectionError("down"))
+    sync_service.get("other")
+
+    pipe = sync_service.client.pipeline.return_value
+    assert pipe.set.call_args.args == ("thread:abc", '{"status": "running"}')
+    assert aio_service._use_fallback is False
+    assert await aio_service.get("thread:abc") == '{"status": "running"}'
@@ -0,0 +1,81 @@
+import pytest
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from app.ai_service import production_gemini
+from app.ai_service.production_gemini import ProductionGeminiClient
+from app.ai_service.resilience import CircuitBreaker, CircuitState, hedged_call
+
+
+def test_breaker_opens_then_recovers_through_half_open():
+    """
+    Tests closed -> open -> half-open -> closed transitions.
+    """
+    breaker = CircuitBreaker("gemini-test", failure_threshold=2, recovery_timeout=0.05)
+
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+    assert not breaker.allow_request()
+
+    breaker.opened_at -= 0.1
+    assert breaker.allow_request()  # half-open probe
+    assert breaker.state is CircuitState.HALF_OPEN
+    assert not breaker.allow_request()  # only one probe at a time
+
+    breaker.record_success()
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.rejected == 2
+
+
+@pytest.mark.asyncio
+async def test_hedged_call_returns_first_finisher_and_cancels_loser():
+    """
+    Tests that a stuck primary is overtaken by the hedge, which then wins.
+    """
+    calls = []
+
+    async def call():
+        calls.append(len(calls))
+        await asyncio.sleep(10 if len(calls) == 1 else 0.01)
+        return f"call {len(calls)}"
+
+    hedges = []
+    result = await asyncio.wait_for(hedged_call(call, 0.02, on_hedge=lambda: hedges.append(1)), timeout=1)
+
+    assert result == "call 2"
+    assert hedges == [1]
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_without_upstream_call(monkeypatch):
+    """
+    Tests that once a model's circuit opens, calls return an error immediately.
+    """
+    monkeypatch.setattr(production_gemini.settings, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(production_gemini.settings, "GEMINI_RATE_LIMIT_ENABLED", False)
+    breaker = CircuitBreaker("gemini-test", failure_threshold=1, recovery_timeout=60)
+    monkeypatch.setattr(production_gemini, "get_circuit_breaker", lambda model_name: breaker)
+
+    upstream_calls = []
+
+    async def generate_content_async(prompt, stream=False):
+        upstream_calls.append(prompt)
+        raise RuntimeError("503 upstream unavailable")
+
+    @asynccontextmanager
+    async def track():
+        yield SimpleNamespace(generate_content_async=generate_content_async)
+
+    registry = SimpleNamespace(get_model=lambda *args: SimpleNamespace(track=track))
+    monkeypatch.setattr(production_gemini, "get_client_registry", lambda: registry)
+
+    client = ProductionGeminiClient()
+    first = await client._call_with_retries("prompt", "default", "gemini-test", {}, None, 1)
+    second = await client._call_with_retries("prompt", "default", "gemini-test", {}, None, 1)
+
+    assert "Max retries exceeded" in first["error"]
+    assert "Circuit open" in second["error"]
+    assert len(upstream_calls) == 1
@@ -0,0 +1,121 @@
+import pytest
+from unittest import mock
+
+from app.knowledge.material_affordances import MaterialType
+from app.knowledge.rule_categorizer import rule_categorizer
+from app.workflows import nodes
+from app.workflows.nodes import ingredient_categorizer_node
+from app.workflows.state import WorkflowState, IngredientsData, IngredientItem
+
+
+def test_rules_resolve_clear_items_and_leave_ambiguous_ones():
+    """
+    Tests that the rule categorizer is confident about well-described items and not about vague ones.
+    """
+    bottle = rule_categorizer.categorize(
+        IngredientItem(name="water bottles", material="PET plastic", category="recyclable", confidence=0.95)
+    )
+    can = rule_categorizer.categorize(IngredientItem(name="soda can", confidence=0.9))
+    soup = rule_categorizer.categorize(IngredientItem(name="can of soup", confidence=0.9))
+    mixed = rule_categorizer.categorize(
+        IngredientItem(name="old stuff", material="plastic or glass", category="unknown", confidence=0.9)
+    )
+
+    assert bottle.material_type == MaterialType.PLASTIC
+    assert bottle.category == "beverage_container"
+    assert bottle.confidence >= 0.8
+    assert can.material == "aluminum" and can.category == "beverage_container"
+    assert soup.confidence == 0.0
+    assert mixed.confidence == 0.0
+
+
+@pytest.mark.asyncio
+async def test_p1c_skips_gemini_when_rules_resolve_everything():
+    """
+    Tests that P1c finalizes confidently categorized ingredients locally without a Gemini call.
+    """
+    state = WorkflowState(thread_id="rules-thread")
+    state.ingredients_data = IngredientsData(ingredients=[
+        IngredientItem(name="soda cans", material="aluminum", category="beverage_container", confidence=0.9),
+        IngredientItem(name="cardboard box", material="corrugated cardboard", confidence=0.9),
+    ])
+    gemini = mock.AsyncMock()
+
+    with mock.patch.object(nodes, "production_call_gemini", gemini), \
+         mock.patch.object(nodes, "load_ingredients_from_redis", mock.AsyncMock(return_value=IngredientsData())), \
+         mock.patch.object(nodes, "save_ingredients_to_redis", mock.AsyncMock(return_value=True)):
+        result = await ingredient_categorizer_node(state)
+
+    gemini.assert_not_called()
+    assert result["current_node"] == "G1"
+    assert [item.category for item in result["ingredients_data"].ingredients] == ["beverage_container", "packaging"]
+    assert "storage_container" in state.user_constraints["recommended_types"]
+
+
+@pytest.mark.asyncio
+async def test_p1c_sends_only_ambiguous_ingredients_to_gemini():
+    """
+    Tests that P1c escalates just the ingredients the rules cannot settle and merges the results.
+    """
+    state = WorkflowState(thread_id="rules-thread")
+    state.ingredients_data = IngredientsData(ingredients=[
+        IngredientItem(name="soda cans", material="aluminum", category="beverage_container", confidence=0.9),
+        IngredientItem(name="mystery gadget", confidence=0.9),
+    ])
+    gemini = mock.AsyncMock(return_value={
+        "ingredients": [{"name": "mystery gadget", "material": "plastic", "category": "electronics"}],
+        "overall_assessment": {"material_synergy": 0.7},
+    })
+
+    with mock.patch.object(nodes, "production_call_gemini", gemini), \
+         mock.patch.object(nodes, "load_ingredients_from_redis", mock.AsyncMock(return_value=IngredientsData())), \
+         mock.patch.object(nodes, "save_ingredients_to_redis", mock.AsyncMock(return_value=True)):
+        result = await ingredient_categorizer_node(state)
+
+    prompt = gemini.call_args.kwargs["prompt"]
+    assert "mystery gadget" in prompt
+    assert '"name": "soda cans"' not in prompt
+    assert [item.name for item in result["ingredients_data"].ingredients] == ["soda cans", "mystery gadget"]
+
+
+@pytest.mark.asyncio
+async def test_p1c_keeps_extraction_order_when_merging():
+    """
+    Tests that rule-finalized and Gemini-categorized ingredients come back in their original order.
+    """
+    state = WorkflowState(thread_id="rules-thread")
+    state.ingredients_data = IngredientsData(ingredients=[
+        IngredientItem(name="mystery gadget", confidence=0.9),
+        IngredientItem(name="soda cans", material="aluminum", category="beverage_container", confidence=0.9),
+        IngredientItem(name="old stuff", confidence=0.9),
+    ])
+    gemini = mock.AsyncMock(return_value={
+        "ingredients": [
+            {"name": "old stuff", "material": "wood", "category": "wood_scrap"},
+            {"name": "mystery gadget", "material": "plastic", "category": "electronics"},
+        ],
+        "overall_assessment": {"material_synergy": 0.7},
+    })
+
+    with mock.patch.object(nodes, "production_call_gemini", gemini), \
+         mock.patch.object(nodes, "load_ingredients_from_redis", mock.AsyncMock(return_value=IngredientsData())), \
+         mock.patch.object(nodes, "save_ingredients_to_redis", mock.AsyncMock(return_value=True)):
+        result = await ingredient_categorizer_node(state)
+
+    assert [item.name for item in result["ingredients_data"].ingredients] == ["mystery gadget", "soda cans", "old stuff"]
+
+
+@pytest.mark.asyncio
+async def test_p1c_with_no_ingredients_still_asks_gemini():
+    """
+    Tests that an empty ingredient list takes the Gemini path rather than the rules fast path.
+    """
+    state = WorkflowState(thread_id="rules-thread")
+    gemini = mock.AsyncMock(return_value={"ingredients": [], "overall_assessment": {}})
+
+    with mock.patch.object(nodes, "production_call_gemini", gemini), \
+         mock.patch.object(nodes, "load_ingredients_from_redis", mock.AsyncMock(return_value=IngredientsData())), \
+         mock.patch.object(nodes, "save_ingredients_to_redis", mock.AsyncMock(return_value=True)):
+        await ingredient_categorizer_node(state)
+
+    gemini.assert_called_once()
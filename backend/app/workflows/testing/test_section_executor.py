@@ -0,0 +1,80 @@
+import pytest
+import asyncio
+import time
+
+from app.workflows.section_executor import PackageSection, SectionExecutor
+
+
+@pytest.mark.asyncio
+async def test_independent_sections_run_concurrently_and_stream():
+    """
+    Tests that independent sections overlap, dependants see their inputs,
+    and every section is published as it completes.
+    """
+    published = []
+
+    async def esg(_inputs):
+        await asyncio.sleep(0.1)
+        return {"overall_esg_score": 90}
+
+    async def tools(_inputs):
+        await asyncio.sleep(0.1)
+        return [{"name": "scissors"}]
+
+    async def tool_icons(inputs):
+        return [dict(item, icon_name="Scissors") for item in inputs["tools"]]
+
+    async def on_section(name, data):
+        published.append(name)
+
+    sections = [
+        PackageSection("esg", esg),
+        PackageSection("tools", tools),
+        PackageSection("tool_icons", tool_icons, depends_on=("tools",)),
+    ]
+
+    start = time.perf_counter()
+    results = await SectionExecutor(sections).run(on_section=on_section)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.18
+    assert results["tool_icons"].value == [{"name": "scissors", "icon_name": "Scissors"}]
+    assert published.index("tools") < published.index("tool_icons")
+    assert set(published) == {"esg", "tools", "tool_icons"}
+
+
+@pytest.mark.asyncio
+async def test_section_deadline_uses_fallback():
+    """
+    Tests that a section missing its deadline resolves to its fallback.
+    """
+    async def slow(_inputs):
+        await asyncio.sleep(1)
+        return "late"
+
+    async def boom(_inputs):
+        raise RuntimeError("model unavailable")
+
+    sections = [
+        PackageSection("esg", slow, fallback=lambda: "fallback", deadline=0.05),
+        PackageSection("tools", boom, fallback=lambda: []),
+    ]
+
+    results = await SectionExecutor(sections).run()
+
+    assert (results["esg"].value, results["esg"].status) == ("fallback", "timeout")
+    assert (results["tools"].value, results["tools"].status) == ([], "error")
+
+
+def test_cyclic_sections_are_rejected():
+    """
+    Tests that dependency cycles are caught before anything runs.
+    """
+    async def noop(_inputs):
+        return None
+
+    with pytest.raises(ValueError):
+        SectionExecutor([
+            PackageSection("a", noop, depends_on=("b",)),
+            PackageSection("b", noop, depends_on=("a",)),
+        ])
@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from app.core.event_bus import WorkflowEventBus
+from app.core.serialization import FastJSONResponse, sse_event, to_jsonable
+from app.workflows.state import IngredientItem, IngredientsData
+
+
+def test_to_jsonable_dumps_nested_models():
+    """
+    Tests that Pydantic models nested in dicts, lists and tuples become plain JSON data.
+    """
+    ingredients = IngredientsData(ingredients=[IngredientItem(name="bottle", material="plastic")])
+
+    result = to_jsonable({"result": {"ingredients_data": ingredients, "sizes": (1, 2)}, 3: "three"})
+
+    assert result["result"]["ingredients_data"]["ingredients"][0]["name"] == "bottle"
+    assert result["result"]["sizes"] == [1, 2]
+    assert result["3"] == "three"
+    assert json.loads(FastJSONResponse(result).body) == result
+
+
+@pytest.mark.asyncio
+async def test_sse_frames_forward_raw_event_data():
+    """
+    Tests that raw event data read from the bus is framed as-is, without re-encoding.
+    """
+    bus = WorkflowEventBus()
+    bus._use_fallback = True
+    data = {"needs_clarification": True, "clarification_questions": ["What size is the jar?"]}
+    await bus.publish("t1", "ingredients_update", data)
+
+    [(event_id, event)] = await bus.read("t1", "0", block_ms=0, decode=False)
+    frame = sse_event(event["type"], event["data"], event_id)
+
+    assert isinstance(event["data"], str)
+    assert frame.startswith(f"id: {event_id}\ndata: ")
+    assert frame.endswith("\n\n")
+    assert json.loads(frame.split("data: ", 1)[1]) == {"type": "ingredients_update", "data": data}
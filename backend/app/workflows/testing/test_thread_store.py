@@ -0,0 +1,123 @@
+from unittest import mock
+
+import pytest
+
+from app.core import thread_store
+from app.core.redis import AsyncRedisService, FallbackStore
+from app.core.thread_store import (
+    COMPRESSED_PREFIX,
+    ZSTD_PREFIX,
+    Artifact,
+    ThreadArtifacts,
+    artifact_ref,
+    decode_artifact,
+    encode_artifact,
+)
+
+
+def _fallback_service() -> AsyncRedisService:
+    service = AsyncRedisService(fallback_store=FallbackStore())
+    service._use_fallback = True
+    return service
+
+
+def test_large_artifacts_are_compressed(monkeypatch):
+    """
+    Tests that values above the threshold are stored compressed and decode back unchanged.
+    """
+    monkeypatch.setattr(thread_store.settings, "THREAD_ARTIFACT_COMPRESS_MIN_BYTES", 256)
+    small = {"status": "running"}
+    large = {"concepts": [{"description": "reclaimed wood planter " * 10}] * 20}
+
+    assert encode_artifact(small) == '{"status":"running"}'
+    encoded = encode_artifact(large)
+    assert encoded.startswith((COMPRESSED_PREFIX, ZSTD_PREFIX))
+    assert decode_artifact(encoded) == large
+
+    monkeypatch.setattr(thread_store, "ZSTD_AVAILABLE", False)
+    encoded = encode_artifact(large)
+    assert encoded.startswith(COMPRESSED_PREFIX)
+    assert decode_artifact(encoded) == large
+    assert decode_artifact(None) is None
+    assert decode_artifact("not json") is None
+
+
+@pytest.mark.asyncio
+async def test_get_many_reads_all_fields_in_one_call():
+    """
+    Tests that several artifacts are fetched with a single HMGET and missing ones read as None.
+    """
+    service = mock.AsyncMock()
+    service.hmget.return_value = ['{"status": "running"}', None]
+    artifacts = ThreadArtifacts("t1", service)
+
+    result = await artifacts.get_many(Artifact.WORKFLOW_STATE, Artifact.CONCEPTS)
+
+    service.hmget.assert_awaited_once_with("thread:t1", ["workflow_state", "concepts"])
+    assert result == {Artifact.WORKFLOW_STATE: {"status": "running"}, Artifact.CONCEPTS: None}
+
+
+@pytest.mark.asyncio
+async def test_set_many_writes_fields_and_ttl_together():
+    """
+    Tests that several artifacts are written with one pipelined call that also refreshes the TTL.
+    """
+    service = mock.AsyncMock()
+    artifacts = ThreadArtifacts("t1", service, ttl=120)
+
+    await artifacts.set_many({Artifact.FINAL_PACKAGE: {"a": 1}, Artifact.ESG_METRICS: {"b": 2}})
+
+    service.hset_many.assert_awaited_once_with(
+        "thread:t1", {"final_package": '{"a":1}', "esg_metrics": '{"b":2}'}, ex=120
+    )
+
+
+@pytest.mark.asyncio
+async def test_artifacts_round_trip_in_fallback_store():
+    """
+    Tests that artifacts survive a round trip through the in-memory fallback and expire as one key.
+    """
+    service = _fallback_service()
+    artifacts = ThreadArtifacts("t1", service, ttl=60)
+
+    await artifacts.set(Artifact.GOALS, {"primary_goal": "planter"})
+    await artifacts.set(Artifact.CHOICES, {"viable_options": []})
+    assert await artifacts.get(Artifact.GOALS) == {"primary_goal": "planter"}
+    assert await artifacts.get(Artifact.EVALUATION, {}) == {}
+
+    await artifacts.delete(Artifact.GOALS)
+    assert await artifacts.get_many(Artifact.GOALS, Artifact.CHOICES) == {
+        Artifact.GOALS: None,
+        Artifact.CHOICES: {"viable_options": []},
+    }
+
+    _, expires_at = service._fallback_store._live("thread:t1")
+    assert expires_at is not None
+
+
+@pytest.mark.asyncio
+async def test_references_store_shared_packages_once():
+    """
+    Tests that referenced artifacts resolve on read, fetching only the ones not already requested.
+    """
+    service = _fallback_service()
+    artifacts = ThreadArtifacts("t1", service)
+    package = {"executive_summary": {"project_title": "Planter"}}
+
+    await artifacts.set_many({
+        Artifact.PACKAGE_ESSENTIAL: package,
+        Artifact.FINAL_PACKAGE: artifact_ref(Artifact.PACKAGE_ESSENTIAL),
+        Artifact.PROJECT_PACKAGE: artifact_ref(Artifact.FINAL_PACKAGE),
+        Artifact.WORKFLOW_COMPLETE: {"status": "complete", "final_package": artifact_ref(Artifact.FINAL_PACKAGE)},
+    })
+
+    stored = service._fallback_store.hgetall("thread:t1")
+    assert sum(value.count("Planter") for value in stored.values()) == 1
+
+    with mock.patch.object(service, "hmget", wraps=service.hmget) as hmget:
+        result = await artifacts.get_many(Artifact.WORKFLOW_COMPLETE, Artifact.PROJECT_PACKAGE)
+
+    assert result[Artifact.WORKFLOW_COMPLETE] == {"status": "complete", "final_package": package}
+    assert result[Artifact.PROJECT_PACKAGE] == package
+    # Requested fields, then final_package, then package_essential
+    assert hmget.await_count == 3
@@ -0,0 +1,89 @@
+import asyncio
+import time
+import pytest
+from unittest import mock
+
+from app.core import job_queue, tracing
+from app.core.job_queue import JobQueue
+from app.workflows.worker import WorkflowWorker
+
+
+@pytest.fixture
+def memory_tracing():
+    exporter = tracing.MemoryExporter(max_traces=10)
+    tracing.configure("memory", exporter=exporter)
+    yield exporter
+    tracing.configure("none")
+
+
+@pytest.fixture
+def local_redis():
+    """Routes queue scripts to the in-process stand-in, as when Redis is down."""
+    fake_redis = mock.AsyncMock()
+    fake_redis.eval.side_effect = lambda script, keys, args, fallback: fallback()
+    with mock.patch.object(job_queue, "redis_service", fake_redis):
+        yield fake_redis
+
+
+@pytest.mark.asyncio
+async def test_spans_nest_across_tasks_and_inherit_thread(memory_tracing):
+    """
+    Tests that spans opened in a task started inside a span join its trace and inherit the thread id.
+    """
+    async def child():
+        with tracing.span("node goal_formation"):
+            await asyncio.sleep(0)
+
+    with tracing.span("job.run", thread_id="t1") as root:
+        await asyncio.create_task(child())
+        tracing.record_span("redis GET", time.perf_counter())
+
+    [trace] = memory_tracing.get_thread_traces("t1")
+    spans = {span["name"]: span for span in trace["spans"]}
+
+    assert trace["trace_id"] == root.trace_id
+    assert spans["node goal_formation"]["parent_id"] == root.span_id
+    assert spans["node goal_formation"]["attributes"]["thread_id"] == "t1"
+    assert spans["redis GET"]["parent_id"] == root.span_id
+
+
+@pytest.mark.asyncio
+async def test_child_only_spans_are_skipped_outside_a_trace(memory_tracing):
+    """
+    Tests that record_span and child_only spans record nothing without an enclosing span.
+    """
+    tracing.record_span("redis GET", time.perf_counter())
+    with tracing.span("redis pipeline", child_only=True) as skipped:
+        pass
+
+    assert skipped is tracing.NOOP_SPAN
+    assert memory_tracing.get_thread_traces("t1") == []
+    assert len(memory_tracing._traces) == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_spans_join_the_enqueuing_trace(memory_tracing, local_redis):
+    """
+    Tests that a queued job carries its span context so the worker's span continues the same trace.
+    """
+    queue = JobQueue("test_jobs")
+
+    async def handler(thread_id, user_input):
+        with tracing.span("node ingredient_extraction"):
+            pass
+
+    worker = WorkflowWorker(queue, {"start_workflow": handler}, concurrency=1, poll_interval=0.01)
+    with tracing.span("POST /workflow/start", thread_id="t1") as request_span:
+        job = await queue.enqueue("start_workflow", {"thread_id": "t1", "user_input": "cans"})
+
+    assert job.trace["trace_id"] == request_span.trace_id
+
+    runner = asyncio.create_task(worker.run())
+    await asyncio.sleep(0.1)
+    worker.stop()
+    await runner
+
+    spans = {span["name"]: span for span in memory_tracing.get_trace(request_span.trace_id)}
+    assert spans["job.run"]["attributes"]["thread_id"] == "t1"
+    assert spans["job.enqueue"]["parent_id"] == request_span.span_id
+    assert spans["node ingredient_extraction"]["parent_id"] == spans["job.run"]["span_id"]
@@ -45,7 +45,7 @@ async def test_p1b_null_checker_finds_nulls(mock_state, mock_gemini_client):
     )
 
     # Act
-    with mock.patch('app.workflows.nodes.redis_service') as mock_redis:
+    with mock.patch('app.workflows.nodes.redis_service', new_callable=mock.AsyncMock) as mock_redis:
         mock_redis.get.return_value = None
         result = await null_checker_node(mock_state)
 
@@ -0,0 +1,201 @@
+"""
+Workflow worker: executes queued workflow jobs with bounded concurrency.
+
+Run standalone with ``python -m app.workflows.worker`` so workflow capacity
+scales separately from the API, or embedded in the API process
+(``WORKFLOW_EMBEDDED_WORKER``) for local development.
+"""
+import asyncio
+import logging
+import signal
+import time
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.job_queue import Job, JobQueue, workflow_jobs
+from app.core.tracing import span
+try:
+    from app.core.metrics import start_metrics_server
+    METRICS_AVAILABLE = True
+except ImportError:
+    METRICS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[..., Awaitable[None]]
+# Called with the job and its last error once the job is dead-lettered
+FailureHandler = Callable[[Job, str], Awaitable[None]]
+
+# Idle workers poll the queue this often
+POLL_INTERVAL = 0.5
+
+
+def default_handlers() -> Dict[str, JobHandler]:
+    """Job kinds enqueued by the workflow endpoints."""
+    from app.endpoints.workflow import router
+
+    return {
+        "start_workflow": router.run_workflow_background,
+        "resume_workflow": router.resume_workflow_background,
+        "select_option": router.generate_detailed_and_continue,
+        "magic_pencil": router.process_magic_pencil_edit,
+        "finalize_workflow": router.finalize_workflow,
+    }
+
+
+def default_failure_handler() -> FailureHandler:
+    from app.endpoints.workflow import router
+
+    return router.report_job_failure
+
+
+class WorkflowWorker:
+    """Claims jobs, runs their handlers, and acks, retries or dead-letters them."""
+
+    def __init__(
+        self,
+        queue: JobQueue = workflow_jobs,
+        handlers: Optional[Dict[str, JobHandler]] = None,
+        concurrency: Optional[int] = None,
+        poll_interval: float = POLL_INTERVAL,
+        on_dead_letter: Optional[FailureHandler] = None,
+    ):
+        self.queue = queue
+        if handlers is None:
+            handlers = default_handlers()
+            on_dead_letter = on_dead_letter or default_failure_handler()
+        self.handlers = handlers
+        self.on_dead_letter = on_dead_letter
+        self.concurrency = concurrency or settings.WORKFLOW_WORKER_CONCURRENCY
+        self.poll_interval = poll_interval
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._running: Set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+
+        # Performance tracking
+        self.completed = 0
+        self.retried = 0
+        self.dead_lettered = 0
+
+    def stop(self):
+        self._stopping.set()
+
+    async def run(self):
+        """Claim and execute jobs until ``stop()``; in-flight jobs are awaited on exit."""
+        logger.info(f"WORKER: Started with concurrency {self.concurrency}")
+        self.queue.local_workers += 1
+        try:
+            while not self._stopping.is_set():
+                await self._slots.acquire()
+                try:
+                    job = await self.queue.claim()
+                except Exception as e:
+                    logger.error(f"WORKER: Failed to claim job: {str(e)}")
+                    job = None
+                if job is None:
+                    self._slots.release()
+                    try:
+                        await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                task = asyncio.create_task(self._process(job))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+        finally:
+            self.queue.local_workers -= 1
+            if self._running:
+                await asyncio.gather(*self._running, return_exceptions=True)
+            logger.info("WORKER: Stopped")
+
+    async def _heartbeat(self, job: Job):
+        while True:
+            await asyncio.sleep(self.queue.visibility_timeout / 3)
+            try:
+                await self.queue.extend(job)
+            except Exception as e:
+                # Keep beating: one failed extend must not let the job's visibility lapse
+                logger.warning(f"WORKER: Heartbeat for job {job.id} failed: {str(e)}")
+
+    async def _process(self, job: Job):
+        try:
+            if job.attempts > job.max_attempts:
+                # Visibility lapsed too often (worker crashed mid-job each time)
+                await self._dead_letter(job, f"Job abandoned after {job.attempts - 1} attempts")
+                return
+
+            handler = self.handlers.get(job.kind)
+            if handler is None:
+                logger.error(f"WORKER: No handler for {job.kind} job {job.id}")
+                await self._dead_letter(job, f"No handler for {job.kind} jobs")
+                return
+
+            heartbeat = asyncio.create_task(self._heartbeat(job))
+            start_time = time.time()
+            try:
+                with span(
+                    "job.run", parent=job.trace, kind=job.kind, job_id=job.id,
+                    attempt=job.attempts, thread_id=job.payload.get("thread_id"),
+                ):
+                    await handler(**job.payload)
+            except Exception as e:
+                if job.attempts < job.max_attempts:
+                    delay = 2 ** job.attempts
+                    logger.warning(
+                        f"WORKER: {job.kind} job {job.id} failed (attempt {job.attempts}), "
+                        f"retrying in {delay}s: {str(e)}"
+                    )
+                    await self.queue.retry(job, delay)
+                    self.retried += 1
+                else:
+                    logger.error(f"WORKER: {job.kind} job {job.id} failed: {str(e)}")
+                    await self._dead_letter(job, str(e))
+                return
+            finally:
+                heartbeat.cancel()
+
+            await self.queue.ack(job)
+            self.completed += 1
+            logger.info(f"WORKER: ✓ {job.kind} job {job.id} done in {time.time() - start_time:.1f}s")
+        except Exception as e:
+            # Queue bookkeeping failed; the visibility timeout will hand the job out again
+            logger.error(f"WORKER: Bookkeeping failed for job {job.id}: {str(e)}")
+        finally:
+            self._slots.release()
+
+    async def _dead_letter(self, job: Job, error: str):
+        await self.queue.dead_letter(job)
+        self.dead_lettered += 1
+        if self.on_dead_letter is None:
+            return
+        try:
+            await self.on_dead_letter(job, error)
+        except Exception as e:
+            logger.error(f"WORKER: Failure report for job {job.id} failed: {str(e)}")
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": len(self._running),
+            "completed": self.completed,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+        }
+
+
+async def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    if METRICS_AVAILABLE and settings.WORKFLOW_WORKER_METRICS_PORT:
+        start_metrics_server(settings.WORKFLOW_WORKER_METRICS_PORT)
+    worker = WorkflowWorker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    await worker.run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
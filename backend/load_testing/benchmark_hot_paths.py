@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for functions on the workflow's per-request hot path:
+artifact encoding, JSON/SSE serialization, streamed-JSON parsing and client
+pool fingerprinting. Payloads are schema-shaped (via the offline Gemini
+synthesizer) so their sizes track the real response schemas.
+
+Each run is saved to load_test_results/ and diffed against
+load_testing/baselines/hot_paths.json; the exit code is non-zero on regression.
+
+Usage (from backend/):
+    python load_testing/benchmark_hot_paths.py --iterations 2000
+    python load_testing/benchmark_hot_paths.py --update-baseline
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.ai_service.client_pool import _fingerprint  # noqa: E402
+from app.ai_service.json_stream import JSONArrayStreamParser  # noqa: E402
+from app.ai_service.offline_gemini import synthesize_from_schema  # noqa: E402
+from app.core.serialization import dumps_str, sse_event, to_jsonable  # noqa: E402
+from app.core.thread_store import decode_artifact, encode_artifact  # noqa: E402
+from app.workflows.phase2_nodes import CHOICE_GENERATION_SCHEMA, GOAL_FORMATION_SCHEMA  # noqa: E402
+from load_testing.results import (  # noqa: E402
+    check_against_baseline,
+    make_result,
+    promote_baseline,
+    save_result,
+    summarize,
+)
+
+SUITE = "hot_paths"
+
+
+def build_payloads(words: int) -> Dict[str, Any]:
+    choices = synthesize_from_schema(CHOICE_GENERATION_SCHEMA, words)
+    goals = synthesize_from_schema(GOAL_FORMATION_SCHEMA, words)
+    # Roughly the shape of a finished package: the selected option plus goals and steps
+    final_package = {
+        "project": choices["viable_options"][0],
+        "goals": goals,
+        "steps": [{"step": index, "detail": " ".join(["step"] * words)} for index in range(12)],
+        "options": choices["viable_options"],
+    }
+    return {"choices": choices, "final_package": final_package}
+
+
+def hot_paths(payloads: Dict[str, Any]) -> Dict[str, Callable[[], Any]]:
+    choices_text = dumps_str(payloads["choices"])
+    encoded_package = encode_artifact(payloads["final_package"])
+    chunk_size = max(len(choices_text) // 16, 1)
+    chunks = [choices_text[start:start + chunk_size] for start in range(0, len(choices_text), chunk_size)]
+    generation_config = {
+        "temperature": 0.8,
+        "max_output_tokens": 8192,
+        "response_mime_type": "application/json",
+        "response_schema": CHOICE_GENERATION_SCHEMA,
+    }
+
+    def parse_stream():
+        parser = JSONArrayStreamParser("viable_options")
+        for chunk in chunks:
+            parser.feed(chunk)
+
+    return {
+        "encode_artifact(final_package)": lambda: encode_artifact(payloads["final_package"]),
+        "decode_artifact(final_package)": lambda: decode_artifact(encoded_package),
+        "to_jsonable(final_package)": lambda: to_jsonable(payloads["final_package"]),
+        "dumps_str(choices)": lambda: dumps_str(payloads["choices"]),
+        "sse_event(choices)": lambda: sse_event("choices_generated", choices_text, "1700000000000-0"),
+        "JSONArrayStreamParser.feed(choices)": parse_stream,
+        "client_pool._fingerprint(config)": lambda: _fingerprint(generation_config),
+    }
+
+
+def measure(func: Callable[[], Any], iterations: int, warmup: int) -> Dict[str, float]:
+    for _ in range(warmup):
+        func()
+    samples_ms = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        func()
+        samples_ms.append((time.perf_counter() - call_started) * 1000)
+    return summarize(samples_ms, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark workflow hot-path functions")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--words", type=int, default=12, help="Words per synthesized string field")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging")
+    parser.add_argument("--update-baseline", action="store_true", help="Save this run as the committed baseline")
+    args = parser.parse_args()
+
+    metrics = {}
+    print(f"{'function':<40} {'p50':>9} {'p95':>9} {'p99':>9} {'calls/s':>10}")
+    for name, func in hot_paths(build_payloads(args.words)).items():
+        stats = measure(func, args.iterations, args.warmup)
+        metrics[name] = stats
+        print(
+            f"{name:<40} {stats['p50_ms']:>7.3f}ms {stats['p95_ms']:>7.3f}ms "
+            f"{stats['p99_ms']:>7.3f}ms {stats['throughput']:>10.0f}"
+        )
+
+    result = make_result(SUITE, metrics, {
+        "iterations": args.iterations,
+        "words": args.words,
+    })
+    print(f"\nResults saved to {save_result(result)}")
+    if args.update_baseline:
+        print(f"Baseline written to {promote_baseline(result)}")
+        return
+    sys.exit(0 if check_against_baseline(result, args.tolerance) else 1)
+
+
+if __name__ == "__main__":
+    main()
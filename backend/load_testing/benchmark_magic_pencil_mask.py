@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for Magic Pencil mask extraction.
+Compares the legacy per-pixel loop with the Pillow band-op implementation
+across common canvas sizes.
+
+Usage (from backend/):
+    python load_testing/benchmark_magic_pencil_mask.py --sizes 512 1024 2048 --repeat 5
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.endpoints.magic_pencil.masking import build_edit_mask, prepare_edit_inputs  # noqa: E402
+
+
+def make_canvas(size: int) -> Image.Image:
+    """Transparent canvas with green strokes like the frontend draws."""
+    overlay = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    rng = random.Random(size)
+    for _ in range(40):
+        x0, y0 = rng.randrange(size), rng.randrange(size)
+        x1, y1 = rng.randrange(size), rng.randrange(size)
+        draw.line((x0, y0, x1, y1), fill=(76, 222, 128, 128), width=max(4, size // 64))
+    return overlay
+
+
+def legacy_mask(drawn_overlay: Image.Image) -> Image.Image:
+    """Original nested-loop implementation, kept for comparison."""
+    pure_mask = Image.new("L", drawn_overlay.size, 0)
+    drawn_pixels = drawn_overlay.load()
+    mask_pixels = pure_mask.load()
+    for y in range(drawn_overlay.size[1]):
+        for x in range(drawn_overlay.size[0]):
+            r, g, b, a = drawn_pixels[x, y]
+            if g > 100 and a > 50:
+                mask_pixels[x, y] = 255
+    return pure_mask
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Magic Pencil mask extraction")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[512, 1024, 2048])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-legacy", action="store_true", help="Skip the slow per-pixel baseline")
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'legacy mask':>12} {'band mask':>10} {'speedup':>8} {'full pipeline':>14}")
+    for size in args.sizes:
+        overlay = make_canvas(size)
+        original = Image.new("RGBA", (size, size), (200, 200, 200, 255))
+
+        band = best_of(lambda: build_edit_mask(overlay), args.repeat)
+        pipeline = best_of(lambda: prepare_edit_inputs(original, overlay), args.repeat)
+
+        if args.skip_legacy:
+            print(f"{size:>6} {'-':>12} {band * 1000:>8.1f}ms {'-':>8} {pipeline * 1000:>12.1f}ms")
+            continue
+
+        legacy = best_of(lambda: legacy_mask(overlay), 1)
+        assert legacy_mask(overlay).tobytes() == build_edit_mask(overlay).tobytes()
+        print(
+            f"{size:>6} {legacy * 1000:>10.1f}ms {band * 1000:>8.1f}ms "
+            f"{legacy / band:>7.0f}x {pipeline * 1000:>12.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,233 +1,272 @@
 """
-Load testing script for AI Recycle-to-Market Generator using Locust.
-Tests all workflow phases under realistic user load.
+Load testing scenarios for AI Recycle-to-Market Generator using Locust.
+
+- WorkflowJourneyUser walks the whole workflow the way the frontend does:
+  start -> stream (options and concepts) -> select-option -> stream (package)
+  -> select-concept -> stream (final package) -> fetch the package. Time spent
+  waiting on each SSE milestone is reported as an "SSE" request, so Locust's
+  percentiles cover end-to-end workflow latency, not just the HTTP calls.
+- SSEHoldingUser opens a workflow stream and keeps it open, to measure how many
+  idle SSE connections a process holds and how promptly keepalives arrive.
+- StressTestUser hammers the cheap endpoints.
+
+Run against a server with GEMINI_BACKEND=offline to benchmark without quota
+(see app/ai_service/offline_gemini.py). run_load_tests.py drives the scenarios
+and diffs the results against load_testing/baselines/.
 """
 import json
+import os
 import random
 import time
-from locust import HttpUser, task, between, events
-from locust.exception import StopUser
-
-
-class RecycleWorkflowUser(HttpUser):
-    """Simulates a user going through the complete recycle workflow."""
-
-    wait_time = between(2, 8)  # Wait 2-8 seconds between tasks
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from locust import HttpUser, between, events, task
+from locust.exception import RescheduleTask
+
+# Longest wait for one workflow milestone before the journey is abandoned
+MILESTONE_TIMEOUT = float(os.getenv("LOAD_TEST_MILESTONE_TIMEOUT", "300"))
+# How long an SSEHoldingUser keeps each stream open
+SSE_HOLD_SECONDS = float(os.getenv("LOAD_TEST_SSE_HOLD_SECONDS", "60"))
+
+USER_INPUTS = [
+    "I have plastic bottles and cardboard boxes to recycle",
+    "Want to make something useful from old containers and paper",
+    "Got aluminum cans and plastic containers for upcycling",
+    "Looking to create storage solutions from waste materials",
+    "Have glass jars and cardboard packaging to repurpose",
+]
+
+CLARIFICATIONS = [
+    "The bottles are 500ml plastic water bottles, clean and empty",
+    "Cardboard boxes are medium-sized shipping boxes in good condition",
+    "Materials are all clean and ready for reuse",
+]
+
+
+class MilestoneError(Exception):
+    """The stream ended, errored or timed out before the expected event."""
+
+
+def iter_sse(response) -> Iterator[Tuple[Optional[str], Optional[Dict[str, Any]]]]:
+    """
+    Parse a streaming SSE response into (event_id, payload) pairs.
+    Keepalive comments are yielded as (None, None) so callers can check deadlines.
+    """
+    event_id, data_lines = None, []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line.startswith(":"):
+            yield None, None
+        elif line.startswith("id:"):
+            event_id = line[3:].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[5:].strip())
+        elif line == "" and data_lines:
+            yield event_id, json.loads("\n".join(data_lines))
+            event_id, data_lines = None, []
+
+
+def fire_sse_metric(name: str, started: float, error: Optional[Exception] = None, length: int = 0):
+    """Report a milestone wait to Locust as an "SSE" request."""
+    events.request.fire(
+        request_type="SSE",
+        name=name,
+        response_time=(time.perf_counter() - started) * 1000,
+        response_length=length,
+        exception=error,
+        context={},
+        url=name,
+        response=None,
+    )
+
+
+class WorkflowJourneyUser(HttpUser):
+    """One complete workflow per task iteration, timed milestone by milestone."""
+
+    wait_time = between(1, 5)
+    weight = 3
 
     def on_start(self):
-        """Initialize user session."""
-        self.thread_id = f"load_test_{int(time.time() * 1000)}_{random.randint(1000, 9999)}"
-        self.user_inputs = [
-            "I have plastic bottles and cardboard boxes to recycle",
-            "Want to make something useful from old containers and paper",
-            "Got aluminum cans and plastic containers for upcycling",
-            "Looking to create storage solutions from waste materials",
-            "Have glass jars and cardboard packaging to repurpose"
-        ]
-        self.current_phase = "starting"
-
-    @task(10)
-    def health_check(self):
-        """Quick health check - most frequent task."""
-        with self.client.get("/health", catch_response=True) as response:
-            if response.status_code != 200:
-                response.failure("Health check failed")
-
-    @task(8)
-    def start_workflow(self):
-        """Start a new workflow - common user action."""
-        if self.current_phase != "starting":
-            return
-
-        user_input = random.choice(self.user_inputs)
-
+        self.thread_id: Optional[str] = None
+        self.cursor = "0"
+
+    def wait_for(self, milestone: str, until: Tuple[str, ...], require: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Read the thread's stream from the last cursor until one of ``until`` arrives
+        (carrying the ``require`` key in its data, when given). Clarification
+        questions are answered on the way, like a user would.
+        """
+        started = time.perf_counter()
+        deadline = time.time() + MILESTONE_TIMEOUT
+        try:
+            while True:
+                with self.client.get(
+                    f"/workflow/stream/{self.thread_id}",
+                    params={"last_event_id": self.cursor},
+                    stream=True,
+                    name="/workflow/stream/{thread_id}",
+                    timeout=(10, MILESTONE_TIMEOUT),
+                ) as response:
+                    for event_id, payload in iter_sse(response):
+                        if time.time() > deadline:
+                            raise MilestoneError(f"{milestone} timed out after {MILESTONE_TIMEOUT:.0f}s")
+                        if payload is None:
+                            continue
+                        if event_id:
+                            self.cursor = event_id
+                        event_type = payload.get("type")
+                        if event_type in ("error", "timeout"):
+                            raise MilestoneError(f"{milestone}: {payload.get('data') or payload.get('message')}")
+                        if event_type == "user_question":
+                            self.client.post(
+                                f"/workflow/resume/{self.thread_id}",
+                                json={"user_input": random.choice(CLARIFICATIONS)},
+                                name="/workflow/resume/{thread_id}",
+                            )
+                        data = payload.get("data") or {}
+                        if event_type in until and (require is None or require in data):
+                            fire_sse_metric(milestone, started, length=len(json.dumps(payload)))
+                            return data
+                # The server closes the stream after workflow_complete; reconnect from the cursor
+                if time.time() > deadline:
+                    raise MilestoneError(f"{milestone} timed out after {MILESTONE_TIMEOUT:.0f}s")
+        except Exception as e:
+            fire_sse_metric(milestone, started, error=e)
+            raise RescheduleTask() from e
+
+    @task
+    def full_workflow(self):
+        journey_started = time.perf_counter()
         with self.client.post(
-            "/api/workflow/start",
-            json={
-                "thread_id": self.thread_id,
-                "user_input": user_input
-            },
+            "/workflow/start",
+            json={"user_input": random.choice(USER_INPUTS)},
             catch_response=True,
-            name="/api/workflow/start"
+            name="/workflow/start",
         ) as response:
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("status") == "waiting_for_input":
-                    self.current_phase = "clarification"
-                elif data.get("status") == "phase_complete":
-                    self.current_phase = "phase2"
-                response.success()
-            else:
+            if response.status_code != 200:
                 response.failure(f"Workflow start failed: {response.status_code}")
+                return
+            self.thread_id = response.json()["thread_id"]
+            self.cursor = "0"
 
-    @task(6)
-    def continue_workflow(self):
-        """Continue workflow with user clarification."""
-        if self.current_phase != "clarification":
-            return
-
-        clarifications = [
-            "The bottles are 500ml plastic water bottles, clean and empty",
-            "Cardboard boxes are medium-sized shipping boxes in good condition",
-            "Containers are various plastic food storage containers",
-            "Materials are all clean and ready for reuse"
-        ]
+        choices = self.wait_for("choices_generated", ("choices_generated",))
+        self.wait_for("concepts_generated", ("concepts_generated",))
+        options = choices.get("viable_options") or []
+        if not options:
+            raise RescheduleTask()
 
-        clarification = random.choice(clarifications)
+        self.client.post(
+            f"/workflow/select-option/{self.thread_id}",
+            json={"option_id": options[0]["option_id"]},
+            name="/workflow/select-option/{thread_id}",
+        )
+        # Skips the completion event of the initial run, which carries no package
+        self.wait_for("option_package", ("workflow_complete",), require="final_package")
 
-        with self.client.post(
-            "/api/workflow/continue",
-            json={
-                "thread_id": self.thread_id,
-                "user_response": clarification
-            },
-            catch_response=True,
-            name="/api/workflow/continue"
-        ) as response:
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("status") == "phase_complete":
-                    self.current_phase = "phase2"
-                elif data.get("status") == "waiting_for_input":
-                    pass  # Still in clarification
-                response.success()
-            else:
-                response.failure(f"Workflow continue failed: {response.status_code}")
-
-    @task(4)
-    def get_workflow_status(self):
-        """Check workflow status."""
-        if self.current_phase == "starting":
-            return
+        self.client.post(
+            f"/workflow/select-concept/{self.thread_id}",
+            json={"concept_id": 0},
+            name="/workflow/select-concept/{thread_id}",
+        )
+        self.wait_for("concept_package", ("workflow_complete",), require="final_package")
 
         with self.client.get(
-            f"/api/workflow/status/{self.thread_id}",
+            f"/api/package/package/{self.thread_id}",
             catch_response=True,
-            name="/api/workflow/status"
+            name="/api/package/package/{thread_id}",
         ) as response:
-            if response.status_code == 200:
-                response.success()
-            else:
-                response.failure(f"Status check failed: {response.status_code}")
-
-    @task(3)
-    def get_project_concepts(self):
-        """Get project concepts (Phase 3)."""
-        if self.current_phase not in ["phase2", "phase3", "complete"]:
-            return
+            if response.status_code != 200:
+                response.failure(f"Package fetch failed: {response.status_code}")
+                return
+        fire_sse_metric("full_workflow", journey_started)
 
-        with self.client.get(
-            f"/api/workflow/concepts/{self.thread_id}",
-            catch_response=True,
-            name="/api/workflow/concepts"
-        ) as response:
-            if response.status_code in [200, 404]:  # 404 is OK if concepts not ready
-                response.success()
-            else:
-                response.failure(f"Concepts fetch failed: {response.status_code}")
-
-    @task(2)
-    def get_project_exports(self):
-        """Get project exports (Phase 4)."""
-        if self.current_phase != "complete":
+    @task
+    def poll_status(self):
+        if not self.thread_id:
             return
+        self.client.get(f"/workflow/status/{self.thread_id}", name="/workflow/status/{thread_id}")
 
-        export_formats = ["json", "html", "pdf_ready"]
-        export_format = random.choice(export_formats)
 
-        with self.client.get(
-            f"/api/workflow/exports/{self.thread_id}",
-            params={"export_format": export_format},
-            catch_response=True,
-            name="/api/workflow/exports"
-        ) as response:
-            if response.status_code in [200, 404]:  # 404 is OK if not ready
-                response.success()
-            else:
-                response.failure(f"Exports fetch failed: {response.status_code}")
-
-    @task(2)
-    def get_project_analytics(self):
-        """Get project analytics (Phase 4)."""
-        if self.current_phase != "complete":
-            return
-
-        with self.client.get(
-            f"/api/workflow/analytics/{self.thread_id}",
-            catch_response=True,
-            name="/api/workflow/analytics"
-        ) as response:
-            if response.status_code in [200, 404]:  # 404 is OK if not ready
-                response.success()
-            else:
-                response.failure(f"Analytics fetch failed: {response.status_code}")
-
-    @task(1)
-    def download_project(self):
-        """Download project file."""
-        if self.current_phase != "complete":
-            return
+class SSEHoldingUser(HttpUser):
+    """Keeps one workflow stream open at a time; reports connect time and keepalive gaps."""
 
-        download_formats = ["json", "html"]
-        download_format = random.choice(download_formats)
+    wait_time = between(0.5, 2)
+    weight = 1
 
-        with self.client.get(
-            f"/api/workflow/download/{self.thread_id}",
-            params={"format": download_format},
-            catch_response=True,
-            name="/api/workflow/download"
-        ) as response:
-            if response.status_code in [200, 404]:  # 404 is OK if not ready
-                response.success()
-            else:
-                response.failure(f"Download failed: {response.status_code}")
+    @task
+    def hold_stream(self):
+        response = self.client.post("/workflow/start", json={"user_input": random.choice(USER_INPUTS)}, name="/workflow/start")
+        if response.status_code != 200:
+            return
+        thread_id = response.json()["thread_id"]
+
+        started = time.perf_counter()
+        opened_at = time.time()
+        try:
+            with self.client.get(
+                f"/workflow/stream/{thread_id}",
+                stream=True,
+                name="/workflow/stream/{thread_id} (hold)",
+                timeout=(10, SSE_HOLD_SECONDS + 30),
+            ) as stream:
+                fire_sse_metric("stream_connected", started)
+                last_frame = time.perf_counter()
+                for _event_id, payload in iter_sse(stream):
+                    now = time.perf_counter()
+                    if payload is None:
+                        fire_sse_metric("keepalive_gap", last_frame)
+                    last_frame = now
+                    if time.time() - opened_at > SSE_HOLD_SECONDS:
+                        break
+        except Exception as e:
+            fire_sse_metric("stream_connected", started, error=e)
 
 
 class StressTestUser(HttpUser):
     """High-intensity user for stress testing."""
 
     wait_time = between(0.5, 2)  # Aggressive timing
+    weight = 1
 
     def on_start(self):
-        self.thread_id = f"stress_{int(time.time() * 1000)}_{random.randint(1000, 9999)}"
+        self.thread_id = None
 
     @task(20)
     def rapid_health_checks(self):
         """Rapid health checks to test system responsiveness."""
         self.client.get("/health")
 
-    @task(10)
+    @task(5)
     def concurrent_workflow_starts(self):
-        """Start multiple workflows rapidly."""
-        user_input = "Stress test workflow with multiple materials"
-
-        self.client.post(
-            "/api/workflow/start",
-            json={
-                "thread_id": self.thread_id,
-                "user_input": user_input
-            }
+        """Start workflows rapidly."""
+        response = self.client.post(
+            "/workflow/start",
+            json={"user_input": "Stress test workflow with multiple materials"},
+            name="/workflow/start",
         )
+        if response.status_code == 200:
+            self.thread_id = response.json()["thread_id"]
 
-    @task(5)
+    @task(10)
     def rapid_status_checks(self):
         """Rapid status checking."""
-        self.client.get(f"/api/workflow/status/{self.thread_id}")
+        if self.thread_id:
+            self.client.get(f"/workflow/status/{self.thread_id}", name="/workflow/status/{thread_id}")
 
 
 # Custom event handlers for detailed reporting
 @events.request.add_listener
 def log_slow_requests(request_type, name, response_time, response_length, **kwargs):
-    """Log requests that take longer than expected."""
-    if response_time > 5000:  # 5 seconds
+    """Log HTTP requests that take longer than expected (SSE milestones are long by design)."""
+    if request_type != "SSE" and response_time > 5000:  # 5 seconds
         print(f"SLOW REQUEST: {request_type} {name} took {response_time:.0f}ms")
 
 
 @events.test_start.add_listener
 def on_test_start(environment, **kwargs):
     """Print test start information."""
-    print(f"🚀 Load test starting with {environment.runner.user_count} users")
-    print(f"🎯 Target host: {environment.host}")
+    print(f"🚀 Load test starting against {environment.host}")
 
 
 @events.test_stop.add_listener
@@ -242,29 +281,11 @@ def on_test_stop(environment, **kwargs):
     print(f"Total requests: {stats.total.num_requests}")
     print(f"Failed requests: {stats.total.num_failures}")
     print(f"Failure rate: {stats.total.fail_ratio:.2%}")
-    print(f"Average response time: {stats.total.avg_response_time:.0f}ms")
-    print(f"95th percentile: {stats.total.get_response_time_percentile(0.95):.0f}ms")
-    print(f"99th percentile: {stats.total.get_response_time_percentile(0.99):.0f}ms")
-    print(f"Max response time: {stats.total.max_response_time:.0f}ms")
-    print(f"RPS: {stats.total.current_rps:.1f}")
-
-    # Check if performance targets are met
-    avg_response_time = stats.total.avg_response_time
-    failure_rate = stats.total.fail_ratio
-
-    print(f"\n🎯 PERFORMANCE TARGETS")
-    print(f"{'='*50}")
-    print(f"Average response time: {avg_response_time:.0f}ms {'✅' if avg_response_time < 2000 else '❌'} (target: <2000ms)")
-    print(f"Failure rate: {failure_rate:.2%} {'✅' if failure_rate < 0.01 else '❌'} (target: <1%)")
-    print(f"95th percentile: {stats.total.get_response_time_percentile(0.95):.0f}ms {'✅' if stats.total.get_response_time_percentile(0.95) < 5000 else '❌'} (target: <5000ms)")
-
-
-# Load test scenarios
-class WorkflowLoadTest(RecycleWorkflowUser):
-    """Standard workflow load testing."""
-    weight = 3
-
-
-class StressTest(StressTestUser):
-    """Stress testing with high request rate."""
-    weight = 1
\ No newline at end of file
+    for name in ("full_workflow", "choices_generated", "concepts_generated"):
+        entry = stats.entries.get((name, "SSE"))
+        if entry and entry.num_requests:
+            print(
+                f"{name}: p50 {entry.get_response_time_percentile(0.5):.0f}ms, "
+                f"p95 {entry.get_response_time_percentile(0.95):.0f}ms, "
+                f"p99 {entry.get_response_time_percentile(0.99):.0f}ms"
+            )
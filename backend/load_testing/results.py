@@ -0,0 +1,255 @@
+"""
+Benchmark results store and baseline comparison.
+
+Every benchmark run (Locust scenario or micro-benchmark suite) is saved as a
+JSON document of per-metric latency percentiles and throughput:
+
+    {"suite": "hot_paths", "created_at": ..., "git_commit": ..., "metadata": {...},
+     "metrics": {"to_jsonable(final_package)": {"p50_ms": ..., "p95_ms": ...,
+                 "p99_ms": ..., "throughput": ..., "count": ...}}}
+
+Runs go to ``load_test_results/`` (not committed); the reference run for each
+suite is committed under ``load_testing/baselines/``. ``compare`` diffs a run
+against its baseline and flags p50/p95/p99 or throughput regressions beyond
+the tolerance, so a slower change is caught before it ships. Runs record the
+machine and Python version; a baseline from a different environment is still
+diffed but its regressions are reported, not enforced.
+
+Usage (from backend/):
+    python load_testing/results.py compare load_test_results/hot_paths_<ts>.json
+    python load_testing/results.py promote load_test_results/hot_paths_<ts>.json
+"""
+import argparse
+import csv
+import json
+import math
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+LOAD_TESTING_DIR = Path(__file__).resolve().parent
+BASELINE_DIR = LOAD_TESTING_DIR / "baselines"
+RESULTS_DIR = LOAD_TESTING_DIR.parent / "load_test_results"
+
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+# Metadata that must match the baseline for timings to be comparable
+ENVIRONMENT_KEYS = ("machine", "python")
+
+# Allowed slowdown before a metric counts as a regression
+DEFAULT_TOLERANCE = 0.15
+# Latency changes smaller than this are timer noise, whatever the ratio
+DEFAULT_MIN_DELTA_MS = 0.05
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of unsorted samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(math.ceil(fraction * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(samples_ms: List[float], elapsed_s: float) -> Dict[str, float]:
+    """Percentiles and throughput for a list of per-call latencies in milliseconds."""
+    return {
+        "p50_ms": percentile(samples_ms, 0.50),
+        "p95_ms": percentile(samples_ms, 0.95),
+        "p99_ms": percentile(samples_ms, 0.99),
+        "throughput": len(samples_ms) / elapsed_s if elapsed_s > 0 else 0.0,
+        "count": len(samples_ms),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=LOAD_TESTING_DIR, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_result(suite: str, metrics: Dict[str, Dict[str, float]], metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {
+        "suite": suite,
+        "created_at": time.time(),
+        "git_commit": _git_commit(),
+        "metadata": {"machine": platform.machine(), "python": platform.python_version(), **(metadata or {})},
+        "metrics": metrics,
+    }
+
+
+def save_result(result: Dict[str, Any], results_dir: Path = RESULTS_DIR) -> Path:
+    results_dir.mkdir(parents=True, exist_ok=True)
+    path = results_dir / f"{result['suite']}_{int(result['created_at'])}.json"
+    path.write_text(json.dumps(result, indent=2, sort_keys=True) + "\n")
+    return path
+
+
+def load_result(path: Path) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text())
+
+
+def baseline_path(suite: str, baseline_dir: Path = BASELINE_DIR) -> Path:
+    return baseline_dir / f"{suite}.json"
+
+
+def load_baseline(suite: str, baseline_dir: Path = BASELINE_DIR) -> Optional[Dict[str, Any]]:
+    path = baseline_path(suite, baseline_dir)
+    return load_result(path) if path.exists() else None
+
+
+def promote_baseline(result: Dict[str, Any], baseline_dir: Path = BASELINE_DIR) -> Path:
+    """Make a run the committed reference for its suite."""
+    baseline_dir.mkdir(parents=True, exist_ok=True)
+    path = baseline_path(result["suite"], baseline_dir)
+    path.write_text(json.dumps(result, indent=2, sort_keys=True) + "\n")
+    return path
+
+
+def metrics_from_locust_csv(stats_csv: Path) -> Dict[str, Dict[str, float]]:
+    """Read Locust's ``<prefix>_stats.csv`` into the results format (one metric per Type+Name row)."""
+    metrics = {}
+    with open(stats_csv, newline="") as handle:
+        for row in csv.DictReader(handle):
+            if not row.get("Name"):
+                continue
+            name = row["Name"] if row["Name"] == "Aggregated" else f"{row['Type']} {row['Name']}"
+            metrics[name] = {
+                "p50_ms": float(row["50%"] or 0),
+                "p95_ms": float(row["95%"] or 0),
+                "p99_ms": float(row["99%"] or 0),
+                "throughput": float(row["Requests/s"] or 0),
+                "count": int(row["Request Count"] or 0),
+                "failures": int(row["Failure Count"] or 0),
+            }
+    return metrics
+
+
+@dataclass
+class MetricDelta:
+    metric: str
+    key: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return (self.current - self.baseline) / self.baseline if self.baseline else 0.0
+
+
+@dataclass
+class Comparison:
+    suite: str
+    deltas: List[MetricDelta] = field(default_factory=list)
+    regressions: List[MetricDelta] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+    new: List[str] = field(default_factory=list)
+    # key -> (baseline, current) for ENVIRONMENT_KEYS that differ
+    environment_mismatch: Dict[str, Tuple[Any, Any]] = field(default_factory=dict)
+
+    @property
+    def passed(self) -> bool:
+        # Timings from another machine or interpreter can't fail the run
+        return not self.regressions or bool(self.environment_mismatch)
+
+    def format_report(self) -> str:
+        lines = [f"Benchmark comparison for '{self.suite}'"]
+        for key, (then, now) in self.environment_mismatch.items():
+            lines.append(f"WARNING: {key} differs from the baseline ({then} -> {now}); regressions are not enforced")
+        lines.append(f"{'metric':<48} {'stat':<10} {'baseline':>10} {'current':>10} {'change':>8}")
+        flagged = {id(delta) for delta in self.regressions}
+        for delta in self.deltas:
+            marker = "  REGRESSION" if id(delta) in flagged else ""
+            lines.append(
+                f"{delta.metric[:48]:<48} {delta.key:<10} {delta.baseline:>10.3f} {delta.current:>10.3f} "
+                f"{delta.change:>+7.1%}{marker}"
+            )
+        for name in self.missing:
+            lines.append(f"{name[:48]:<48} missing from this run")
+        for name in self.new:
+            lines.append(f"{name[:48]:<48} new (no baseline)")
+        if not self.regressions:
+            lines.append("No regressions")
+        elif self.environment_mismatch:
+            lines.append(f"{len(self.regressions)} regression(s), not enforced across environments")
+        else:
+            lines.append(f"{len(self.regressions)} regression(s)")
+        return "\n".join(lines)
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE,
+    min_delta_ms: float = DEFAULT_MIN_DELTA_MS,
+) -> Comparison:
+    """
+    Diff a run against its baseline; slower percentiles or lower throughput beyond
+    tolerance regress. Throughput is held to the same min_delta_ms floor through
+    the per-call time it implies (1000 / throughput).
+    """
+    comparison = Comparison(suite=current["suite"])
+    current_env, baseline_env = current.get("metadata", {}), baseline.get("metadata", {})
+    for key in ENVIRONMENT_KEYS:
+        if key in current_env and key in baseline_env and current_env[key] != baseline_env[key]:
+            comparison.environment_mismatch[key] = (baseline_env[key], current_env[key])
+    current_metrics, baseline_metrics = current["metrics"], baseline["metrics"]
+    comparison.missing = sorted(set(baseline_metrics) - set(current_metrics))
+    comparison.new = sorted(set(current_metrics) - set(baseline_metrics))
+
+    for name in sorted(set(current_metrics) & set(baseline_metrics)):
+        now, then = current_metrics[name], baseline_metrics[name]
+        for key in LATENCY_KEYS:
+            if key not in now or key not in then:
+                continue
+            delta = MetricDelta(name, key, then[key], now[key])
+            comparison.deltas.append(delta)
+            if now[key] > then[key] * (1 + tolerance) and now[key] - then[key] > min_delta_ms:
+                comparison.regressions.append(delta)
+        if "throughput" in now and "throughput" in then:
+            delta = MetricDelta(name, "throughput", then["throughput"], now["throughput"])
+            comparison.deltas.append(delta)
+            if now["throughput"] < then["throughput"] * (1 - tolerance) and (
+                now["throughput"] <= 0 or 1000 / now["throughput"] - 1000 / then["throughput"] > min_delta_ms
+            ):
+                comparison.regressions.append(delta)
+    return comparison
+
+
+def check_against_baseline(result: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE) -> bool:
+    """Print the comparison for a run; True when it has no baseline yet or did not regress."""
+    baseline = load_baseline(result["suite"])
+    if baseline is None:
+        print(f"No baseline for '{result['suite']}' yet; promote a run to create one.")
+        return True
+    comparison = compare(result, baseline, tolerance)
+    print(comparison.format_report())
+    return comparison.passed
+
+
+def main(argv: Optional[Iterable[str]] = None):
+    parser = argparse.ArgumentParser(description="Compare benchmark results against committed baselines")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compare_parser = subparsers.add_parser("compare", help="Diff a saved run against its suite baseline")
+    compare_parser.add_argument("result", type=Path)
+    compare_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    promote_parser = subparsers.add_parser("promote", help="Commit a saved run as its suite baseline")
+    promote_parser.add_argument("result", type=Path)
+    args = parser.parse_args(argv)
+
+    result = load_result(args.result)
+    if args.command == "promote":
+        print(f"Baseline written to {promote_baseline(result)}")
+        return
+    sys.exit(0 if check_against_baseline(result, args.tolerance) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,10 @@
 """
 Load testing runner for AI Recycle-to-Market Generator.
 Orchestrates different load testing scenarios and generates reports.
+
+Each scenario's Locust stats are saved in the benchmark results format and
+diffed against load_testing/baselines/<scenario>.json (see results.py); the
+run fails when p50/p95/p99 or throughput regress beyond the tolerance.
 """
 import subprocess
 import sys
@@ -11,13 +15,36 @@ import argparse
 from pathlib import Path
 from typing import Dict, Any
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from load_testing.results import (  # noqa: E402
+    RESULTS_DIR,
+    check_against_baseline,
+    make_result,
+    metrics_from_locust_csv,
+    promote_baseline,
+    save_result,
+)
+
+# Locust user classes per scenario (see locustfile.py)
+SCENARIO_USERS = {
+    "baseline": ["WorkflowJourneyUser"],
+    "normal": ["WorkflowJourneyUser", "SSEHoldingUser"],
+    "peak": ["WorkflowJourneyUser", "SSEHoldingUser", "StressTestUser"],
+    "stress": ["StressTestUser"],
+    "sse": ["SSEHoldingUser"],
+    "endurance": ["WorkflowJourneyUser", "SSEHoldingUser"],
+}
+
 
 class LoadTestRunner:
     """Manages load testing scenarios and reporting."""
 
-    def __init__(self, host: str = "http://localhost:8000"):
+    def __init__(self, host: str = "http://localhost:8000", tolerance: float = 0.15, update_baseline: bool = False):
         self.host = host
-        self.results_dir = Path("load_test_results")
+        self.tolerance = tolerance
+        self.update_baseline = update_baseline
+        self.results_dir = RESULTS_DIR
         self.results_dir.mkdir(exist_ok=True)
 
     def run_scenario(self, scenario: str, users: int, duration: int) -> Dict[str, Any]:
@@ -28,7 +55,6 @@ class LoadTestRunner:
         print(f"   Target: {self.host}")
 
         timestamp = int(time.time())
-        stats_file = self.results_dir / f"{scenario}_{timestamp}_stats.json"
 
         # Build locust command
         cmd = [
@@ -36,27 +62,27 @@ class LoadTestRunner:
             "-f", "locustfile.py",
             "--host", self.host,
             "--users", str(users),
-            "--spawn-rate", str(min(users // 10, 10)),  # Gradual ramp-up
+            "--spawn-rate", str(max(min(users // 10, 10), 1)),  # Gradual ramp-up
             "--run-time", f"{duration}s",
             "--headless",
             "--csv", str(self.results_dir / f"{scenario}_{timestamp}"),
-            "--html", str(self.results_dir / f"{scenario}_{timestamp}_report.html")
+            "--html", str(self.results_dir / f"{scenario}_{timestamp}_report.html"),
+            *SCENARIO_USERS[scenario],
         ]
 
-        if scenario == "stress":
-            cmd.extend(["--tags", "stress"])
-
         try:
             print(f"🔄 Executing: {' '.join(cmd)}")
             result = subprocess.run(cmd, capture_output=True, text=True, cwd=Path(__file__).parent)
 
             if result.returncode == 0:
                 print(f"✅ {scenario} scenario completed successfully")
+                within_baseline = self.record_results(scenario, users, duration, timestamp)
                 return {
                     "scenario": scenario,
                     "users": users,
                     "duration": duration,
-                    "success": True,
+                    "success": within_baseline,
+                    "regressed": not within_baseline,
                     "stdout": result.stdout,
                     "stderr": result.stderr
                 }
@@ -80,6 +106,23 @@ class LoadTestRunner:
                 "error": str(e)
             }
 
+    def record_results(self, scenario: str, users: int, duration: int, timestamp: int) -> bool:
+        """Save the scenario's Locust stats as a benchmark result and diff it against the baseline."""
+        stats_csv = self.results_dir / f"{scenario}_{timestamp}_stats.csv"
+        if not stats_csv.exists():
+            print(f"⚠️ No Locust stats at {stats_csv}; skipping baseline comparison")
+            return True
+        result = make_result(scenario, metrics_from_locust_csv(stats_csv), {
+            "host": self.host,
+            "users": users,
+            "duration": duration,
+        })
+        print(f"📄 Results saved to {save_result(result, self.results_dir)}")
+        if self.update_baseline:
+            print(f"📌 Baseline written to {promote_baseline(result)}")
+            return True
+        return check_against_baseline(result, self.tolerance)
+
     def run_baseline_test(self) -> Dict[str, Any]:
         """Run baseline performance test with minimal load."""
         print("\n🧪 Running baseline performance test...")
@@ -120,11 +163,8 @@ class LoadTestRunner:
 
             # Check if we can start a test workflow
             test_response = requests.post(
-                f"{self.host}/api/workflow/start",
-                json={
-                    "thread_id": "health_check_test",
-                    "user_input": "Test materials for load testing"
-                },
+                f"{self.host}/workflow/start",
+                json={"user_input": "Test materials for load testing"},
                 timeout=30
             )
 
@@ -237,22 +277,24 @@ def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(description="Load testing for AI Recycle Generator")
     parser.add_argument("--host", default="http://localhost:8000", help="Target host")
-    parser.add_argument("--scenario", choices=["baseline", "normal", "peak", "stress", "endurance", "all"],
+    parser.add_argument("--scenario", choices=[*SCENARIO_USERS, "all"],
                        default="all", help="Test scenario to run")
     parser.add_argument("--users", type=int, help="Number of users (overrides scenario default)")
     parser.add_argument("--duration", type=int, help="Test duration in seconds (overrides scenario default)")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown vs. baseline before failing")
+    parser.add_argument("--update-baseline", action="store_true", help="Record this run as the committed baseline")
 
     args = parser.parse_args()
 
-    runner = LoadTestRunner(host=args.host)
+    runner = LoadTestRunner(host=args.host, tolerance=args.tolerance, update_baseline=args.update_baseline)
 
     if args.scenario == "all":
         success = runner.run_all_tests()
         sys.exit(0 if success else 1)
     else:
         # Run single scenario
-        users = args.users or {"baseline": 1, "normal": 10, "peak": 50, "stress": 100, "endurance": 20}[args.scenario]
-        duration = args.duration or {"baseline": 60, "normal": 300, "peak": 300, "stress": 180, "endurance": 1800}[args.scenario]
+        users = args.users or {"baseline": 1, "normal": 10, "peak": 50, "stress": 100, "sse": 200, "endurance": 20}[args.scenario]
+        duration = args.duration or {"baseline": 60, "normal": 300, "peak": 300, "stress": 180, "sse": 180, "endurance": 1800}[args.scenario]
 
         if runner.check_system_readiness():
             result = runner.run_scenario(args.scenario, users, duration)
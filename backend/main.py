@@ -12,8 +12,19 @@ from app.endpoints.storyboard import router as storyboard_router
 from app.endpoints.images import router as images_router
 from app.endpoints.step_images import router as step_images_router
 from app.endpoints.package import router as package_router
+from app.core.config import settings
+from app.core.redis import async_redis_service
+from app.core.serialization import FastJSONResponse
+from app.workflows.worker import WorkflowWorker
+import asyncio
 import logging
 
+try:
+    from app.core.metrics import MetricsMiddleware, metrics_endpoint
+    METRICS_AVAILABLE = True
+except ImportError:
+    METRICS_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -23,7 +34,8 @@ logging.basicConfig(
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="FastAPI Application")
+# Responses render with orjson (see app.core.serialization)
+app = FastAPI(title="FastAPI Application", default_response_class=FastJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -34,6 +46,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Prometheus: request metrics labelled by route template, scraped from /metrics
+if METRICS_AVAILABLE:
+    app.add_middleware(MetricsMiddleware)
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
+
 # Include domain routers
 app.include_router(example_router)
 app.include_router(redis_router)
@@ -51,6 +68,27 @@ app.include_router(package_router, prefix="/api/package", tags=["package"])
 async def root():
     return {"message": "Welcome to FastAPI"}
 
+# Workflow jobs run here only when no separate worker deployment is used
+embedded_worker: WorkflowWorker | None = None
+embedded_worker_task: asyncio.Task | None = None
+
+@app.on_event("startup")
+async def start_embedded_worker():
+    global embedded_worker, embedded_worker_task
+    if settings.WORKFLOW_EMBEDDED_WORKER:
+        embedded_worker = WorkflowWorker()
+        embedded_worker_task = asyncio.create_task(embedded_worker.run())
+
+@app.on_event("shutdown")
+async def stop_embedded_worker():
+    if embedded_worker is not None:
+        embedded_worker.stop()
+        await embedded_worker_task
+
+@app.on_event("shutdown")
+async def close_redis_pool():
+    await async_redis_service.close()
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
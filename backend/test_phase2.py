@@ -4,13 +4,12 @@ Test script for Phase 2: Goal Formation & Choice Generation.
 Validates the complete Phase 1 → Phase 2 workflow integration.
 """
 import asyncio
-import json
 import time
 from app.workflows.graph import workflow_orchestrator
 from app.workflows.state import WorkflowState, IngredientsData, IngredientItem
 from app.workflows.phase2_nodes import goal_formation_node, choice_proposer_node, evaluation_node
 from app.knowledge.material_affordances import material_kb, MaterialType
-from app.core.redis import redis_service
+from app.core.thread_store import Artifact, ThreadArtifacts
 
 
 async def test_phase2_workflow():
@@ -102,16 +101,14 @@ async def test_phase2_workflow():
         print("💾 Testing Redis data persistence...")
 
         # Check goal data
-        goal_key = f"goals:{thread_id}"
-        goal_data = redis_service.get(goal_key)
+        goal_data = await ThreadArtifacts(thread_id).get(Artifact.GOALS)
         if goal_data:
             print("✅ Goal data persisted successfully")
         else:
             print("❌ Goal data not found in Redis")
 
         # Check choices data
-        choices_key = f"choices:{thread_id}"
-        choices_data = redis_service.get(choices_key)
+        choices_data = await ThreadArtifacts(thread_id).get(Artifact.CHOICES)
         if choices_data:
             print("✅ Choices data persisted successfully")
         else:
@@ -215,16 +212,13 @@ async def test_full_phase2_integration():
             print("✅ Successfully completed Phase 1 → Phase 2 transition!")
 
             # Check what was generated
-            choices_key = f"choices:{thread_id}"
-            choices_data = redis_service.get(choices_key)
-            if choices_data:
-                choices = json.loads(choices_data)
+            artifacts = await ThreadArtifacts(thread_id).get_many(Artifact.CHOICES, Artifact.EVALUATION)
+            choices = artifacts[Artifact.CHOICES]
+            if choices:
                 print(f"🎨 Generated {len(choices.get('viable_options', []))} project options")
 
-            eval_key = f"evaluation:{thread_id}"
-            eval_data = redis_service.get(eval_key)
-            if eval_data:
-                evaluation = json.loads(eval_data)
+            evaluation = artifacts[Artifact.EVALUATION]
+            if evaluation:
                 print(f"📊 Evaluated with safety assessment: {evaluation.get('safety_assessment', {}).get('has_safety_concerns', 'unknown')}")
 
             return True
@@ -241,15 +235,7 @@ async def test_full_phase2_integration():
     finally:
         # Cleanup test data
         print("\n🧹 Cleaning up test data...")
-        cleanup_keys = [
-            f"ingredients:{thread_id}",
-            f"goals:{thread_id}",
-            f"choices:{thread_id}",
-            f"evaluation:{thread_id}",
-            f"workflow_state:{thread_id}"
-        ]
-        for key in cleanup_keys:
-            redis_service.delete(key)
+        await ThreadArtifacts(thread_id).clear()
 
 
 async def main():
@@ -403,7 +403,7 @@ async def test_phase3_integration():
         cleanup_keys = [
             f"concepts:{thread_id}",
             f"project_preview:{thread_id}",
-            f"workflow_state:{thread_id}"
+            f"thread:{thread_id}"
         ]
         for key in cleanup_keys:
             redis_service.delete(key)
@@ -446,7 +446,7 @@ async def test_phase4_integration():
             f"exports:{thread_id}",
             f"analytics:{thread_id}",
             f"sharing:{thread_id}",
-            f"workflow_state:{thread_id}"
+            f"thread:{thread_id}"
         ]
         for key in cleanup_keys:
             redis_service.delete(key)
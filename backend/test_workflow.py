@@ -4,11 +4,11 @@ Test script for the AI Recycle-to-Market Generator workflow system.
 Validates the progressive ingredient discovery implementation.
 """
 import asyncio
-import json
 import time
 from app.workflows.graph import workflow_orchestrator
 from app.workflows.state import WorkflowState, IngredientsData
 from app.core.redis import redis_service
+from app.core.thread_store import Artifact, ThreadArtifacts
 
 
 async def test_progressive_ingredient_discovery():
@@ -59,11 +59,9 @@ async def test_progressive_ingredient_discovery():
 
         # Check ingredients in Redis
         print("🥫 Checking ingredients in Redis...")
-        ingredient_key = f"ingredients:{thread_id}"
-        ingredient_data = redis_service.get(ingredient_key)
+        ingredients = await ThreadArtifacts(thread_id).get(Artifact.INGREDIENTS)
 
-        if ingredient_data:
-            ingredients = json.loads(ingredient_data)
+        if ingredients:
             print(f"✅ Found {len(ingredients.get('ingredients', []))} ingredients:")
             for i, ingredient in enumerate(ingredients.get('ingredients', []), 1):
                 print(f"   {i}. {ingredient.get('name', 'Unknown')} - {ingredient.get('material', 'Unknown')} - {ingredient.get('size', 'Unknown')}")
@@ -22,12 +22,15 @@ export async function GET(
 ) {
   const { imageId } = await params;
   const backendUrl = process.env.NEXT_PUBLIC_BACKEND_URL || 'http://localhost:8000';
+  // Forward resize parameters (?w=, ?h=, ?q=); each size is cached separately
+  const search = request.nextUrl.search;
+  const cacheKey = `${imageId}${search}`;
 
   try {
     // Check in-memory cache first
-    const cached = imageCache.get(imageId);
+    const cached = imageCache.get(cacheKey);
     if (cached && (Date.now() - cached.timestamp) < CACHE_TTL) {
-      console.log(`[IMAGE CACHE] HIT: ${imageId}`);
+      console.log(`[IMAGE CACHE] HIT: ${cacheKey}`);
       return new NextResponse(cached.data, {
         headers: {
           'Content-Type': cached.contentType,
@@ -38,8 +41,8 @@ export async function GET(
     }
 
     // Fetch from backend
-    console.log(`[IMAGE CACHE] MISS: ${imageId} - Fetching from backend`);
-    const response = await fetch(`${backendUrl}/images/${imageId}`, {
+    console.log(`[IMAGE CACHE] MISS: ${cacheKey} - Fetching from backend`);
+    const response = await fetch(`${backendUrl}/images/${imageId}${search}`, {
       // Enable Next.js fetch cache
       next: { revalidate: 3600 }, // Cache for 1 hour
     });
@@ -57,14 +60,14 @@ export async function GET(
     const buffer = Buffer.from(arrayBuffer);
 
     // Store in cache
-    imageCache.set(imageId, {
+    imageCache.set(cacheKey, {
       data: buffer,
       contentType,
       timestamp: Date.now(),
     });
     cleanCache();
 
-    console.log(`[IMAGE CACHE] Cached ${imageId} (${buffer.length} bytes)`);
+    console.log(`[IMAGE CACHE] Cached ${cacheKey} (${buffer.length} bytes)`);
 
     return new NextResponse(buffer, {
       headers: {
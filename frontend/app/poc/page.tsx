@@ -29,6 +29,7 @@ interface WorkflowConcept {
   concept_id: string;
   title: string;
   image_url: string;
+  thumbnail_url?: string;
   description?: string;
   style?: string;
 }
@@ -994,7 +995,7 @@ export default function Home() {
                                 {concept.image_url && (
                                   <div className="w-full aspect-square bg-[#232937] overflow-hidden relative">
                                     <img
-                                      src={concept.image_url}
+                                      src={concept.thumbnail_url || concept.image_url}
                                       alt={concept.title}
                                       className="w-full h-full object-contain"
                                     />
@@ -12,8 +12,10 @@ const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || 'http://localhost:800
  * - In-memory caching in the API route
  * - Browser caching with immutable headers
  * 
- * @param imageUrl - Backend image URL (e.g., "http://localhost:8000/images/hero_...")
- * @returns Proxied URL (e.g., "/api/images/hero_...")
+ * Resize parameters (?w=, ?h=, ?q=) are preserved so thumbnails stay small.
+ *
+ * @param imageUrl - Backend image URL (e.g., "http://localhost:8000/images/hero_...?w=512")
+ * @returns Proxied URL (e.g., "/api/images/hero_...?w=512")
  */
 export function getProxiedImageUrl(imageUrl: string): string {
   if (!imageUrl || imageUrl === 'undefined') return '';
@@ -25,10 +27,11 @@ export function getProxiedImageUrl(imageUrl: string): string {
   
   // Extract image ID from backend URL
   // Format: http://localhost:8000/images/{imageId}
-  const match = imageUrl.match(/\/images\/([^?]+)/);
+  const match = imageUrl.match(/\/images\/([^?]+)(\?.*)?$/);
   if (match) {
     const imageId = match[1];
-    return `/api/images/${imageId}`;
+    const query = match[2] || '';
+    return `/api/images/${imageId}${query}`;
   }
   
   // Fallback: return original URL
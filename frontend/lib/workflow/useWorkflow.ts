@@ -22,6 +22,7 @@ interface WorkflowConcept {
   concept_id: string;
   title: string;
   image_url: string;
+  thumbnail_url?: string;
   description?: string;
   style?: string;
 }
@@ -194,12 +195,31 @@ export function useWorkflow({
             }));
             break;
 
+          case 'choice_option':
+            // PROGRESSIVE UPDATE: one project option streamed before the full list
+            const streamedIndex = data.data.index ?? 0;
+            const streamedOption = data.data.option;
+            if (!streamedOption) break;
+            setState(prev => {
+              const updatedOptions = [...prev.projectOptions];
+              updatedOptions[streamedIndex] = streamedOption;
+              return {
+                ...prev,
+                projectOptions: updatedOptions.filter(Boolean),
+                phase: 'choice_selection',
+                isLoading: true, // Keep loading until the full list arrives
+                loadingMessage: `💡 Generated ${updatedOptions.filter(Boolean).length} project ideas...`,
+              };
+            });
+            break;
+
           case 'concept_progress':
             // PROGRESSIVE UPDATE: Single concept with image just completed!
             const progressConcept = {
               concept_id: data.data.concept_id || `concept_${Date.now()}`,
               title: data.data.title || 'Concept',
               image_url: getProxiedImageUrl(data.data.image_url || data.data.url || ''),
+              thumbnail_url: getProxiedImageUrl(data.data.thumbnail_url || ''),
               description: data.data.description,
               style: data.data.style,
             };
@@ -234,6 +254,7 @@ export function useWorkflow({
               concept_id: c.concept_id || `concept_${idx}`,
               title: c.title || c.style || `Concept ${idx + 1}`,
               image_url: getProxiedImageUrl(c.image_url || c.url || ''),
+              thumbnail_url: getProxiedImageUrl(c.thumbnail_url || ''),
               description: c.description,
               style: c.style,
             }));